@@ -22,7 +22,11 @@ from qtpy.QtWidgets import (
     QWidget,
 )
 
-from napari_chatgpt.llm.litemind_api import get_model_list
+from napari_chatgpt.llm.litemind_api import (
+    get_cached_model_list,
+    get_model_list,
+    refresh_model_list,
+)
 from napari_chatgpt.microplugin.microplugin_window import MicroPluginMainWindow
 from napari_chatgpt.utils.configuration.app_configuration import AppConfiguration
 from napari_chatgpt.utils.qt.one_time_disclaimer_dialog import (
@@ -84,6 +88,9 @@ class OmegaQWidget(QWidget):
         # MicroPlugin code editor window (may be None if add_code_editor=False):
         self.micro_plugin_main_window: "MicroPluginMainWindow | None" = None
 
+        # Background refresh of the model list, if any:
+        self._model_list_worker = None
+
         # Create a QVBoxLayout instance
         self.main_layout = QVBoxLayout()
 
@@ -92,6 +99,9 @@ class OmegaQWidget(QWidget):
 
         with asection("Setting up OmegaQWidget UI:"):
 
+            # List of models, from the disk cache if possible:
+            self._model_list = self._load_model_list()
+
             # Add elements to UI:
             self._main_model_selection()
             self._tool_model_selection()
@@ -148,14 +158,7 @@ class OmegaQWidget(QWidget):
         )
 
         # Add All litemind API models to the combo box:
-        model_list: list[str] = list(get_model_list())
-
-        # Filter and sort the models to have preferred models first:
-        self._preferred_models(model_list)
-
-        # Add models to combo box:
-        for model in model_list:
-            self.main_model_combo_box.addItem(model)
+        self._fill_model_combo_box(self.main_model_combo_box, self._model_list)
 
         # Add the combo box to the layout
         self.main_layout.addWidget(self.main_model_combo_box)
@@ -176,17 +179,70 @@ class OmegaQWidget(QWidget):
         )
 
         # Add All litemind API models to the combo box:
-        model_list: list[str] = list(get_model_list())
+        self._fill_model_combo_box(self.tool_model_combo_box, self._model_list)
+
+        # Add the combo box to the layout
+        self.main_layout.addWidget(self.tool_model_combo_box)
+
+    def _load_model_list(self) -> list[str]:
+        """Return the list of models, without contacting providers if possible.
 
+        A list saved on disk for the current API keys is used right away;
+        if it is older than its time-to-live, the list is refreshed in the
+        background and the combo boxes are updated once it is done. The
+        providers are only contacted before the widget appears when no
+        list was saved yet.
+
+        Returns:
+            Model name strings.
+        """
+        cached = get_cached_model_list()
+        if cached is None:
+            aprint("No saved model list, listing models from the providers.")
+            return list(get_model_list())
+
+        model_list, is_fresh = cached
+        if not is_fresh:
+            aprint("Saved model list is stale, refreshing it in the background.")
+            self._refresh_model_list_in_background()
+        return model_list
+
+    def _refresh_model_list_in_background(self):
+        """List the models in a worker thread, then update the combo boxes."""
+        from napari.qt.threading import create_worker
+
+        self._model_list_worker = create_worker(refresh_model_list)
+        self._model_list_worker.returned.connect(self._on_model_list_refreshed)
+        self._model_list_worker.errored.connect(
+            lambda e: aprint(f"Could not refresh the model list: {e}")
+        )
+        self._model_list_worker.start()
+
+    def _on_model_list_refreshed(self, model_list: list[str]):
+        """Update the combo boxes with a refreshed model list (Qt thread)."""
+        self._model_list_worker = None
+        self._model_list = list(model_list)
+        self._fill_model_combo_box(self.main_model_combo_box, self._model_list)
+        self._fill_model_combo_box(self.tool_model_combo_box, self._model_list)
+
+    def _fill_model_combo_box(self, combo_box: QComboBox, model_list: list[str]):
+        """Fill a combo box with the preferred models first, keeping its selection.
+
+        Args:
+            combo_box: The model combo box.
+            model_list: Model name strings, not modified.
+        """
         # Filter and sort the models to have preferred models first:
+        model_list = list(model_list)
         self._preferred_models(model_list)
 
-        # Add models to combo box:
+        # Replace the models, the selected one stays selected if still listed:
+        selected_model = combo_box.currentText()
+        combo_box.clear()
         for model in model_list:
-            self.tool_model_combo_box.addItem(model)
-
-        # Add the combo box to the layout
-        self.main_layout.addWidget(self.tool_model_combo_box)
+            combo_box.addItem(model)
+        if selected_model in model_list:
+            combo_box.setCurrentText(selected_model)
 
     @staticmethod
     def _preferred_models(model_list: list[str]):
@@ -0,0 +1,90 @@
+"""Bounded executor running the agent turns of all chat sessions.
+
+Each agent turn blocks a thread for as long as the LLM and the tools
+take, so turns are run on a dedicated pool rather than on asyncio's
+default executor, which is shared with everything else in the process.
+At most ``max_workers`` turns run at the same time, at most
+``max_queued`` more wait for a free worker, and further turns are
+rejected right away so that the user can be told the server is busy
+instead of waiting for an unbounded amount of time.
+"""
+
+import asyncio
+import contextvars
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+
+class AgentExecutorBusyError(RuntimeError):
+    """Raised when a turn is submitted while the executor's queue is full."""
+
+
+class AgentExecutor:
+    """Thread pool with a bounded queue for running agent turns."""
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 4):
+        """Create the executor; threads are started on demand.
+
+        Args:
+            max_workers: Maximum number of turns running at the same time.
+            max_queued: Maximum number of turns waiting for a worker.
+        """
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="omega_agent"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of turns running or waiting for a worker."""
+        with self._lock:
+            return self._pending
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        """Run ``function(*args)`` on the pool and await its result.
+
+        Args:
+            function: Blocking callable, e.g. an agent.
+            *args: Arguments passed to *function*.
+
+        Returns:
+            The value returned by *function*.
+
+        Raises:
+            AgentExecutorBusyError: If the maximum number of running and
+                queued turns is reached.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queued:
+                raise AgentExecutorBusyError(
+                    f"{self._pending} requests are already running or waiting."
+                )
+            self._pending += 1
+
+        try:
+            # Run in a copy of the caller's context, e.g. its current span:
+            context = contextvars.copy_context()
+            future = self._pool.submit(context.run, function, *args)
+        except RuntimeError:
+            self._release()
+            raise
+        # Turns count until they actually end, even if nobody awaits them:
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self, wait: bool = False):
+        """Stop the pool, cancelling the turns still waiting for a worker.
+
+        Args:
+            wait: If ``True``, block until running turns have finished.
+        """
+        self._pool.shutdown(wait=wait, cancel_futures=True)
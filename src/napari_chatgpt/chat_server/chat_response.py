@@ -12,8 +12,9 @@ class ChatResponse:
         message: The text content of the message.
         type: Message type controlling UI behavior. Values include
             ``"start"``, ``"thinking"``, ``"tool_start"``,
-            ``"tool_activity"``, ``"tool_result"``, ``"final"``,
-            and ``"error"``.
+            ``"tool_activity"``, ``"tool_result"``, ``"delta"`` (a
+            fragment of the reply being generated), ``"final"``, and
+            ``"error"``.
         tokens: Number of tokens used for this individual response.
         total_tokens: Cumulative token count for the entire session.
     """
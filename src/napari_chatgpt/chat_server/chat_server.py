@@ -5,7 +5,10 @@ chat UI over WebSocket. User messages are routed to the Omega agent, which
 can inspect and manipulate the napari viewer through the
 :class:`~napari_chatgpt.omega_agent.napari_bridge.NapariBridge`.  Tool
 activity, errors, and final responses are streamed back to the browser in
-real time.
+real time. Each WebSocket gets its own
+:class:`~napari_chatgpt.chat_server.chat_session.ChatSession`, and the
+agent turns of all sessions run on a bounded
+:class:`~napari_chatgpt.chat_server.agent_executor.AgentExecutor`.
 """
 
 import asyncio
@@ -20,6 +23,7 @@ from typing import Any
 import napari
 from arbol import aprint, asection
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from litemind.agent.messages.message import Message
 from litemind.agent.tools.base_tool import BaseTool
@@ -28,10 +32,19 @@ from qtpy.QtCore import QTimer
 from starlette.staticfiles import StaticFiles
 from uvicorn import Config, Server
 
+from napari_chatgpt.chat_server.agent_executor import (
+    AgentExecutor,
+    AgentExecutorBusyError,
+)
 from napari_chatgpt.chat_server.chat_response import ChatResponse
-from napari_chatgpt.llm.token_counter_callback import TokenCounterCallback
-from napari_chatgpt.omega_agent.napari_bridge import NapariBridge, _set_viewer_info
-from napari_chatgpt.omega_agent.omega_init import initialize_omega_agent
+from napari_chatgpt.chat_server.chat_session import ChatSession
+from napari_chatgpt.llm.llm_metrics import get_llm_metrics
+from napari_chatgpt.omega_agent.napari_bridge import (
+    NapariBridge,
+    _set_viewer_info,
+    napari_lane,
+)
+from napari_chatgpt.omega_agent.omega_init import OmegaSessionFactory
 from napari_chatgpt.omega_agent.tools.omega_tool_callbacks import OmegaToolCallbacks
 from napari_chatgpt.utils.configuration.app_configuration import AppConfiguration
 from napari_chatgpt.utils.network.port_available import find_first_port_available
@@ -39,6 +52,7 @@ from napari_chatgpt.utils.notebook.jupyter_notebook import JupyterNotebookFile
 from napari_chatgpt.utils.strings.camel_case_to_normal import (
     camel_case_to_lower_case_with_space,
 )
+from napari_chatgpt.utils.system.tracing import span
 
 
 class NapariChatServer:
@@ -95,13 +109,29 @@ class NapariChatServer:
         # Napari bridge:
         self.napari_bridge: NapariBridge = napari_bridge
 
-        # UV event loop:
-        self.event_loop = None
+        # Factory of the per-session agents, sharing the expensive parts:
+        self.session_factory = OmegaSessionFactory(
+            to_napari_queue=napari_bridge.to_napari_queue,
+            from_napari_queue=napari_bridge.from_napari_queue,
+            main_llm_model_name=main_llm_model_name,
+            tool_llm_model_name=tool_llm_model_name,
+            temperature=temperature,
+            tool_temperature=tool_temperature,
+            has_builtin_websearch_tool=has_builtin_websearch_tool,
+            notebook=self.notebook,
+            agent_personality=agent_personality,
+            be_didactic=be_didactic,
+            verbose=verbose,
+        )
 
         # Define lifespan context manager for FastAPI:
         @asynccontextmanager
         async def lifespan(app: FastAPI):
-            # Startup: nothing needed currently
+            # Startup: prepare the shared session resources in the background,
+            # so that the first connection does not have to wait for them:
+            asyncio.get_running_loop().run_in_executor(
+                None, self._warm_up_session_factory
+            )
             yield
             # Shutdown: nothing needed currently (handled by stop() method)
 
@@ -118,6 +148,19 @@ class NapariChatServer:
         self.port = find_first_port_available(default_port, default_port + 1000)
         aprint(f"Using port: {self.port}")
 
+        # Stream the agent's replies to the web UI as they are generated:
+        self.stream_responses = config.get("stream_responses", True)
+
+        # Open chat sessions, by session id:
+        self.sessions: dict[str, ChatSession] = {}
+        self.max_sessions = config.get("max_chat_sessions", 8)
+
+        # Dedicated, bounded executor for the agent turns of all sessions:
+        self.agent_executor = AgentExecutor(
+            max_workers=config.get("agent_workers", 2),
+            max_queued=config.get("agent_max_queued_requests", 4),
+        )
+
         # Mount static files:
         static_files_path = os.path.join(
             os.path.dirname(os.path.abspath(__file__)), "static"
@@ -141,110 +184,148 @@ class NapariChatServer:
                 "index.html", {"request": request, "port": self.port}
             )
 
+        # Token and latency metrics of the LLM calls, in Prometheus' text
+        # format, or as JSON with the most recent calls (?format=json):
+        @self.app.get("/metrics")
+        async def metrics(format: str = "prometheus"):
+            llm_metrics = get_llm_metrics()
+            if format == "json":
+                return JSONResponse(llm_metrics.snapshot())
+            return PlainTextResponse(
+                llm_metrics.to_prometheus(), media_type="text/plain; version=0.0.4"
+            )
+
         # Chat path:
         @self.app.websocket("/chat")
         async def websocket_endpoint(websocket: WebSocket):
             await websocket.accept()
 
-            # Get the event event_loop:
-            self.event_loop = asyncio.get_event_loop()
-
-            # restart a notebook:
-            if self.notebook:
-                self.notebook.restart()
-
-            # Token counter callback:
-            token_counter = TokenCounterCallback()
-
-            # Register token counter on the LiteMind API:
+            # Admission control, each session holds an agent and its memory:
+            if len(self.sessions) >= self.max_sessions:
+                aprint(f"Rejecting chat session, {len(self.sessions)} already open.")
+                resp = ChatResponse(
+                    sender="agent",
+                    message=f"Sorry, too many chat sessions are open ({len(self.sessions)}). Please close another tab and reload this page.",
+                    type="error",
+                )
+                await websocket.send_json(resp.dict())
+                await websocket.close()
+                return
+
+            # Per-session state (event loop, token counter, streaming):
+            session = ChatSession(websocket, stream_responses=self.stream_responses)
+            self.sessions[session.session_id] = session
+            aprint(f"Opened chat {session.session_id}.")
+
+            # Start a new notebook, unless other sessions are writing to it.
+            # Restarting writes the previous notebook once its pending
+            # snapshots are taken, so it must not block the event loop:
+            if self.notebook and len(self.sessions) == 1:
+                await asyncio.to_thread(self.notebook.restart)
+
+            # Register the session's callbacks on the LiteMind API:
             from napari_chatgpt.llm.litemind_api import get_litemind_api
 
             api = get_litemind_api()
-            api.callback_manager.add_callback(token_counter)
+            session.open(api)
 
             # Tool's callbacks:
             tool_callbacks = OmegaToolCallbacks(
                 _on_tool_start=(
-                    lambda t, q: notify_user_omega_tool_start(websocket, t, q)
+                    lambda t, q: notify_user_omega_tool_start(session, t, q)
                 ),
                 _on_tool_activity=(
-                    lambda t, at, c: notify_user_omega_tool_activity(
-                        websocket, t, at, c
-                    )
+                    lambda t, at, c: notify_user_omega_tool_activity(session, t, at, c)
                 ),
-                _on_tool_end=(lambda t, r: notify_user_omega_tool_end(websocket, t, r)),
-                _on_tool_error=(lambda t, e: notify_user_omega_error(websocket, e)),
-            )
-
-            # Agent
-            agent = initialize_omega_agent(
-                to_napari_queue=napari_bridge.to_napari_queue,
-                from_napari_queue=napari_bridge.from_napari_queue,
-                main_llm_model_name=main_llm_model_name,
-                tool_llm_model_name=tool_llm_model_name,
-                temperature=temperature,
-                tool_temperature=tool_temperature,
-                has_builtin_websearch_tool=has_builtin_websearch_tool,
-                notebook=self.notebook,
-                agent_personality=agent_personality,
-                be_didactic=be_didactic,
-                tool_callbacks=tool_callbacks,
-                verbose=verbose,
+                _on_tool_end=(lambda t, r: notify_user_omega_tool_end(session, t, r)),
+                _on_tool_error=(lambda t, e: notify_user_omega_error(session, e)),
             )
 
             dialog_counter = 0
 
             # Dialog Loop:
             try:
+                # Agent (blocks until the shared resources are prepared):
+                session.agent = await asyncio.to_thread(
+                    self.session_factory.create_agent, tool_callbacks
+                )
+
                 while True:
-                    with asection(f"Dialog iteration {dialog_counter}:"):
+                    with asection(
+                        f"Dialog iteration {dialog_counter} of {session.session_id}:"
+                    ):
                         try:
                             aprint(f"Waiting for user input...")
 
-                            # Receive and send back the client message
+                            # Receive the client message
                             prompt = await receive_from_user(websocket)
 
-                            with asection(f"User prompt:"):
-                                aprint(prompt)
-
-                            if self.notebook:
-                                self.notebook.add_markdown_cell("### User:\n" + prompt)
-
-                            # get napari viewer info::
-                            viewer_info = self.napari_bridge.get_viewer_info()
-                            _set_viewer_info(viewer_info)
-
-                            # call LLM:
-                            await notify_user_omega_thinking(websocket)
-                            # result = agent(prompt)
-                            result = await self.async_run_in_executor(agent, prompt)
-
-                            with asection(f"Agent response:"):
-                                # Extract text from result:
-                                for i, message in enumerate(result):
-                                    with asection(f"Message Block #{i}"):
-                                        aprint(message.to_plain_text())
-
-                            await send_final_response_to_user(
-                                result, websocket, token_counter
-                            )
-
-                            if self.notebook:
-                                # Add agent response to notebook:
-                                self.notebook.add_markdown_cell(
-                                    f"### Omega:\n {result}"
-                                )
-
-                                # Add snapshot to notebook:
-                                self.notebook.take_snapshot()
-
-                                # write notebook:
-                                self.notebook.write()
+                            with span("chat.turn", session=session.session_id):
+                                # Start getting napari viewer info, it is collected
+                                # on the Qt thread while we echo the prompt:
+                                with napari_lane(session.session_id):
+                                    viewer_info_task = asyncio.ensure_future(
+                                        self.napari_bridge.aget_viewer_info()
+                                    )
+
+                                # Send back the client message
+                                await echo_user_prompt(websocket, prompt)
+
+                                with asection(f"User prompt:"):
+                                    aprint(prompt)
+
+                                if self.notebook:
+                                    self.notebook.add_markdown_cell(
+                                        "### User:\n" + prompt
+                                    )
+
+                                # call LLM:
+                                await notify_user_omega_thinking(websocket)
+
+                                # wait for napari viewer info:
+                                with span("chat.viewer_info"):
+                                    viewer_info = await viewer_info_task
+                                _set_viewer_info(viewer_info)
+
+                                # result = agent(prompt), on the bounded agent executor:
+                                with span("chat.agent"):
+                                    result = await self.agent_executor.run(
+                                        session.run_turn, prompt
+                                    )
+
+                                with asection(f"Agent response:"):
+                                    # Extract text from result:
+                                    for i, message in enumerate(result):
+                                        with asection(f"Message Block #{i}"):
+                                            aprint(message.to_plain_text())
+
+                                await send_final_response_to_user(result, session)
+
+                                if self.notebook:
+                                    # Add agent response to notebook:
+                                    self.notebook.add_markdown_cell(
+                                        f"### Omega:\n {result}"
+                                    )
+
+                                    # Add snapshot to notebook and write it,
+                                    # both on the notebook's background thread:
+                                    with span("chat.notebook"):
+                                        self.notebook.take_snapshot_in_background()
+                                        self.notebook.write_in_background()
 
                         except WebSocketDisconnect:
                             aprint("websocket disconnect")
                             break
 
+                        except AgentExecutorBusyError as e:
+                            aprint(f"Agent executor busy: {e}")
+                            resp = ChatResponse(
+                                sender="agent",
+                                message="Sorry, Omega is busy with requests from other chat sessions. Please try again in a moment.",
+                                type="error",
+                            )
+                            await session.send_json(resp.dict())
+
                         except Exception as e:
                             traceback.print_exc()
                             resp = ChatResponse(
@@ -252,16 +333,20 @@ class NapariChatServer:
                                 message=f"Sorry, something went wrong ({type(e).__name__}: {str(e)}).",
                                 type="error",
                             )
-                            await websocket.send_json(resp.dict())
+                            await session.send_json(resp.dict())
                     dialog_counter += 1
             finally:
-                api.callback_manager.remove_callback(token_counter)
+                await session.close(api)
+                self.sessions.pop(session.session_id, None)
+                aprint(f"Closed chat {session.session_id}.")
 
         async def receive_from_user(websocket: WebSocket) -> str:
-            """Receive a user message, echo it back, and send a start marker."""
+            """Receive a user message."""
             # Receive a question from the user via WebSocket:
-            question = await websocket.receive_text()
+            return await websocket.receive_text()
 
+        async def echo_user_prompt(websocket: WebSocket, question: str):
+            """Echo a user message back, and send a start marker."""
             # Format the question as a ChatResponse:
             resp = ChatResponse(sender="user", message=question)
 
@@ -274,15 +359,13 @@ class NapariChatServer:
             # Send the this empty 'place-holder'  response to the user via WebSocket:
             await websocket.send_json(start_resp.dict())
 
-            # Return the question for further processing:
-            return question
-
         async def send_final_response_to_user(
-            result: list[Message],
-            websocket: WebSocket,
-            token_counter: TokenCounterCallback,
+            result: list[Message], session: ChatSession
         ):
-            """Send the agent's final text response and token count to the UI."""
+            """Send the agent's final text response and token count to the UI.
+
+            The final response replaces the deltas streamed before it.
+            """
             # Filter out non-text messages:
             text_result = [m for m in result if m.has(Text)]
 
@@ -294,11 +377,11 @@ class NapariChatServer:
                 sender="agent",
                 message=message_str,
                 type="final",
-                total_tokens=token_counter.total_tokens,
+                total_tokens=session.token_counter.total_tokens,
             )
 
             # Send the response to the user via WebSocket:
-            await websocket.send_json(end_resp.dict())
+            await session.send_json(end_resp.dict())
 
         async def notify_user_omega_thinking(websocket: WebSocket):
             """Notify user that Omega is thinking."""
@@ -310,10 +393,13 @@ class NapariChatServer:
             await websocket.send_json(resp.dict())
 
         def notify_user_omega_tool_start(
-            websocket: WebSocket, tool: BaseTool, query: str
+            session: ChatSession, tool: BaseTool, query: str
         ):
             """Notify user that Omega started using a tool."""
 
+            # The tool's own LLM calls are not part of the reply:
+            session.pause_streaming()
+
             # Convert name of the tool to a human-readable format:
             tool_name = camel_case_to_lower_case_with_space(tool.name)
 
@@ -324,7 +410,7 @@ class NapariChatServer:
             resp = ChatResponse(sender="agent", message=message, type="tool_start")
 
             # Send the message to the user via WebSocket:
-            self.sync_handler(websocket.send_json, resp.dict())
+            session.send_json_threadsafe(resp.dict())
             aprint(f"Sent to user via web-ui: {message}")
 
             # If notebook is available, add the message to it:
@@ -332,7 +418,7 @@ class NapariChatServer:
                 self.notebook.add_markdown_cell("### Omega:\n" + message)
 
         def notify_user_omega_tool_activity(
-            websocket: WebSocket, tool: BaseTool, activity_type: str, code: str
+            session: ChatSession, tool: BaseTool, activity_type: str, code: str
         ):
             """Notify user of tool activity (e.g. code generation and execution)."""
             aprint(f"Tool {tool.name} is {activity_type}...")
@@ -349,7 +435,7 @@ class NapariChatServer:
                 )
 
                 # Send the message to the user via WebSocket:
-                self.sync_handler(websocket.send_json, resp.dict())
+                session.send_json_threadsafe(resp.dict())
                 aprint(f"Sent to user via web-ui: {message}")
 
             else:
@@ -359,10 +445,13 @@ class NapariChatServer:
                 )
 
         def notify_user_omega_tool_end(
-            websocket: WebSocket, tool: BaseTool, result: Any
+            session: ChatSession, tool: BaseTool, result: Any
         ):
             """Notify user that Omega's tool usage ended."""
 
+            # Stream the agent's reply again:
+            session.resume_streaming()
+
             # Convert to string if result is not a string:
             message = str(result)
 
@@ -370,16 +459,19 @@ class NapariChatServer:
             resp = ChatResponse(sender="agent", message=message, type="tool_result")
 
             # Send the message to the user via WebSocket:
-            self.sync_handler(websocket.send_json, resp.dict())
+            session.send_json_threadsafe(resp.dict())
             aprint(f"Sent to user via web-ui: {message}")
 
             # If notebook is available, add the message to it:
             if self.notebook:
                 self.notebook.add_markdown_cell("### Omega:\n" + message)
 
-        def notify_user_omega_error(websocket: WebSocket, error: Exception):
+        def notify_user_omega_error(session: ChatSession, error: Exception):
             """Notify user that Omega's tool encountered an error."""
 
+            # Stream the agent's reply again:
+            session.resume_streaming()
+
             # Get the type and message of the error:
             error_type = type(error).__name__
             error_message = ", ".join(str(a) for a in error.args)
@@ -391,13 +483,25 @@ class NapariChatServer:
             resp = ChatResponse(sender="agent", message=message, type="error")
 
             # Send the error response to the user via WebSocket:
-            self.sync_handler(websocket.send_json, resp.dict())
+            session.send_json_threadsafe(resp.dict())
             aprint(f"Sent to user via web-ui: {message}")
 
             # If notebook is available, add the error message to it:
             if self.notebook:
                 self.notebook.add_markdown_cell("### Omega:\n" + "Error:\n" + message)
 
+    def _warm_up_session_factory(self):
+        """Prepare the session factory, logging instead of raising errors.
+
+        Errors are raised again, to the user, when a session is opened.
+        """
+        try:
+            self.session_factory.prepare()
+        except Exception as e:
+            aprint(
+                f"Error: {type(e).__name__} with message: '{str(e)}' while preparing Omega sessions."
+            )
+
     def _start_uvicorn_server(self, app):
         """Start the Uvicorn ASGI server on the configured port (blocking)."""
         with asection(f"Starting Uvicorn server on port {self.port}"):
@@ -415,6 +519,14 @@ class NapariChatServer:
         with asection("Stopping Omega server"):
             self.running = False
 
+            # Cancel agent turns still waiting for a worker:
+            self.agent_executor.shutdown(wait=False)
+
+            # Write the notebook, without waiting long for snapshots as
+            # they need the Qt thread, which may be the one stopping us:
+            if self.notebook:
+                self.notebook.close(timeout=5)
+
             # Stop the napari bridge worker:
             if self.napari_bridge:
                 self.napari_bridge.stop()
@@ -428,23 +540,6 @@ class NapariChatServer:
                     aprint("Warning: Server thread did not stop gracefully")
             aprint("Omega server stopped!")
 
-    def sync_handler(self, _callable, *args, **kwargs):
-        """Schedule an async callable from a synchronous (executor) thread.
-
-        Uses ``run_coroutine_threadsafe`` -- the thread-safe counterpart
-        of ``create_task`` -- to dispatch the coroutine onto the server's
-        event loop.
-        """
-        asyncio.run_coroutine_threadsafe(_callable(*args, **kwargs), self.event_loop)
-
-    def async_run_in_executor(self, func, *args):
-        """Run a blocking function in the default executor.
-
-        Returns an awaitable future so that blocking agent calls do not
-        stall the asyncio event loop.
-        """
-        return self.event_loop.run_in_executor(None, func, *args)
-
 
 def start_chat_server(
     viewer: napari.Viewer = None,
@@ -496,7 +591,10 @@ def start_chat_server(
         notebook_folder_path = config.get("notebook_path")
         aprint(f"Using notebook folder path: {notebook_folder_path}")
         notebook = (
-            JupyterNotebookFile(notebook_folder_path=notebook_folder_path)
+            JupyterNotebookFile(
+                notebook_folder_path=notebook_folder_path,
+                embed_snapshots_on_close=config.get("notebook_embed_snapshots", False),
+            )
             if save_chats_as_notebooks
             else None
         )
@@ -0,0 +1,137 @@
+"""Per-connection state of the chat server.
+
+Every browser tab connected to the chat server gets its own
+:class:`ChatSession`, holding the event loop of its WebSocket, its
+agent, its token counter and its delta stream. Callbacks fired on the
+agent's thread are routed back to their own session, so that several
+sessions can run side by side without receiving each other's messages.
+"""
+
+import asyncio
+import itertools
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi import WebSocket
+from litemind.agent.messages.message import Message
+from litemind.apis.base_api import BaseApi
+
+from napari_chatgpt.chat_server.delta_stream import DeltaStream
+from napari_chatgpt.llm.litemind_api import (
+    add_provider_callback,
+    remove_provider_callback,
+)
+from napari_chatgpt.llm.token_counter_callback import TokenCounterCallback
+from napari_chatgpt.omega_agent.napari_bridge import napari_lane
+
+# Chat session on whose behalf the current context runs:
+_chat_session_id: ContextVar[str | None] = ContextVar(
+    "omega_chat_session_id", default=None
+)
+
+
+class SessionTokenCounter(TokenCounterCallback):
+    """Token counter ignoring the LLM calls of other sessions.
+
+    The LiteMind API is shared by all sessions, so only calls made in the
+    context of the session's turns are counted. This includes calls made
+    in worker threads that run in a copy of that context.
+    """
+
+    def __init__(self, session_id: str):
+        super().__init__()
+        self.session_id = session_id
+
+    def on_text_generation(self, messages: list[Message], response, **kwargs) -> None:
+        """Count the call if it was made on behalf of this session."""
+        if _chat_session_id.get() == self.session_id:
+            super().on_text_generation(messages, response, **kwargs)
+
+
+class ChatSession:
+    """State of one WebSocket chat session.
+
+    Attributes:
+        session_id: Unique identifier of the session, also used as its
+            lane for napari calls (see ``napari_lane``).
+        websocket: The session's WebSocket.
+        event_loop: Event loop serving the WebSocket.
+        token_counter: Counter of the tokens used by the session.
+        delta_stream: Stream of the agent's reply to the browser, or
+            ``None`` if replies are not streamed.
+        agent: The session's agent, set once created.
+    """
+
+    _session_ids = itertools.count(1)
+
+    def __init__(self, websocket: WebSocket, stream_responses: bool = True):
+        """Create the session; must be called from the WebSocket's event loop.
+
+        Args:
+            websocket: The session's WebSocket.
+            stream_responses: If True, stream the agent's replies.
+        """
+        self.session_id = f"session-{next(ChatSession._session_ids)}"
+        self.websocket = websocket
+        self.event_loop = asyncio.get_running_loop()
+        self.token_counter = SessionTokenCounter(self.session_id)
+        self.delta_stream = (
+            DeltaStream(websocket.send_json) if stream_responses else None
+        )
+        self.agent = None
+
+    def open(self, api: BaseApi):
+        """Register the session's callbacks on the LiteMind API."""
+        api.callback_manager.add_callback(self.token_counter)
+        if self.delta_stream is not None:
+            self.delta_stream.start()
+            # Streamed fragments are only reported by the provider APIs:
+            add_provider_callback(api, self.delta_stream)
+
+    async def close(self, api: BaseApi):
+        """Unregister the session's callbacks and stop streaming."""
+        api.callback_manager.remove_callback(self.token_counter)
+        if self.delta_stream is not None:
+            remove_provider_callback(api, self.delta_stream)
+            await self.delta_stream.stop()
+
+    async def send_json(self, message: dict):
+        """Send a message to the browser, after any pending streamed text."""
+        if self.delta_stream is not None:
+            await self.delta_stream.send(message)
+        else:
+            await self.websocket.send_json(message)
+
+    def send_json_threadsafe(self, message: dict):
+        """Schedule :meth:`send_json` from any thread, without waiting."""
+        asyncio.run_coroutine_threadsafe(self.send_json(message), self.event_loop)
+
+    def run_turn(self, prompt: str) -> Any:
+        """Run the agent on *prompt*, on the calling (worker) thread.
+
+        Args:
+            prompt: The user's message.
+
+        Returns:
+            The agent's response messages.
+        """
+        session_token = _chat_session_id.set(self.session_id)
+        if self.delta_stream is not None:
+            self.delta_stream.begin_turn()
+        try:
+            with napari_lane(self.session_id):
+                return self.agent(prompt)
+        finally:
+            if self.delta_stream is not None:
+                self.delta_stream.end_turn()
+            _chat_session_id.reset(session_token)
+
+    def pause_streaming(self):
+        """Stop streaming while a tool runs (its LLM calls are not the reply)."""
+        if self.delta_stream is not None:
+            self.delta_stream.pause()
+
+    def resume_streaming(self):
+        """Stream the agent's reply again after a tool ran."""
+        if self.delta_stream is not None:
+            self.delta_stream.resume()
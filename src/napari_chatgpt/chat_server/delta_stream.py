@@ -0,0 +1,169 @@
+"""Streaming of the agent's text to the web UI as it is generated.
+
+LiteMind APIs report each streamed text fragment through the
+``on_text_streaming`` callback, on the thread running the agent.
+:class:`DeltaStream` collects these fragments and sends them to the
+browser as ``"delta"`` :class:`ChatResponse` messages from the server's
+event loop. The agent thread never waits for the browser: fragments are
+appended to a bounded buffer and, while a send is in progress, new
+fragments are coalesced with the pending ones. A slow browser therefore
+receives fewer, larger deltas instead of slowing down the agent.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+
+from arbol import aprint
+from litemind.apis.callbacks.base_api_callbacks import BaseApiCallbacks
+
+from napari_chatgpt.chat_server.chat_response import ChatResponse
+
+
+class DeltaStream(BaseApiCallbacks):
+    """Forwards streamed text fragments of one chat session to its WebSocket.
+
+    The LiteMind API is shared by all sessions, so fragments are only
+    accepted from the thread that called :meth:`begin_turn`, and not
+    while one of the agent's tools is running (tools make their own LLM
+    calls, e.g. to generate code, whose text is not part of the reply).
+
+    All messages of the session should be sent with :meth:`send`, which
+    flushes pending fragments first, so that the browser receives
+    messages in the order they were produced.
+    """
+
+    def __init__(
+        self,
+        send_json: Callable[[dict], Awaitable],
+        max_pending_chunks: int = 64,
+        min_interval: float = 0.05,
+    ):
+        """Create a stream; call :meth:`start` from the event loop to use it.
+
+        Args:
+            send_json: Coroutine function sending a JSON message, e.g.
+                ``websocket.send_json``.
+            max_pending_chunks: Maximum number of fragments waiting to be
+                sent. Beyond that, fragments are merged into the last one.
+            min_interval: Minimum time in seconds between two deltas, so
+                that fragments arriving in quick succession are sent
+                together.
+        """
+        self.send_json = send_json
+        self.max_pending_chunks = max_pending_chunks
+        self.min_interval = min_interval
+
+        self._lock = threading.Lock()
+        self._pending: list[str] = []
+        self._owner: int | None = None
+        self._paused = False
+        self._wakeup_scheduled = False
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._send_lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        """Start sending deltas; must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop sending deltas and drop pending fragments."""
+        self.end_turn()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._lock:
+            self._pending.clear()
+
+    def begin_turn(self):
+        """Accept fragments from the calling thread, which runs the agent."""
+        with self._lock:
+            self._owner = threading.get_ident()
+            self._paused = False
+
+    def end_turn(self):
+        """Stop accepting fragments until the next :meth:`begin_turn`."""
+        with self._lock:
+            self._owner = None
+
+    def pause(self):
+        """Ignore fragments, e.g. while a tool runs."""
+        with self._lock:
+            self._paused = True
+
+    def resume(self):
+        """Accept fragments again after :meth:`pause`."""
+        with self._lock:
+            self._paused = False
+
+    def on_text_streaming(self, fragment: str, **kwargs) -> None:
+        """Buffer a fragment of the agent's reply (called by the LiteMind API)."""
+        if not fragment or self._loop is None:
+            return
+
+        with self._lock:
+            if self._paused or self._owner != threading.get_ident():
+                return
+            if len(self._pending) < self.max_pending_chunks:
+                self._pending.append(fragment)
+            else:
+                self._pending[-1] += fragment
+            if self._wakeup_scheduled:
+                return
+            self._wakeup_scheduled = True
+
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # The event loop is closed, the session is over:
+            pass
+
+    async def flush(self):
+        """Send pending fragments now."""
+        async with self._send_lock:
+            await self._send_pending()
+
+    async def send(self, message: dict):
+        """Send a message to the browser after the pending fragments.
+
+        Args:
+            message: JSON-serialisable message, e.g. ``ChatResponse.dict()``.
+        """
+        async with self._send_lock:
+            await self._send_pending()
+            await self.send_json(message)
+
+    async def _run(self):
+        """Send buffered fragments as deltas whenever some are available."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                aprint(
+                    f"Error: {type(e).__name__} with message: '{str(e)}' while streaming to the web UI."
+                )
+                return
+            # Let fragments accumulate before sending the next delta:
+            await asyncio.sleep(self.min_interval)
+
+    async def _send_pending(self):
+        """Send all pending fragments as one delta (send lock held)."""
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending.clear()
+            self._wakeup_scheduled = False
+        if text:
+            resp = ChatResponse(sender="agent", message=text, type="delta")
+            await self.send_json(resp.dict())
@@ -139,6 +139,7 @@ function showDisconnectBanner() {
     const banner = document.createElement('div');
     banner.id = 'disconnect-banner';
     banner.className = 'disconnect-banner';
+    closeDraft();
     banner.textContent = hasConnected
         ? 'Disconnected from server. Reconnecting\u2026'
         : 'Connecting to server\u2026';
@@ -155,6 +156,52 @@ function showDisconnectBanner() {
     header.classList.remove('thinking');
 }
 
+/******************************************************************
+ * Streamed replies: deltas are appended to a draft message, which
+ * the final message replaces once the agent is done.
+ ******************************************************************/
+let draftElement = null;    // <p> of the draft receiving deltas
+let draftText = '';         // markdown received so far for the draft
+let draftRenderPending = false;
+
+function appendDelta(messages, text) {
+    if (!draftElement) {
+        const div = document.createElement('div');
+        div.className = 'server-message streaming-draft';
+        draftElement = document.createElement('p');
+        div.appendChild(draftElement);
+        messages.appendChild(div);
+        draftText = '';
+    }
+    draftText += text;
+
+    // Render at most once per frame, however fast deltas arrive:
+    if (!draftRenderPending) {
+        draftRenderPending = true;
+        requestAnimationFrame(function () {
+            draftRenderPending = false;
+            if (draftElement) {
+                draftElement.innerHTML = "<strong>" + "Omega: " + "</strong>" + parse_markdown(draftText);
+                messages.scrollTop = messages.scrollHeight;
+            }
+        });
+    }
+}
+
+function closeDraft() {
+    if (draftElement) {
+        draftElement.innerHTML = "<strong>" + "Omega: " + "</strong>" + parse_markdown(draftText);
+    }
+    draftElement = null;
+    draftText = '';
+}
+
+function removeDrafts(messages) {
+    draftElement = null;
+    draftText = '';
+    messages.querySelectorAll('.streaming-draft').forEach(function (el) { el.remove(); });
+}
+
 function scheduleReconnect() {
     setTimeout(function () {
         reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY);
@@ -194,9 +241,16 @@ function onMessage(event) {
             header.innerHTML = 'Thinking...';
             header.classList.add('thinking');
         }
+        // fragment of the reply being generated:
+        else if (data.type === "delta") {
+            appendDelta(messages, data.message);
+        }
         // tool start:
         else if (data.type === "tool_start") {
 
+            // Text streamed so far precedes the tool's output:
+            closeDraft();
+
             // Set subtitle:
             const header = document.getElementById('header');
             header.innerHTML = "Using a tool... please wait!";
@@ -256,6 +310,9 @@ function onMessage(event) {
         }
         // end message, this is sent once the agent has a final response:
         else if (data.type === "final") {
+            // The final message replaces the streamed drafts:
+            removeDrafts(messages);
+
             // Create a new message entry:
             const div = document.createElement('div');
             div.className = 'server-message';
@@ -291,6 +348,9 @@ function onMessage(event) {
         }
         // Error:
         else if (data.type === "error") {
+            // Keep what was streamed so far:
+            closeDraft();
+
             // Reset subtitle:
             const header = document.getElementById('header');
             header.innerHTML = default_subtitle;
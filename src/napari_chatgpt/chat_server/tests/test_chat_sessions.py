@@ -0,0 +1,158 @@
+"""Tests for per-session state and the bounded agent executor."""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from napari_chatgpt.chat_server.agent_executor import (
+    AgentExecutor,
+    AgentExecutorBusyError,
+)
+from napari_chatgpt.chat_server.chat_session import ChatSession
+from napari_chatgpt.omega_agent.napari_bridge import NapariCall
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAgentExecutor:
+
+    def test_admission_control(self):
+        executor = AgentExecutor(max_workers=1, max_queued=1)
+        release = threading.Event()
+
+        async def scenario():
+            running = asyncio.ensure_future(executor.run(release.wait))
+            queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+            await asyncio.sleep(0.05)
+            assert executor.pending == 2
+
+            # A third turn is rejected instead of waiting:
+            with pytest.raises(AgentExecutorBusyError):
+                await executor.run(lambda: "rejected")
+
+            release.set()
+            assert await queued == "queued"
+            await running
+            assert executor.pending == 0
+
+        try:
+            _run(scenario())
+        finally:
+            executor.shutdown()
+
+    def test_turns_run_concurrently(self):
+        executor = AgentExecutor(max_workers=2, max_queued=0)
+
+        async def scenario():
+            start = time.perf_counter()
+            await asyncio.gather(
+                executor.run(time.sleep, 0.2), executor.run(time.sleep, 0.2)
+            )
+            return time.perf_counter() - start
+
+        try:
+            assert _run(scenario()) < 0.35
+        finally:
+            executor.shutdown()
+
+
+class TestChatSession:
+
+    def test_sessions_are_isolated(self):
+        async def scenario():
+            session_1 = ChatSession(AsyncMock(), stream_responses=False)
+            session_2 = ChatSession(AsyncMock(), stream_responses=False)
+            assert session_1.session_id != session_2.session_id
+            assert session_1.event_loop is asyncio.get_running_loop()
+
+            message = MagicMock()
+            message.to_plain_text.return_value = "one two three four"
+
+            def agent(prompt):
+                # LLM calls made while the session's agent runs:
+                session_1.token_counter.on_text_generation([message], message)
+                session_2.token_counter.on_text_generation([message], message)
+                return NapariCall(lambda v: None).lane
+
+            session_1.agent = agent
+            lane = await asyncio.to_thread(session_1.run_turn, "hello")
+
+            # The turn's napari calls are tagged with the session's lane:
+            assert lane == session_1.session_id
+            # Only the session running the turn counts its tokens:
+            assert session_1.token_counter.total_tokens > 0
+            assert session_2.token_counter.total_tokens == 0
+
+        _run(scenario())
+
+    def test_tokens_counted_in_worker_threads(self):
+        """Calls made off the agent thread, e.g. in the I/O pool, are counted."""
+
+        async def scenario():
+            session = ChatSession(AsyncMock(), stream_responses=False)
+            counter = session.token_counter
+
+            message = MagicMock()
+            message.to_plain_text.return_value = "one two three four"
+
+            def call_llm():
+                counter.on_text_generation([message], message)
+
+            def agent(prompt):
+                with ThreadPoolExecutor(max_workers=1) as pool:
+                    # Without the session's context, the call is not counted:
+                    pool.submit(call_llm).result()
+                    assert counter.total_tokens == 0
+                    # In a copy of the turn's context, it is:
+                    pool.submit(contextvars.copy_context().run, call_llm).result()
+
+            session.agent = agent
+            await asyncio.to_thread(session.run_turn, "hello")
+            assert counter.total_tokens > 0
+
+        _run(scenario())
+
+    def test_send_json_threadsafe(self):
+        async def scenario():
+            websocket = AsyncMock()
+            session = ChatSession(websocket, stream_responses=False)
+            await asyncio.to_thread(session.send_json_threadsafe, {"type": "x"})
+            await asyncio.sleep(0.05)
+            websocket.send_json.assert_awaited_once_with({"type": "x"})
+
+        _run(scenario())
+
+    def test_delta_stream_registered_on_provider_apis(self):
+        """Providers report streamed fragments on their own callback manager."""
+
+        async def scenario():
+            provider = MagicMock()
+            api = MagicMock()
+            api.apis = [provider]
+            session = ChatSession(AsyncMock(), stream_responses=True)
+
+            session.open(api)
+            provider.callback_manager.add_callback.assert_called_once_with(
+                session.delta_stream
+            )
+            api.callback_manager.add_callback.assert_called_once_with(
+                session.token_counter
+            )
+
+            await session.close(api)
+            provider.callback_manager.remove_callback.assert_called_once_with(
+                session.delta_stream
+            )
+
+        _run(scenario())
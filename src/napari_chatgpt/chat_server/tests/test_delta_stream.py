@@ -0,0 +1,144 @@
+"""Tests for DeltaStream, which streams the agent's reply to the web UI."""
+
+import asyncio
+import threading
+import time
+
+from napari_chatgpt.chat_server.delta_stream import DeltaStream
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def _deltas(sent):
+    return [m["message"] for m in sent if m["type"] == "delta"]
+
+
+def test_fragments_streamed_as_deltas():
+    async def scenario():
+        sent = []
+
+        async def send_json(message):
+            sent.append(message)
+
+        stream = DeltaStream(send_json, min_interval=0)
+        stream.start()
+
+        def agent():
+            stream.begin_turn()
+            for word in ["Hello", " there", "!"]:
+                stream.on_text_streaming(word)
+            stream.end_turn()
+
+        await asyncio.get_running_loop().run_in_executor(None, agent)
+        await stream.send({"type": "final", "message": "Hello there!"})
+        await stream.stop()
+        return sent
+
+    sent = _run(scenario())
+
+    assert "".join(_deltas(sent)) == "Hello there!"
+    assert all(m["sender"] == "agent" for m in sent[:-1])
+    # Deltas are always sent before the final message:
+    assert sent[-1]["type"] == "final"
+
+
+def test_fragments_filtered_by_thread_and_pause():
+    async def scenario():
+        sent = []
+
+        async def send_json(message):
+            sent.append(message)
+
+        stream = DeltaStream(send_json, min_interval=0)
+        stream.start()
+
+        def agent():
+            stream.begin_turn()
+            stream.on_text_streaming("reply ")
+            # Text generated by tools is not part of the reply:
+            stream.pause()
+            stream.on_text_streaming("import numpy")
+            stream.resume()
+            # Neither is text generated by other sessions:
+            other = threading.Thread(
+                target=stream.on_text_streaming, args=("other session",)
+            )
+            other.start()
+            other.join()
+            stream.on_text_streaming("done")
+            stream.end_turn()
+            stream.on_text_streaming("after the turn")
+
+        await asyncio.get_running_loop().run_in_executor(None, agent)
+        await stream.flush()
+        await stream.stop()
+        return sent
+
+    sent = _run(scenario())
+
+    assert "".join(_deltas(sent)) == "reply done"
+
+
+def test_slow_browser_does_not_block_agent():
+    async def scenario():
+        sent = []
+
+        async def slow_send_json(message):
+            await asyncio.sleep(0.2)
+            sent.append(message)
+
+        stream = DeltaStream(slow_send_json, max_pending_chunks=4, min_interval=0)
+        stream.start()
+
+        def agent():
+            stream.begin_turn()
+            start = time.perf_counter()
+            for i in range(1000):
+                stream.on_text_streaming(f"{i} ")
+            elapsed = time.perf_counter() - start
+            stream.end_turn()
+            return elapsed
+
+        elapsed = await asyncio.get_running_loop().run_in_executor(None, agent)
+        await stream.flush()
+        await stream.stop()
+        return sent, elapsed
+
+    sent, elapsed = _run(scenario())
+
+    # The agent thread never waited for the browser:
+    assert elapsed < 0.2
+    # Fragments were coalesced into few deltas, without losing any text:
+    deltas = _deltas(sent)
+    assert len(deltas) <= 2
+    assert "".join(deltas) == "".join(f"{i} " for i in range(1000))
+
+
+def test_provider_callbacks_registered_on_each_provider_api():
+    """Providers report streamed fragments on their own callback manager."""
+    from unittest.mock import MagicMock
+
+    from napari_chatgpt.llm.litemind_api import (
+        add_provider_callback,
+        remove_provider_callback,
+    )
+
+    providers = [MagicMock(), MagicMock()]
+    combined_api = MagicMock()
+    combined_api.apis = providers
+    stream = DeltaStream(MagicMock())
+
+    add_provider_callback(combined_api, stream)
+    for provider in providers:
+        provider.callback_manager.add_callback.assert_called_once_with(stream)
+    combined_api.callback_manager.add_callback.assert_not_called()
+
+    remove_provider_callback(combined_api, stream)
+    for provider in providers:
+        provider.callback_manager.remove_callback.assert_called_once_with(stream)
@@ -1,8 +1,9 @@
 """Global LiteMind API singleton and LLM factory functions.
 
 Provides :func:`get_litemind_api` (a lazily-initialised ``CombinedApi``
-that aggregates all available LLM providers), :func:`get_model_list`,
-and :func:`get_llm` for obtaining configured :class:`LLM` instances.
+that aggregates all available LLM providers), :func:`get_model_list`
+(also persisted on disk, see :func:`get_cached_model_list`), and
+:func:`get_llm` for obtaining configured :class:`LLM` instances.
 Custom OpenAI-compatible endpoints and GitHub Models are automatically
 registered when their environment variables are set.
 """
@@ -10,6 +11,7 @@ registered when their environment variables are set.
 from __future__ import annotations
 
 import os
+import threading
 from functools import lru_cache
 from typing import TYPE_CHECKING
 
@@ -23,6 +25,8 @@ if TYPE_CHECKING:
     from litemind.apis.combined_api import CombinedApi
 
 __litemind_api = None
+__litemind_api_lock = threading.Lock()
+__api_keys_loaded = False
 
 
 def is_llm_available() -> bool:
@@ -177,27 +181,78 @@ def get_litemind_api() -> "CombinedApi":
     # This module provides a global instance of the LiteMind API.
     global __litemind_api
 
-    # If the global instance is not initialized, create it.
-    if __litemind_api is None:
-        set_api_key("OpenAI")
-        set_api_key("Anthropic")
-        set_api_key("Gemini")
+    # The API may be requested from a background thread and from the Qt
+    # thread at the same time, it must be created only once:
+    with __litemind_api_lock:
+        # If the global instance is not initialized, create it.
+        if __litemind_api is None:
+            load_api_keys()
 
-        from litemind.apis.combined_api import CombinedApi
+            from napari_chatgpt.llm.omega_combined_api import OmegaCombinedApi
+
+            litemind_api = OmegaCombinedApi()
+
+            # Register custom endpoints and GitHub Models:
+            _build_custom_apis(litemind_api)
 
-        __litemind_api = CombinedApi()
+            # Record token counts and latencies of all calls:
+            from napari_chatgpt.llm.llm_metrics import get_llm_metrics
 
-        # Register custom endpoints and GitHub Models:
-        _build_custom_apis(__litemind_api)
+            add_provider_callback(litemind_api, get_llm_metrics())
+
+            __litemind_api = litemind_api
 
     return __litemind_api
 
 
+def load_api_keys():
+    """Load the API keys of the built-in providers, once per process.
+
+    Keys missing from the environment are requested from the encrypted
+    vault, which may show a Qt dialog: call this on the Qt thread before
+    creating the LiteMind API from another thread.
+    """
+    global __api_keys_loaded
+    if __api_keys_loaded:
+        return
+    set_api_key("OpenAI")
+    set_api_key("Anthropic")
+    set_api_key("Gemini")
+    __api_keys_loaded = True
+
+
+def add_provider_callback(api, callback) -> None:
+    """Register a callback on each provider API of a combined API.
+
+    Provider APIs fire some callbacks, e.g. ``on_text_streaming``, on
+    their own callback manager only; the combined API does not forward
+    them.
+
+    Args:
+        api: A ``CombinedApi``, or a single provider API.
+        callback: The ``BaseApiCallbacks`` instance to register.
+    """
+    for provider_api in getattr(api, "apis", None) or [api]:
+        provider_api.callback_manager.add_callback(callback)
+
+
+def remove_provider_callback(api, callback) -> None:
+    """Unregister a callback registered with ``add_provider_callback``.
+
+    Args:
+        api: A ``CombinedApi``, or a single provider API.
+        callback: The ``BaseApiCallbacks`` instance to unregister.
+    """
+    for provider_api in getattr(api, "apis", None) or [api]:
+        provider_api.callback_manager.remove_callback(callback)
+
+
 @lru_cache
 def get_model_list() -> list[str]:
     """Return the cached list of models that support text generation.
 
-    Results are cached via ``@lru_cache`` so subsequent calls are free.
+    Results are cached via ``@lru_cache`` so subsequent calls are free,
+    and saved to the on-disk model list cache.
 
     Returns:
         Model name strings available through the global API.
@@ -205,7 +260,49 @@ def get_model_list() -> list[str]:
     api = get_litemind_api()
     from litemind.apis.model_features import ModelFeatures
 
-    return api.list_models(features=[ModelFeatures.TextGeneration])
+    model_list = api.list_models(features=[ModelFeatures.TextGeneration])
+
+    from napari_chatgpt.llm.model_list_cache import get_model_list_cache
+
+    get_model_list_cache().put(_providers_fingerprint(), model_list)
+
+    return model_list
+
+
+def get_cached_model_list() -> tuple[list[str], bool] | None:
+    """Return the model list saved on disk for the current API keys.
+
+    Loads the API keys first (see ``load_api_keys``), but never creates
+    the LiteMind API, so no provider is contacted.
+
+    Returns:
+        ``(models, is_fresh)``, where *is_fresh* is False once the list is
+        older than the cache's time-to-live, or ``None`` if no list was
+        saved for the current providers and keys.
+    """
+    load_api_keys()
+
+    from napari_chatgpt.llm.model_list_cache import get_model_list_cache
+
+    return get_model_list_cache().get(_providers_fingerprint())
+
+
+def refresh_model_list() -> list[str]:
+    """List the models again from the providers and update the caches.
+
+    Returns:
+        Model name strings available through the global API.
+    """
+    get_model_list.cache_clear()
+    return get_model_list()
+
+
+def _providers_fingerprint() -> str:
+    from napari_chatgpt.llm.model_list_cache import providers_fingerprint
+    from napari_chatgpt.utils.configuration.app_configuration import AppConfiguration
+
+    config = AppConfiguration("omega")
+    return providers_fingerprint(config["custom_endpoints"] or [])
 
 
 def has_model_support_for(model_name: str, features: list[ModelFeatures]) -> bool:
@@ -1,8 +1,12 @@
 """Lightweight LLM wrapper for text generation via the LiteMind API."""
 
+import hashlib
+
 from litemind.agent.messages.message import Message
 from litemind.apis.base_api import BaseApi
 
+from napari_chatgpt.utils.system.tracing import span
+
 
 class LLM:
     """Simple text-completion wrapper around a LiteMind ``BaseApi``.
@@ -34,6 +38,7 @@ class LLM:
         variables: dict[str, str] | None = None,
         model_name: str | None = None,
         temperature: float | None = None,
+        cache_system: bool = False,
     ) -> list[Message]:
         """Generate a response from the LLM.
 
@@ -45,6 +50,9 @@ class LLM:
             variables: Template variables substituted into *prompt*.
             model_name: Override the model set at init time.
             temperature: Override the temperature set at init time.
+            cache_system: If True, *system* is a stable prefix shared by
+                many calls, and the provider is asked to cache it (see
+                ``prompt_cache_hints``).
 
         Returns:
             A list of ``Message`` objects containing the LLM's response.
@@ -73,9 +81,62 @@ class LLM:
         # Append the user message to the messages list:
         messages.append(message)
 
-        # Generate the response:
-        response = self._api.generate_text(
-            model_name=model_name, messages=messages, temperature=temperature
+        # Ask the provider to cache the system prefix:
+        hints = (
+            prompt_cache_hints(self._api, model_name, system)
+            if cache_system and system
+            else {}
         )
 
+        # Generate the response:
+        with span("llm.generate", model=model_name):
+            response = self._api.generate_text(
+                model_name=model_name,
+                messages=messages,
+                temperature=temperature,
+                **hints,
+            )
+
         return response
+
+
+def prompt_cache_hints(api: BaseApi, model_name: str | None, system: str) -> dict:
+    """Return provider-specific arguments to cache a stable system prefix.
+
+    Anthropic only caches content marked with ``cache_control``, so the
+    system prompt is passed as a text block carrying that marker. OpenAI
+    caches long prefixes automatically; a ``prompt_cache_key`` derived
+    from the prefix routes calls sharing it to the same cache. Other
+    providers (e.g. Gemini) cache common prefixes implicitly and get no
+    extra arguments.
+
+    Args:
+        api: The LiteMind API, possibly a ``CombinedApi`` dispatching to
+            provider APIs by model.
+        model_name: The model that will be called.
+        system: The system prompt to cache.
+
+    Returns:
+        Keyword arguments for ``generate_text``.
+    """
+    # Find the provider API serving the model:
+    provider_api = getattr(api, "model_to_api", {}).get(model_name, api)
+    provider = type(provider_api).__name__
+
+    if provider == "AnthropicApi":
+        return {
+            "system": [
+                {
+                    "type": "text",
+                    "text": system,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+        }
+
+    # Custom OpenAI-compatible endpoints may reject unknown parameters:
+    if provider == "OpenAIApi" and getattr(provider_api, "base_url", None) is None:
+        key = hashlib.sha256(system.encode("utf-8")).hexdigest()[:32]
+        return {"prompt_cache_key": f"omega-{key}"}
+
+    return {}
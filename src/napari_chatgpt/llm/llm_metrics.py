@@ -0,0 +1,319 @@
+"""Per-call token and latency metrics of all LLM calls.
+
+Every text generation made through the LiteMind API is recorded as an
+:class:`LLMCallRecord`: model, caller (the main agent, a tool's sub-LLM,
+vision, summarisation, ...), prompt and completion tokens, wall time and
+time to first streamed token. Records are aggregated into histograms per
+caller, which the chat server exposes on its ``/metrics`` endpoint.
+
+LiteMind callbacks only fire once a generation is done, so calls are
+timed by ``OmegaCombinedApi`` (see ``litemind_api``) with
+:meth:`LLMMetrics.track_call`, and the first streamed fragment and the
+final response are reported by the provider APIs through the
+``BaseApiCallbacks`` interface.
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from litemind.agent.messages.message import Message
+from litemind.apis.callbacks.base_api_callbacks import BaseApiCallbacks
+
+from napari_chatgpt.llm.token_counter_callback import count_tokens, provider_usage
+
+# Caller of the LLM calls made in the current context:
+_llm_caller: ContextVar[str] = ContextVar("omega_llm_caller", default="agent")
+
+# Histogram bucket upper bounds:
+_SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+_TOKENS_BUCKETS = (64, 256, 1024, 4096, 16384, 65536)
+
+
+@contextmanager
+def llm_caller(name: str) -> Iterator[None]:
+    """Attribute the LLM calls made within this block to *name*.
+
+    Calls made outside of any such block are attributed to ``"agent"``.
+
+    Args:
+        name: Name of the caller, e.g. a tool name or ``"vision"``.
+    """
+    token = _llm_caller.set(name)
+    try:
+        yield
+    finally:
+        _llm_caller.reset(token)
+
+
+@dataclass
+class LLMCallRecord:
+    """Metrics of one LLM call.
+
+    Attributes:
+        model: Name of the model.
+        caller: Who made the call (see ``llm_caller``).
+        prompt_tokens: Number of tokens sent to the model.
+        completion_tokens: Number of tokens generated by the model.
+        exact: True if the token counts were reported by the provider,
+            False if they were counted locally.
+        wall_time: Duration of the call in seconds, if it was timed.
+        time_to_first_token: Seconds until the first streamed fragment,
+            if the response was streamed.
+        timestamp: Time the call ended, as returned by ``time.time()``.
+    """
+
+    model: str
+    caller: str
+    prompt_tokens: int
+    completion_tokens: int
+    exact: bool = False
+    wall_time: float | None = None
+    time_to_first_token: float | None = None
+    timestamp: float = field(default_factory=time.time)
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, as used by Prometheus."""
+
+    def __init__(self, bounds: tuple[float, ...]):
+        """Create an empty histogram.
+
+        Args:
+            bounds: Increasing upper bounds of the buckets; an implicit
+                last bucket holds everything above.
+        """
+        self.bounds = bounds
+        self.bucket_counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Add a value to the histogram."""
+        self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> list[tuple[str, int]]:
+        """Return ``(upper bound, number of values <= bound)`` pairs."""
+        counts = []
+        total = 0
+        for bound, count in zip(
+            [*map(str, self.bounds), "+Inf"], self.bucket_counts, strict=True
+        ):
+            total += count
+            counts.append((bound, total))
+        return counts
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the histogram as a JSON-serialisable dictionary."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(self.cumulative_counts()),
+        }
+
+
+class _CallState:
+    """Timing of an LLM call in progress on one thread."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token: float | None = None
+        self.recorded = False
+
+
+class LLMMetrics(BaseApiCallbacks):
+    """Records token counts and latencies of LLM calls.
+
+    Must be registered on the provider APIs (see
+    ``add_provider_callback``), which report streamed fragments and
+    responses with the name of the model used.
+    """
+
+    # Histograms kept per caller:
+    HISTOGRAMS = {
+        "llm_call_seconds": _SECONDS_BUCKETS,
+        "llm_time_to_first_token_seconds": _SECONDS_BUCKETS,
+        "llm_prompt_tokens": _TOKENS_BUCKETS,
+        "llm_completion_tokens": _TOKENS_BUCKETS,
+    }
+
+    def __init__(self, max_records: int = 1000):
+        """Create empty metrics.
+
+        Args:
+            max_records: Number of most recent call records kept.
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.records: deque[LLMCallRecord] = deque(maxlen=max_records)
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._totals: dict[tuple[str, str], dict[str, int]] = {}
+
+    @contextmanager
+    def track_call(self) -> Iterator[None]:
+        """Time the LLM call made within this block on the current thread."""
+        stack = self._call_stack()
+        stack.append(_CallState())
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def on_text_streaming(self, fragment: str, **kwargs) -> None:
+        """Note the time of the first streamed fragment of the current call."""
+        stack = self._call_stack()
+        if stack and stack[-1].first_token is None:
+            stack[-1].first_token = time.perf_counter()
+
+    def on_text_generation(self, messages: list[Message], response, **kwargs) -> None:
+        """Record the call that just produced *response*."""
+        end = time.perf_counter()
+        responses = response if isinstance(response, list) else [response]
+
+        usage = provider_usage(responses, **kwargs)
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage
+        else:
+            prompt_tokens = sum(count_tokens(m.to_plain_text()) for m in messages)
+            completion_tokens = sum(count_tokens(m.to_plain_text()) for m in responses)
+
+        wall_time = time_to_first_token = None
+        stack = self._call_stack()
+        if stack and not stack[-1].recorded:
+            state = stack[-1]
+            state.recorded = True
+            wall_time = end - state.start
+            if state.first_token is not None:
+                time_to_first_token = state.first_token - state.start
+
+        self.record(
+            LLMCallRecord(
+                model=str(kwargs.get("model_name") or "unknown"),
+                caller=_llm_caller.get(),
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                exact=usage is not None,
+                wall_time=wall_time,
+                time_to_first_token=time_to_first_token,
+            )
+        )
+
+    def record(self, record: LLMCallRecord):
+        """Add a call record and update the aggregates."""
+        with self._lock:
+            self.records.append(record)
+
+            totals = self._totals.setdefault(
+                (record.caller, record.model),
+                {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0},
+            )
+            totals["calls"] += 1
+            totals["prompt_tokens"] += record.prompt_tokens
+            totals["completion_tokens"] += record.completion_tokens
+
+            for name, value in (
+                ("llm_call_seconds", record.wall_time),
+                ("llm_time_to_first_token_seconds", record.time_to_first_token),
+                ("llm_prompt_tokens", record.prompt_tokens),
+                ("llm_completion_tokens", record.completion_tokens),
+            ):
+                if value is not None:
+                    self._histogram(name, record.caller).observe(value)
+
+    def snapshot(self, max_records: int = 50) -> dict[str, Any]:
+        """Return the aggregated metrics and the most recent calls.
+
+        Args:
+            max_records: Number of most recent call records included.
+
+        Returns:
+            A JSON-serialisable dictionary.
+        """
+        with self._lock:
+            recent = list(self.records)[-max_records:] if max_records else []
+            return {
+                "totals": [
+                    {"caller": caller, "model": model, **totals}
+                    for (caller, model), totals in self._totals.items()
+                ],
+                "histograms": {
+                    f"{name}{{caller={caller}}}": histogram.to_dict()
+                    for (name, caller), histogram in self._histograms.items()
+                },
+                "recent_calls": [asdict(r) for r in recent],
+            }
+
+    def to_prometheus(self) -> str:
+        """Return the aggregated metrics in Prometheus' text format."""
+        lines = []
+        with self._lock:
+            for metric in ("calls", "prompt_tokens", "completion_tokens"):
+                name = f"llm_{metric}_total"
+                lines.append(f"# TYPE {name} counter")
+                for (caller, model), totals in self._totals.items():
+                    labels = f'caller="{_escape(caller)}",model="{_escape(model)}"'
+                    lines.append(f"{name}{{{labels}}} {totals[metric]}")
+
+            for name in self.HISTOGRAMS:
+                lines.append(f"# TYPE {name} histogram")
+                for (histogram_name, caller), histogram in self._histograms.items():
+                    if histogram_name != name:
+                        continue
+                    caller_label = f'caller="{_escape(caller)}"'
+                    for bound, count in histogram.cumulative_counts():
+                        lines.append(
+                            f'{name}_bucket{{{caller_label},le="{bound}"}} {count}'
+                        )
+                    lines.append(f"{name}_sum{{{caller_label}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{caller_label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Forget all records and aggregates."""
+        with self._lock:
+            self.records.clear()
+            self._histograms.clear()
+            self._totals.clear()
+
+    def _histogram(self, name: str, caller: str) -> Histogram:
+        """Return the histogram *name* of *caller* (lock held)."""
+        histogram = self._histograms.get((name, caller))
+        if histogram is None:
+            histogram = Histogram(self.HISTOGRAMS[name])
+            self._histograms[(name, caller)] = histogram
+        return histogram
+
+    def _call_stack(self) -> list[_CallState]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_metrics_lock = threading.Lock()
+_metrics: LLMMetrics | None = None
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Return the process-wide LLM metrics.
+
+    Returns:
+        The shared ``LLMMetrics``.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = LLMMetrics()
+        return _metrics
@@ -0,0 +1,170 @@
+"""Persistent cache of the list of available LLM models.
+
+Listing the models means creating the LiteMind API, which contacts every
+configured provider over the network and takes several seconds on slow
+networks. The cache stores the list in a JSON file, keyed by a
+fingerprint of the configured providers and of their API keys, so that
+the list of another set of keys is never shown. Entries older than the
+time-to-live are still returned, flagged as stale, so that callers can
+show them right away and refresh the list in the background.
+
+API keys themselves are never stored, only hashes of them.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from arbol import aprint
+
+# Version of the on-disk format, bump to invalidate existing caches:
+_CACHE_FORMAT = 1
+
+# Environment variables holding the keys of the built-in providers:
+_PROVIDER_KEY_VARIABLES = {
+    "OpenAI": "OPENAI_API_KEY",
+    "Anthropic": "ANTHROPIC_API_KEY",
+    "Gemini": "GOOGLE_GEMINI_API_KEY",
+    "GitHub": "GITHUB_TOKEN",
+}
+
+
+class ModelListCache:
+    """Model lists cached on disk, one per providers fingerprint.
+
+    Attributes:
+        path: Path of the JSON file holding the cache.
+        ttl: Time in seconds after which a cached list is stale.
+    """
+
+    def __init__(self, path: str, ttl: float = 24 * 3600):
+        """Create a cache stored at *path*; nothing is read until first use.
+
+        Args:
+            path: Path of the JSON file holding the cache.
+            ttl: Time in seconds after which a cached list is stale.
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: str) -> tuple[list[str], bool] | None:
+        """Return the cached model list for a providers fingerprint.
+
+        Args:
+            fingerprint: Fingerprint of the providers, see
+                ``providers_fingerprint``.
+
+        Returns:
+            ``(models, is_fresh)``, or ``None`` if nothing is cached.
+        """
+        with self._lock:
+            entry = self._load().get(fingerprint)
+        if entry is None:
+            return None
+        is_fresh = 0 <= time.time() - entry["time"] <= self.ttl
+        return list(entry["models"]), is_fresh
+
+    def put(self, fingerprint: str, models: list[str]):
+        """Store the model list of a providers fingerprint.
+
+        Args:
+            fingerprint: Fingerprint of the providers.
+            models: The model names.
+        """
+        with self._lock:
+            entries = self._load()
+            entries[fingerprint] = {"time": time.time(), "models": list(models)}
+            # Entries of keys not used for a while are dropped:
+            entries = {
+                key: entry
+                for key, entry in entries.items()
+                if time.time() - entry["time"] <= 30 * self.ttl
+            }
+            self._save(entries)
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("format") != _CACHE_FORMAT:
+                return {}
+            return data["entries"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save(self, entries: dict[str, dict]):
+        data = {"format": _CACHE_FORMAT, "entries": entries}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Write then rename, so that readers never see a partial file:
+            temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            aprint(
+                f"Error: {type(e).__name__} with message: '{str(e)}' while saving the model list cache."
+            )
+
+
+def providers_fingerprint(custom_endpoints: list[dict] | None = None) -> str:
+    """Return a fingerprint of the configured providers and their API keys.
+
+    Args:
+        custom_endpoints: The ``custom_endpoints`` entries of the
+            configuration, see ``litemind_api._build_custom_apis``.
+
+    Returns:
+        A hexadecimal digest, which changes when a key is added, removed
+        or changed.
+    """
+    parts = []
+    for provider, variable in _PROVIDER_KEY_VARIABLES.items():
+        parts.append(f"{provider}:{_key_hash(os.environ.get(variable))}")
+    for endpoint in custom_endpoints or []:
+        api_key_env = endpoint.get("api_key_env")
+        api_key = os.environ.get(api_key_env) if api_key_env else None
+        parts.append(
+            f"{endpoint.get('name', 'custom')}@{endpoint.get('base_url')}:{_key_hash(api_key)}"
+        )
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _key_hash(api_key: str | None) -> str:
+    if not api_key:
+        return "-"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+_cache_lock = threading.Lock()
+_cache: ModelListCache | None = None
+
+
+def get_model_list_cache() -> ModelListCache:
+    """Return the process-wide model list cache.
+
+    The cache is stored in ``~/.omega/model_list_cache.json`` unless the
+    ``model_list_cache_path`` key of the ``omega`` application
+    configuration says otherwise; ``model_list_cache_ttl`` sets its
+    time-to-live in seconds (one day by default).
+
+    Returns:
+        The shared ``ModelListCache``.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from napari_chatgpt.utils.configuration.app_configuration import (
+                AppConfiguration,
+            )
+
+            config = AppConfiguration("omega")
+            path = (
+                config.get("model_list_cache_path") or "~/.omega/model_list_cache.json"
+            )
+            ttl = config.get("model_list_cache_ttl", 24 * 3600)
+            _cache = ModelListCache(os.path.expanduser(path), ttl=ttl)
+        return _cache
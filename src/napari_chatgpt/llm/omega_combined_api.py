@@ -0,0 +1,63 @@
+"""LiteMind ``CombinedApi`` variant used by Omega.
+
+``CombinedApi.generate_text`` dispatches each call to the provider API
+serving the requested model, but does not pass extra keyword arguments
+on. Omega relies on them to reach the provider, e.g. the prompt caching
+arguments returned by ``prompt_cache_hints``. Calls are also timed for
+``LLMMetrics``, since LiteMind callbacks only fire once a call is done.
+"""
+
+from litemind.agent.messages.message import Message
+from litemind.apis.combined_api import CombinedApi
+from litemind.apis.model_features import ModelFeatures
+
+from napari_chatgpt.llm.llm_metrics import get_llm_metrics
+
+
+class OmegaCombinedApi(CombinedApi):
+    """``CombinedApi`` forwarding extra ``generate_text`` arguments."""
+
+    def describe_image(self, *args, **kwargs) -> str:
+        """Describe an image, see ``CombinedApi.describe_image``."""
+        with get_llm_metrics().track_call():
+            return super().describe_image(*args, **kwargs)
+
+    def generate_text(
+        self,
+        messages: list[Message],
+        model_name: str | None = None,
+        temperature: float = 0.0,
+        max_num_output_tokens: int | None = None,
+        toolset=None,
+        use_tools: bool = True,
+        response_format=None,
+        **kwargs,
+    ) -> list[Message]:
+        """Generate text with the provider API serving *model_name*.
+
+        Same as ``CombinedApi.generate_text``, except that *kwargs* are
+        passed on to the provider API.
+        """
+        # Use the best text generation model if none is given:
+        if model_name is None:
+            model_name = self.get_best_model(ModelFeatures.TextGeneration)
+
+        if model_name not in self.model_to_api:
+            raise ValueError(f"Model '{model_name}' not found in any API.")
+
+        with get_llm_metrics().track_call():
+            response = self.model_to_api[model_name].generate_text(
+                messages=messages,
+                model_name=model_name,
+                temperature=temperature,
+                max_num_output_tokens=max_num_output_tokens,
+                toolset=toolset,
+                use_tools=use_tools,
+                response_format=response_format,
+                **kwargs,
+            )
+
+        # Call the callback manager:
+        self.callback_manager.on_text_generation(messages, response=response, **kwargs)
+
+        return response
@@ -0,0 +1,122 @@
+"""Tests for per-call LLM metrics."""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+import napari_chatgpt.llm.token_counter_callback as token_counter_callback
+from napari_chatgpt.llm.llm_metrics import (
+    Histogram,
+    LLMCallRecord,
+    LLMMetrics,
+    llm_caller,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_tokenizer(monkeypatch):
+    """Count tokens with the word heuristic, as when tiktoken is unavailable."""
+    monkeypatch.setattr(token_counter_callback, "_get_encoding", lambda: None)
+
+
+def _message(text):
+    message = MagicMock(spec=["to_plain_text"])
+    message.to_plain_text.return_value = text
+    return message
+
+
+def test_streamed_call_is_timed_and_attributed():
+    metrics = LLMMetrics()
+
+    with llm_caller("NapariViewerControlTool"):
+        with metrics.track_call():
+            time.sleep(0.05)
+            metrics.on_text_streaming("Hello")
+            metrics.on_text_streaming(" world")
+            time.sleep(0.05)
+            metrics.on_text_generation(
+                [_message("one two three four five six seven eight nine ten")],
+                _message("Hello world"),
+                model_name="gpt-test",
+            )
+
+    (record,) = metrics.records
+    assert record.model == "gpt-test"
+    assert record.caller == "NapariViewerControlTool"
+    assert record.prompt_tokens == 13
+    assert record.completion_tokens == 2
+    assert not record.exact
+    assert 0.05 <= record.time_to_first_token < record.wall_time
+    assert record.wall_time >= 0.1
+
+
+def test_untracked_call_defaults_to_agent_without_timing():
+    metrics = LLMMetrics()
+    metrics.on_text_generation([_message("hi")], [_message("hello")])
+
+    (record,) = metrics.records
+    assert record.caller == "agent"
+    assert record.model == "unknown"
+    assert record.wall_time is None
+    assert record.time_to_first_token is None
+
+
+def test_provider_usage_is_preferred():
+    metrics = LLMMetrics()
+    response = _message("short")
+    response.usage = SimpleNamespace(input_tokens=1200, output_tokens=34)
+
+    metrics.on_text_generation([_message("hi")], response, model_name="claude")
+
+    (record,) = metrics.records
+    assert (record.prompt_tokens, record.completion_tokens) == (1200, 34)
+    assert record.exact
+
+
+def test_aggregates_and_prometheus_export():
+    metrics = LLMMetrics()
+    for wall_time in (0.2, 0.7, 3.0):
+        metrics.record(
+            LLMCallRecord(
+                model="gpt-test",
+                caller="vision",
+                prompt_tokens=100,
+                completion_tokens=10,
+                wall_time=wall_time,
+            )
+        )
+
+    snapshot = metrics.snapshot()
+    assert snapshot["totals"] == [
+        {
+            "caller": "vision",
+            "model": "gpt-test",
+            "calls": 3,
+            "prompt_tokens": 300,
+            "completion_tokens": 30,
+        }
+    ]
+    seconds = snapshot["histograms"]["llm_call_seconds{caller=vision}"]
+    assert seconds["count"] == 3
+    assert seconds["buckets"]["0.25"] == 1
+    assert seconds["buckets"]["1.0"] == 2
+    assert seconds["buckets"]["+Inf"] == 3
+    assert len(snapshot["recent_calls"]) == 3
+
+    text = metrics.to_prometheus()
+    assert 'llm_calls_total{caller="vision",model="gpt-test"} 3' in text
+    assert 'llm_call_seconds_bucket{caller="vision",le="+Inf"} 3' in text
+    assert 'llm_call_seconds_count{caller="vision"} 3' in text
+
+    metrics.reset()
+    assert metrics.snapshot()["totals"] == []
+
+
+def test_histogram_bucket_edges():
+    histogram = Histogram((1.0, 2.0))
+    for value in (0.5, 1.0, 1.5, 5.0):
+        histogram.observe(value)
+    assert histogram.cumulative_counts() == [("1.0", 2), ("2.0", 3), ("+Inf", 4)]
+    assert histogram.sum == 8.0
@@ -0,0 +1,75 @@
+"""Tests for the on-disk model list cache."""
+
+import time
+
+from napari_chatgpt.llm import litemind_api, model_list_cache
+from napari_chatgpt.llm.model_list_cache import ModelListCache, providers_fingerprint
+
+
+def test_put_and_get(tmp_path):
+    cache = ModelListCache(str(tmp_path / "models.json"))
+
+    assert cache.get("fingerprint") is None
+
+    cache.put("fingerprint", ["model-a", "model-b"])
+
+    # A new instance reads the list back from disk:
+    reloaded = ModelListCache(str(tmp_path / "models.json"))
+    assert reloaded.get("fingerprint") == (["model-a", "model-b"], True)
+    assert reloaded.get("other-fingerprint") is None
+
+
+def test_stale_entries_are_flagged(tmp_path, monkeypatch):
+    cache = ModelListCache(str(tmp_path / "models.json"), ttl=60)
+    cache.put("fingerprint", ["model-a"])
+
+    now = time.time()
+    monkeypatch.setattr(model_list_cache.time, "time", lambda: now + 120)
+
+    assert cache.get("fingerprint") == (["model-a"], False)
+
+
+def test_corrupted_file_is_ignored(tmp_path):
+    path = tmp_path / "models.json"
+    path.write_text("{not json")
+    cache = ModelListCache(str(path))
+
+    assert cache.get("fingerprint") is None
+    cache.put("fingerprint", ["model-a"])
+    assert cache.get("fingerprint") == (["model-a"], True)
+
+
+def test_fingerprint_depends_on_keys_but_does_not_contain_them(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-first-key")
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    first = providers_fingerprint()
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-second-key")
+    second = providers_fingerprint()
+
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-key")
+    third = providers_fingerprint()
+
+    endpoint = {"name": "local", "base_url": "http://localhost", "api_key_env": "X"}
+    fourth = providers_fingerprint([endpoint])
+
+    assert len({first, second, third, fourth}) == 4
+    assert "first-key" not in first
+    assert providers_fingerprint() == third
+
+
+def test_get_cached_model_list_does_not_create_the_api(tmp_path, monkeypatch):
+    cache = ModelListCache(str(tmp_path / "models.json"))
+    monkeypatch.setattr(model_list_cache, "_cache", cache)
+    monkeypatch.setattr(litemind_api, "load_api_keys", lambda: None)
+    monkeypatch.setattr(litemind_api, "_providers_fingerprint", lambda: "current-keys")
+
+    def _no_api():
+        raise AssertionError("The LiteMind API must not be created.")
+
+    monkeypatch.setattr(litemind_api, "get_litemind_api", _no_api)
+
+    assert litemind_api.get_cached_model_list() is None
+
+    cache.put("current-keys", ["model-a"])
+    assert litemind_api.get_cached_model_list() == (["model-a"], True)
@@ -0,0 +1,72 @@
+"""Tests for provider-specific prompt caching hints."""
+
+from unittest.mock import MagicMock
+
+from napari_chatgpt.llm.llm import LLM, prompt_cache_hints
+
+
+class AnthropicApi:
+    """Stand-in named like LiteMind's Anthropic API."""
+
+
+class OpenAIApi:
+    """Stand-in named like LiteMind's OpenAI API."""
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url
+
+
+class CombinedApi:
+    """Stand-in dispatching models to provider APIs."""
+
+    def __init__(self, model_to_api):
+        self.model_to_api = model_to_api
+
+
+def test_anthropic_system_block_has_cache_control():
+    api = CombinedApi({"claude": AnthropicApi()})
+    hints = prompt_cache_hints(api, "claude", "stable prefix")
+    assert hints["system"][0]["text"] == "stable prefix"
+    assert hints["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_openai_cache_key_depends_on_prefix():
+    api = CombinedApi({"gpt": OpenAIApi()})
+    key_a = prompt_cache_hints(api, "gpt", "prefix a")["prompt_cache_key"]
+    assert key_a == prompt_cache_hints(api, "gpt", "prefix a")["prompt_cache_key"]
+    assert key_a != prompt_cache_hints(api, "gpt", "prefix b")["prompt_cache_key"]
+
+
+def test_no_hints_for_custom_endpoints_and_other_providers():
+    api = CombinedApi({"custom": OpenAIApi(base_url="http://localhost:8000")})
+    assert prompt_cache_hints(api, "custom", "prefix") == {}
+    assert prompt_cache_hints(MagicMock(), "gemini", "prefix") == {}
+
+
+def test_generate_passes_hints_and_system_first():
+    api = MagicMock()
+    api.model_to_api = {"claude": AnthropicApi()}
+    llm = LLM(api=api, model_name="claude")
+
+    llm.generate(
+        "Do {input}", system="prefix", variables={"input": "it"}, cache_system=True
+    )
+
+    kwargs = api.generate_text.call_args.kwargs
+    assert kwargs["messages"][0].role == "system"
+    assert kwargs["messages"][1].to_plain_text().strip() == "Do it"
+    assert kwargs["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_combined_api_forwards_hints_to_provider():
+    from napari_chatgpt.llm.omega_combined_api import OmegaCombinedApi
+
+    provider = MagicMock()
+    provider.list_models.return_value = ["gpt"]
+    api = OmegaCombinedApi(apis=[provider])
+
+    api.generate_text(messages=[], model_name="gpt", prompt_cache_key="omega-123")
+
+    kwargs = provider.generate_text.call_args.kwargs
+    assert kwargs["model_name"] == "gpt"
+    assert kwargs["prompt_cache_key"] == "omega-123"
@@ -1,13 +1,25 @@
 """Tests for TokenCounterCallback and estimate_tokens."""
 
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
+import pytest
+
+import napari_chatgpt.llm.token_counter_callback as token_counter_callback
 from napari_chatgpt.llm.token_counter_callback import (
     TokenCounterCallback,
+    count_tokens,
     estimate_tokens,
+    provider_usage,
 )
 
 
+@pytest.fixture(autouse=True)
+def no_tokenizer(monkeypatch):
+    """Count tokens with the word heuristic, as when tiktoken is unavailable."""
+    monkeypatch.setattr(token_counter_callback, "_get_encoding", lambda: None)
+
+
 class TestEstimateTokens:
     """Tests for the estimate_tokens heuristic."""
 
@@ -103,3 +115,38 @@ class TestTokenCounterCallback:
         response = self._make_message("")
         counter.on_text_generation(msgs, response)
         assert counter.total_tokens == 0
+
+    def test_provider_usage_is_preferred(self):
+        counter = TokenCounterCallback()
+        msgs = [self._make_message("hello world")]
+        response = self._make_message("goodbye world")
+        counter.on_text_generation(
+            msgs, response, usage={"prompt_tokens": 120, "completion_tokens": 8}
+        )
+        assert counter.prompt_tokens == 120
+        assert counter.completion_tokens == 8
+        assert counter.total_tokens == 128
+
+
+class TestCountTokens:
+    """Tests for count_tokens and provider_usage."""
+
+    def test_falls_back_to_estimate(self):
+        assert count_tokens("") == 0
+        assert count_tokens("one two three") == estimate_tokens("one two three")
+
+    def test_uses_encoding_when_available(self, monkeypatch):
+        encoding = MagicMock()
+        encoding.encode.return_value = [1, 2, 3, 4, 5]
+        monkeypatch.setattr(token_counter_callback, "_get_encoding", lambda: encoding)
+        assert count_tokens("hello world") == 5
+
+    def test_provider_usage_formats(self):
+        openai_usage = {"prompt_tokens": 10, "completion_tokens": 2}
+        assert provider_usage([], usage=openai_usage) == (10, 2)
+
+        anthropic_usage = SimpleNamespace(input_tokens=0, output_tokens=3)
+        response = SimpleNamespace(usage=anthropic_usage)
+        assert provider_usage([response]) == (0, 3)
+
+        assert provider_usage([SimpleNamespace()]) is None
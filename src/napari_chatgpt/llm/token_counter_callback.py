@@ -1,10 +1,19 @@
 """Token-counting callback for tracking LLM usage across all API calls."""
 
-from typing import List
+import threading
+from collections.abc import Sequence
+from typing import Any
 
 from litemind.agent.messages.message import Message
 from litemind.apis.callbacks.base_api_callbacks import BaseApiCallbacks
 
+# Encoding of recent OpenAI models, close enough for other providers:
+_ENCODING_NAME = "o200k_base"
+
+_encoding_lock = threading.Lock()
+_encoding = None
+_encoding_requested = False
+
 
 def estimate_tokens(text: str) -> int:
     """Estimate token count from text using a word-based heuristic.
@@ -23,28 +32,126 @@ def estimate_tokens(text: str) -> int:
     return max(1, int(len(text.split()) * 1.3))
 
 
+def _load_encoding():
+    """Load the tiktoken encoding; it may have to be downloaded first."""
+    global _encoding
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(_ENCODING_NAME)
+    except Exception:
+        # tiktoken is optional, and its encodings may not be downloadable:
+        return
+    with _encoding_lock:
+        _encoding = encoding
+
+
+def _get_encoding():
+    """Return the tiktoken encoding, or ``None`` while it is not loaded.
+
+    The first call starts loading the encoding in a background thread,
+    so that counting tokens never waits for a download.
+    """
+    global _encoding_requested
+    with _encoding_lock:
+        if not _encoding_requested:
+            _encoding_requested = True
+            threading.Thread(
+                target=_load_encoding, name="omega_tokenizer", daemon=True
+            ).start()
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of *text* with a local tokenizer.
+
+    Uses tiktoken when it is installed and its encoding is available,
+    and falls back to ``estimate_tokens`` otherwise.
+
+    Args:
+        text: The text to count tokens for.
+
+    Returns:
+        Number of tokens.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def provider_usage(responses: Sequence[Any], **kwargs) -> tuple[int, int] | None:
+    """Return ``(prompt_tokens, completion_tokens)`` reported by the provider.
+
+    Looks for a ``usage`` keyword argument of the callback, then for a
+    ``usage`` attribute on the response messages. Both OpenAI-style
+    (``prompt_tokens``/``completion_tokens``) and Anthropic-style
+    (``input_tokens``/``output_tokens``) usage objects or dicts are
+    understood.
+
+    Args:
+        responses: The response messages of the call.
+        **kwargs: Keyword arguments of the callback.
+
+    Returns:
+        The token counts, or ``None`` if no usage was reported.
+    """
+    candidates = [kwargs.get("usage")] + [getattr(r, "usage", None) for r in responses]
+    for usage in candidates:
+        if usage is None:
+            continue
+        prompt_tokens = _usage_field(usage, "prompt_tokens", "input_tokens")
+        completion_tokens = _usage_field(usage, "completion_tokens", "output_tokens")
+        if prompt_tokens is not None and completion_tokens is not None:
+            return prompt_tokens, completion_tokens
+    return None
+
+
+def _usage_field(usage: Any, *names: str) -> int | None:
+    for name in names:
+        value = (
+            usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        )
+        if isinstance(value, int):
+            return value
+    return None
+
+
 class TokenCounterCallback(BaseApiCallbacks):
     """Counts tokens for every LLM call via on_text_generation.
 
     This callback is registered on the CombinedApi and fires on every
     text generation call — including internal sub-calls from tools,
-    segmentation prompts, code generation, etc.
+    segmentation prompts, code generation, etc. Token counts reported
+    by the provider are used when available, otherwise tokens are
+    counted locally with ``count_tokens``.
     """
 
     def __init__(self):
         self.total_tokens: int = 0
+        self.prompt_tokens: int = 0
+        self.completion_tokens: int = 0
 
-    def on_text_generation(self, messages: List[Message], response, **kwargs) -> None:
-        """Accumulate estimated tokens for all messages and the response."""
-        for m in messages:
-            self.total_tokens += estimate_tokens(m.to_plain_text())
+    def on_text_generation(self, messages: list[Message], response, **kwargs) -> None:
+        """Accumulate tokens for all messages and the response."""
         # response can be a single Message or a List[Message]:
-        if isinstance(response, list):
-            for m in response:
-                self.total_tokens += estimate_tokens(m.to_plain_text())
+        responses = response if isinstance(response, list) else [response]
+
+        usage = provider_usage(responses, **kwargs)
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage
         else:
-            self.total_tokens += estimate_tokens(response.to_plain_text())
+            prompt_tokens = sum(count_tokens(m.to_plain_text()) for m in messages)
+            completion_tokens = sum(count_tokens(m.to_plain_text()) for m in responses)
+
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.total_tokens += prompt_tokens + completion_tokens
 
     def reset(self):
-        """Reset the token counter to zero."""
+        """Reset the token counters to zero."""
         self.total_tokens = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
@@ -1,15 +1,30 @@
 """Thread-safe bridge between the Omega agent and the napari Qt event loop.
 
-This module provides ``NapariBridge``, which uses a pair of queues and
-napari's ``@thread_worker`` decorator to safely execute arbitrary callables
-on the Qt thread from a background (non-GUI) thread. It also maintains a
-thread-safe global cache of viewer information so that tools can inspect
-viewer state without blocking the Qt thread.
+This module provides ``NapariBridge``, which uses a queue and napari's
+``@thread_worker`` decorator to safely execute arbitrary callables on the
+Qt thread from background (non-GUI) threads. Each submitted call is
+wrapped in a ``NapariCall`` carrying its own id and future, so several
+callers can have calls in flight at the same time, each with its own
+timeout, without ever receiving another caller's result. Calls are
+tagged with the *lane* (e.g. the chat session) they were submitted from,
+and the bridge's queue serves lanes in turn, so that one busy session
+cannot starve the others of viewer access. It also
+maintains a thread-safe global cache of viewer information so that tools
+can inspect viewer state without blocking the Qt thread.
 """
 
+import asyncio
+import itertools
 import threading
-from collections.abc import Callable
-from queue import Empty, Queue
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import CancelledError, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from queue import Empty, Full, Queue
+from typing import Any
 
 import napari
 import napari.viewer
@@ -21,8 +36,13 @@ from PIL.Image import fromarray
 from napari_chatgpt.omega_agent.tools.special.exception_catcher_tool import (
     enqueue_exception,
 )
-from napari_chatgpt.utils.napari.napari_viewer_info import get_viewer_info
+from napari_chatgpt.utils.napari.napari_viewer_info import ViewerInfoCache
+from napari_chatgpt.utils.napari.snapshot_service import (
+    downscale_image,
+    get_snapshot_service,
+)
 from napari_chatgpt.utils.python.exception_guard import ExceptionGuard
+from napari_chatgpt.utils.system.tracing import current_span_id, span
 
 # Thread-safe global variable to exchange information with the viewer:
 _viewer_info_lock = threading.Lock()
@@ -50,29 +70,265 @@ def _get_viewer_info():
         return _viewer_info
 
 
+# Lane of the napari calls submitted from the current thread or task:
+_napari_lane: ContextVar[str | None] = ContextVar("omega_napari_lane", default=None)
+
+
+@contextmanager
+def napari_lane(lane: str | None) -> Iterator[None]:
+    """Tag the napari calls submitted within this block with *lane*.
+
+    Calls from different lanes are served in turn by ``FairNapariQueue``.
+
+    Args:
+        lane: Name of the lane, typically a chat session id.
+    """
+    token = _napari_lane.set(lane)
+    try:
+        yield
+    finally:
+        _napari_lane.reset(token)
+
+
+class FairNapariQueue(Queue):
+    """Queue serving the lanes of the queued calls in round-robin order.
+
+    Within a lane, calls are served first in, first out. Items without a
+    ``lane`` attribute (bare callables, the stop sentinel) share the
+    ``None`` lane. Like ``queue.PriorityQueue``, only the storage hooks
+    of ``queue.Queue`` are overridden, so blocking and ``maxsize`` work
+    as usual.
+    """
+
+    def _init(self, maxsize):
+        self._lanes: OrderedDict[str | None, deque] = OrderedDict()
+        self._size = 0
+
+    def _qsize(self):
+        return self._size
+
+    def _put(self, item):
+        self._lanes.setdefault(getattr(item, "lane", None), deque()).append(item)
+        self._size += 1
+
+    def _get(self):
+        lane, items = next(iter(self._lanes.items()))
+        item = items.popleft()
+        self._size -= 1
+        # The lane goes to the back of the line, or away if it is empty:
+        del self._lanes[lane]
+        if items:
+            self._lanes[lane] = items
+        return item
+
+
+class NapariCall:
+    """A callable submitted to napari's Qt thread, with its own future.
+
+    Calling the instance with a viewer runs the wrapped function and
+    resolves the future with its result, or with an ``ExceptionGuard``
+    if the function raised. Calls cancelled before they start running
+    are skipped.
+
+    Attributes:
+        call_id: Unique, increasing identifier of this call.
+        function: The callable to run; accepts a ``napari.Viewer``.
+        future: Future resolved with the result of *function*.
+        lane: Lane the call was submitted from (see ``napari_lane``).
+    """
+
+    _call_ids = itertools.count()
+
+    def __init__(self, function: Callable[[napari.Viewer], Any]):
+        self.call_id = next(NapariCall._call_ids)
+        self.function = function
+        self.future = Future()
+        self.lane = _napari_lane.get()
+        # The span of the submitter, parent of the span on the Qt thread:
+        self.parent_span_id = current_span_id()
+        self.submitted_ns = time.perf_counter_ns()
+
+    def __call__(self, viewer: Viewer) -> Any:
+        # Skip calls that were cancelled while waiting in the queue:
+        if not self.future.set_running_or_notify_cancel():
+            aprint(f"Skipping cancelled napari call #{self.call_id}.")
+            return None
+
+        queue_wait_ms = (time.perf_counter_ns() - self.submitted_ns) / 1e6
+        with (
+            ExceptionGuard() as guard,
+            span(
+                "napari.qt_execute",
+                parent_id=self.parent_span_id,
+                call_id=self.call_id,
+                queue_wait_ms=queue_wait_ms,
+            ),
+        ):
+            result = self.function(viewer)
+            self.future.set_result(result)
+            return result
+
+        aprint(
+            f"Exception in napari call #{self.call_id} on napari's QT thread:\n{guard.exception_description}"
+        )
+        self.future.set_result(guard)
+        enqueue_exception(guard.exception_value)
+        return guard
+
+    def __repr__(self) -> str:
+        return f"NapariCall(#{self.call_id}, {self.function!r})"
+
+
+def submit_to_napari(
+    to_napari_queue: Queue,
+    function: Callable[[napari.Viewer], Any],
+    timeout: float | None = None,
+) -> Future:
+    """Submit a callable for execution on napari's Qt thread.
+
+    Args:
+        to_napari_queue: The bridge queue consumed on the Qt thread.
+        function: A callable accepting a ``napari.Viewer``.
+        timeout: Maximum seconds to wait for room in the queue, or
+            ``None`` to wait indefinitely.
+
+    Returns:
+        A ``Future`` resolved with the value returned by *function*, or
+        with an ``ExceptionGuard`` if it raised.
+
+    Raises:
+        queue.Full: If the queue stayed full for *timeout* seconds.
+    """
+    call = NapariCall(function)
+    to_napari_queue.put(call, timeout=timeout)
+    return call.future
+
+
+def call_in_napari(
+    to_napari_queue: Queue,
+    function: Callable[[napari.Viewer], Any],
+    timeout: float | None = 300.0,
+) -> Any:
+    """Run a callable on napari's Qt thread and wait for its result.
+
+    If no result arrives within *timeout* seconds the call is cancelled:
+    it will be skipped if it has not started yet, and its result is
+    discarded otherwise.
+
+    Args:
+        to_napari_queue: The bridge queue consumed on the Qt thread.
+        function: A callable accepting a ``napari.Viewer``.
+        timeout: Maximum seconds to wait, or ``None`` to wait
+            indefinitely. Defaults to 300 (5 minutes).
+
+    Returns:
+        The value returned by *function*, or an ``ExceptionGuard`` if it
+        raised.
+
+    Raises:
+        TimeoutError: If no result arrived within *timeout* seconds.
+    """
+    with span("napari.call"):
+        try:
+            future = submit_to_napari(to_napari_queue, function, timeout=timeout)
+        except Full:
+            raise TimeoutError(
+                f"Timeout waiting for napari's queue to accept a call after {timeout} seconds."
+            )
+
+        try:
+            return future.result(timeout=timeout)
+        except (FutureTimeoutError, CancelledError):
+            future.cancel()
+            raise TimeoutError(
+                f"Timeout waiting for napari to respond after {timeout} seconds."
+            )
+
+
+async def acall_in_napari(
+    to_napari_queue: Queue,
+    function: Callable[[napari.Viewer], Any],
+    timeout: float | None = 300.0,
+) -> Any:
+    """Awaitable variant of ``call_in_napari``, for coroutines.
+
+    The event loop is never blocked: the result is awaited through the
+    call's future, resolved from the Qt thread, and waiting for room in a
+    full queue happens in a worker thread.
+
+    Args:
+        to_napari_queue: The bridge queue consumed on the Qt thread.
+        function: A callable accepting a ``napari.Viewer``.
+        timeout: Maximum seconds to wait, or ``None`` to wait
+            indefinitely. Defaults to 300 (5 minutes).
+
+    Returns:
+        The value returned by *function*, or an ``ExceptionGuard`` if it
+        raised.
+
+    Raises:
+        TimeoutError: If no result arrived within *timeout* seconds.
+    """
+    with span("napari.call"):
+        call = NapariCall(function)
+        try:
+            to_napari_queue.put_nowait(call)
+        except Full:
+            try:
+                await asyncio.to_thread(to_napari_queue.put, call, timeout=timeout)
+            except Full:
+                raise TimeoutError(
+                    f"Timeout waiting for napari's queue to accept a call after {timeout} seconds."
+                )
+
+        try:
+            # Cancelling the wrapper on timeout also cancels the call:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(call.future), timeout=timeout
+            )
+        except (asyncio.TimeoutError, CancelledError):
+            call.future.cancel()
+            raise TimeoutError(
+                f"Timeout waiting for napari to respond after {timeout} seconds."
+            )
+
+
 class NapariBridge:
     """Queue-based bridge for executing code on napari's Qt thread.
 
     The bridge spawns a background ``@thread_worker`` that polls a
-    *to_napari_queue* for callables. Each callable is yielded so that
-    napari's signal/slot mechanism invokes it on the Qt event loop. The
-    result (or any caught exception) is placed on a *from_napari_queue*
-    for the caller to retrieve.
+    *to_napari_queue* for calls. Each call is yielded so that napari's
+    signal/slot mechanism invokes it on the Qt event loop. ``NapariCall``
+    instances (see ``submit_to_napari``) resolve their own future; bare
+    callables are still supported for backwards compatibility, in which
+    case the result (or any caught exception) is placed on
+    *from_napari_queue*.
 
     Attributes:
         viewer: The napari ``Viewer`` instance this bridge is bound to.
-        to_napari_queue: Queue for sending callables to the Qt thread.
-        from_napari_queue: Queue for receiving results from the Qt thread.
+        viewer_info_cache: Event-invalidated cache of layer descriptions.
+        to_napari_queue: Queue for sending calls to the Qt thread.
+        from_napari_queue: Queue for receiving results of bare callables.
     """
 
     def __init__(self, viewer: Viewer):
         self.viewer = viewer
 
-        self.to_napari_queue = Queue(maxsize=16)
+        # Layer descriptions are cached and only recomputed when layers change:
+        self.viewer_info_cache = ViewerInfoCache(viewer)
+
+        # Calls from different chat sessions are served in turn:
+        self.to_napari_queue = FairNapariQueue(maxsize=16)
         self.from_napari_queue = Queue(maxsize=16)
 
         #
         def qt_code_executor(fun: Callable[[napari.Viewer], None]):
+            # Calls with their own future deliver their result directly:
+            if isinstance(fun, NapariCall):
+                with asection(f"qt_code_executor received call #{fun.call_id}."):
+                    fun(viewer)
+                return
+
             with asection(f"qt_code_executor received delegated function."):
                 with ExceptionGuard() as guard:
                     aprint("Executing now!")
@@ -111,30 +367,43 @@ class NapariBridge:
     def get_viewer_info(self) -> str:
         """Collect viewer state information on the Qt thread and return it.
 
+        Only the layers that changed since the previous call are described
+        again; other layer descriptions come from ``viewer_info_cache``.
+
         Returns:
             A string summarising the current viewer state, or an error
             message if the information could not be retrieved.
         """
+        info = self._execute_in_napari_context(self._collect_viewer_info)
+        return _viewer_info_or_error(info)
 
-        # Setting up delegated function:
-        delegated_function = lambda v: get_viewer_info(v)
+    async def aget_viewer_info(self) -> str:
+        """Awaitable variant of ``get_viewer_info``, for coroutines.
 
-        try:
-            # execute delegated function in napari context:
-            info = self._execute_in_napari_context(delegated_function)
+        The event loop keeps serving other coroutines while the viewer
+        information is collected on the Qt thread.
 
-            return info
+        Returns:
+            A string summarising the current viewer state, or an error
+            message if the information could not be retrieved.
+        """
+        info = await self._aexecute_in_napari_context(self._collect_viewer_info)
+        return _viewer_info_or_error(info)
 
-        except Exception as e:
-            # print exception stack trace:
-            import traceback
+    def _collect_viewer_info(self, viewer: Viewer) -> str:
+        """Describe the viewer, on the Qt thread."""
+        return self.viewer_info_cache.get_viewer_info()
 
-            traceback.print_exc()
+    def take_snapshot(self, max_size: int | None = None):
+        """Take a screenshot of the napari viewer.
 
-            return "Could not get information about the viewer because of an error."
+        Only grabbing the frame happens on the Qt thread, and a recent
+        frame is reused if the scene has not changed since (see
+        ``SnapshotService``). The image is downscaled on the calling thread.
 
-    def take_snapshot(self):
-        """Take a screenshot of the napari viewer on the Qt thread.
+        Args:
+            max_size: Maximum width and height of the image in pixels,
+                defaults to the snapshot service's configured size.
 
         Returns:
             A ``PIL.Image.Image`` of the full napari window, or ``None``
@@ -143,16 +412,18 @@ class NapariBridge:
 
         # Delegated function:
         def _delegated_snapshot_function(viewer: Viewer):
-            # Take a screenshot of the whole Napari viewer
-            screenshot = self.viewer.screenshot(canvas_only=False, flash=False)
-
-            # Convert the screenshot (NumPy array) to a PIL image
-            pil_image = fromarray(screenshot)
+            # Grab the whole Napari viewer, or reuse a recent frame:
+            service = get_snapshot_service(self.viewer)
+            return service.grab(canvas_only=False), service.max_size
 
-            return pil_image
+        # Execute delegated function in napari context:
+        result = self._execute_in_napari_context(_delegated_snapshot_function)
+        if not isinstance(result, tuple):
+            return result
+        screenshot, default_max_size = result
 
-        # Execute delegated function in napari context and return result:
-        return self._execute_in_napari_context(_delegated_snapshot_function)
+        # Convert the screenshot (NumPy array) to a downscaled PIL image:
+        return downscale_image(fromarray(screenshot), max_size or default_max_size)
 
     def stop(self):
         """Signal the background worker to exit."""
@@ -162,12 +433,24 @@ class NapariBridge:
         except Exception:
             pass
 
+    def submit(self, delegated_function, timeout: float | None = None) -> Future:
+        """Submit a callable for execution in napari's Qt context.
+
+        Args:
+            delegated_function: A callable accepting a ``napari.Viewer``.
+            timeout: Maximum seconds to wait for room in the queue.
+
+        Returns:
+            A ``Future`` resolved with the result of *delegated_function*,
+            or with an ``ExceptionGuard`` if it raised.
+        """
+        return submit_to_napari(self.to_napari_queue, delegated_function, timeout)
+
     def _execute_in_napari_context(self, delegated_function, timeout: float = 300.0):
-        """Execute a callable in napari's Qt context via the queue bridge.
+        """Execute a callable in napari's Qt context and wait for its result.
 
-        The callable is placed on ``to_napari_queue`` and the method blocks
-        until a result appears on ``from_napari_queue`` or the timeout
-        elapses.
+        Each call gets its own future, so concurrent callers never receive
+        each other's results, and a call that times out is cancelled.
 
         Args:
             delegated_function: A callable accepting a ``napari.Viewer``
@@ -177,35 +460,71 @@ class NapariBridge:
 
         Returns:
             The value returned by *delegated_function*, an error message
-            string if an exception was caught, or ``None`` on unexpected
-            failure.
+            string if an exception was caught or on timeout, or ``None``
+            on unexpected failure.
         """
         try:
-            # Send code to napari:
-            self.to_napari_queue.put(delegated_function)
+            response = call_in_napari(
+                self.to_napari_queue, delegated_function, timeout=timeout
+            )
+        except Exception as e:
+            return _failure_to_response(e)
 
-            # Get response with timeout to prevent deadlocks:
-            try:
-                response = self.from_napari_queue.get(timeout=timeout)
-            except Empty:
-                aprint(f"Timeout waiting for napari response after {timeout}s")
-                return f"Error: Timeout waiting for napari to respond after {timeout} seconds."
+        return _exception_guard_to_response(response)
+
+    async def _aexecute_in_napari_context(
+        self, delegated_function, timeout: float = 300.0
+    ):
+        """Awaitable variant of ``_execute_in_napari_context``, for coroutines.
+
+        Args:
+            delegated_function: A callable accepting a ``napari.Viewer``
+                and returning an arbitrary result.
+            timeout: Maximum seconds to wait for a response. Defaults to
+                300 (5 minutes).
+
+        Returns:
+            The value returned by *delegated_function*, an error message
+            string if an exception was caught or on timeout, or ``None``
+            on unexpected failure.
+        """
+        try:
+            response = await acall_in_napari(
+                self.to_napari_queue, delegated_function, timeout=timeout
+            )
+        except Exception as e:
+            return _failure_to_response(e)
 
-            if isinstance(response, ExceptionGuard):
-                exception_guard = response
-                # print stack trace:
-                import traceback
+        return _exception_guard_to_response(response)
 
-                traceback.print_exc()
-                # raise exception_guard.exception
-                return f"Error: {exception_guard.exception_type_name} with message: '{str(exception_guard.exception)}' ."
 
-            return response
+def _exception_guard_to_response(response: Any) -> Any:
+    """Turn an ``ExceptionGuard`` returned from napari into an error message."""
+    if isinstance(response, ExceptionGuard):
+        return f"Error: {response.exception_type_name} with message: '{str(response.exception_value)}' ."
+    return response
 
-        except Exception:
-            # print exception stack trace:
-            import traceback
 
-            traceback.print_exc()
+def _failure_to_response(e: Exception) -> str | None:
+    """Return the response of a call to napari that failed with *e*.
 
-            return None
+    Returns:
+        An error message on timeout, otherwise ``None``.
+    """
+    if isinstance(e, TimeoutError):
+        aprint(str(e))
+        return f"Error: {e}"
+
+    # print exception stack trace:
+    import traceback
+
+    traceback.print_exc()
+
+    return None
+
+
+def _viewer_info_or_error(info: str | None) -> str:
+    """Return the viewer information, or an error message if there is none."""
+    if info is None:
+        return "Could not get information about the viewer because of an error."
+    return info
@@ -3,8 +3,14 @@
 This module wires together the LLM backend, system prompt, tools, and
 napari communication queues to produce a fully configured ``OmegaAgent``
 ready to handle user conversations.
+
+``OmegaSessionFactory`` builds the parts that do not depend on the chat
+session (tool LLM, plugin catalog, external tool classes, system prompt,
+capability checks) once, so that each new session only has to create
+its tools and agent.
 """
 
+import threading
 from queue import Queue
 
 from arbol import aprint, asection
@@ -21,7 +27,6 @@ from napari_chatgpt.llm.litemind_api import (
 )
 from napari_chatgpt.omega_agent.omega_agent import OmegaAgent
 from napari_chatgpt.omega_agent.prompts import DIDACTICS, PERSONALITY, SYSTEM
-from napari_chatgpt.utils.configuration.app_configuration import AppConfiguration
 from napari_chatgpt.utils.notebook.jupyter_notebook import JupyterNotebookFile
 
 
@@ -44,7 +49,8 @@ def initialize_omega_agent(
     This is the main entry point for agent initialisation. It creates
     the tool LLM, assembles the toolset, attaches the system prompt
     (including personality and optional didactic mode), and returns the
-    ready-to-use ``OmegaAgent``.
+    ready-to-use ``OmegaAgent``. To create several agents with the same
+    settings, use an ``OmegaSessionFactory`` instead.
 
     Args:
         to_napari_queue: Queue for sending callables to the napari Qt
@@ -71,70 +77,194 @@ def initialize_omega_agent(
     Raises:
         ValueError: If either queue argument is ``None``.
     """
-    if to_napari_queue is None or from_napari_queue is None:
-        raise ValueError("to_napari_queue and from_napari_queue must not be None")
-
-    with asection("Initialising Omega Agent"):
-        # Get app configuration:
-        config = AppConfiguration("omega")
-
-        # get the LLM for tools:
-        tool_llm = get_llm(model_name=tool_llm_model_name, temperature=tool_temperature)
-
-        # tool context:
-        tool_context = {
-            "llm": tool_llm,
-            "to_napari_queue": to_napari_queue,
-            "from_napari_queue": from_napari_queue,
-            "notebook": notebook,
-            "verbose": verbose,
-            "callback": None,  # This will be set later
-        }
-
-        toolset: ToolSet = prepare_toolset(tool_context, main_llm_model_name)
-
-        # Add built-in web search tool if required:
-        if has_builtin_websearch_tool:
-            if has_model_support_for(
-                main_llm_model_name, [ModelFeatures.WebSearchTool]
-            ):
-                aprint("Builtin websearch tool has been added to Omega.")
-                toolset.add_builtin_web_search_tool()
-            else:
-                aprint(
-                    f"Model '{main_llm_model_name}' does not support the web search tool."
+    factory = OmegaSessionFactory(
+        to_napari_queue=to_napari_queue,
+        from_napari_queue=from_napari_queue,
+        main_llm_model_name=main_llm_model_name,
+        tool_llm_model_name=tool_llm_model_name,
+        temperature=temperature,
+        tool_temperature=tool_temperature,
+        has_builtin_websearch_tool=has_builtin_websearch_tool,
+        notebook=notebook,
+        agent_personality=agent_personality,
+        be_didactic=be_didactic,
+        verbose=verbose,
+    )
+    return factory.create_agent(tool_callbacks=tool_callbacks)
+
+
+class OmegaSessionFactory:
+    """Creates Omega agents for chat sessions sharing the same settings.
+
+    The expensive, session-independent resources are built once, on the
+    first call to ``prepare`` or ``create_agent``: the tool LLM, the
+    napari plugin catalog, the external tool classes registered through
+    entry points, the capability checks (vision, Aydin, built-in web
+    search) and the system prompt. Each session then only creates its
+    own tool instances and agent, which hold per-session state such as
+    tool callbacks, the last generated code, and the conversation.
+    """
+
+    def __init__(
+        self,
+        to_napari_queue: Queue = None,
+        from_napari_queue: Queue = None,
+        main_llm_model_name: str = None,
+        tool_llm_model_name: str = None,
+        temperature: float = 0.0,
+        tool_temperature: float = 0.0,
+        has_builtin_websearch_tool: bool = True,
+        notebook: JupyterNotebookFile = None,
+        agent_personality: str = "neutral",
+        be_didactic: bool = False,
+        verbose: bool = False,
+    ):
+        """Create a session factory; see ``initialize_omega_agent`` for the arguments.
+
+        Raises:
+            ValueError: If either queue argument is ``None``.
+        """
+        if to_napari_queue is None or from_napari_queue is None:
+            raise ValueError("to_napari_queue and from_napari_queue must not be None")
+
+        self.to_napari_queue = to_napari_queue
+        self.from_napari_queue = from_napari_queue
+        self.main_llm_model_name = main_llm_model_name
+        self.tool_llm_model_name = tool_llm_model_name
+        self.temperature = temperature
+        self.tool_temperature = tool_temperature
+        self.has_builtin_websearch_tool = has_builtin_websearch_tool
+        self.notebook = notebook
+        self.agent_personality = agent_personality
+        self.be_didactic = be_didactic
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self._prepared = False
+
+    def prepare(self):
+        """Build the shared, session-independent resources (once).
+
+        Safe to call from several threads; later calls return immediately.
+        """
+        with self._lock:
+            if self._prepared:
+                return
+
+            with asection("Preparing shared Omega session resources"):
+                # get the LLM for tools:
+                self._tool_llm = get_llm(
+                    model_name=self.tool_llm_model_name,
+                    temperature=self.tool_temperature,
                 )
 
-        # Add tool callbacks:
-        toolset.add_tool_callback(tool_callbacks)
+                # Get the LiteMind API:
+                self._api = get_litemind_api()
 
-        # Get the LiteMind API:
-        api = get_litemind_api()
+                # Check which optional tools can be used:
+                from napari_chatgpt.omega_agent.tools.napari.image_denoising_tool import (
+                    _aydin_available,
+                )
+                from napari_chatgpt.utils.llm.vision import is_vision_available
 
-        # Get the main LLM:
-        omega_agent = OmegaAgent(
-            api=api,
-            name="Omega",
-            model_name=main_llm_model_name,
-            temperature=temperature,
-            toolset=toolset,
-        )
+                self._vision_available = bool(is_vision_available())
+                self._aydin_available = _aydin_available()
 
-        # Format system instructions:
-        system_message = Message(role="system")
-        system_message.append_templated_text(
-            SYSTEM,
-            personality=PERSONALITY[agent_personality],
-            didactics=DIDACTICS if be_didactic else "",
-        )
-        with asection("System Prompt:"):
-            aprint(str(system_message))
+                # Scan the installed napari plugins:
+                from napari_chatgpt.omega_agent.tools.napari.napari_plugin_tool import (
+                    PluginCatalog,
+                )
+
+                with asection("Building napari plugin catalog"):
+                    self._plugin_catalog = PluginCatalog()
+
+                # Load the external tool classes:
+                self._external_tool_classes = _load_external_tool_classes()
+
+                # Check for built-in web search support:
+                self._add_builtin_websearch_tool = False
+                if self.has_builtin_websearch_tool:
+                    if has_model_support_for(
+                        self.main_llm_model_name, [ModelFeatures.WebSearchTool]
+                    ):
+                        aprint("Builtin websearch tool will be added to Omega.")
+                        self._add_builtin_websearch_tool = True
+                    else:
+                        aprint(
+                            f"Model '{self.main_llm_model_name}' does not support the web search tool."
+                        )
+
+                # Format system instructions:
+                self._system_message = Message(role="system")
+                self._system_message.append_templated_text(
+                    SYSTEM,
+                    personality=PERSONALITY[self.agent_personality],
+                    didactics=DIDACTICS if self.be_didactic else "",
+                )
+                with asection("System Prompt:"):
+                    aprint(str(self._system_message))
+
+            self._prepared = True
+
+    def create_agent(self, tool_callbacks: BaseToolCallbacks | None = None) -> Agent:
+        """Create the agent of a new chat session.
+
+        Args:
+            tool_callbacks: Optional callbacks for tool lifecycle events of
+                this session.
+
+        Returns:
+            A configured ``OmegaAgent`` instance.
+        """
+        self.prepare()
+
+        with asection("Initialising Omega Agent"):
+            # tool context:
+            tool_context = {
+                "llm": self._tool_llm,
+                "to_napari_queue": self.to_napari_queue,
+                "from_napari_queue": self.from_napari_queue,
+                "notebook": self.notebook,
+                "verbose": self.verbose,
+                "plugin_catalog": self._plugin_catalog,
+                "callback": None,  # This will be set later
+            }
+
+            # Instantiate this session's tools:
+            tools = []
+            _append_all_tools(
+                tool_context,
+                tools,
+                self.main_llm_model_name,
+                vision_available=self._vision_available,
+                aydin_available=self._aydin_available,
+            )
+            _discover_external_tools(
+                tool_context, tools, tool_classes=self._external_tool_classes
+            )
+            toolset = ToolSet(tools)
+
+            # Add built-in web search tool if required:
+            if self._add_builtin_websearch_tool:
+                toolset.add_builtin_web_search_tool()
+
+            # Add tool callbacks:
+            toolset.add_tool_callback(tool_callbacks)
+
+            # Get the main LLM:
+            omega_agent = OmegaAgent(
+                api=self._api,
+                name="Omega",
+                model_name=self.main_llm_model_name,
+                temperature=self.temperature,
+                toolset=toolset,
+            )
 
-        # Append system instructions:
-        omega_agent.append_system_message(system_message)
+            # Append system instructions:
+            omega_agent.append_system_message(self._system_message.copy())
 
-        # Return agent
-        return omega_agent
+            # Return agent
+            return omega_agent
 
 
 def prepare_toolset(tool_context, vision_llm_model_name) -> ToolSet:
@@ -162,7 +292,13 @@ def prepare_toolset(tool_context, vision_llm_model_name) -> ToolSet:
     return toolset
 
 
-def _append_all_tools(tool_context, tools, vision_llm_model_name):
+def _append_all_tools(
+    tool_context,
+    tools,
+    vision_llm_model_name,
+    vision_available: bool | None = None,
+    aydin_available: bool | None = None,
+):
     """Instantiate all built-in Omega tools and append them to *tools*.
 
     Conditionally includes vision and denoising tools based on runtime
@@ -172,6 +308,8 @@ def _append_all_tools(tool_context, tools, vision_llm_model_name):
         tool_context: Shared context dictionary forwarded to each tool.
         tools: Mutable list to which new tool instances are appended.
         vision_llm_model_name: Model name passed to the vision tool.
+        vision_available: Whether vision is available; checked if ``None``.
+        aydin_available: Whether Aydin is installed; checked if ``None``.
     """
     from napari_chatgpt.omega_agent.tools.napari.viewer_control_tool import (
         NapariViewerControlTool,
@@ -227,9 +365,12 @@ def _append_all_tools(tool_context, tools, vision_llm_model_name):
 
     tools.append(NapariLayerActionTool(**tool_context))
 
-    from napari_chatgpt.utils.llm.vision import is_vision_available
+    if vision_available is None:
+        from napari_chatgpt.utils.llm.vision import is_vision_available
 
-    if is_vision_available():
+        vision_available = is_vision_available()
+
+    if vision_available:
         from napari_chatgpt.omega_agent.tools.napari.viewer_vision_tool import (
             NapariViewerVisionTool,
         )
@@ -240,11 +381,14 @@ def _append_all_tools(tool_context, tools, vision_llm_model_name):
             )
         )
 
-    from napari_chatgpt.omega_agent.tools.napari.image_denoising_tool import (
-        _aydin_available,
-    )
+    if aydin_available is None:
+        from napari_chatgpt.omega_agent.tools.napari.image_denoising_tool import (
+            _aydin_available,
+        )
+
+        aydin_available = _aydin_available()
 
-    if _aydin_available():
+    if aydin_available:
         from napari_chatgpt.omega_agent.tools.napari.image_denoising_tool import (
             ImageDenoisingTool,
         )
@@ -282,7 +426,9 @@ def _append_all_tools(tool_context, tools, vision_llm_model_name):
     tools.append(PipInstallTool(**tool_context))
 
 
-def _discover_external_tools(tool_context: dict, tools: list) -> None:
+def _discover_external_tools(
+    tool_context: dict, tools: list, tool_classes: list | None = None
+) -> None:
     """Discover and instantiate tools registered via entry points.
 
     External packages can register tools by adding an entry point in
@@ -293,6 +439,31 @@ def _discover_external_tools(tool_context: dict, tools: list) -> None:
 
     Each entry point must resolve to a class that subclasses
     ``BaseOmegaTool``. Invalid entries are logged and skipped.
+
+    Args:
+        tool_context: Shared context dictionary forwarded to each tool.
+        tools: Mutable list to which new tool instances are appended.
+        tool_classes: ``(name, class)`` pairs previously returned by
+            ``_load_external_tool_classes``; entry points are loaded if
+            ``None``.
+    """
+    if tool_classes is None:
+        tool_classes = _load_external_tool_classes()
+
+    for name, tool_class in tool_classes:
+        try:
+            tool_instance = tool_class(**tool_context)
+            tools.append(tool_instance)
+            aprint(f"Registered external tool: {name} ({tool_class.__name__})")
+        except Exception as e:
+            aprint(f"Failed to load external tool '{name}': {e}")
+
+
+def _load_external_tool_classes() -> list[tuple[str, type]]:
+    """Load the tool classes registered via entry points.
+
+    Returns:
+        A list of ``(entry point name, tool class)`` pairs.
     """
     import importlib.metadata
 
@@ -304,6 +475,7 @@ def _discover_external_tools(tool_context: dict, tools: list) -> None:
         # Python 3.9 compatibility: entry_points() doesn't accept group=
         eps = importlib.metadata.entry_points().get("napari_chatgpt.tools", [])
 
+    tool_classes = []
     for ep in eps:
         try:
             tool_class = ep.load()
@@ -315,8 +487,8 @@ def _discover_external_tools(tool_context: dict, tools: list) -> None:
                     f"{tool_class} is not a subclass of BaseOmegaTool"
                 )
                 continue
-            tool_instance = tool_class(**tool_context)
-            tools.append(tool_instance)
-            aprint(f"Registered external tool: {ep.name} ({tool_class.__name__})")
+            tool_classes.append((ep.name, tool_class))
         except Exception as e:
             aprint(f"Failed to load external tool '{ep.name}': {e}")
+
+    return tool_classes
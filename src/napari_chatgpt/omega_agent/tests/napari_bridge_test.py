@@ -1,16 +1,38 @@
 """Tests for NapariBridge functionality using mocked queues."""
 
-from queue import Queue
+import asyncio
+import threading
+from queue import Full, Queue
 from unittest.mock import MagicMock
 
+import pytest
+
 from napari_chatgpt.omega_agent.napari_bridge import (
+    FairNapariQueue,
     NapariBridge,
+    NapariCall,
     _get_viewer_info,
     _set_viewer_info,
+    acall_in_napari,
+    call_in_napari,
+    napari_lane,
+    submit_to_napari,
 )
 from napari_chatgpt.utils.python.exception_guard import ExceptionGuard
 
 
+def _serve(queue: Queue, viewer, n: int = 1):
+    """Emulate napari's Qt thread: run n calls from the queue."""
+
+    def _loop():
+        for _ in range(n):
+            queue.get()(viewer)
+
+    thread = threading.Thread(target=_loop, daemon=True)
+    thread.start()
+    return thread
+
+
 class TestExecuteInNapariContext:
     """Test _execute_in_napari_context by constructing a bridge with mocked internals."""
 
@@ -24,32 +46,39 @@ class TestExecuteInNapariContext:
 
     def test_happy_path(self):
         bridge = self._make_bridge_with_mocked_queues()
-        bridge.from_napari_queue.put("result_value")
+        _serve(bridge.to_napari_queue, bridge.viewer)
 
-        result = bridge._execute_in_napari_context(lambda v: "ignored", timeout=1.0)
+        result = bridge._execute_in_napari_context(
+            lambda v: "result_value", timeout=1.0
+        )
 
         assert result == "result_value"
 
     def test_timeout_path(self):
         bridge = self._make_bridge_with_mocked_queues()
-        # from_napari_queue is empty, so get() will timeout
+        # Nobody serves the queue, so the call times out:
 
         result = bridge._execute_in_napari_context(lambda v: "ignored", timeout=0.1)
 
         assert "Timeout" in result
 
+        # The timed-out call was cancelled and is skipped when finally run:
+        call = bridge.to_napari_queue.get_nowait()
+        assert call.future.cancelled()
+        assert call(bridge.viewer) is None
+
     def test_exception_guard_response(self):
         bridge = self._make_bridge_with_mocked_queues()
-        guard = ExceptionGuard(print_stacktrace=False)
-        guard.exception = ValueError
-        guard.exception_type_name = "ValueError"
-        guard.exception_value = ValueError("test error")
-        bridge.from_napari_queue.put(guard)
+        _serve(bridge.to_napari_queue, bridge.viewer)
 
-        result = bridge._execute_in_napari_context(lambda v: "ignored", timeout=1.0)
+        def _failing(viewer):
+            raise ValueError("test error")
+
+        result = bridge._execute_in_napari_context(_failing, timeout=1.0)
 
         assert "Error" in result
         assert "ValueError" in result
+        assert "test error" in result
 
     def test_put_exception_path(self):
         bridge = self._make_bridge_with_mocked_queues()
@@ -62,6 +91,112 @@ class TestExecuteInNapariContext:
         assert result is None
 
 
+class TestNapariCalls:
+    """Test per-call futures and correlation of results."""
+
+    def test_call_ids_are_unique(self):
+        first = NapariCall(lambda v: None)
+        second = NapariCall(lambda v: None)
+        assert second.call_id > first.call_id
+
+    def test_exception_resolves_future_with_guard(self):
+        call = NapariCall(lambda v: 1 / 0)
+        call(None)
+        result = call.future.result(timeout=1.0)
+        assert isinstance(result, ExceptionGuard)
+        assert result.exception_type_name == "ZeroDivisionError"
+
+    def test_out_of_order_results_go_to_the_right_caller(self):
+        queue = Queue()
+        futures = [submit_to_napari(queue, lambda v, i=i: i * 10) for i in range(5)]
+
+        # Run the calls in reverse order:
+        calls = [queue.get_nowait() for _ in range(5)]
+        for call in reversed(calls):
+            call(None)
+
+        assert [f.result(timeout=1.0) for f in futures] == [0, 10, 20, 30, 40]
+
+    def test_concurrent_callers(self):
+        queue = Queue()
+        _serve(queue, viewer=None, n=8)
+        results = {}
+
+        def _caller(i):
+            results[i] = call_in_napari(queue, lambda v: i, timeout=5.0)
+
+        threads = [threading.Thread(target=_caller, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5.0)
+
+        assert results == {i: i for i in range(8)}
+
+    def test_call_in_napari_timeout(self):
+        with pytest.raises(TimeoutError):
+            call_in_napari(Queue(), lambda v: None, timeout=0.1)
+
+
+class TestAsyncNapariCalls:
+    """Test the awaitable bridge API used by the chat server's event loop."""
+
+    def _run(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_acall_in_napari(self):
+        queue = Queue()
+        _serve(queue, viewer="viewer")
+
+        assert self._run(acall_in_napari(queue, lambda v: f"{v}!", timeout=5.0)) == (
+            "viewer!"
+        )
+
+    def test_event_loop_is_not_blocked(self):
+        queue = Queue()
+        ticks = []
+
+        async def _ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        async def _main():
+            ticker = asyncio.ensure_future(_ticker())
+            call = asyncio.ensure_future(acall_in_napari(queue, lambda v: 42))
+            await asyncio.sleep(0.1)
+            # The call is still waiting for napari, the loop kept running:
+            assert not call.done() and len(ticks) > 3
+            _serve(queue, viewer=None)
+            result = await call
+            ticker.cancel()
+            return result
+
+        assert self._run(_main()) == 42
+
+    def test_acall_in_napari_timeout_cancels_call(self):
+        queue = Queue()
+
+        with pytest.raises(TimeoutError):
+            self._run(acall_in_napari(queue, lambda v: None, timeout=0.1))
+
+        call = queue.get_nowait()
+        assert call.future.cancelled()
+
+    def test_aget_viewer_info(self):
+        bridge = object.__new__(NapariBridge)
+        bridge.to_napari_queue = Queue()
+        bridge.viewer_info_cache = MagicMock()
+        bridge.viewer_info_cache.get_viewer_info.return_value = "viewer info"
+        _serve(bridge.to_napari_queue, viewer=None)
+
+        assert self._run(bridge.aget_viewer_info()) == "viewer info"
+
+
 class TestViewerInfoThreadSafety:
     """Test _set_viewer_info and _get_viewer_info global functions."""
 
@@ -77,3 +212,37 @@ class TestViewerInfoThreadSafety:
         _set_viewer_info("first")
         _set_viewer_info("second")
         assert _get_viewer_info() == "second"
+
+
+class TestFairNapariQueue:
+    """Calls from different lanes are served in turn."""
+
+    def test_round_robin_between_lanes(self):
+        queue = FairNapariQueue()
+        calls = {}
+        for lane, n in [("a", 3), ("b", 2)]:
+            with napari_lane(lane):
+                for i in range(n):
+                    call = NapariCall(lambda v: None)
+                    calls[call.call_id] = f"{lane}{i}"
+                    queue.put(call)
+        queue.put(None)
+
+        assert queue.qsize() == 6
+        order = [queue.get() for _ in range(6)]
+        # The stop sentinel has its own lane, which also gets its turn:
+        assert [calls[c.call_id] if c else None for c in order] == [
+            "a0",
+            "b0",
+            None,
+            "a1",
+            "b1",
+            "a2",
+        ]
+        assert queue.empty()
+
+    def test_maxsize(self):
+        queue = FairNapariQueue(maxsize=1)
+        queue.put(NapariCall(lambda v: None))
+        with pytest.raises(Full):
+            queue.put(NapariCall(lambda v: None), timeout=0.01)
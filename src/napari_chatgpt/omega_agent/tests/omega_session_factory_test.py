@@ -0,0 +1,91 @@
+"""Tests for OmegaSessionFactory, with the LLM backend mocked out."""
+
+import time
+from queue import Queue
+from unittest.mock import MagicMock
+
+import pytest
+
+import napari_chatgpt.omega_agent.omega_init as omega_init
+import napari_chatgpt.omega_agent.tools.napari.napari_plugin_tool as plugin_tool
+import napari_chatgpt.utils.llm.vision as vision
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    """Mock the LLM backend and count the expensive initialisation steps."""
+    counters = {"llm": 0, "catalog": 0, "entry_points": 0}
+
+    def fake_get_llm(**kwargs):
+        counters["llm"] += 1
+        return MagicMock()
+
+    class CountingCatalog(plugin_tool.PluginCatalog):
+        def _build_catalog(self):
+            counters["catalog"] += 1
+            # Emulate the cost of scanning plugin manifests:
+            time.sleep(0.2)
+
+    def fake_load_external_tool_classes():
+        counters["entry_points"] += 1
+        return []
+
+    monkeypatch.setattr(omega_init, "get_llm", fake_get_llm)
+    monkeypatch.setattr(omega_init, "get_litemind_api", lambda: MagicMock())
+    monkeypatch.setattr(omega_init, "has_model_support_for", lambda *a, **k: False)
+    monkeypatch.setattr(
+        omega_init, "_load_external_tool_classes", fake_load_external_tool_classes
+    )
+    monkeypatch.setattr(plugin_tool, "PluginCatalog", CountingCatalog)
+    monkeypatch.setattr(vision, "is_vision_available", lambda: False)
+    return counters
+
+
+def _make_factory():
+    return omega_init.OmegaSessionFactory(
+        to_napari_queue=Queue(),
+        from_napari_queue=Queue(),
+        main_llm_model_name="fake-model",
+    )
+
+
+def test_factory_requires_queues():
+    with pytest.raises(ValueError):
+        omega_init.OmegaSessionFactory()
+
+
+def test_shared_resources_built_once(counters):
+    factory = _make_factory()
+
+    agent_1 = factory.create_agent()
+    agent_2 = factory.create_agent()
+
+    assert counters == {"llm": 1, "catalog": 1, "entry_points": 1}
+
+    # Each session gets its own agent and tool instances:
+    assert agent_1 is not agent_2
+    tools_1 = {t.name: t for t in agent_1.toolset.list_tools()}
+    tools_2 = {t.name: t for t in agent_2.toolset.list_tools()}
+    assert tools_1.keys() == tools_2.keys()
+    assert tools_1["NapariPluginTool"] is not tools_2["NapariPluginTool"]
+
+    # ...but the plugin catalog is shared:
+    assert tools_1["NapariPluginTool"].catalog is tools_2["NapariPluginTool"].catalog
+
+
+def test_session_startup_latency(counters):
+    """Once prepared, opening a session must not redo the expensive work."""
+    factory = _make_factory()
+
+    start = time.perf_counter()
+    factory.prepare()
+    prepare_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(3):
+        factory.create_agent()
+    session_time = (time.perf_counter() - start) / 3
+
+    assert counters["catalog"] == 1
+    assert session_time < prepare_time
+    assert session_time < 1.0
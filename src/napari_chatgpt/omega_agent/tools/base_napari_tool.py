@@ -1,12 +1,16 @@
 """Base class for napari-aware Omega tools that generate and execute code.
 
 Provides ``BaseNapariTool``, which delegates code generation to a sub-LLM,
-sends the resulting callable to the napari Qt thread via queues, and
-collects the execution result. Concrete subclasses override ``_run_code``
-to define tool-specific execution logic.
+submits the resulting callable to the napari Qt thread via the bridge
+queue, and waits on that call's own future for the execution result.
+Concrete subclasses override ``_run_code`` to define tool-specific
+execution logic, or, for tools with heavy computations, the three staged
+hooks used by split execution.
 """
 
+import contextvars
 import sys
+import traceback
 from pathlib import Path
 from queue import Queue
 from typing import Any
@@ -15,7 +19,8 @@ from arbol import aprint, asection
 from napari import Viewer
 
 from napari_chatgpt.llm.llm import LLM
-from napari_chatgpt.omega_agent.napari_bridge import _get_viewer_info
+from napari_chatgpt.llm.llm_metrics import llm_caller
+from napari_chatgpt.omega_agent.napari_bridge import _get_viewer_info, call_in_napari
 from napari_chatgpt.omega_agent.tools.base_omega_tool import BaseOmegaTool
 from napari_chatgpt.omega_agent.tools.generic_coding_instructions import (
     omega_generic_codegen_instructions,
@@ -27,6 +32,8 @@ from napari_chatgpt.utils.python.installed_packages import installed_package_lis
 from napari_chatgpt.utils.strings.extract_code import extract_code_from_markdown
 from napari_chatgpt.utils.strings.filter_lines import filter_lines
 from napari_chatgpt.utils.system.information import system_info
+from napari_chatgpt.utils.system.tracing import current_span_id, span
+from napari_chatgpt.utils.system.worker_pool import get_compute_pool, get_io_pool
 
 
 class BaseNapariTool(BaseOmegaTool):
@@ -36,13 +43,28 @@ class BaseNapariTool(BaseOmegaTool):
 
     1. ``run_omega_tool`` formats a prompt with viewer state and sends it to
        the sub-LLM, which returns Python code.
-    2. The code is wrapped in a callable and placed on ``to_napari_queue``.
-    3. The Qt-side worker executes the callable and puts the result on
-       ``from_napari_queue``.
+    2. The code is wrapped in a callable and submitted on
+       ``to_napari_queue`` together with its own future.
+    3. The Qt-side worker executes the callable and resolves that future.
     4. The result (or error) is returned to the calling agent.
 
     Subclasses must implement ``_run_code`` to define how the generated
     code is prepared and executed.
+
+    Tools whose work is dominated by a heavy computation can instead set
+    ``split_execution`` to ``True`` and implement three staged hooks:
+
+    1. ``_prepare_compute`` runs on the Qt thread and captures whatever is
+       needed from the viewer (typically layer data).
+    2. ``_compute`` runs in the shared compute pool, off the Qt thread.
+    3. ``_commit_result`` runs on the Qt thread again to add the result
+       to the viewer.
+
+    This keeps napari responsive during long computations and lets
+    several jobs run at once. Tools whose middle stage mostly waits on
+    the network (downloads, web searches, vision-LLM requests) also set
+    ``io_bound`` to ``True`` so that it runs in the shared I/O pool
+    instead of the compute pool.
     """
 
     def __init__(
@@ -57,6 +79,9 @@ class BaseNapariTool(BaseOmegaTool):
         llm: LLM = None,
         return_direct: bool = False,
         save_last_generated_code: bool = True,
+        split_execution: bool = False,
+        io_bound: bool = False,
+        napari_timeout: float | None = 600.0,
         verbose: bool = False,
         notebook: JupyterNotebookFile | None = None,
         last_generated_code: str | None = None,
@@ -76,13 +101,22 @@ class BaseNapariTool(BaseOmegaTool):
                 ``code=None``.
             to_napari_queue: Queue for sending callables to napari's Qt
                 thread.
-            from_napari_queue: Queue for receiving execution results
-                from napari's Qt thread.
+            from_napari_queue: Legacy queue for receiving results of bare
+                callables; results of this tool's calls are delivered
+                through per-call futures instead.
             llm: LLM instance used for code generation.
             return_direct: If ``True``, the tool returns the raw LLM
                 output without executing it.
             save_last_generated_code: If ``True``, persist the most
                 recent generated code for reference in subsequent calls.
+            split_execution: If ``True``, run the staged hooks
+                (``_prepare_compute``, ``_compute``, ``_commit_result``)
+                instead of running ``_run_code`` entirely on the Qt
+                thread.
+            io_bound: If ``True``, split execution runs ``_compute`` in
+                the I/O pool rather than in the compute pool.
+            napari_timeout: Maximum seconds to wait for each call on
+                napari's Qt thread, or ``None`` to wait indefinitely.
             verbose: Enable verbose logging.
             notebook: Optional Jupyter notebook to record generated code.
             last_generated_code: Seed value for previously generated
@@ -100,6 +134,9 @@ class BaseNapariTool(BaseOmegaTool):
         self.llm = llm
         self.return_direct = return_direct
         self.save_last_generated_code = save_last_generated_code
+        self.split_execution = split_execution
+        self.io_bound = io_bound
+        self.napari_timeout = napari_timeout
         self.verbose = verbose
         self.last_generated_code = last_generated_code
 
@@ -107,6 +144,10 @@ class BaseNapariTool(BaseOmegaTool):
 
         self._installed_package_list = installed_package_list()
 
+        # Stable parts of the prompt, computed on first use:
+        self._instructions_cache: str | None = None
+        self._system_information_cache: str | None = None
+
     def run_omega_tool(self, query: str = "") -> Any:
         """Generate code via the sub-LLM and execute it in napari.
 
@@ -117,6 +158,11 @@ class BaseNapariTool(BaseOmegaTool):
             A success/result string from ``_run_code``, or an error
             message if execution raised an exception.
         """
+        with span("tool.run", tool=self.name):
+            return self._generate_and_run(query)
+
+    def _generate_and_run(self, query: str) -> Any:
+        """Body of ``run_omega_tool``, see there."""
 
         if self.prompt:
             # Instantiate message
@@ -133,32 +179,35 @@ class BaseNapariTool(BaseOmegaTool):
             else:
                 last_generated_code = ""
 
-            # Adding information about packages and Python version to instructions:
-            filled_generic_instructions = omega_generic_codegen_instructions.format(
-                python_version=str(sys.version.split()[0]),
-                packages=", ".join(self._installed_package_list),
-            )
-
-            # Prepend generic instructions to tool specific instructions:
-            instructions = filled_generic_instructions + self.instructions
-
             # Variable for prompt:
             variables = {
                 "input": query,
-                "instructions": instructions,
+                "instructions": self._get_instructions(),
                 "last_generated_code": last_generated_code,
                 "viewer_information": "For reference, below is information about the current state of the napari viewer: \n"
                 + _get_viewer_info(),
-                "system_information": "For reference, below is information about the current system: \n"
-                + system_info(add_python_info=False),
+                "system_information": self._get_system_information(),
             }
 
+            # Split the prompt into a stable prefix and a per-call suffix:
+            static_prompt, dynamic_prompt = split_prompt_template(self.prompt)
+
             # call LLM:
-            result = self.llm.generate(
-                prompt=self.prompt,
-                # system='',
-                variables=variables,
-            )
+            with llm_caller(self.name):
+                if static_prompt:
+                    # The prefix is sent as a cacheable system message:
+                    result = self.llm.generate(
+                        prompt=dynamic_prompt,
+                        system=static_prompt.format_map(variables),
+                        variables=variables,
+                        cache_system=True,
+                    )
+                else:
+                    result = self.llm.generate(
+                        prompt=self.prompt,
+                        # system='',
+                        variables=variables,
+                    )
 
             # Get code from result:
             code = "\n\n".join([m.to_plain_text() for m in result])
@@ -172,14 +221,62 @@ class BaseNapariTool(BaseOmegaTool):
         if self.save_last_generated_code:
             self.last_generated_code = code
 
+        # Split execution: only the viewer-facing stages run on the Qt thread:
+        if self.split_execution:
+            return self._run_split_execution(query, code)
+
         # Setting up delegated function:
         delegated_function = lambda v: self._run_code(query, code, v)
 
-        # Send code to napari:
-        self.to_napari_queue.put(delegated_function)
+        # Execute delegated function in napari context and return result:
+        return self._execute_in_napari(delegated_function)
+
+    def _get_instructions(self) -> str:
+        """Return the generic and tool-specific instructions (cached).
+
+        They only depend on the tool and the installed packages, so they
+        are the same for every call and form part of the cacheable
+        prompt prefix.
+        """
+        if self._instructions_cache is None:
+            # Adding information about packages and Python version to instructions:
+            filled_generic_instructions = omega_generic_codegen_instructions.format(
+                python_version=str(sys.version.split()[0]),
+                # Sorted, so that the prefix does not change between processes:
+                packages=", ".join(sorted(self._installed_package_list)),
+            )
+
+            # Prepend generic instructions to tool specific instructions:
+            self._instructions_cache = filled_generic_instructions + self.instructions
+        return self._instructions_cache
+
+    def _get_system_information(self) -> str:
+        """Return the system information for prompts (cached)."""
+        if self._system_information_cache is None:
+            self._system_information_cache = (
+                "For reference, below is information about the current system: \n"
+                + system_info(add_python_info=False)
+            )
+        return self._system_information_cache
+
+    def _execute_in_napari(self, delegated_function) -> Any:
+        """Run a callable on the Qt thread and wait for its result.
 
-        # Get response:
-        response = self.from_napari_queue.get()
+        Args:
+            delegated_function: A callable accepting a ``napari.Viewer``.
+
+        Returns:
+            The value returned by *delegated_function*, or an error
+            message string if it raised an exception or timed out.
+        """
+
+        # Send code to napari and wait for this call's own response:
+        try:
+            response = call_in_napari(
+                self.to_napari_queue, delegated_function, timeout=self.napari_timeout
+            )
+        except TimeoutError as e:
+            return f"Error: {e} while using tool: {self.__class__.__name__} ."
 
         if isinstance(response, ExceptionGuard):
             exception_guard = response
@@ -188,6 +285,66 @@ class BaseNapariTool(BaseOmegaTool):
 
         return response
 
+    def _run_split_execution(self, query: str, code: str) -> Any:
+        """Run the staged hooks: prepare on Qt, compute in pool, commit on Qt.
+
+        The middle stage runs in the I/O pool if ``io_bound`` is set, in
+        the compute pool otherwise.
+
+        Args:
+            query: The original user request.
+            code: The Python code generated by the sub-LLM, or ``None``.
+
+        Returns:
+            The message returned by ``_commit_result``, or the message
+            returned early by ``_prepare_compute``, or an error message.
+        """
+        with asection(f"Split execution of tool {self.name}:"):
+
+            # Stage 1: capture what we need from the viewer on the Qt thread:
+            aprint("Preparing computation on napari's Qt thread...")
+            prepared = self._execute_in_napari(
+                lambda v: self._prepare_compute(query, code, v)
+            )
+
+            # A string at this point is either an error or an early answer:
+            if isinstance(prepared, str):
+                return prepared
+
+            # Stage 2: run the heavy computation or the network requests
+            # in a worker pool:
+            pool = get_io_pool() if self.io_bound else get_compute_pool()
+            aprint(
+                f"Running computation in the {'I/O' if self.io_bound else 'compute'} pool..."
+            )
+            try:
+                # Run in a copy of our context, e.g. the current chat session:
+                context = contextvars.copy_context()
+                future = pool.submit(
+                    context.run,
+                    self._traced_compute,
+                    current_span_id(),
+                    query,
+                    prepared,
+                )
+                result = future.result()
+            except Exception as e:
+                traceback.print_exc()
+                return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request with tool: {self.__class__.__name__} ."
+
+            # Stage 3: commit the result to the viewer on the Qt thread:
+            aprint("Committing result on napari's Qt thread...")
+            return self._execute_in_napari(
+                lambda v: self._commit_result(query, prepared, result, v)
+            )
+
+    def _traced_compute(
+        self, parent_span_id: int | None, query: str, prepared: Any
+    ) -> Any:
+        """Run ``_compute`` in a span attached to the submitting span."""
+        with span("tool.compute", parent_id=parent_span_id, tool=self.name):
+            return self._compute(query, prepared)
+
     def _run_code(self, query: str, code: str, viewer: Viewer) -> str:
         """Execute tool-specific logic on the Qt thread.
 
@@ -209,6 +366,65 @@ class BaseNapariTool(BaseOmegaTool):
         """
         raise NotImplementedError("This method must be implemented")
 
+    def _prepare_compute(self, query: str, code: str, viewer: Viewer) -> Any:
+        """Split execution, stage 1: runs on the Qt thread.
+
+        Capture from the viewer everything the computation needs, e.g.
+        with :class:`ViewerDataSnapshot`. Keep this stage cheap.
+
+        Args:
+            query: The original user request.
+            code: The Python code generated by the sub-LLM, or ``None``.
+            viewer: The napari ``Viewer`` instance.
+
+        Returns:
+            An arbitrary object handed to ``_compute`` and
+            ``_commit_result``. Returning a string ends the execution
+            early and the string is returned as the tool's result.
+
+        Raises:
+            NotImplementedError: Always, unless overridden.
+        """
+        raise NotImplementedError("This method must be implemented")
+
+    def _compute(self, query: str, prepared: Any) -> Any:
+        """Split execution, stage 2: runs in the compute or I/O pool.
+
+        Must not touch the live viewer.
+
+        Args:
+            query: The original user request.
+            prepared: The object returned by ``_prepare_compute``.
+
+        Returns:
+            The result of the computation, handed to ``_commit_result``.
+
+        Raises:
+            NotImplementedError: Always, unless overridden.
+        """
+        raise NotImplementedError("This method must be implemented")
+
+    def _commit_result(
+        self, query: str, prepared: Any, result: Any, viewer: Viewer
+    ) -> str:
+        """Split execution, stage 3: runs on the Qt thread.
+
+        Add the result of the computation to the viewer.
+
+        Args:
+            query: The original user request.
+            prepared: The object returned by ``_prepare_compute``.
+            result: The object returned by ``_compute``.
+            viewer: The napari ``Viewer`` instance.
+
+        Returns:
+            A result string describing the outcome.
+
+        Raises:
+            NotImplementedError: Always, unless overridden.
+        """
+        raise NotImplementedError("This method must be implemented")
+
     def _prepare_code(
         self,
         code: str,
@@ -336,3 +552,29 @@ def _get_delegated_code(name: str, signature: bool = False):
             code = splitted_code[1]
 
         return code
+
+
+# Prompt templates start with stable sections (context, instructions,
+# system information) and end with per-call sections, starting here:
+_DYNAMIC_PROMPT_START = "{last_generated_code}"
+
+
+def split_prompt_template(prompt: str) -> tuple[str, str]:
+    """Split a tool prompt template into its stable prefix and dynamic suffix.
+
+    The prefix holds everything before the previously generated code,
+    i.e. the sections that do not change between calls of a tool, so
+    that providers can cache it. The suffix holds the previously
+    generated code, the viewer state and the request.
+
+    Args:
+        prompt: Prompt template with ``{placeholders}``.
+
+    Returns:
+        ``(prefix, suffix)`` templates; the prefix is empty if the template
+        has no ``{last_generated_code}`` placeholder.
+    """
+    index = prompt.find(_DYNAMIC_PROMPT_START)
+    if index <= 0:
+        return "", prompt
+    return prompt[:index].strip() + "\n", prompt[index:]
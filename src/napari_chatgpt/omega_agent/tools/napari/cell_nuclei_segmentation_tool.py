@@ -28,6 +28,7 @@ from napari_chatgpt.omega_agent.tools.napari.delegated_code.utils import (
     get_description_of_algorithms,
     get_list_of_algorithms,
 )
+from napari_chatgpt.utils.napari.viewer_data_snapshot import ViewerDataSnapshot
 from napari_chatgpt.utils.python.conda_utils import conda_uninstall
 from napari_chatgpt.utils.python.dynamic_import import dynamic_import
 from napari_chatgpt.utils.python.pip_utils import pip_install, pip_uninstall
@@ -136,14 +137,14 @@ Here is an explanation of the parameters:
 - If the request asks for segmentation with an algorithm that is not available, inform the user and suggest using one of the available functions instead.
 - Answer with a single function 'segment(viewer)->ArrayLike' that takes the viewer and returns the segmented image.
 
+**System Information:**
+{system_information}
+
 {last_generated_code}
 
 **Viewer Information:**
 {viewer_information}
 
-**System Information:**
-{system_information}
-
 **Request:** 
 {input}
 
@@ -205,8 +206,9 @@ class CellNucleiSegmentationTool(BaseNapariTool):
     Dynamically detects installed backends (Cellpose, StarDist) and always
     includes the classic threshold-based segmentation.  The sub-LLM generates
     a ``segment(viewer) -> ArrayLike`` function that delegates to one of the
-    available segmentation functions.  The resulting labels layer is added to
-    the viewer automatically.
+    available segmentation functions.  Segmentation runs in the compute pool
+    (split execution) and the resulting labels layer is added to the viewer
+    automatically.
 
     Attributes:
         prompt: The assembled prompt containing available backend signatures.
@@ -231,14 +233,38 @@ class CellNucleiSegmentationTool(BaseNapariTool):
         self.prompt = _get_segmentation_prompt()
         self.instructions = _instructions
         self.save_last_generated_code = False
+        self.split_execution = True
 
     def _run_code(self, request: str, code: str, viewer: Viewer) -> str:
-        """Execute LLM-generated segmentation code on the napari viewer.
+        """Run all segmentation stages sequentially on the Qt thread.
+
+        Only used when ``split_execution`` is disabled.
+
+        Args:
+            request: The original user request text.
+            code: Python source code generated by the sub-LLM.
+            viewer: The active napari viewer instance.
+
+        Returns:
+            A success or error message string.
+        """
+        prepared = self._prepare_compute(request, code, viewer)
+        if isinstance(prepared, str):
+            return prepared
+        try:
+            segmented_image = self._compute(request, prepared)
+        except Exception as e:
+            traceback.print_exc()
+            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request. "
+        return self._commit_result(request, prepared, segmented_image, viewer)
+
+    def _prepare_compute(self, request: str, code: str, viewer: Viewer):
+        """Prepare the generated segmentation code on the Qt thread.
 
         Determines which segmentation backend the generated code calls,
         prepends the corresponding delegated implementation, dynamically
-        imports and runs the ``segment(viewer)`` function, and adds the
-        resulting labels layer to the viewer.
+        imports the ``segment(viewer)`` function, and snapshots the
+        viewer's layers so that segmentation can run off the Qt thread.
 
         Args:
             request: The original user request text.
@@ -246,7 +272,8 @@ class CellNucleiSegmentationTool(BaseNapariTool):
             viewer: The active napari viewer instance.
 
         Returns:
-            A success or error message string.
+            A ``(code, segment_function, viewer_snapshot)`` tuple, or an
+            error message string.
         """
         try:
             with asection(f"CellNucleiSegmentationTool:"):
@@ -284,44 +311,82 @@ class CellNucleiSegmentationTool(BaseNapariTool):
                 # get the function:
                 segment_function = getattr(loaded_module, "segment")
 
-                # Run segmentation:
-                with asection(f"Running segmentation..."):
-                    segmented_image = segment_function(viewer)
+                # Snapshot the viewer so that segmentation can run off the Qt thread:
+                viewer_snapshot = ViewerDataSnapshot(viewer)
+
+                return code, segment_function, viewer_snapshot
+
+        except Exception as e:
+            traceback.print_exc()
+            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request. "  # \n```python\n{code}\n```\n
 
-                # Call the activity callback. At this point we assume the code is correct because it ran!
-                self.callbacks.on_tool_activity(self, "coding", code=code)
+    def _compute(self, request: str, prepared):
+        """Run the segmentation function, off the Qt thread.
 
-                # Add to viewer:
-                viewer.add_labels(segmented_image, name="segmented")
+        Args:
+            request: The original user request text.
+            prepared: The tuple returned by ``_prepare_compute``.
 
-                # Add call to segment function:
-                code += f"\n\nsegmented_image = segment(viewer)"
-                code += f"\nviewer.add_labels(segmented_image, name='segmented')"
+        Returns:
+            The segmented labels array.
+        """
+        _, segment_function, viewer_snapshot = prepared
 
-                # At this point we assume the code ran successfully and we add it to the notebook:
-                if self.notebook:
-                    self.notebook.add_code_cell(code)
+        # Run segmentation:
+        with asection(f"Running segmentation..."):
+            return segment_function(viewer_snapshot)
 
-                # Come up with a filename:
-                filename = f"generated_code_{self.__class__.__name__}.py"
+    def _commit_result(
+        self, request: str, prepared, segmented_image, viewer: Viewer
+    ) -> str:
+        """Add the segmented labels to the viewer and record the code.
 
-                # Add the snippet to the code snippet editor:
-                from napari_chatgpt.microplugin.microplugin_window import (
-                    MicroPluginMainWindow,
-                )
+        Args:
+            request: The original user request text.
+            prepared: The tuple returned by ``_prepare_compute``.
+            segmented_image: The labels array returned by ``_compute``.
+            viewer: The active napari viewer instance.
 
-                MicroPluginMainWindow.add_snippet(filename=filename, code=code)
+        Returns:
+            A success or error message string.
+        """
+        try:
+            code, _, _ = prepared
+
+            # Call the activity callback. At this point we assume the code is correct because it ran!
+            self.callbacks.on_tool_activity(self, "coding", code=code)
+
+            # Add to viewer:
+            viewer.add_labels(segmented_image, name="segmented")
+
+            # Add call to segment function:
+            code += f"\n\nsegmented_image = segment(viewer)"
+            code += f"\nviewer.add_labels(segmented_image, name='segmented')"
+
+            # At this point we assume the code ran successfully and we add it to the notebook:
+            if self.notebook:
+                self.notebook.add_code_cell(code)
 
-                # Message:
-                message = f"Success: image segmented and added to the viewer as a labels layer named 'segmented'."
+            # Come up with a filename:
+            filename = f"generated_code_{self.__class__.__name__}.py"
 
-                aprint(f"Message: {message}")
+            # Add the snippet to the code snippet editor:
+            from napari_chatgpt.microplugin.microplugin_window import (
+                MicroPluginMainWindow,
+            )
 
-                return message
+            MicroPluginMainWindow.add_snippet(filename=filename, code=code)
+
+            # Message:
+            message = f"Success: image segmented and added to the viewer as a labels layer named 'segmented'."
+
+            aprint(f"Message: {message}")
+
+            return message
 
         except Exception as e:
             traceback.print_exc()
-            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request. "  # \n```python\n{code}\n```\n
+            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request. "
 
 
 @cache
@@ -3,17 +3,21 @@
 This module is injected at runtime by ``CellNucleiSegmentationTool`` when the
 LLM-generated code calls ``cellpose_segmentation()``.  It wraps the Cellpose
 library to provide a unified 2D/3D segmentation interface with optional
-normalization and small-segment removal.
+normalization and small-segment removal. Models are kept in the
+process-wide model registry so that their weights are loaded only once.
 """
 
 from collections.abc import Sequence
 
+import numpy
 from napari.types import ArrayLike
 from numpy import ndarray
 
+from napari_chatgpt.utils.images.lazy_arrays import as_dask_array, is_lazy_array
 from napari_chatgpt.utils.segmentation.remove_small_segments import (
     remove_small_segments,
 )
+from napari_chatgpt.utils.system.model_registry import get_model_registry
 
 
 ### SIGNATURE
@@ -81,46 +85,57 @@ def cellpose_segmentation(
     if len(image.shape) > 3:
         raise ValueError("The input image must be 2D or 3D.")
 
-    # Convert image to float
-    image = image.astype(float, copy=False)
+    # Lazy images are normalized before being loaded into memory, as
+    # Cellpose needs the whole image at once:
+    if is_lazy_array(image) or isinstance(image, (list, tuple)):
+        image = as_dask_array(image)
 
-    # If normalize is True, normalize the image:
+    # If normalize is True, normalize the image, which also converts it to float32:
     if normalize:
         from napari_chatgpt.utils.images.normalize import normalize_img
 
         image = normalize_img(image, norm_range_low, norm_range_high)
 
+    # Materialize the image in memory:
+    image = numpy.asarray(image, dtype=numpy.float32)
+
     if channel is None:
         channel = [0, 0]
 
-    # Load cellpose models:
+    # Get the cellpose model from the model registry, loading it only once:
     # Try to use GPU if available
     import torch
     from cellpose import models
 
     gpu = torch.cuda.is_available()
-    model = models.CellposeModel(model_type=model_type, gpu=gpu)
-
-    if len(image.shape) == 2:
-        # Run cellpose in 2D mode:
-        labels = model.eval(
-            image, diameter=diameter, channels=channel, min_size=min_segment_size
-        )[0]
-    elif len(image.shape) == 3:
-
-        # If no diameter is provided, use a default value:
-        if diameter is None:
-            diameter = 30.0
-
-        # Run cellpose in 3D mode:
-        labels = model.eval(
-            image,
-            diameter=diameter,
-            channels=channel,
-            do_3D=True,
-            z_axis=0,
-            min_size=min_segment_size,
-        )[0]
+    registry = get_model_registry()
+    with registry.use(
+        "cellpose",
+        model_type,
+        "cuda" if gpu else "cpu",
+        lambda: models.CellposeModel(model_type=model_type, gpu=gpu),
+    ) as model:
+
+        if len(image.shape) == 2:
+            # Run cellpose in 2D mode:
+            labels = model.eval(
+                image, diameter=diameter, channels=channel, min_size=min_segment_size
+            )[0]
+        elif len(image.shape) == 3:
+
+            # If no diameter is provided, use a default value:
+            if diameter is None:
+                diameter = 30.0
+
+            # Run cellpose in 3D mode:
+            labels = model.eval(
+                image,
+                diameter=diameter,
+                channels=channel,
+                do_3D=True,
+                z_axis=0,
+                min_size=min_segment_size,
+            )[0]
 
     # Remove small segments:
     labels = remove_small_segments(labels, min_segment_size)
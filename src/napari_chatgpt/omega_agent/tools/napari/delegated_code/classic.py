@@ -4,10 +4,12 @@ This module is injected at runtime by ``CellNucleiSegmentationTool`` when the
 LLM-generated code calls ``classic_segmentation()``.  It provides
 threshold-based segmentation with multiple thresholding algorithms (Otsu, Li,
 Triangle, etc.), optional morphological operations, and watershed separation.
+Lazy (dask, zarr, multiscale) images are segmented block by block without
+loading them into memory.
 """
 
 from napari.types import ArrayLike
-from numpy import ndarray, uint32, zeros
+from numpy import float32, ndarray, uint32, zeros
 from scipy.ndimage import distance_transform_edt, gaussian_filter
 from skimage.feature import peak_local_max
 from skimage.filters import (
@@ -53,6 +55,8 @@ def classic_segmentation(
 
     image: ArrayLike
             Image for which to segment cells. Can be 2D or 3D.
+            Can be a lazy (dask, zarr) array, in which case the image is processed
+            block by block and the labels are returned as a lazy chunked array.
 
     threshold_type: str
             Algorithm to use for thresholding. Options include: 'otsu', 'yen', 'li', 'minimum', 'triangle', 'mean', 'isodata'.
@@ -90,20 +94,7 @@ def classic_segmentation(
     Segmented image as a labels array that can be added to napari as a Labels layer.
 
     """
-
-    # Convert image to float
-    image = image.astype(float, copy=False)
-
-    # # Remove background:
-    # background_scale = 50
-    # footprint = disk(background_scale) if len(image.shape) == 2 else ball(background_scale)
-    # image = white_tophat(image, footprint=footprint)
-
-    # If normalize is True, normalize the image:
-    if normalize:
-        from napari_chatgpt.utils.images.normalize import normalize_img
-
-        image = normalize_img(image, norm_range_low, norm_range_high)
+    ### SIGNATURE
 
     # Get appropriate thresholding function
     threshold_func = {
@@ -121,6 +112,37 @@ def classic_segmentation(
             "threshold_type must be one of: 'otsu', 'yen', 'li', 'minimum', 'triangle', 'mean', 'isodata'."
         )
 
+    # Lazy images are segmented block by block:
+    from napari_chatgpt.utils.images.lazy_arrays import is_lazy_array
+
+    if is_lazy_array(image) or isinstance(image, (list, tuple)):
+        return _classic_segmentation_lazy(
+            image,
+            threshold_func=threshold_func,
+            normalize=normalize,
+            norm_range_low=norm_range_low,
+            norm_range_high=norm_range_high,
+            min_segment_size=min_segment_size,
+            erosion_steps=erosion_steps,
+            closing_steps=closing_steps,
+            opening_steps=opening_steps,
+            apply_watershed=apply_watershed,
+            min_distance=min_distance,
+        )
+
+    # # Remove background:
+    # background_scale = 50
+    # footprint = disk(background_scale) if len(image.shape) == 2 else ball(background_scale)
+    # image = white_tophat(image, footprint=footprint)
+
+    # If normalize is True, normalize the image, which also converts it to float32:
+    if normalize:
+        from napari_chatgpt.utils.images.normalize import normalize_img
+
+        image = normalize_img(image, norm_range_low, norm_range_high)
+    else:
+        image = image.astype(float32, copy=False)
+
     # Erosion steps:
     footprint = disk(2) if len(image.shape) == 2 else ball(2)
     for _ in range(erosion_steps):
@@ -139,33 +161,7 @@ def classic_segmentation(
         binary_image = opening(binary_image, footprint=footprint)
 
     if apply_watershed:
-
-        # Gaussian filtered binary image:
-        sigma = min_distance / 3
-        filtered_binary_image = gaussian_filter(binary_image.astype(float), sigma=sigma)
-
-        # Compute new threshold value:
-        threshold_value = threshold_func(filtered_binary_image)
-
-        # Apply threshold:
-        modified_binary_image = filtered_binary_image > threshold_value
-
-        # Compute Euclidean distance from every binary pixel
-        # to the nearest zero pixel and return the result
-        distance = distance_transform_edt(modified_binary_image)
-
-        # Find peaks in an image, and return them as coordinates or a boolean array
-        coords = peak_local_max(
-            distance, min_distance=min_distance, labels=binary_image
-        )
-
-        # Create a mask from the coordinates by dilating the peaks
-        mask = zeros(distance.shape, dtype=bool)
-        mask[tuple(coords.T)] = True
-        markers = label(mask)
-
-        # Perform watershed segmentation
-        labels = watershed(-distance, markers, mask=binary_image)
+        labels = _watershed_labels(binary_image, threshold_func, min_distance)
     else:
         # Label the thresholded image:
         labels = label(binary_image)
@@ -186,3 +182,110 @@ def classic_segmentation(
     labels = labels.astype(uint32)
 
     return labels
+
+
+def _watershed_labels(binary_image, threshold_func, min_distance: int) -> ndarray:
+    """Split touching objects of a binary image with a distance-transform watershed."""
+
+    # Gaussian filtered binary image:
+    sigma = min_distance / 3
+    filtered_binary_image = gaussian_filter(binary_image.astype(float), sigma=sigma)
+
+    # Compute new threshold value:
+    threshold_value = threshold_func(filtered_binary_image)
+
+    # Apply threshold:
+    modified_binary_image = filtered_binary_image > threshold_value
+
+    # Compute Euclidean distance from every binary pixel
+    # to the nearest zero pixel and return the result
+    distance = distance_transform_edt(modified_binary_image)
+
+    # Find peaks in an image, and return them as coordinates or a boolean array
+    coords = peak_local_max(distance, min_distance=min_distance, labels=binary_image)
+
+    # Create a mask from the coordinates by dilating the peaks
+    mask = zeros(distance.shape, dtype=bool)
+    mask[tuple(coords.T)] = True
+    markers = label(mask)
+
+    # Perform watershed segmentation
+    return watershed(-distance, markers, mask=binary_image)
+
+
+def _classic_segmentation_lazy(
+    image,
+    threshold_func,
+    normalize: bool | None,
+    norm_range_low: float | None,
+    norm_range_high: float | None,
+    min_segment_size: int,
+    erosion_steps: int,
+    closing_steps: int,
+    opening_steps: int,
+    apply_watershed: bool,
+    min_distance: int,
+):
+    """Classic segmentation of a lazy image, one block at a time.
+
+    Morphological operators run per block with enough overlap to be exact,
+    the threshold is computed from a sample of the image's blocks, and
+    connected components are labelled blockwise and merged across block
+    faces. Returns a lazy chunked labels array.
+    """
+    from napari_chatgpt.utils.images.lazy_arrays import as_dask_array, sample_blocks
+    from napari_chatgpt.utils.segmentation.blockwise_labels import label_blockwise
+
+    # If normalize is True, normalize the image, lazily and as float32:
+    if normalize:
+        from napari_chatgpt.utils.images.normalize import normalize_img
+
+        image = normalize_img(image, norm_range_low, norm_range_high)
+    else:
+        image = as_dask_array(image).astype(float32)
+
+    # Erosion steps, each step needs an overlap of 2 (the footprint radius):
+    footprint = disk(2) if image.ndim == 2 else ball(2)
+    if erosion_steps > 0:
+
+        def _erode(block):
+            for _ in range(erosion_steps):
+                block = erosion(block, footprint=footprint)
+            return block
+
+        image = image.map_overlap(
+            _erode, depth=2 * erosion_steps, boundary="reflect", dtype=image.dtype
+        )
+
+    # Compute threshold value from a sample of the blocks:
+    threshold_value = threshold_func(sample_blocks(image))
+
+    # Apply threshold:
+    binary_image = image > threshold_value
+
+    # Apply the closing and opening operators, each step needs an overlap of 4:
+    if closing_steps + opening_steps > 0:
+
+        def _close_open(block):
+            for _ in range(closing_steps):
+                block = closing(block, footprint=footprint)
+            for _ in range(opening_steps):
+                block = opening(block, footprint=footprint)
+            return block
+
+        binary_image = binary_image.map_overlap(
+            _close_open,
+            depth=4 * (closing_steps + opening_steps),
+            boundary="none",
+            dtype=bool,
+        )
+
+    # Label blocks (watershed is applied per block) and merge them across faces:
+    if apply_watershed:
+        segment_block = lambda b: _watershed_labels(b, threshold_func, min_distance)
+    else:
+        segment_block = label
+
+    return label_blockwise(
+        binary_image, segment_block=segment_block, min_segment_size=min_segment_size
+    )
@@ -28,7 +28,8 @@ def stardist_segmentation(image: ArrayLike,
                           norm_range_low: Optional[float] = 1.0,
                           norm_range_high: Optional[float] = 99.8,
                           min_segment_size: int = 32,
-                          scale:float = None) -> ArrayLike
+                          scale:float = None,
+                          z_only: bool = False) -> ArrayLike
 """
 
 classic_signature = """
@@ -79,6 +79,26 @@ def test_classic_3d(show_viewer: bool = False):
     napari.run()
 
 
+def test_classic_lazy():
+    import dask.array as da
+    import numpy as np
+
+    # Synthetic image with 9 bright blobs:
+    image = np.zeros((96, 96), dtype=np.float32)
+    for y in range(3):
+        for x in range(3):
+            image[10 + 30 * y : 24 + 30 * y, 10 + 30 * x : 24 + 30 * x] = 1.0
+    image += np.random.default_rng(0).normal(0, 0.05, image.shape).astype(np.float32)
+
+    # Segment the image lazily, block by block:
+    lazy_labels = classic_segmentation(da.from_array(image, chunks=(32, 32)))
+    assert isinstance(lazy_labels, da.Array)
+    labels = lazy_labels.compute()
+
+    # Same number of objects as the in-memory segmentation:
+    assert len(unique(labels)) == len(unique(classic_segmentation(image))) == 10
+
+
 if __name__ == "__main__":
     test_classic_2d(show_viewer=True)
     test_classic_3d(show_viewer=True)
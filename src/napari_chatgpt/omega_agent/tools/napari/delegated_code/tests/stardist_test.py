@@ -1,4 +1,5 @@
 import napari
+import numpy
 import pytest
 import skimage
 from arbol import aprint
@@ -99,6 +100,24 @@ def test_stardist_3d(show_viewer: bool = False):
     napari.run()
 
 
+@pytest.mark.skipif(
+    not check_stardist_installed(), reason="requires stardist to be installed to run"
+)
+def test_stardist_3d_z_only():
+    aprint("")
+
+    # Tiny crop, only the Z slices are segmented:
+    cells = skimage.data.cells3d()[:4, 1, :64, :64]
+
+    # Segment the cells, one predict_instances call per Z slice:
+    labels = stardist_segmentation(cells, z_only=True)
+
+    aprint(len(unique(labels)))
+
+    assert labels.shape == cells.shape
+    assert labels.dtype == numpy.uint32
+
+
 if __name__ == "__main__":
     test_stardist_2d(show_viewer=True)
     test_stardist_3d(show_viewer=True)
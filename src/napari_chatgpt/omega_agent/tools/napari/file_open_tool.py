@@ -7,12 +7,15 @@ include .tif, .png, .jpg, .zarr, and any format for which a napari reader
 plugin is available.
 """
 
+import os
 import traceback
+import urllib.parse
 
 from arbol import aprint, asection
 from napari import Viewer
 
 from napari_chatgpt.omega_agent.tools.base_napari_tool import BaseNapariTool
+from napari_chatgpt.utils.download.download_cache import get_download_cache
 from napari_chatgpt.utils.napari.open_in_napari import open_in_napari
 
 
@@ -49,12 +52,14 @@ class NapariFileOpenTool(BaseNapariTool):
         self.prompt: str = None
         self.instructions: str = None
 
+        # Download URLs in the I/O pool, open the files on the Qt thread:
+        self.split_execution = True
+        self.io_bound = True
+
     def _run_code(self, query: str, code: str, viewer: Viewer) -> str:
-        """Open one or more image files in the napari viewer.
+        """Download and open the files on the Qt thread.
 
-        Parses the newline-delimited query for file paths and optional reader
-        plugin names, then attempts to open each file.  Returns a summary
-        indicating which files were opened successfully and which failed.
+        Only used when ``split_execution`` is disabled.
 
         Args:
             query: Newline-delimited list of file paths / URLs (with optional
@@ -65,23 +70,29 @@ class NapariFileOpenTool(BaseNapariTool):
         Returns:
             A summary message listing opened files and any errors encountered.
         """
-        with asection(f"NapariFileOpenTool:"):
-            with asection(f"Query:"):
-                aprint(query)
+        prepared = self._prepare_compute(query, code, viewer)
+        result = self._compute(query, prepared)
+        return self._commit_result(query, prepared, result, viewer)
 
-            # Files opened:
-            opened_files = []
+    def _prepare_compute(self, query: str, code: str, viewer: Viewer):
+        """Parse the newline-delimited query into files and reader plugins.
 
-            # Errors encountered:
-            encountered_errors = []
+        Args:
+            query: Newline-delimited list of file paths / URLs (with optional
+                ``[plugin_name]`` suffixes).
+            code: Unused (no LLM code generation for this tool).
+            viewer: The active napari viewer instance (unused).
 
-            # Split lines:
-            lines = query.splitlines()
+        Returns:
+            A list of ``(file_path_or_url, plugin)`` tuples.
+        """
+        with asection(f"NapariFileOpenTool:"):
+            with asection(f"Query:"):
+                aprint(query)
 
-            # Remove any whitespace from the list entries:
-            lines = [line.strip() for line in lines]
+            entries = []
 
-            for line in lines:
+            for line in query.splitlines():
 
                 # Remove whitespaces:
                 line = line.strip()
@@ -93,48 +104,116 @@ class NapariFileOpenTool(BaseNapariTool):
                 else:
                     plugin = None
 
-                # Try to open file:
-                try:
-                    aprint(f"Trying to open file: '{line}' with plugin '{plugin}'")
+                entries.append((line, plugin))
 
-                    success = open_in_napari(viewer, line, plugin=plugin)
+            return entries
 
-                    if success:
-                        aprint(f"Successfully opened file: '{line}'. ")
-                        opened_files.append(line)
+    def _compute(self, query: str, prepared) -> list[str]:
+        """Download remote files into the download cache, off the Qt thread.
 
-                except Exception as e:
-                    traceback.print_exc()
-                    error_info = f"Error: '{type(e).__name__}' with message: '{str(e)}' occurred while trying to open: '{line}'."
-                    encountered_errors.append(error_info)
+        Only single-file URLs are downloaded; local paths, and URLs that
+        napari readers stream themselves (e.g. Zarr stores), are left as
+        they are, as are URLs whose download fails.
 
-            # Encountered errors string:
-            encountered_errors_str = "\n".join(encountered_errors)
+        Args:
+            query: The original query.
+            prepared: The entries returned by ``_prepare_compute``.
 
-            if encountered_errors:
+        Returns:
+            The local path or URL to open for each entry.
+        """
+        paths = []
+        for line, _ in prepared:
+            if not _is_downloadable_url(line):
+                paths.append(line)
+                continue
+            try:
+                # Cached files keep their name, napari picks readers by extension:
+                paths.append(get_download_cache().fetch(line))
+            except Exception as e:
                 aprint(
-                    f"Encountered the following errors while trying to open the files:\n"
-                    f"{encountered_errors_str}\n"
+                    f"Error: {type(e).__name__} with message: '{str(e)}' occurred while downloading: '{line}', napari will try to open it directly."
                 )
+                paths.append(line)
+        return paths
 
-            # Return outcome:
-            if len(opened_files) == len(lines) and len(encountered_errors) == 0:
-                result = f"All of the image files: '{', '.join(opened_files)}' could be successfully opened in napari. "
-                aprint(result)
-                return result
-            elif len(opened_files) > 0 and len(encountered_errors) > 0:
-                result = (
-                    f"Some of the image files: '{', '.join(opened_files)}' could be successfully opened in napari.\n"
-                    f"Here are the exceptions, if any, that occurred:\n"
-                    f"{encountered_errors_str}.\n"
-                )
-                aprint(result)
-                return result
-            else:
-                result = (
-                    f"Failure: none of the image files could be opened!\n"
-                    f"Here are the exceptions, if any, that occurred:\n"
-                    f"{encountered_errors_str}.\n"
-                )
-                aprint(result)
-                return result
+    def _commit_result(self, query: str, prepared, result, viewer: Viewer) -> str:
+        """Open the files in the viewer, on the Qt thread.
+
+        Returns a summary indicating which files were opened successfully
+        and which failed.
+
+        Args:
+            query: The original query.
+            prepared: The entries returned by ``_prepare_compute``.
+            result: The paths returned by ``_compute``.
+            viewer: The active napari viewer instance.
+
+        Returns:
+            A summary message listing opened files and any errors encountered.
+        """
+        # Files opened:
+        opened_files = []
+
+        # Errors encountered:
+        encountered_errors = []
+
+        for (line, plugin), path in zip(prepared, result):
+
+            # Try to open file:
+            try:
+                aprint(f"Trying to open file: '{path}' with plugin '{plugin}'")
+
+                success = open_in_napari(viewer, path, plugin=plugin)
+
+                if success:
+                    aprint(f"Successfully opened file: '{line}'. ")
+                    opened_files.append(line)
+
+            except Exception as e:
+                traceback.print_exc()
+                error_info = f"Error: '{type(e).__name__}' with message: '{str(e)}' occurred while trying to open: '{line}'."
+                encountered_errors.append(error_info)
+
+        # Encountered errors string:
+        encountered_errors_str = "\n".join(encountered_errors)
+
+        if encountered_errors:
+            aprint(
+                f"Encountered the following errors while trying to open the files:\n"
+                f"{encountered_errors_str}\n"
+            )
+
+        # Return outcome:
+        if len(opened_files) == len(prepared) and len(encountered_errors) == 0:
+            result = f"All of the image files: '{', '.join(opened_files)}' could be successfully opened in napari. "
+            aprint(result)
+            return result
+        elif len(opened_files) > 0 and len(encountered_errors) > 0:
+            result = (
+                f"Some of the image files: '{', '.join(opened_files)}' could be successfully opened in napari.\n"
+                f"Here are the exceptions, if any, that occurred:\n"
+                f"{encountered_errors_str}.\n"
+            )
+            aprint(result)
+            return result
+        else:
+            result = (
+                f"Failure: none of the image files could be opened!\n"
+                f"Here are the exceptions, if any, that occurred:\n"
+                f"{encountered_errors_str}.\n"
+            )
+            aprint(result)
+            return result
+
+
+def _is_downloadable_url(path_or_url: str) -> bool:
+    """Return whether *path_or_url* is the URL of a single remote file."""
+    parsed = urllib.parse.urlparse(path_or_url)
+    if parsed.scheme not in ("http", "https"):
+        return False
+    file_name = os.path.basename(parsed.path.rstrip("/"))
+    # Zarr stores are folders, and names without extension are often
+    # pages or folders too; napari readers open those from the URL:
+    extension = os.path.splitext(file_name)[1].lower()
+    return bool(extension) and extension != ".zarr" and not parsed.path.endswith("/")
@@ -18,6 +18,7 @@ from napari_chatgpt.omega_agent.tools.base_napari_tool import (
     BaseNapariTool,
     _get_delegated_code,
 )
+from napari_chatgpt.utils.napari.viewer_data_snapshot import ViewerDataSnapshot
 from napari_chatgpt.utils.python.dynamic_import import dynamic_import
 from napari_chatgpt.utils.python.pip_utils import pip_install
 
@@ -74,14 +75,14 @@ Here is an explanation of the parameters:
 
 - Answer in markdown with a single function `denoise(viewer) -> ArrayLike` that takes the viewer and returns the denoised image.
 
+**System Information:**
+{system_information}
+
 {last_generated_code}
 
 **Viewer Information:**
 {viewer_information}
 
-**System Information:**
-{system_information}
-
 **Request:** 
 {input}
 
@@ -107,8 +108,9 @@ class ImageDenoisingTool(BaseNapariTool):
     * **FGR** -- Noise2Self Feature Generation and Regression (CatBoost, LGBM, etc.)
 
     The sub-LLM generates a ``denoise(viewer) -> ArrayLike`` function that
-    delegates to one of the available Aydin functions.  The denoised image is
-    added to the viewer as a new layer named ``"denoised"``.
+    delegates to one of the available Aydin functions.  Denoising runs in the
+    compute pool (split execution) and the denoised image is added to the
+    viewer as a new layer named ``"denoised"``.
 
     Attributes:
         prompt: Prompt template describing the available denoising functions.
@@ -134,16 +136,41 @@ class ImageDenoisingTool(BaseNapariTool):
         self.prompt = _image_denoising_prompt
         self.instructions = _instructions
         self.save_last_generated_code = False
+        self.split_execution = True
 
     # generic_codegen_instructions: str = ''
 
     def _run_code(self, request: str, code: str, viewer: Viewer) -> str:
-        """Execute LLM-generated denoising code on the napari viewer.
+        """Run all denoising stages sequentially on the Qt thread.
+
+        Only used when ``split_execution`` is disabled.
+
+        Args:
+            request: The original user request text.
+            code: Python source code generated by the sub-LLM.
+            viewer: The active napari viewer instance.
+
+        Returns:
+            A success or error message string.
+        """
+        prepared = self._prepare_compute(request, code, viewer)
+        if isinstance(prepared, str):
+            return prepared
+        try:
+            denoised_image = self._compute(request, prepared)
+        except Exception as e:
+            traceback.print_exc()
+            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request. "
+        return self._commit_result(request, prepared, denoised_image, viewer)
+
+    def _prepare_compute(self, request: str, code: str, viewer: Viewer):
+        """Prepare the generated denoising code on the Qt thread.
 
         Determines which Aydin backend the generated code calls, installs
         Aydin if necessary, prepends the corresponding delegated
-        implementation, dynamically imports and runs the ``denoise(viewer)``
-        function, and adds the denoised image to the viewer.
+        implementation, dynamically imports the ``denoise(viewer)``
+        function, and snapshots the viewer's layers so that denoising can
+        run off the Qt thread.
 
         Args:
             request: The original user request text.
@@ -151,7 +178,8 @@ class ImageDenoisingTool(BaseNapariTool):
             viewer: The active napari viewer instance.
 
         Returns:
-            A success or error message string.
+            A ``(code, denoise_function, viewer_snapshot)`` tuple, or an
+            error message string.
         """
         try:
             with asection(f"ImageDenoisingTool:"):
@@ -193,44 +221,84 @@ class ImageDenoisingTool(BaseNapariTool):
                 # get the function:
                 denoise_function = getattr(loaded_module, "denoise")
 
-                # Run denoising:
-                with asection(f"Running image denoising..."):
-                    denoised_image = denoise_function(viewer)
+                # Snapshot the viewer so that denoising can run off the Qt thread:
+                viewer_snapshot = ViewerDataSnapshot(viewer)
 
-                # Call the activity callback. At this point we assume the code is correct because it ran!
-                self.callbacks.on_tool_activity(self, "coding", code=code)
+                return code, denoise_function, viewer_snapshot
 
-                # Add to viewer:
-                viewer.add_image(denoised_image, name="denoised")
+        except Exception as e:
+            traceback.print_exc()
+            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request. "  # \n```python\n{code}\n```\n
+
+    def _compute(self, request: str, prepared):
+        """Run the denoising function, off the Qt thread.
+
+        Args:
+            request: The original user request text.
+            prepared: The tuple returned by ``_prepare_compute``.
+
+        Returns:
+            The denoised image array.
+        """
+        _, denoise_function, viewer_snapshot = prepared
+
+        # Run denoising:
+        with asection(f"Running image denoising..."):
+            return denoise_function(viewer_snapshot)
+
+    def _commit_result(
+        self, request: str, prepared, denoised_image, viewer: Viewer
+    ) -> str:
+        """Add the denoised image to the viewer and record the code.
+
+        Args:
+            request: The original user request text.
+            prepared: The tuple returned by ``_prepare_compute``.
+            denoised_image: The image returned by ``_compute``.
+            viewer: The active napari viewer instance.
 
-                # Add call to denoise function & add to napari viewer:
-                code += f"\n\ndenoised_image = denoise(viewer)"
-                code += f"\nviewer.add_image(denoised_image, name='denoised')"
+        Returns:
+            A success or error message string.
+        """
+        try:
+            code, _, _ = prepared
+
+            # Call the activity callback. At this point we assume the code is correct because it ran!
+            self.callbacks.on_tool_activity(self, "coding", code=code)
+
+            # Add to viewer:
+            viewer.add_image(denoised_image, name="denoised")
 
-                # At this point we assume the code ran successfully and we add it to the notebook:
-                if self.notebook:
-                    self.notebook.add_code_cell(code)
+            # Add call to denoise function & add to napari viewer:
+            code += f"\n\ndenoised_image = denoise(viewer)"
+            code += f"\nviewer.add_image(denoised_image, name='denoised')"
 
-                # Come up with a filename:
-                filename = f"generated_code_{self.__class__.__name__}.py"
+            # At this point we assume the code ran successfully and we add it to the notebook:
+            if self.notebook:
+                self.notebook.add_code_cell(code)
 
-                # Add the snippet to the code snippet editor:
-                from napari_chatgpt.microplugin.microplugin_window import (
-                    MicroPluginMainWindow,
-                )
+            # Come up with a filename:
+            filename = f"generated_code_{self.__class__.__name__}.py"
 
-                MicroPluginMainWindow.add_snippet(filename=filename, code=code)
+            # Add the snippet to the code snippet editor:
+            from napari_chatgpt.microplugin.microplugin_window import (
+                MicroPluginMainWindow,
+            )
 
-                # Message:
-                message = f"Success: image denoised and added to the viewer as layer 'denoised'. "
+            MicroPluginMainWindow.add_snippet(filename=filename, code=code)
 
-                aprint(f"Message: {message}")
+            # Message:
+            message = (
+                f"Success: image denoised and added to the viewer as layer 'denoised'. "
+            )
 
-                return message
+            aprint(f"Message: {message}")
+
+            return message
 
         except Exception as e:
             traceback.print_exc()
-            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request. "  # \n```python\n{code}\n```\n
+            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to fulfill the request. "
 
 
 _AYDIN_MISSING_MSG = (
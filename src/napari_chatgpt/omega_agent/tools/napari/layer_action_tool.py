@@ -27,14 +27,14 @@ right-click context-menu actions and (optionally) keyboard shortcuts.
 **Instructions:**
 {instructions}
 
+**System Information:**
+{system_information}
+
 {last_generated_code}
 
 **Viewer Information:**
 {viewer_information}
 
-**System Information:**
-{system_information}
-
 **Request:**
 {input}
 
@@ -11,8 +11,11 @@ available widgets, readers, and writers.  The tool operates in two modes:
 """
 
 import inspect
+import json
 import logging
+import os
 import re
+import threading
 import traceback
 
 from arbol import aprint, asection
@@ -30,20 +33,20 @@ You write Python code that uses installed napari plugins for image
 processing and analysis.
 The viewer instance is accessible as `viewer`.
 
-**Available Plugins:**
-[PLUGIN_CATALOG]
-
 **Instructions:**
 {instructions}
 
+**System Information:**
+{system_information}
+
 {last_generated_code}
 
+**Available Plugins:**
+[PLUGIN_CATALOG]
+
 **Viewer Information:**
 {viewer_information}
 
-**System Information:**
-{system_information}
-
 **Request:**
 {input}
 
@@ -63,6 +66,18 @@ _instructions = r"""
 - For writers, use the extensions and layer types shown.
 """
 
+# Version of the on-disk catalog format, bump to invalidate existing caches:
+_CATALOG_CACHE_FORMAT = 1
+
+# Maximum number of plugin contributions listed in the execution prompt:
+_MAX_PROMPT_ITEMS = 8
+
+# Words ignored when matching requests to plugin contributions:
+_STOP_WORDS = set(
+    "the and for with this that from into use using plugin plugins napari "
+    "image layer please can you".split()
+)
+
 # Keywords that trigger info mode instead of execution mode:
 _INFO_KEYWORDS = re.compile(
     r"\b(list|what|available|show|which\s+plugin|discover|catalog)\b",
@@ -74,12 +89,17 @@ class PluginCatalog:
     """Scans npe2 plugin manifests and builds a catalog of available contributions.
 
     On construction, discovers all enabled napari plugins via npe2 and
-    introspects their widgets, readers, and writers.  Provides formatted
-    output methods for embedding in LLM prompts or returning to the user.
+    collects their widgets, readers, and writers from the manifests.
+    Widget signatures and docstrings require importing the plugin, so
+    they are only introspected when needed (see ``ensure_details``).
+    The catalog is persisted to disk per plugin and version: plugins
+    whose version did not change are taken from the cache, including
+    their already introspected signatures. Provides formatted output
+    methods for embedding in LLM prompts or returning to the user.
 
     Attributes:
         widgets: List of widget contribution dicts (plugin, display_name,
-            python_name, signature, docstring, kind).
+            python_name, signature, docstring, kind, introspected).
         readers: List of reader contribution dicts (plugin, command,
             python_name, filename_patterns).
         writers: List of writer contribution dicts (plugin, command,
@@ -87,12 +107,26 @@ class PluginCatalog:
         error_log: Warnings/errors encountered during catalog building.
     """
 
-    def __init__(self):
+    def __init__(self, cache_path: str | None = None, use_cache: bool = True):
+        """Build the catalog.
+
+        Args:
+            cache_path: Path of the JSON file caching the catalog. Defaults
+                to the ``plugin_catalog_path`` configuration key, or
+                ``~/.omega/plugin_catalog.json``.
+            use_cache: If False, the catalog is neither read from nor
+                written to disk.
+        """
         self.widgets: list[dict] = []
         self.readers: list[dict] = []
         self.writers: list[dict] = []
         self.error_log: list[str] = []
         self._plugin_names: set[str] = set()
+        self._plugins: dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._cache_path = (
+            (cache_path or _default_catalog_cache_path()) if use_cache else None
+        )
         self._build_catalog()
 
     # ------------------------------------------------------------------
@@ -113,60 +147,97 @@ class PluginCatalog:
             self.error_log.append(f"Failed to get PluginManager instance: {exc}")
             return
 
+        cached_plugins = self._load_cache()
+        reused = 0
+
         for manifest in pm.iter_manifests(disabled=False):
             plugin_name = manifest.name
             # Skip ourselves:
             if plugin_name == "napari-chatgpt":
                 continue
 
-            # Build command-id -> python_name lookup:
-            cmd_map = {}
-            for cmd in manifest.contributions.commands or []:
-                pn = getattr(cmd, "python_name", None)
-                if pn:
-                    cmd_map[cmd.id] = pn
-
-            has_contributions = False
+            # Reuse the cached record if the plugin version did not change:
+            version = str(getattr(manifest, "package_version", None) or "")
+            record = cached_plugins.get(plugin_name)
+            if record is not None and version and record.get("version") == version:
+                reused += 1
+            else:
+                record = self._process_manifest(manifest, version)
+
+            self._plugins[plugin_name] = record
+            self.widgets += record["widgets"]
+            self.readers += record["readers"]
+            self.writers += record["writers"]
+            self.error_log += record["errors"]
+            if record["widgets"] or record["readers"] or record["writers"]:
+                self._plugin_names.add(plugin_name)
 
-            # --- Widgets ---
-            for contrib in manifest.contributions.widgets or []:
-                has_contributions = True
-                try:
+        aprint(
+            f"Plugin catalog: {len(self._plugins)} plugin(s), "
+            f"{reused} taken from the cache."
+        )
+        if reused < len(self._plugins) or len(cached_plugins) != len(self._plugins):
+            self._save_cache()
+
+    def _process_manifest(self, manifest, version: str) -> dict:
+        """Collect the contributions of one plugin manifest, without importing it."""
+        plugin_name = manifest.name
+        record = {
+            "version": version,
+            "widgets": [],
+            "readers": [],
+            "writers": [],
+            "errors": [],
+        }
+
+        # Build command-id -> python_name lookup:
+        cmd_map = {}
+        for cmd in manifest.contributions.commands or []:
+            pn = getattr(cmd, "python_name", None)
+            if pn:
+                cmd_map[cmd.id] = pn
+
+        # --- Widgets ---
+        for contrib in manifest.contributions.widgets or []:
+            try:
+                record["widgets"].append(
                     self._process_widget(plugin_name, contrib, cmd_map)
-                except Exception as exc:
-                    msg = (
-                        f"Error introspecting widget "
-                        f"'{contrib.display_name}' from "
-                        f"'{plugin_name}': {exc}"
-                    )
-                    self.error_log.append(msg)
-                    log.debug(msg, exc_info=True)
+                )
+            except Exception as exc:
+                msg = (
+                    f"Error reading widget "
+                    f"'{contrib.display_name}' from "
+                    f"'{plugin_name}': {exc}"
+                )
+                record["errors"].append(msg)
+                log.debug(msg, exc_info=True)
 
-            # --- Readers ---
-            for contrib in manifest.contributions.readers or []:
-                has_contributions = True
-                try:
+        # --- Readers ---
+        for contrib in manifest.contributions.readers or []:
+            try:
+                record["readers"].append(
                     self._process_reader(plugin_name, contrib, cmd_map)
-                except Exception as exc:
-                    msg = f"Error introspecting reader from " f"'{plugin_name}': {exc}"
-                    self.error_log.append(msg)
-                    log.debug(msg, exc_info=True)
-
-            # --- Writers ---
-            for contrib in manifest.contributions.writers or []:
-                has_contributions = True
-                try:
+                )
+            except Exception as exc:
+                msg = f"Error introspecting reader from " f"'{plugin_name}': {exc}"
+                record["errors"].append(msg)
+                log.debug(msg, exc_info=True)
+
+        # --- Writers ---
+        for contrib in manifest.contributions.writers or []:
+            try:
+                record["writers"].append(
                     self._process_writer(plugin_name, contrib, cmd_map)
-                except Exception as exc:
-                    msg = f"Error introspecting writer from " f"'{plugin_name}': {exc}"
-                    self.error_log.append(msg)
-                    log.debug(msg, exc_info=True)
+                )
+            except Exception as exc:
+                msg = f"Error introspecting writer from " f"'{plugin_name}': {exc}"
+                record["errors"].append(msg)
+                log.debug(msg, exc_info=True)
 
-            if has_contributions:
-                self._plugin_names.add(plugin_name)
+        return record
 
-    def _process_widget(self, plugin_name, contrib, cmd_map):
-        """Introspect a single widget contribution and add it to the catalog."""
+    def _process_widget(self, plugin_name, contrib, cmd_map) -> dict:
+        """Read a single widget contribution; the signature is introspected later."""
         display_name = contrib.display_name or ""
         autogenerate = getattr(contrib, "autogenerate", False)
 
@@ -175,111 +246,182 @@ class PluginCatalog:
         command_id = getattr(contrib, "command", None) or ""
         python_name = cmd_map.get(command_id, command_id)
 
-        sig_str = ""
-        docstring = ""
-
-        # Try to resolve the callable for introspection:
-        if python_name and ":" in python_name:
-            try:
-                obj = _resolve_python_name(python_name)
-                if obj is not None:
-                    sig_str = str(inspect.signature(obj))
-                    docstring = inspect.getdoc(obj) or ""
-            except Exception:
-                pass
-
         kind = "function" if autogenerate else "class"
-        self.widgets.append(
-            {
-                "plugin": plugin_name,
-                "display_name": display_name,
-                "python_name": python_name,
-                "signature": sig_str,
-                "docstring": docstring,
-                "kind": kind,
-            }
-        )
-
-    def _process_reader(self, plugin_name, contrib, cmd_map):
-        """Extract reader metadata and add it to the catalog."""
+        return {
+            "plugin": plugin_name,
+            "display_name": display_name,
+            "python_name": python_name,
+            "signature": "",
+            "docstring": "",
+            "kind": kind,
+            "introspected": False,
+        }
+
+    def _process_reader(self, plugin_name, contrib, cmd_map) -> dict:
+        """Extract reader metadata."""
         command_id = getattr(contrib, "command", None) or ""
         patterns = getattr(contrib, "filename_patterns", []) or []
         python_name = cmd_map.get(command_id, command_id)
-        self.readers.append(
-            {
-                "plugin": plugin_name,
-                "command": command_id,
-                "python_name": python_name,
-                "filename_patterns": patterns,
-            }
-        )
-
-    def _process_writer(self, plugin_name, contrib, cmd_map):
-        """Extract writer metadata and add it to the catalog."""
+        return {
+            "plugin": plugin_name,
+            "command": command_id,
+            "python_name": python_name,
+            "filename_patterns": list(patterns),
+        }
+
+    def _process_writer(self, plugin_name, contrib, cmd_map) -> dict:
+        """Extract writer metadata."""
         command_id = getattr(contrib, "command", None) or ""
         extensions = getattr(contrib, "filename_extensions", []) or []
         layer_types = getattr(contrib, "layer_types", []) or []
         python_name = cmd_map.get(command_id, command_id)
-        self.writers.append(
-            {
-                "plugin": plugin_name,
-                "command": command_id,
-                "python_name": python_name,
-                "filename_extensions": extensions,
-                "layer_types": layer_types,
-            }
-        )
+        return {
+            "plugin": plugin_name,
+            "command": command_id,
+            "python_name": python_name,
+            "filename_extensions": list(extensions),
+            "layer_types": [str(t) for t in layer_types],
+        }
+
+    def ensure_details(self, widgets: list[dict]):
+        """Introspect the signature and docstring of widgets that lack them.
+
+        This imports the plugins providing the widgets. Results are kept
+        in the catalog and its disk cache, so each widget is introspected
+        once per plugin version.
+
+        Args:
+            widgets: Widget contribution dicts of this catalog.
+        """
+        with self._lock:
+            pending = [w for w in widgets if not w.get("introspected", True)]
+            for w in pending:
+                python_name = w["python_name"]
+                # Try to resolve the callable for introspection:
+                if python_name and ":" in python_name:
+                    try:
+                        obj = _resolve_python_name(python_name)
+                        if obj is not None:
+                            w["signature"] = str(inspect.signature(obj))
+                            w["docstring"] = inspect.getdoc(obj) or ""
+                    except Exception as exc:
+                        log.debug(
+                            f"Error introspecting widget '{w['display_name']}' "
+                            f"from '{w['plugin']}': {exc}",
+                            exc_info=True,
+                        )
+                w["introspected"] = True
+            if pending:
+                self._save_cache()
+
+    # ------------------------------------------------------------------
+    # Retrieval
+    # ------------------------------------------------------------------
+    def search(self, query: str, max_items: int = 8) -> list[tuple[str, dict]]:
+        """Return the contributions most relevant to a query.
+
+        Contributions are ranked by how many words of the query match
+        words of their plugin name, display name, import path, docstring
+        (if already introspected), file patterns and layer types.
+
+        Args:
+            query: The user request.
+            max_items: Maximum number of contributions returned.
+
+        Returns:
+            ``(kind, contribution)`` pairs, with kind one of ``"widget"``,
+            ``"reader"`` or ``"writer"``, best match first. Contributions
+            matching no word of the query are left out.
+        """
+        query_words = _words(query)
+        if not query_words:
+            return []
+
+        scored = []
+        for kind, items in (
+            ("widget", self.widgets),
+            ("reader", self.readers),
+            ("writer", self.writers),
+        ):
+            for item in items:
+                score = _match_score(query_words, _words(item["plugin"])) * 3
+                score += _match_score(query_words, _contribution_words(item))
+                if score > 0:
+                    scored.append((score, len(scored), kind, item))
+
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        return [(kind, item) for _, _, kind, item in scored[:max_items]]
 
     # ------------------------------------------------------------------
     # Formatting
     # ------------------------------------------------------------------
-    def format_for_prompt(self, max_items: int = 30) -> str:
-        """Concise format suitable for embedding in a sub-LLM prompt."""
+    def format_for_prompt(self, max_items: int = 30, query: str | None = None) -> str:
+        """Concise format suitable for embedding in a sub-LLM prompt.
+
+        Args:
+            max_items: Maximum number of contributions listed in detail.
+            query: If given, only the contributions relevant to the query
+                are listed in detail, followed by the names of the other
+                plugins, so that the prompt size does not grow with the
+                number of installed plugins.
+
+        Returns:
+            The formatted catalog.
+        """
         if self.is_empty():
             return "(no plugins detected)"
 
+        if query is not None:
+            selected = self.search(query, max_items=max_items)
+        else:
+            selected = (
+                [("widget", w) for w in self.widgets]
+                + [("reader", r) for r in self.readers]
+                + [("writer", wr) for wr in self.writers]
+            )[:max_items]
+
+        self.ensure_details([item for kind, item in selected if kind == "widget"])
+
         lines: list[str] = []
-        count = 0
-
-        for w in self.widgets:
-            if count >= max_items:
-                break
-            sig = w["signature"] or "(…)"
-            doc = _truncate(w["docstring"], 200)
-            lines.append(
-                f"- [{w['plugin']}] widget: "
-                f"{w['python_name']}{sig}  "
-                f"# {w['kind']}; {doc}"
-            )
-            count += 1
-
-        for r in self.readers:
-            if count >= max_items:
-                break
-            patterns = _truncate_list(r["filename_patterns"], 10)
-            lines.append(
-                f"- [{r['plugin']}] reader: "
-                f"{r['python_name']}  "
-                f"patterns={patterns}"
-            )
-            count += 1
-
-        for wr in self.writers:
-            if count >= max_items:
-                break
-            exts = _truncate_list(wr["filename_extensions"], 10)
-            ltypes = ", ".join(wr["layer_types"])
-            lines.append(
-                f"- [{wr['plugin']}] writer: "
-                f"{wr['python_name']}  "
-                f"extensions={exts}  "
-                f"layer_types={ltypes}"
-            )
-            count += 1
+        for kind, item in selected:
+            if kind == "widget":
+                sig = item["signature"] or "(…)"
+                doc = _truncate(item["docstring"], 200)
+                lines.append(
+                    f"- [{item['plugin']}] widget: "
+                    f"{item['python_name']}{sig}  "
+                    f"# {item['kind']}; {doc}"
+                )
+            elif kind == "reader":
+                patterns = _truncate_list(item["filename_patterns"], 10)
+                lines.append(
+                    f"- [{item['plugin']}] reader: "
+                    f"{item['python_name']}  "
+                    f"patterns={patterns}"
+                )
+            else:
+                exts = _truncate_list(item["filename_extensions"], 10)
+                ltypes = ", ".join(item["layer_types"])
+                lines.append(
+                    f"- [{item['plugin']}] writer: "
+                    f"{item['python_name']}  "
+                    f"extensions={exts}  "
+                    f"layer_types={ltypes}"
+                )
 
-        total = self._total_items()
-        if count < total:
-            lines.append(f"... and {total - count} more " f"(total {total})")
+        if query is not None:
+            listed = {item["plugin"] for _, item in selected}
+            others = sorted(self._plugin_names - listed)
+            if not lines:
+                lines.append("(no plugin contribution matches the request)")
+            if others:
+                lines.append(f"Other installed plugins: {_truncate_list(others, 50)}")
+        else:
+            total = self._total_items()
+            if len(selected) < total:
+                lines.append(
+                    f"... and {total - len(selected)} more " f"(total {total})"
+                )
 
         return "\n".join(lines)
 
@@ -291,6 +433,8 @@ class PluginCatalog:
                 msg += "\nErrors during scanning:\n" + "\n".join(self.error_log)
             return msg
 
+        self.ensure_details(self.widgets)
+
         sections: list[str] = []
         sections.append(
             f"Found {self.get_plugin_count()} plugin(s) with "
@@ -354,6 +498,35 @@ class PluginCatalog:
         """Return the total number of widgets + readers + writers."""
         return len(self.widgets) + len(self.readers) + len(self.writers)
 
+    def _load_cache(self) -> dict[str, dict]:
+        """Return the cached plugin records, keyed by plugin name."""
+        if self._cache_path is None:
+            return {}
+        try:
+            with open(self._cache_path) as f:
+                data = json.load(f)
+            if data.get("format") != _CATALOG_CACHE_FORMAT:
+                return {}
+            return data["plugins"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_cache(self):
+        """Write the plugin records to the disk cache."""
+        if self._cache_path is None:
+            return
+        with self._lock:
+            data = {"format": _CATALOG_CACHE_FORMAT, "plugins": self._plugins}
+            try:
+                os.makedirs(os.path.dirname(self._cache_path) or ".", exist_ok=True)
+                # Write then rename, so that readers never see a partial file:
+                temp_path = f"{self._cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self._cache_path)
+            except (OSError, TypeError, ValueError) as exc:
+                log.debug(f"Could not save the plugin catalog: {exc}", exc_info=True)
+
 
 class NapariPluginTool(BaseNapariTool):
     """Tool that discovers and executes installed napari plugin functions.
@@ -366,22 +539,27 @@ class NapariPluginTool(BaseNapariTool):
       uses a plugin function, then executes it on the Qt thread.
 
     Attributes:
-        catalog: The ``PluginCatalog`` built at initialization time.
+        catalog: The ``PluginCatalog`` built at initialization time, or the one
+            shared by the session factory.
     """
 
     def __init__(self, **kwargs):
         """Initialize the plugin tool and build the plugin catalog.
 
         Args:
-            **kwargs: Forwarded to ``BaseNapariTool.__init__``.
+            **kwargs: Forwarded to ``BaseNapariTool.__init__``. A
+                ``plugin_catalog`` key can provide an already built
+                ``PluginCatalog`` to reuse.
         """
         super().__init__(**kwargs)
 
         self.name = "NapariPluginTool"
 
-        # Build the catalog once at init:
-        with asection("Building napari plugin catalog"):
-            self.catalog = PluginCatalog()
+        # Reuse the given catalog, or build it once at init:
+        self.catalog = kwargs.get("plugin_catalog")
+        if self.catalog is None:
+            with asection("Building napari plugin catalog"):
+                self.catalog = PluginCatalog()
 
         if self.catalog.is_empty():
             self.description = (
@@ -405,14 +583,8 @@ class NapariPluginTool(BaseNapariTool):
                 "of what to do, e.g. 'denoise this image using "
                 "plugin X'."
             )
-            # Bake the catalog into the prompt template.
-            # Escape { and } so format_map() in the LLM
-            # layer doesn't treat them as template variables:
-            catalog_text = self.catalog.format_for_prompt()
-            catalog_text = catalog_text.replace("{", "{{").replace("}", "}}")
-            self.prompt = _napari_plugin_prompt.replace(
-                _PLUGIN_CATALOG_PLACEHOLDER, catalog_text
-            )
+            # The catalog is inserted per request, see _prompt_for_query:
+            self.prompt = _napari_plugin_prompt
 
         self.instructions = _instructions
         self.save_last_generated_code = False
@@ -443,8 +615,21 @@ class NapariPluginTool(BaseNapariTool):
                 "Install plugins with pip and restart napari."
             )
 
+        # Only the plugins relevant to the request go into the prompt:
+        self.prompt = self._prompt_for_query(query)
+
         return super().run_omega_tool(query)
 
+    def _prompt_for_query(self, query: str) -> str:
+        """Return the prompt template with the catalog entries relevant to *query*."""
+        catalog_text = self.catalog.format_for_prompt(
+            max_items=_MAX_PROMPT_ITEMS, query=query
+        )
+        # Escape { and } so format_map() in the LLM
+        # layer doesn't treat them as template variables:
+        catalog_text = catalog_text.replace("{", "{{").replace("}", "}}")
+        return _napari_plugin_prompt.replace(_PLUGIN_CATALOG_PLACEHOLDER, catalog_text)
+
     # ------------------------------------------------------------------
     # Code execution (runs on Qt thread via napari bridge)
     # ------------------------------------------------------------------
@@ -531,6 +716,51 @@ def _resolve_python_name(python_name: str):
     return getattr(mod, attr_name, None)
 
 
+def _default_catalog_cache_path() -> str:
+    """Return the path of the plugin catalog cache from the configuration."""
+    from napari_chatgpt.utils.configuration.app_configuration import AppConfiguration
+
+    config = AppConfiguration("omega")
+    path = config.get("plugin_catalog_path") or "~/.omega/plugin_catalog.json"
+    return os.path.expanduser(path)
+
+
+def _words(text: str) -> set[str]:
+    """Return the lower-case words of a text, without stop words."""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    return {w for w in words if len(w) > 2 and w not in _STOP_WORDS}
+
+
+def _contribution_words(item: dict) -> set[str]:
+    """Return the words describing a catalog contribution."""
+    texts = [
+        item.get("display_name", ""),
+        item.get("python_name", ""),
+        item.get("docstring", ""),
+        " ".join(item.get("filename_patterns", [])),
+        " ".join(item.get("filename_extensions", [])),
+        " ".join(item.get("layer_types", [])),
+    ]
+    return _words(" ".join(texts))
+
+
+def _match_score(query_words: set[str], words: set[str]) -> int:
+    """Count the query words matching a word of *words*.
+
+    Words match if equal, or if one is a prefix of the other and both
+    have at least four letters (e.g. 'denoise' and 'denoising').
+    """
+    score = 0
+    for q in query_words:
+        if q in words:
+            score += 1
+        elif len(q) >= 4 and any(
+            len(w) >= 4 and (w.startswith(q[:5]) or q.startswith(w[:5])) for w in words
+        ):
+            score += 1
+    return score
+
+
 def _truncate_list(items: list, max_show: int) -> str:
     """Join list items, showing at most max_show with a count of omitted."""
     if not items:
@@ -46,5 +46,59 @@ def test_napari_file_open_tool_class_exists():
     assert NapariFileOpenTool is not None
 
 
+def test_is_downloadable_url():
+    from napari_chatgpt.omega_agent.tools.napari.file_open_tool import (
+        _is_downloadable_url,
+    )
+
+    assert _is_downloadable_url("https://example.com/data/cells.tif")
+    assert _is_downloadable_url("http://example.com/movie.mp4?raw=true")
+    assert not _is_downloadable_url("/local/path/cells.tif")
+    assert not _is_downloadable_url("https://example.com/store.zarr")
+    assert not _is_downloadable_url("https://example.com/store.zarr/")
+    assert not _is_downloadable_url("https://example.com/page")
+
+
+def test_urls_are_downloaded_off_the_qt_thread(monkeypatch):
+    """URLs are downloaded by _compute, files are opened by _commit_result."""
+    from napari_chatgpt.omega_agent.tools.napari import file_open_tool
+
+    downloaded = []
+
+    class _FakeCache:
+        def fetch(self, url):
+            downloaded.append(url)
+            return "/cache/files/0123/cells.tif"
+
+    opened = []
+
+    def _fake_open_in_napari(viewer, path, plugin=None):
+        opened.append((path, plugin))
+        return True
+
+    monkeypatch.setattr(file_open_tool, "get_download_cache", _FakeCache)
+    monkeypatch.setattr(file_open_tool, "open_in_napari", _fake_open_in_napari)
+
+    tool = file_open_tool.NapariFileOpenTool()
+    assert tool.split_execution and tool.io_bound
+
+    query = "https://example.com/cells.tif [builtins]\n/local/image.png"
+    prepared = tool._prepare_compute(query, None, viewer=None)
+    assert prepared == [
+        ("https://example.com/cells.tif", "builtins"),
+        ("/local/image.png", None),
+    ]
+
+    paths = tool._compute(query, prepared)
+    assert downloaded == ["https://example.com/cells.tif"]
+    assert paths == ["/cache/files/0123/cells.tif", "/local/image.png"]
+    assert opened == []
+
+    message = tool._commit_result(query, prepared, paths, viewer=None)
+    assert opened == [(paths[0], "builtins"), ("/local/image.png", None)]
+    assert message.startswith("All of the image files")
+    assert "https://example.com/cells.tif" in message
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
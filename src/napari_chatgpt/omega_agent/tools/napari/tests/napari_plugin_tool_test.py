@@ -193,5 +193,110 @@ def test_napari_plugin_tool_empty_catalog_fallback():
     assert "plugin" in result.lower()
 
 
+def _fake_manifest(name, version, widgets):
+    """Build a minimal stand-in for an npe2 plugin manifest."""
+    from types import SimpleNamespace
+
+    commands = [
+        SimpleNamespace(id=f"{name}.{i}", python_name=python_name)
+        for i, (_, python_name) in enumerate(widgets)
+    ]
+    widget_contribs = [
+        SimpleNamespace(display_name=display_name, command=f"{name}.{i}")
+        for i, (display_name, _) in enumerate(widgets)
+    ]
+    contributions = SimpleNamespace(
+        commands=commands, widgets=widget_contribs, readers=[], writers=[]
+    )
+    return SimpleNamespace(
+        name=name, package_version=version, contributions=contributions
+    )
+
+
+@pytest.fixture
+def fake_plugins(monkeypatch):
+    """Replace npe2 plugin discovery with two fake plugins."""
+    import npe2
+
+    manifests = [
+        _fake_manifest(
+            "napari-denoiser", "1.0", [("Denoise image", "textwrap:dedent")]
+        ),
+        _fake_manifest("napari-cells", "2.0", [("Segment cells", "json:dumps")]),
+    ]
+
+    class FakePluginManager:
+        def discover(self):
+            pass
+
+        def iter_manifests(self, disabled=False):
+            return iter(manifests)
+
+    monkeypatch.setattr(npe2.PluginManager, "instance", lambda: FakePluginManager())
+    return manifests
+
+
+def test_plugin_catalog_lazy_and_cached(fake_plugins, tmp_path, monkeypatch):
+    """Signatures are introspected on demand and persisted per plugin version."""
+    from napari_chatgpt.omega_agent.tools.napari.napari_plugin_tool import (
+        PluginCatalog,
+    )
+
+    cache_path = str(tmp_path / "plugin_catalog.json")
+
+    catalog = PluginCatalog(cache_path=cache_path)
+    assert catalog.get_plugin_count() == 2
+    assert not any(w["introspected"] for w in catalog.widgets)
+
+    # Retrieval only introspects the relevant widget:
+    prompt_text = catalog.format_for_prompt(query="please denoise this image")
+    assert "textwrap:dedent(text)" in prompt_text
+    assert "json:dumps" not in prompt_text
+    assert "napari-cells" in prompt_text
+    assert [w["introspected"] for w in catalog.widgets] == [True, False]
+
+    # Unchanged plugins come from the cache, with their signatures:
+    processed = []
+    process_manifest = PluginCatalog._process_manifest
+
+    def counting_process_manifest(self, manifest, version):
+        processed.append(manifest.name)
+        return process_manifest(self, manifest, version)
+
+    monkeypatch.setattr(PluginCatalog, "_process_manifest", counting_process_manifest)
+
+    catalog = PluginCatalog(cache_path=cache_path)
+    assert processed == []
+    assert catalog.widgets[0]["signature"] == "(text)"
+
+    # Only the upgraded plugin is read again:
+    fake_plugins[1].package_version = "2.1"
+    catalog = PluginCatalog(cache_path=cache_path)
+    assert processed == ["napari-cells"]
+    assert catalog.widgets[0]["introspected"]
+
+
+def test_napari_plugin_tool_prompt_has_relevant_plugins(fake_plugins, tmp_path):
+    """The execution prompt lists the plugins relevant to the request."""
+    from unittest.mock import MagicMock
+
+    from napari_chatgpt.omega_agent.tools.napari.napari_plugin_tool import (
+        NapariPluginTool,
+        PluginCatalog,
+    )
+
+    tool = NapariPluginTool(
+        llm=MagicMock(),
+        to_napari_queue=MagicMock(),
+        from_napari_queue=MagicMock(),
+        plugin_catalog=PluginCatalog(cache_path=str(tmp_path / "catalog.json")),
+    )
+
+    prompt = tool._prompt_for_query("segment the cells")
+    assert "json:dumps" in prompt
+    assert "textwrap:dedent" not in prompt
+    assert "[PLUGIN_CATALOG]" not in prompt
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
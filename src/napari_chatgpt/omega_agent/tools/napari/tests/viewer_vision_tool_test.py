@@ -0,0 +1,54 @@
+"""Tests for the staged execution of the viewer vision tool."""
+
+import numpy
+
+
+class _FakeSnapshotService:
+    max_size = 64
+    image_format = "jpeg"
+    quality = 80
+
+    def grab(self, canvas_only=True, layer_name=None, reset_view=False):
+        return numpy.full((256, 128, 4), 200, dtype=numpy.uint8)
+
+
+def test_frame_is_encoded_off_the_qt_thread(monkeypatch):
+    """The Qt stage only grabs the frame, _compute downscales and encodes it."""
+    from PIL import Image
+
+    from napari_chatgpt.omega_agent.tools.napari import viewer_vision_tool
+
+    encoded = []
+    encode_image = viewer_vision_tool.encode_image
+
+    def _recording_encode_image(image, **kwargs):
+        encoded.append(image.size)
+        return encode_image(image, **kwargs)
+
+    described = []
+
+    def _fake_describe_image(image_path, query, model_name):
+        with Image.open(image_path) as image:
+            described.append((image.format, image.size))
+        return "a grey square"
+
+    monkeypatch.setattr(
+        viewer_vision_tool, "get_snapshot_service", lambda v: _FakeSnapshotService()
+    )
+    monkeypatch.setattr(viewer_vision_tool, "encode_image", _recording_encode_image)
+    monkeypatch.setattr(viewer_vision_tool, "describe_image", _fake_describe_image)
+
+    # Qt stage: the raw frame only:
+    layer_image = viewer_vision_tool._capture_layer_image(
+        viewer=None, query="What is this?", layer_name="cells"
+    )
+    assert layer_image.frame.shape == (256, 128, 4)
+    assert encoded == []
+
+    # Compute stage: downscaled and encoded, then described:
+    description = viewer_vision_tool._describe_layer_image(
+        layer_image, vision_model_name="some-model", delete=True
+    )
+    assert description == "a grey square"
+    assert encoded == [(32, 64)]
+    assert described == [("JPEG", (32, 64))]
@@ -21,14 +21,14 @@ The viewer instance is accessible as `viewer`, so you can directly use methods l
 **Instructions:**
 {instructions}
 
+**System Information:**
+{system_information}
+
 {last_generated_code}
 
 **Viewer Information:**
 {viewer_information}
 
-**System Information:**
-{system_information}
-
 **Request:**
 {input}
 
@@ -27,14 +27,14 @@ Implement a function `query(viewer) -> str` that queries the napari viewer and r
 **Instructions:**
 {instructions}
 
+**System Information:**
+{system_information}
+
 {last_generated_code}
 
 **Viewer Information:**
 {viewer_information}
 
-**System Information:**
-{system_information}
-
 **Request:**
 {input}
 
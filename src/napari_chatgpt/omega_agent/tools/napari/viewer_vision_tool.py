@@ -9,13 +9,20 @@ specific layer by name, the currently selected layer, or the entire canvas.
 import re
 import tempfile
 import traceback
+from dataclasses import dataclass
 
+import numpy
 from arbol import aprint, asection
 from napari import Viewer
 
 from napari_chatgpt.omega_agent.tools.base_napari_tool import BaseNapariTool
 from napari_chatgpt.utils.llm.vision import describe_image
-from napari_chatgpt.utils.napari.layer_snapshot import capture_canvas_snapshot
+from napari_chatgpt.utils.napari.snapshot_service import (
+    downscale_image,
+    encode_image,
+    get_snapshot_service,
+    image_file_suffix,
+)
 
 
 class NapariViewerVisionTool(BaseNapariTool):
@@ -60,12 +67,40 @@ class NapariViewerVisionTool(BaseNapariTool):
 
         self.vision_model_name = vision_model_name
 
+        # Capture on the Qt thread, query the vision LLM in the I/O pool:
+        self.split_execution = True
+        self.io_bound = True
+
     def _run_code(self, query: str, code: str, viewer: Viewer) -> str:
-        """Capture a viewer/layer screenshot and describe it with a vision LLM.
+        """Capture and describe the viewer contents on the Qt thread.
+
+        Only used when ``split_execution`` is disabled.
+
+        Args:
+            query: The user's visual question, optionally prefixed with
+                ``*layer_name*``.
+            code: Unused (no LLM code generation for this tool).
+            viewer: The active napari viewer instance.
+
+        Returns:
+            A description of the visual contents, or an error message.
+        """
+        prepared = self._prepare_compute(query, code, viewer)
+        if isinstance(prepared, str):
+            return prepared
+        try:
+            description = self._compute(query, prepared)
+        except Exception as e:
+            traceback.print_exc()
+            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to query the napari viewer."
+        return self._commit_result(query, prepared, description, viewer)
+
+    def _prepare_compute(self, query: str, code: str, viewer: Viewer):
+        """Capture the screenshot to describe, on the Qt thread.
 
         Parses the query for an optional ``*layer_name*`` reference to
         determine which layer or canvas region to capture.  Falls back to
-        describing the entire canvas if no layer name is specified.
+        capturing the entire canvas if no layer name is specified.
 
         Args:
             query: The user's visual question, optionally prefixed with
@@ -74,7 +109,7 @@ class NapariViewerVisionTool(BaseNapariTool):
             viewer: The active napari viewer instance.
 
         Returns:
-            A description of the visual contents, or an error message.
+            A ``_LayerImage``, or an error message string.
         """
         try:
             with asection(f"NapariViewerVisionTool:"):
@@ -118,11 +153,10 @@ class NapariViewerVisionTool(BaseNapariTool):
                         # Augmented query:
                         augmented_query = f"Here is an image. {query}"
 
-                        # Get the description of the image of the layer:
-                        message = _get_layer_image_description(
+                        # Capture the image of the layer:
+                        return _capture_layer_image(
                             viewer=viewer,
                             query=augmented_query,
-                            vision_model_name=self.vision_model_name,
                             layer_name=layer_name,
                             reset_view=True,
                         )
@@ -134,42 +168,82 @@ class NapariViewerVisionTool(BaseNapariTool):
                         # Augmented query:
                         augmented_query = f"Here is an image. {query}"
 
-                        # Get the description of the image of the selected layer:
-                        message = _get_description_for_selected_layer(
+                        # Capture the image of the selected layer:
+                        return _capture_selected_layer_image(
                             query=augmented_query,
                             viewer=viewer,
-                            vision_model_name=self.vision_model_name,
                             reset_view=True,
                         )
                     else:
-                        message = f"Tool did not succeed because no layer '{layer_name}' exists or no layer is selected."
+                        return f"Tool did not succeed because no layer '{layer_name}' exists or no layer is selected."
 
                 else:
                     # Augmented query:
                     augmented_query = f"Here is an image. {query}"
 
-                    message = _get_description_for_whole_canvas(
-                        query=augmented_query,
-                        viewer=viewer,
-                        vision_model_name=self.vision_model_name,
+                    return _capture_whole_canvas_image(
+                        query=augmented_query, viewer=viewer
                     )
 
-                    message = f"The following is the description of the contents of the whole canvas: '{message}'"
-
-                with asection(f"Message:"):
-                    aprint(message)
-
-                return message
-
         except Exception as e:
             traceback.print_exc()
             return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to query the napari viewer."  # with code:\n```python\n{code}\n```\n.
 
+    def _compute(self, query: str, prepared: "_LayerImage") -> str:
+        """Encode the captured frame and describe it, off the Qt thread.
+
+        Args:
+            query: The user's visual question.
+            prepared: The ``_LayerImage`` returned by ``_prepare_compute``.
+
+        Returns:
+            The description returned by the vision LLM.
+        """
+        return _describe_layer_image(prepared, self.vision_model_name)
+
+    def _commit_result(
+        self, query: str, prepared: "_LayerImage", result: str, viewer: Viewer
+    ) -> str:
+        """Format the description as the tool's answer.
+
+        Args:
+            query: The user's visual question.
+            prepared: The ``_LayerImage`` returned by ``_prepare_compute``.
+            result: The description returned by ``_compute``.
+            viewer: The active napari viewer instance (unused).
+
+        Returns:
+            The tool's answer.
+        """
+        if prepared.layer_name:
+            message = f"Tool completed successfully, layer '{prepared.layer_name}' description: '{result}'"
+        else:
+            message = f"Tool completed successfully, description: '{result}'"
+
+        if prepared.whole_canvas:
+            message = f"The following is the description of the contents of the whole canvas: '{message}'"
+
+        with asection(f"Message:"):
+            aprint(message)
+
+        return message
+
+
+@dataclass
+class _LayerImage:
+    """A captured frame, with the settings to encode it for the vision LLM."""
+
+    query: str
+    layer_name: str | None
+    frame: numpy.ndarray
+    max_size: int | None
+    image_format: str
+    quality: int
+    whole_canvas: bool = False
 
-def _get_description_for_selected_layer(
-    query, viewer, vision_model_name: str, reset_view: bool = False
-):
-    """Get a vision-LLM description for the currently selected layer.
+
+def _capture_selected_layer_image(query, viewer, reset_view: bool = False):
+    """Capture the image of the currently selected layer.
 
     If no layer is selected, falls back to the first layer (if any).
     If multiple layers are selected, uses the current/active one.
@@ -177,13 +251,12 @@ def _get_description_for_selected_layer(
     Args:
         query: The augmented visual query string.
         viewer: The napari viewer instance.
-        vision_model_name: Model identifier for the vision LLM.
         reset_view: Whether to reset the camera view before capturing.
 
     Returns:
-        A description message string.
+        A ``_LayerImage``, or an error message string.
     """
-    with asection(f"Getting description for selected layer. "):
+    with asection(f"Capturing image of selected layer. "):
         aprint(f"Query: '{query}'")
 
         # Get the selected layers
@@ -199,25 +272,23 @@ def _get_description_for_selected_layer(
                     f"No layer is selected, defaulting to first layer: '{first_layer_name}'"
                 )
 
-                message = _get_layer_image_description(
+                layer_image = _capture_layer_image(
                     viewer=viewer,
                     query=query,
-                    vision_model_name=vision_model_name,
                     layer_name=first_layer_name,
                     reset_view=reset_view,
                 )
             else:
-                message = f"Tool did not succeed because no layer is selected and there are no layers in the viewer."
+                layer_image = f"Tool did not succeed because no layer is selected and there are no layers in the viewer."
 
         elif len(selected_layers) == 1:
             selected_layer = selected_layers.active
             selected_layer_name = selected_layer.name
             aprint(f"Only one selected layer: '{selected_layer_name}'")
 
-            message = _get_layer_image_description(
+            layer_image = _capture_layer_image(
                 viewer=viewer,
                 query=query,
-                vision_model_name=vision_model_name,
                 layer_name=selected_layer_name,
                 reset_view=reset_view,
             )
@@ -230,10 +301,9 @@ def _get_description_for_selected_layer(
                     f"Multiple layers are selected, defaulting to current layer: '{current_layer_name}'. "
                 )
 
-                message = _get_layer_image_description(
+                layer_image = _capture_layer_image(
                     viewer=viewer,
                     query=query,
-                    vision_model_name=vision_model_name,
                     layer_name=current_layer_name,
                     reset_view=reset_view,
                 )
@@ -242,79 +312,101 @@ def _get_description_for_selected_layer(
                     f"Multiple layers are selected, looking at what is currently visible in the viewer's canvas. "
                 )
 
-                message = _get_layer_image_description(
+                layer_image = _capture_layer_image(
                     viewer=viewer,
                     query=query,
-                    vision_model_name=vision_model_name,
                 )
 
-        return message
+        return layer_image
 
 
-def _get_description_for_whole_canvas(query, viewer, vision_model_name):
-    """Get a vision-LLM description for the entire napari canvas.
+def _capture_whole_canvas_image(query, viewer):
+    """Capture the image of the entire napari canvas.
 
     Args:
         query: The augmented visual query string.
         viewer: The napari viewer instance.
-        vision_model_name: Model identifier for the vision LLM.
 
     Returns:
-        A description message string.
+        A ``_LayerImage`` flagged as showing the whole canvas.
     """
-    with asection(f"Getting description for whole canvas.'"):
+    with asection(f"Capturing image of whole canvas."):
         aprint(f"Query: '{query}'")
 
-        message = _get_layer_image_description(
-            viewer=viewer,
-            query=query,
-            vision_model_name=vision_model_name,
-            layer_name=None,
-        )
+        layer_image = _capture_layer_image(viewer=viewer, query=query, layer_name=None)
+        layer_image.whole_canvas = True
 
-        return message
+        return layer_image
 
 
-def _get_layer_image_description(
+def _capture_layer_image(
     viewer,
     query,
-    vision_model_name: str,
     layer_name: str | None = None,
-    delete: bool = False,
     reset_view: bool = False,
-) -> str:
-    """Capture a canvas snapshot and describe it using a vision LLM.
+) -> _LayerImage:
+    """Capture a frame of the canvas for the vision LLM.
+
+    Must run on the Qt thread. Only the frame is grabbed here, it is
+    downscaled and encoded by ``_describe_layer_image``.
 
     Args:
         viewer: The napari viewer instance.
         query: The visual query to send alongside the image.
-        vision_model_name: Model identifier for the vision LLM.
         layer_name: If provided, isolate this layer for the screenshot.
             If ``None``, capture the entire canvas.
-        delete: Whether to delete the temporary PNG file after use.
         reset_view: Whether to reset the camera view before capturing.
 
     Returns:
-        A formatted message containing the LLM's description.
+        The captured ``_LayerImage``.
     """
-    # Capture the image of the specific layer
+    # Grab the frame of the specific layer, or reuse a recent one:
+    service = get_snapshot_service(viewer)
+    frame = service.grab(canvas_only=True, layer_name=layer_name, reset_view=reset_view)
+
+    return _LayerImage(
+        query=query,
+        layer_name=layer_name,
+        frame=frame,
+        max_size=service.max_size,
+        image_format=service.image_format,
+        quality=service.quality,
+    )
+
+
+def _describe_layer_image(
+    layer_image: _LayerImage, vision_model_name: str, delete: bool = False
+) -> str:
+    """Downscale, encode and describe a captured frame using a vision LLM.
+
+    Does not touch the viewer, so it can run off the Qt thread.
 
+    Args:
+        layer_image: The image captured by ``_capture_layer_image``.
+        vision_model_name: Model identifier for the vision LLM.
+        delete: Whether to delete the temporary image file after use.
+
+    Returns:
+        The LLM's description of the image.
+    """
     from PIL import Image
 
-    snapshot_image: Image = capture_canvas_snapshot(
-        viewer=viewer, layer_name=layer_name, reset_view=reset_view
+    # Downscale and encode the frame compactly (JPEG by default):
+    image = downscale_image(Image.fromarray(layer_image.frame), layer_image.max_size)
+    image_bytes = encode_image(
+        image, image_format=layer_image.image_format, quality=layer_image.quality
     )
-    with tempfile.NamedTemporaryFile(delete=delete, suffix=".png") as tmpfile:
-        # Save the image to a temporary file:
-        snapshot_image.save(tmpfile.name)
 
-        # Query OpenAI API to describe the image of the layer:
-        description = describe_image(
-            image_path=tmpfile.name, query=query, model_name=vision_model_name
+    with tempfile.NamedTemporaryFile(
+        delete=delete, suffix=image_file_suffix(layer_image.image_format)
+    ) as tmpfile:
+        # Save the image to a temporary file:
+        tmpfile.write(image_bytes)
+        tmpfile.flush()
+
+        # Query the vision LLM to describe the image of the layer:
+        return describe_image(
+            image_path=tmpfile.name,
+            query=layer_image.query,
+            model_name=vision_model_name,
         )
-
-        if layer_name:
-            message = f"Tool completed successfully, layer '{layer_name}' description: '{description}'"
-        else:
-            message = f"Tool completed successfully, description: '{description}'"
-    return message
@@ -7,7 +7,6 @@ widget functions in the napari viewer.  The sub-agent is given a
 thread and provides error feedback, allowing up to 3 retry attempts.
 """
 
-import sys
 import traceback
 
 from arbol import aprint, asection
@@ -16,11 +15,8 @@ from litemind.agent.tools.function_tool import FunctionTool
 from litemind.agent.tools.toolset import ToolSet
 from napari import Viewer
 
-from napari_chatgpt.omega_agent.napari_bridge import _get_viewer_info
+from napari_chatgpt.omega_agent.napari_bridge import _get_viewer_info, call_in_napari
 from napari_chatgpt.omega_agent.tools.base_napari_tool import BaseNapariTool
-from napari_chatgpt.omega_agent.tools.generic_coding_instructions import (
-    omega_generic_codegen_instructions,
-)
 from napari_chatgpt.utils.python.dynamic_import import dynamic_import
 from napari_chatgpt.utils.python.exception_guard import ExceptionGuard
 from napari_chatgpt.utils.strings.extract_code import extract_code_from_markdown
@@ -29,7 +25,6 @@ from napari_chatgpt.utils.strings.find_function_name import (
     find_magicgui_decorated_function_name,
 )
 from napari_chatgpt.utils.strings.trailing_code import remove_trailing_code
-from napari_chatgpt.utils.system.information import system_info
 
 _SUB_AGENT_SYSTEM_PROMPT = """
 You are a specialized code generator for napari magicgui widgets.
@@ -51,13 +46,13 @@ You are a specialized code generator for napari magicgui widgets.
 **Instructions:**
 {instructions}
 
+**System Information:**
+{system_information}
+
 {last_generated_code}
 
 **Viewer Information:**
 {viewer_information}
-
-**System Information:**
-{system_information}
 """
 
 _instructions = """
@@ -201,8 +196,10 @@ class _WidgetCodeSubmitTool(FunctionTool):
             def delegated_function(v):
                 return self._execute_widget_code(code, v)
 
-            self._to_napari_queue.put(delegated_function)
-            response = self._from_napari_queue.get()
+            try:
+                response = call_in_napari(self._to_napari_queue, delegated_function)
+            except TimeoutError as e:
+                return f"Error: {e}"
 
             if isinstance(response, ExceptionGuard):
                 error_desc = response.exception_description or str(
@@ -364,27 +361,18 @@ class NapariWidgetMakerTool(BaseNapariTool):
             else:
                 last_generated_code = ""
 
-            filled_generic_instructions = omega_generic_codegen_instructions.format(
-                python_version=str(sys.version.split()[0]),
-                packages=", ".join(self._installed_package_list),
-            )
-            instructions = filled_generic_instructions + self.instructions
-
             viewer_information = (
                 "For reference, below is information about the current state of the napari viewer: \n"
                 + _get_viewer_info()
             )
-            system_information = (
-                "For reference, below is information about the current system: \n"
-                + system_info(add_python_info=False)
-            )
 
-            # Fill the system prompt template:
+            # Fill the system prompt template, stable sections first so that
+            # providers can reuse their cached prefix:
             system_prompt = _SUB_AGENT_SYSTEM_PROMPT.format(
-                instructions=instructions,
+                system_information=self._get_system_information(),
+                instructions=self._get_instructions(),
                 last_generated_code=last_generated_code,
                 viewer_information=viewer_information,
-                system_information=system_information,
             )
 
             # Create the submit tool (fresh per invocation — counter resets):
@@ -7,13 +7,11 @@ a specific number of images via parenthesized integers in the query.
 
 import traceback
 
-import numpy
 from arbol import aprint, asection
-from imageio.v3 import imread
 from napari import Viewer
 
 from napari_chatgpt.omega_agent.tools.base_napari_tool import BaseNapariTool
-from napari_chatgpt.utils.download.download_files import download_file_stealth
+from napari_chatgpt.utils.download.fetch_images import fetch_images
 from napari_chatgpt.utils.strings.find_integer_in_parenthesis import (
     find_integer_in_parenthesis,
 )
@@ -54,13 +52,14 @@ class WebImageSearchTool(BaseNapariTool):
         )
         self.prompt: str = None
 
+        # Search and download in the I/O pool, add layers on the Qt thread:
+        self.split_execution = True
+        self.io_bound = True
+
     def _run_code(self, query: str, code: str, viewer: Viewer) -> str:
-        """Search for images on the web and open them in the napari viewer.
+        """Search, download and open the images on the Qt thread.
 
-        Parses the query for an optional integer in parentheses to determine
-        how many images to open, performs a DuckDuckGo image search, downloads
-        the results, and adds them as image layers. Skips images that fail to
-        download or decode.
+        Only used when ``split_execution`` is disabled.
 
         Args:
             query: Search query string, optionally containing a count in
@@ -72,86 +71,122 @@ class WebImageSearchTool(BaseNapariTool):
             A status message indicating how many images were opened, or an
             error message if the search or all downloads failed.
         """
+        prepared = self._prepare_compute(query, code, viewer)
         try:
+            result = self._compute(query, prepared)
+        except Exception as e:
+            traceback.print_exc()
+            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to search the web for images with this query: '{query}'."
+        return self._commit_result(query, prepared, result, viewer)
 
-            with asection(f"WebImageSearchTool:"):
-                with asection(f"Query:"):
-                    aprint(query)
+    def _prepare_compute(self, query: str, code: str, viewer: Viewer):
+        """Parse the search query and the number of images to open.
 
-                # Parse the number of images to search
-                result = find_integer_in_parenthesis(query)
+        Args:
+            query: Search query string, optionally containing a count in
+                parentheses (e.g., 'sunset (3)').
+            code: Unused; present for API compatibility with ``BaseNapariTool``.
+            viewer: The napari ``Viewer`` instance (unused).
 
-                # Identify search query from nb of images:
-                if result:
-                    search_query, nb_images = result
-                else:
-                    search_query, nb_images = query, 1
+        Returns:
+            A ``(search_query, nb_images)`` tuple.
+        """
+        with asection(f"WebImageSearchTool:"):
+            with asection(f"Query:"):
+                aprint(query)
 
-                # Basic Cleanup:
-                search_query = search_query.strip()
-                nb_images = max(1, nb_images)
+            # Parse the number of images to search
+            result = find_integer_in_parenthesis(query)
 
-                # Search for image:
-                results = search_images_ddg(
-                    query=search_query, num_results=2 * nb_images
-                )
+            # Identify search query from nb of images:
+            if result:
+                search_query, nb_images = result
+            else:
+                search_query, nb_images = query, 1
 
-                aprint(f"Found {len(results)} images.")
+            # Basic Cleanup:
+            search_query = search_query.strip()
+            nb_images = max(1, nb_images)
 
-                # Extract URLs:
-                urls = [r["image"] for r in results]
-                with asection(f"All URLs found:"):
-                    for url in urls:
-                        aprint(url)
+            return search_query, nb_images
 
-                # Limit the number of images to open to the number found:
-                nb_images = min(len(urls), nb_images)
+    def _compute(self, query: str, prepared) -> tuple[list, int]:
+        """Search the web and download the images, off the Qt thread.
 
-                # open each image:
-                number_of_opened_images = 0
-                for i, url in enumerate(urls):
-                    try:
-                        aprint(f"Trying to open image {i} from URL: {url}.")
+        Candidate images are downloaded and decoded concurrently, and the
+        search stops as soon as enough of them are decoded. Images that
+        fail to download or decode are skipped.
 
-                        # Download the image:
-                        file_path = download_file_stealth(url)
+        Args:
+            query: The original search query.
+            prepared: The ``(search_query, nb_images)`` tuple returned by
+                ``_prepare_compute``.
 
-                        if file_path is None:
-                            aprint(f"Image {i} download failed (None path), skipping.")
-                            continue
+        Returns:
+            A ``(images, number_of_urls)`` tuple, where *images* is a list
+            of ``(layer_name, image_array)`` pairs.
+        """
+        search_query, nb_images = prepared
 
-                        # Open the image:
-                        image = imread(file_path)
+        # Search for image:
+        results = search_images_ddg(query=search_query, num_results=2 * nb_images)
 
-                        # convert to array:
-                        image_array = numpy.array(image)
+        aprint(f"Found {len(results)} images.")
 
-                        # Add to napari:
-                        viewer.add_image(image_array, name=f"image_{i}")
+        # Extract URLs:
+        urls = [r["image"] for r in results]
+        with asection(f"All URLs found:"):
+            for url in urls:
+                aprint(url)
 
-                        # Increment counter:
-                        number_of_opened_images += 1
-                        aprint(f"Image {i} opened!")
+        # Limit the number of images to open to the number found:
+        nb_images = min(len(urls), nb_images)
 
-                        # Stop if we have opened enough images:
-                        if number_of_opened_images >= nb_images:
-                            break
+        # Download and decode the images concurrently, keeping the first ones:
+        images = [
+            (f"image_{index}", image_array)
+            for index, _, image_array in fetch_images(urls, max_images=nb_images)
+        ]
 
-                    except Exception as e:
-                        # We ignore single failures:
-                        aprint(f"Image {i} failed to open!")
-                        traceback.print_exc()
+        return images, len(urls)
 
-                if number_of_opened_images > 0:
-                    message = f"Opened {number_of_opened_images} images in napari out of {len(urls)} found."
-                else:
-                    message = f"Found {len(urls)} images, but could not open any! Probably because of a file format issue."
+    def _commit_result(self, query: str, prepared, result, viewer: Viewer) -> str:
+        """Add the downloaded images to the viewer, on the Qt thread.
 
-                with asection(f"Message:"):
-                    aprint(message)
+        Args:
+            query: The original search query.
+            prepared: The tuple returned by ``_prepare_compute``.
+            result: The ``(images, number_of_urls)`` tuple returned by
+                ``_compute``.
+            viewer: The napari ``Viewer`` instance to add image layers to.
 
-                return message
+        Returns:
+            A status message indicating how many images were opened.
+        """
+        images, number_of_urls = result
 
-        except Exception as e:
-            traceback.print_exc()
-            return f"Error: {type(e).__name__} with message: '{str(e)}' occurred while trying to search the web for images with this query: '{query}'."
+        # open each image:
+        number_of_opened_images = 0
+        for name, image_array in images:
+            try:
+                # Add to napari:
+                viewer.add_image(image_array, name=name)
+
+                # Increment counter:
+                number_of_opened_images += 1
+                aprint(f"Image '{name}' opened!")
+
+            except Exception:
+                # We ignore single failures:
+                aprint(f"Image '{name}' failed to open!")
+                traceback.print_exc()
+
+        if number_of_opened_images > 0:
+            message = f"Opened {number_of_opened_images} images in napari out of {number_of_urls} found."
+        else:
+            message = f"Found {number_of_urls} images, but could not open any! Probably because of a file format issue."
+
+        with asection(f"Message:"):
+            aprint(message)
+
+        return message
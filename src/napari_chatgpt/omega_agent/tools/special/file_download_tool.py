@@ -2,7 +2,9 @@
 
 Extracts URLs from the agent's input text, downloads each file to the
 current working directory, and returns the resulting local file paths
-so subsequent tools can operate on the downloaded files.
+so subsequent tools can operate on the downloaded files. Files are fetched
+through the local download cache, so a file requested again is copied
+from disk instead of being downloaded again.
 """
 
 from arbol import aprint, asection
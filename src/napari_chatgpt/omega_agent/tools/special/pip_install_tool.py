@@ -11,6 +11,10 @@ from arbol import aprint, asection
 
 from napari_chatgpt.omega_agent.tools.base_omega_tool import BaseOmegaTool
 from napari_chatgpt.utils.python.installed_packages import is_package_installed
+from napari_chatgpt.utils.python.package_index import (
+    environment_fingerprint,
+    get_package_index,
+)
 from napari_chatgpt.utils.python.pip_utils import pip_install
 
 
@@ -87,6 +91,7 @@ class PipInstallTool(BaseOmegaTool):
                     return message
 
                 # Install the packages (with user permission dialog):
+                fingerprint = environment_fingerprint()
                 message = pip_install(
                     packages,
                     skip_if_installed=True,
@@ -94,6 +99,11 @@ class PipInstallTool(BaseOmegaTool):
                     included=False,
                 )
 
+                # Record the newly installed packages in the package index,
+                # if pip changed the environment:
+                if environment_fingerprint() != fingerprint:
+                    get_package_index().update_packages(packages)
+
                 if self.notebook:
                     self.notebook.add_code_cell(f"!pip install {' '.join(packages)}")
 
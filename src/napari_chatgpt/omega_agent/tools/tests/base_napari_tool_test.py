@@ -1,5 +1,6 @@
 """Tests for BaseNapariTool._prepare_code() and _get_delegated_code()."""
 
+import threading
 from queue import Queue
 from unittest.mock import MagicMock
 
@@ -8,6 +9,7 @@ import pytest
 from napari_chatgpt.omega_agent.tools.base_napari_tool import (
     BaseNapariTool,
     _get_delegated_code,
+    split_prompt_template,
 )
 
 
@@ -108,3 +110,124 @@ class TestGetDelegatedCode:
     def test_nonexistent_raises(self):
         with pytest.raises(FileNotFoundError):
             _get_delegated_code("nonexistent_algorithm", signature=False)
+
+
+class SplitNapariTool(BaseNapariTool):
+    """A BaseNapariTool subclass using split execution, for testing."""
+
+    def _prepare_compute(self, query, code, viewer):
+        self.threads = {"prepare": threading.current_thread().name}
+        return viewer["value"]
+
+    def _compute(self, query, prepared):
+        self.threads["compute"] = threading.current_thread().name
+        if prepared < 0:
+            raise ValueError("negative value")
+        return prepared * 2
+
+    def _commit_result(self, query, prepared, result, viewer):
+        self.threads["commit"] = threading.current_thread().name
+        viewer["result"] = result
+        return f"Success: {result}"
+
+
+def _serve_napari_queue(to_napari_queue, viewer, n):
+    """Emulate the Qt thread: run n napari calls on a fake viewer."""
+    for _ in range(n):
+        call = to_napari_queue.get()
+        call(viewer)
+
+
+class TestSplitExecution:
+    def _run(self, value, n, io_bound=False):
+        to_napari_queue, from_napari_queue = Queue(), Queue()
+        tool = SplitNapariTool(
+            name="SplitTool",
+            description="A split execution test tool.",
+            to_napari_queue=to_napari_queue,
+            from_napari_queue=from_napari_queue,
+            llm=MagicMock(),
+            split_execution=True,
+            io_bound=io_bound,
+        )
+        viewer = {"value": value}
+        qt_thread = threading.Thread(
+            target=_serve_napari_queue,
+            args=(to_napari_queue, viewer, n),
+            name="fake_qt",
+        )
+        qt_thread.start()
+        result = tool._run_split_execution("query", "code")
+        qt_thread.join(timeout=10)
+        return tool, viewer, result
+
+    def test_compute_runs_in_pool(self):
+        tool, viewer, result = self._run(21, n=2)
+        assert result == "Success: 42"
+        assert viewer["result"] == 42
+        assert tool.threads["prepare"] == "fake_qt"
+        assert tool.threads["commit"] == "fake_qt"
+        assert tool.threads["compute"].startswith("omega_compute")
+
+    def test_io_bound_compute_runs_in_io_pool(self):
+        tool, viewer, result = self._run(21, n=2, io_bound=True)
+        assert result == "Success: 42"
+        assert tool.threads["compute"].startswith("omega_io")
+
+    def test_compute_error_skips_commit(self):
+        tool, viewer, result = self._run(-1, n=1)
+        assert result.startswith("Error: ValueError")
+        assert "result" not in viewer
+        assert "commit" not in tool.threads
+
+
+_test_prompt = """
+**Context**
+You write code.
+
+**Instructions:**
+{instructions}
+
+**System Information:**
+{system_information}
+
+{last_generated_code}
+
+**Viewer Information:**
+{viewer_information}
+
+**Request:**
+{input}
+"""
+
+
+class TestPromptSplitting:
+    def test_split_prompt_template(self):
+        static_prompt, dynamic_prompt = split_prompt_template(_test_prompt)
+        assert "{instructions}" in static_prompt
+        assert "{system_information}" in static_prompt
+        assert "{viewer_information}" not in static_prompt
+        assert dynamic_prompt.startswith("{last_generated_code}")
+        assert "{input}" in dynamic_prompt
+
+    def test_split_prompt_template_without_marker(self):
+        assert split_prompt_template("Do {input}") == ("", "Do {input}")
+
+    def test_stable_prefix_sent_as_cached_system(self):
+        from napari_chatgpt.omega_agent.napari_bridge import _set_viewer_info
+
+        _set_viewer_info("no layers")
+        tool = _make_tool(prompt=_test_prompt)
+        tool._execute_in_napari = lambda f: "done"
+
+        tool.run_omega_tool("first request")
+        tool.run_omega_tool("second request")
+
+        first, second = tool.llm.generate.call_args_list
+        assert first.kwargs["cache_system"] is True
+        assert first.kwargs["system"] == second.kwargs["system"]
+        assert "**Instructions:**" in first.kwargs["system"]
+        assert "first request" not in first.kwargs["system"]
+        assert first.kwargs["variables"]["input"] == "first request"
+        assert "{input}" in first.kwargs["prompt"]
+        assert "{instructions}" not in first.kwargs["prompt"]
@@ -8,17 +8,19 @@ from napari_chatgpt.omega_agent.tools.special.file_download_tool import (
 
 
 def test_download_with_urls(tmp_path):
-    """Test URL extraction and download with mocked HTTP request."""
+    """Test URL extraction and download with a mocked download cache."""
     tool = FileDownloadTool()
 
-    fake_response = MagicMock()
-    fake_response.status_code = 200
-    fake_response.raise_for_status = MagicMock()
-    fake_response.iter_content = MagicMock(return_value=[b"fake content"])
+    cached_file = tmp_path / "cache" / "image.tif"
+    cached_file.parent.mkdir()
+    cached_file.write_bytes(b"fake content")
+
+    fake_cache = MagicMock()
+    fake_cache.fetch = MagicMock(return_value=str(cached_file))
 
     with patch(
-        "napari_chatgpt.utils.download.download_files.requests.get",
-        return_value=fake_response,
+        "napari_chatgpt.utils.download.download_files.get_download_cache",
+        return_value=fake_cache,
     ):
         with patch("os.getcwd", return_value=str(tmp_path)):
             query = "Download https://example.com/image.tif"
@@ -26,6 +28,8 @@ def test_download_with_urls(tmp_path):
 
     assert "Successfully downloaded" in result
     assert "image.tif" in result
+    fake_cache.fetch.assert_called_once_with("https://example.com/image.tif")
+    assert (tmp_path / "image.tif").read_bytes() == b"fake content"
 
 
 def test_download_empty_urls():
@@ -61,6 +61,34 @@ def test_pip_install_tool_exception_before_split():
     assert "pkg1" in result or "boom" in result
 
 
+def test_pip_install_tool_failed_install_keeps_package_index():
+    """A failed install must not mark the package index as up to date."""
+    from napari_chatgpt.omega_agent.tools.special.pip_install_tool import (
+        PipInstallTool,
+    )
+
+    module = "napari_chatgpt.omega_agent.tools.special.pip_install_tool"
+    tool = PipInstallTool()
+
+    with (
+        patch(f"{module}.is_package_installed", return_value=False),
+        patch(f"{module}.pip_install", return_value="Error occurred:\n"),
+        patch(f"{module}.environment_fingerprint", return_value="unchanged"),
+        patch(f"{module}.get_package_index") as get_package_index,
+    ):
+        tool.run_omega_tool("pkg1")
+    get_package_index.return_value.update_packages.assert_not_called()
+
+    with (
+        patch(f"{module}.is_package_installed", return_value=False),
+        patch(f"{module}.pip_install", return_value="Installed!\n"),
+        patch(f"{module}.environment_fingerprint", side_effect=["before", "after"]),
+        patch(f"{module}.get_package_index") as get_package_index,
+    ):
+        tool.run_omega_tool("pkg1")
+    get_package_index.return_value.update_packages.assert_called_once_with(["pkg1"])
+
+
 def test_functions_info_tool_exception_handler():
     """Fix 3: PythonFunctionsInfoTool except block is safe."""
     from napari_chatgpt.omega_agent.tools.special.functions_info_tool import (
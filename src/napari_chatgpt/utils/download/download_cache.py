@@ -0,0 +1,565 @@
+"""Local, content-addressed cache of downloaded files.
+
+Files are stored once per content, under their SHA-256 digest, and an
+index maps each URL to the stored file together with the ``ETag`` and
+``Last-Modified`` validators returned by the server. A cached URL is
+revalidated with a ``HEAD`` request once its last validation is older
+than ``revalidate_after`` seconds, and downloaded again only if the
+validators changed. When the server cannot be reached the cached file
+is used as it is.
+
+Interrupted downloads are kept as partial files and resumed with HTTP
+``Range`` requests, guarded by ``If-Range`` so that a file that changed
+on the server is never stitched to an older partial download. Large
+files can be downloaded as several ranges in parallel. The least
+recently used files are evicted once the cache exceeds its maximum
+size.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from arbol import aprint, asection
+from requests.structures import CaseInsensitiveDict
+
+from napari_chatgpt.utils.download.http_session import get_http_session
+
+# Version of the on-disk index format, bump to invalidate existing caches:
+_CACHE_FORMAT = 1
+
+# Files smaller than this are never downloaded in parallel ranges:
+_MIN_PARALLEL_SIZE = 64 * 1024 * 1024
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ChecksumMismatchError(ValueError):
+    """Raised when a downloaded file does not have the expected checksum."""
+
+
+class DownloadCache:
+    """Downloaded files cached on disk, keyed by URL and validated by ETag.
+
+    Attributes:
+        folder: Folder holding the cached files and their index.
+        max_size: Maximum total size in bytes of the cached files.
+        revalidate_after: Time in seconds during which a cached file is
+            used without asking the server whether it changed.
+        parallel_chunks: Number of ranges downloaded in parallel for
+            large files, 1 to disable parallel downloads.
+        timeout: ``(connect, read)`` timeouts in seconds of requests.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        max_size: int = 5 * 1024**3,
+        revalidate_after: float = 3600,
+        parallel_chunks: int = 4,
+        timeout: tuple[float, float] = (10.0, 60.0),
+    ):
+        """Create a cache stored in *folder*; nothing is read until first use.
+
+        Args:
+            folder: Folder holding the cached files and their index.
+            max_size: Maximum total size in bytes of the cached files.
+            revalidate_after: Time in seconds during which a cached file
+                is used without asking the server whether it changed.
+            parallel_chunks: Number of ranges downloaded in parallel for
+                large files, 1 to disable parallel downloads.
+            timeout: ``(connect, read)`` timeouts in seconds of requests.
+        """
+        self.folder = folder
+        self.max_size = max_size
+        self.revalidate_after = revalidate_after
+        self.parallel_chunks = parallel_chunks
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._url_locks: dict[str, threading.Lock] = {}
+        self._entries: dict[str, dict] | None = None
+
+    def fetch(self, url: str, sha256: str | None = None) -> str:
+        """Return the path of the cached file of *url*, downloading it if needed.
+
+        The returned file belongs to the cache: copy it before modifying it.
+
+        Args:
+            url: URL of the file.
+            sha256: Expected SHA-256 digest of the file, as a hexadecimal
+                string, checked after each download.
+
+        Returns:
+            Path of the cached file, named after the last component of
+            the URL path so that readers can pick a format by extension.
+
+        Raises:
+            requests.RequestException: If the file is not cached and
+                cannot be downloaded.
+            ChecksumMismatchError: If the downloaded file does not have
+                the expected digest.
+        """
+        with self._url_lock(url):
+            entry = self._get_entry(url)
+            if entry is not None and (sha256 is None or entry["sha256"] == sha256):
+                if time.time() - entry["validated"] <= self.revalidate_after:
+                    return self._touch(url)
+                head = self._head(url)
+                if head is None or not _changed(entry, head):
+                    # Unchanged, or the server cannot tell us:
+                    return self._touch(url, validated=head is not None)
+                aprint(f"File changed on the server, downloading again: {url}")
+                try:
+                    return self._download(url, head, sha256)
+                except requests.RequestException as e:
+                    aprint(
+                        f"Error: {type(e).__name__} with message: '{str(e)}', using the cached file instead."
+                    )
+                    return self._touch(url)
+
+            return self._download(url, self._head(url), sha256)
+
+    def lookup(self, url: str) -> str | None:
+        """Return the path of the cached file of *url* without any request.
+
+        Args:
+            url: URL of the file.
+
+        Returns:
+            Path of the cached file, or ``None`` if *url* is not cached.
+        """
+        with self._url_lock(url):
+            if self._get_entry(url) is None:
+                return None
+            return self._touch(url)
+
+    def store(self, url: str, data: bytes, headers: dict | None = None) -> str:
+        """Add the contents of *url*, downloaded by the caller, to the cache.
+
+        Args:
+            url: URL the data was downloaded from.
+            data: Contents of the file.
+            headers: Response headers, for the ``ETag`` and
+                ``Last-Modified`` validators.
+
+        Returns:
+            Path of the cached file.
+        """
+        with self._url_lock(url):
+            part_path = self._part_path(url)
+            os.makedirs(os.path.dirname(part_path), exist_ok=True)
+            with open(part_path, "wb") as f:
+                f.write(data)
+            return self._commit(url, part_path, CaseInsensitiveDict(headers), None)
+
+    def size(self) -> int:
+        """Return the total size in bytes of the cached files."""
+        with self._lock:
+            return _total_size(self._load())
+
+    def clear(self):
+        """Remove all cached files and partial downloads."""
+        with self._lock:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self._entries = {}
+
+    # Downloading:
+
+    def _head(self, url: str) -> requests.Response | None:
+        """Return the response to a ``HEAD`` request, or ``None`` on failure."""
+        try:
+            response = get_http_session().head(
+                url, allow_redirects=True, timeout=self.timeout
+            )
+            response.close()
+            if response.ok:
+                return response
+        except requests.RequestException as e:
+            aprint(
+                f"Error: {type(e).__name__} with message: '{str(e)}' while checking: {url}"
+            )
+        return None
+
+    def _download(
+        self, url: str, head: requests.Response | None, sha256: str | None
+    ) -> str:
+        with asection(f"Downloading file at {url}:"):
+            part_path = self._part_path(url)
+            os.makedirs(os.path.dirname(part_path), exist_ok=True)
+            headers = head.headers if head is not None else CaseInsensitiveDict()
+            validator = _validator(headers)
+
+            # Partial downloads of another version of the file are useless:
+            if _read_json(part_path + ".json").get("validator") != validator:
+                _remove_partial_files(part_path)
+            _write_json(part_path + ".json", {"url": url, "validator": validator})
+
+            length = _content_length(headers)
+            if (
+                self.parallel_chunks > 1
+                and headers.get("Accept-Ranges", "").lower() == "bytes"
+                and length is not None
+                and length >= _MIN_PARALLEL_SIZE
+            ):
+                self._download_chunks(url, part_path, length, validator)
+            else:
+                headers = self._download_stream(url, part_path, validator)
+
+            size = os.path.getsize(part_path)
+            if length is not None and size != length:
+                raise requests.RequestException(
+                    f"Downloaded {size} bytes instead of {length} from: {url}"
+                )
+            aprint(f"Downloaded {size} bytes.")
+
+            return self._commit(url, part_path, headers, sha256)
+
+    def _download_stream(
+        self, url: str, part_path: str, validator: str | None
+    ) -> CaseInsensitiveDict:
+        """Download *url* into *part_path*, resuming it if possible.
+
+        Returns:
+            The headers of the response.
+        """
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        request_headers = {}
+        if offset > 0 and validator is not None:
+            aprint(f"Resuming download at byte {offset}.")
+            request_headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+
+        with get_http_session().get(
+            url, headers=request_headers, stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code == 416 and offset > 0:
+                # The partial file is already complete:
+                return response.headers
+            response.raise_for_status()
+
+            # The server sends the whole file if it cannot resume:
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(_CHUNK_SIZE):
+                    f.write(chunk)
+
+            return response.headers
+
+    def _download_chunks(
+        self, url: str, part_path: str, length: int, validator: str | None
+    ):
+        """Download *url* as parallel ranges, then join them in *part_path*."""
+        chunk_length = -(-length // self.parallel_chunks)
+        ranges = [
+            (index, start, min(start + chunk_length, length) - 1)
+            for index, start in enumerate(range(0, length, chunk_length))
+        ]
+        aprint(f"Downloading {len(ranges)} ranges in parallel.")
+
+        with ThreadPoolExecutor(
+            max_workers=len(ranges), thread_name_prefix="omega_download"
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self._download_range,
+                    url,
+                    f"{part_path}.{index}",
+                    start,
+                    end,
+                    validator,
+                )
+                for index, start, end in ranges
+            ]
+            for future in futures:
+                future.result()
+
+        with open(part_path, "wb") as f:
+            for index, _, _ in ranges:
+                with open(f"{part_path}.{index}", "rb") as chunk_file:
+                    shutil.copyfileobj(chunk_file, f, _CHUNK_SIZE)
+                os.remove(f"{part_path}.{index}")
+
+    def _download_range(
+        self,
+        url: str,
+        chunk_path: str,
+        start: int,
+        end: int,
+        validator: str | None,
+    ):
+        """Download bytes *start* to *end* of *url*, resuming *chunk_path*."""
+        offset = os.path.getsize(chunk_path) if os.path.exists(chunk_path) else 0
+        if start + offset > end:
+            return
+        request_headers = {"Range": f"bytes={start + offset}-{end}"}
+        if validator is not None:
+            # The server sends the whole file instead if it changed:
+            request_headers["If-Range"] = validator
+        with get_http_session().get(
+            url,
+            headers=request_headers,
+            stream=True,
+            timeout=self.timeout,
+        ) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise requests.RequestException(
+                    f"Server ignored the range request for: {url}"
+                )
+            with open(chunk_path, "ab") as f:
+                for chunk in response.iter_content(_CHUNK_SIZE):
+                    f.write(chunk)
+
+    # Cache contents:
+
+    def _commit(
+        self,
+        url: str,
+        part_path: str,
+        headers: CaseInsensitiveDict,
+        sha256: str | None,
+    ) -> str:
+        """Move a complete download into the cache and index it."""
+        digest = _file_sha256(part_path)
+        if sha256 is not None and digest != sha256.lower():
+            _remove_partial_files(part_path)
+            raise ChecksumMismatchError(
+                f"File downloaded from {url} has SHA-256 {digest} instead of {sha256}."
+            )
+
+        file_name = _file_name(url)
+        relative_path = os.path.join("files", digest, file_name)
+        path = os.path.join(self.folder, relative_path)
+        if os.path.exists(path):
+            # Same contents and name as another URL or an older download:
+            os.remove(part_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            stored = [
+                name for name in os.listdir(os.path.dirname(path)) if name != file_name
+            ]
+            if stored:
+                # Same contents under another name, stored once:
+                _link_or_copy(os.path.join(os.path.dirname(path), stored[0]), path)
+                os.remove(part_path)
+            else:
+                os.replace(part_path, path)
+        if os.path.exists(part_path + ".json"):
+            os.remove(part_path + ".json")
+
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            previous = entries.get(_url_key(url))
+            entries[_url_key(url)] = {
+                "url": url,
+                "path": relative_path,
+                "size": os.path.getsize(path),
+                "sha256": digest,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "validated": now,
+                "last_access": now,
+            }
+            if previous is not None and previous["path"] != relative_path:
+                # The URL's contents changed, drop the old file if unused:
+                self._remove_unused_file(previous)
+            self._evict(keep=_url_key(url))
+            self._save()
+        return path
+
+    def _get_entry(self, url: str) -> dict | None:
+        with self._lock:
+            entry = self._load().get(_url_key(url))
+            if entry is None:
+                return None
+            if not os.path.exists(os.path.join(self.folder, entry["path"])):
+                # Removed behind our back:
+                del self._entries[_url_key(url)]
+                return None
+            return dict(entry)
+
+    def _touch(self, url: str, validated: bool = False) -> str:
+        with self._lock:
+            entry = self._load()[_url_key(url)]
+            entry["last_access"] = time.time()
+            if validated:
+                entry["validated"] = entry["last_access"]
+            self._save()
+            return os.path.join(self.folder, entry["path"])
+
+    def _evict(self, keep: str):
+        """Remove least recently used files until the cache fits in its maximum size."""
+        entries = self._entries
+        for key in sorted(entries, key=lambda k: entries[k]["last_access"]):
+            if _total_size(entries) <= self.max_size:
+                break
+            if key == keep:
+                continue
+            entry = entries.pop(key)
+            aprint(f"Evicting from the download cache: {entry['url']}")
+            self._remove_unused_file(entry)
+
+    def _remove_unused_file(self, entry: dict):
+        """Remove the file of a removed *entry*, unless another entry uses it."""
+        path = os.path.join(self.folder, entry["path"])
+        others = self._entries.values()
+        # Files are shared by the URLs with the same contents:
+        if all(other["sha256"] != entry["sha256"] for other in others):
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        elif all(other["path"] != entry["path"] for other in others):
+            # The same contents remain under another name:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            return self._url_locks.setdefault(_url_key(url), threading.Lock())
+
+    def _part_path(self, url: str) -> str:
+        return os.path.join(self.folder, "partial", _url_key(url) + ".part")
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            data = _read_json(os.path.join(self.folder, "index.json"))
+            if data.get("format") == _CACHE_FORMAT:
+                self._entries = data.get("entries", {})
+            else:
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        try:
+            _write_json(
+                os.path.join(self.folder, "index.json"),
+                {"format": _CACHE_FORMAT, "entries": self._entries},
+            )
+        except OSError as e:
+            aprint(
+                f"Error: {type(e).__name__} with message: '{str(e)}' while saving the download cache index."
+            )
+
+
+def _changed(entry: dict, head: requests.Response) -> bool:
+    """Return whether the file described by *head* differs from *entry*."""
+    etag = head.headers.get("ETag")
+    if etag and entry["etag"]:
+        return etag != entry["etag"]
+    last_modified = head.headers.get("Last-Modified")
+    if last_modified and entry["last_modified"]:
+        return last_modified != entry["last_modified"]
+    length = _content_length(head.headers)
+    return length is not None and length != entry["size"]
+
+
+def _validator(headers: dict) -> str | None:
+    # Weak ETags cannot be used with If-Range:
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _content_length(headers) -> int | None:
+    length = headers.get("Content-Length")
+    if length and length.isdigit() and "Content-Encoding" not in headers:
+        return int(length)
+    return None
+
+
+def _total_size(entries: dict[str, dict]) -> int:
+    return sum({entry["sha256"]: entry["size"] for entry in entries.values()}.values())
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _file_name(url: str) -> str:
+    parsed = urllib.parse.urlparse(url)
+    return os.path.basename(parsed.path.rstrip("/")) or "downloaded_file"
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: str, destination: str):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def _remove_partial_files(part_path: str):
+    folder = os.path.dirname(part_path)
+    prefix = os.path.basename(part_path)
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            if name.startswith(prefix) and not name.endswith(".json"):
+                os.remove(os.path.join(folder, name))
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write then rename, so that readers never see a partial file:
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+_cache_lock = threading.Lock()
+_cache: DownloadCache | None = None
+
+
+def get_download_cache() -> DownloadCache:
+    """Return the process-wide download cache.
+
+    The cache is stored in ``~/.omega/download_cache`` unless the
+    ``download_cache_path`` key of the ``omega`` application
+    configuration says otherwise. ``download_cache_max_size`` sets its
+    maximum size in bytes (5 GB by default),
+    ``download_cache_revalidate_after`` the time in seconds during which
+    files are used without revalidation (one hour by default), and
+    ``download_parallel_chunks`` the number of ranges downloaded in
+    parallel for large files (4 by default).
+
+    Returns:
+        The shared ``DownloadCache``.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from napari_chatgpt.utils.configuration.app_configuration import (
+                AppConfiguration,
+            )
+
+            config = AppConfiguration("omega")
+            folder = config.get("download_cache_path") or "~/.omega/download_cache"
+            _cache = DownloadCache(
+                os.path.expanduser(folder),
+                max_size=config.get("download_cache_max_size", 5 * 1024**3),
+                revalidate_after=config.get("download_cache_revalidate_after", 3600),
+                parallel_chunks=config.get("download_parallel_chunks", 4),
+            )
+        return _cache
@@ -1,36 +1,23 @@
-"""File download utilities with browser-like HTTP headers."""
+"""File download utilities backed by the local download cache.
+
+Files are fetched through the download cache (see ``download_cache.py``)
+with browser-like HTTP headers, so that a file is downloaded only once
+across requests and sessions, then copied where the caller wants it.
+"""
 
 import os
-import tempfile
+import shutil
 import urllib.parse
 
 import requests
 from arbol import aprint, asection
 
-_DOWNLOAD_HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-    "Accept": (
-        "text/html,application/xhtml+xml," "application/xml;q=0.9,image/webp,*/*;q=0.8"
-    ),
-    "Accept-Language": "en-US,en;q=0.5",
-    "DNT": "1",
-    "Connection": "keep-alive",
-    "Upgrade-Insecure-Requests": "1",
-}
+from napari_chatgpt.utils.download.download_cache import get_download_cache
 
 
 def _download_file(url, file_path) -> str:
-    """Download a single file using proper HTTP headers."""
-    response = requests.get(url, headers=_DOWNLOAD_HEADERS, stream=True, timeout=60)
-    response.raise_for_status()
-
-    with open(file_path, "wb") as f:
-        for chunk in response.iter_content(8192):
-            f.write(chunk)
+    """Download a single file through the download cache and copy it to *file_path*."""
+    shutil.copyfile(get_download_cache().fetch(url), file_path)
 
     return file_path
 
@@ -71,33 +58,26 @@ def download_files(urls, path=None) -> list[str]:
 
 
 def download_file_stealth(url, file_path=None) -> str:
-    """Download a file, optionally to a temporary location.
+    """Download a file, optionally into the download cache only.
 
     Args:
         url: URL to download.
-        file_path: Destination path. If ``None``, a temporary file is created.
+        file_path: Destination path. If ``None``, the path of the file in
+            the download cache is returned; do not modify that file.
 
     Returns:
         Path to the downloaded file, or ``None`` on failure.
     """
-    response = requests.get(url, headers=_DOWNLOAD_HEADERS, stream=True, timeout=60)
-
-    if response.status_code == 200:
-        if file_path is None:
-            # Use a temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False)
-            file_path = temp_file.name
-            file_obj = temp_file
-        else:
-            # Use the specified file path
-            file_obj = open(file_path, "wb")
-
-        with file_obj as f:
-            for chunk in response.iter_content(8192):
-                f.write(chunk)
-
-        aprint(f"File downloaded: {file_path}")
-        return file_path
-    else:
-        aprint(f"Failed to download file: " f"status code {response.status_code}")
+    try:
+        cached_path = get_download_cache().fetch(url)
+    except requests.HTTPError as e:
+        aprint(f"Failed to download file: status code {e.response.status_code}")
         return None
+
+    if file_path is None:
+        file_path = cached_path
+    else:
+        shutil.copyfile(cached_path, file_path)
+
+    aprint(f"File downloaded: {file_path}")
+    return file_path
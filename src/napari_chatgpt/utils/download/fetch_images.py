@@ -0,0 +1,173 @@
+"""Concurrent fetching and decoding of images from the web.
+
+``fetch_images`` downloads candidate images in parallel and returns as
+soon as enough of them could be decoded, so that a request takes about
+as long as the slowest *useful* download rather than the sum of all of
+them. Downloads still running at that point are abandoned. Downloaded
+images are kept in the download cache, so that searching again for the
+same images does not download them again.
+"""
+
+import io
+import threading
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import imageio.v3 as iio
+import numpy
+from arbol import aprint, asection
+
+from napari_chatgpt.utils.download.download_cache import get_download_cache
+from napari_chatgpt.utils.download.http_session import get_http_session
+
+
+class FetchCancelled(Exception):
+    """Raised inside a download when the fetch no longer needs it."""
+
+
+class _HostLimiter:
+    """Limits the number of concurrent downloads from each host."""
+
+    def __init__(self, per_host_limit: int):
+        self._per_host_limit = per_host_limit
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, threading.Semaphore] = {}
+
+    def semaphore(self, url: str) -> threading.Semaphore:
+        host = urllib.parse.urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.Semaphore(self._per_host_limit)
+            return self._semaphores[host]
+
+
+def fetch_images(
+    urls: list[str],
+    max_images: int,
+    max_workers: int = 8,
+    per_host_limit: int = 2,
+    max_bytes: int = 50 * 1024 * 1024,
+    timeout: tuple[float, float] = (5.0, 20.0),
+) -> list[tuple[int, str, numpy.ndarray]]:
+    """Download and decode images concurrently, stopping after enough successes.
+
+    Each URL is downloaded and decoded in a worker thread. As soon as
+    *max_images* images are decoded, pending downloads are cancelled and
+    running ones are aborted at their next chunk.
+
+    Args:
+        urls: Candidate image URLs, best first.
+        max_images: Number of images wanted.
+        max_workers: Number of concurrent downloads.
+        per_host_limit: Maximum number of concurrent downloads per host.
+        max_bytes: Downloads larger than this are abandoned.
+        timeout: ``(connect, read)`` timeouts in seconds for each request;
+            the read timeout applies between received chunks.
+
+    Returns:
+        ``(index, url, image)`` tuples for the decoded images, at most
+        *max_images*, sorted by the index of their URL in *urls*.
+    """
+    if max_images <= 0 or not urls:
+        return []
+
+    cancelled = threading.Event()
+    limiter = _HostLimiter(per_host_limit)
+    images = []
+
+    with asection(f"Fetching up to {max_images} of {len(urls)} images:"):
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(urls))),
+            thread_name_prefix="omega_fetch",
+        )
+        try:
+            pending = {
+                executor.submit(
+                    _fetch_image,
+                    url,
+                    limiter.semaphore(url),
+                    cancelled,
+                    max_bytes,
+                    timeout,
+                ): (index, url)
+                for index, url in enumerate(urls)
+            }
+            while pending and len(images) < max_images:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, url = pending.pop(future)
+                    try:
+                        images.append((index, url, future.result()))
+                        aprint(f"Image {index} fetched from: {url}")
+                    except Exception as e:
+                        # We ignore single failures:
+                        aprint(
+                            f"Image {index} failed: {type(e).__name__} with message: '{str(e)}'"
+                        )
+        finally:
+            # Abandon the downloads we do not need anymore:
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        aprint(f"Fetched {len(images)} images.")
+
+    images.sort(key=lambda image: image[0])
+    return images[:max_images]
+
+
+def _fetch_image(
+    url: str,
+    host_semaphore: threading.Semaphore,
+    cancelled: threading.Event,
+    max_bytes: int,
+    timeout: tuple[float, float],
+) -> numpy.ndarray:
+    """Download one image into memory and decode it."""
+    with host_semaphore:
+        data = _download_bytes(url, cancelled, max_bytes, timeout)
+
+    if cancelled.is_set():
+        raise FetchCancelled(url)
+
+    return numpy.asarray(iio.imread(io.BytesIO(data)))
+
+
+def _download_bytes(
+    url: str,
+    cancelled: threading.Event,
+    max_bytes: int,
+    timeout: tuple[float, float],
+) -> bytes:
+    """Download the body of *url*, at most *max_bytes* of it, or read it from the cache."""
+    if cancelled.is_set():
+        raise FetchCancelled(url)
+
+    cache = get_download_cache()
+    cached_path = cache.lookup(url)
+    if cached_path is not None:
+        with open(cached_path, "rb") as f:
+            return f.read()
+
+    with get_http_session().get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+
+        # Reject large files before downloading them when we can:
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit():
+            if int(content_length) > max_bytes:
+                raise ValueError(
+                    f"File of {content_length} bytes exceeds the limit of {max_bytes} bytes."
+                )
+
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(64 * 1024):
+            if cancelled.is_set():
+                raise FetchCancelled(url)
+            buffer.write(chunk)
+            if buffer.tell() > max_bytes:
+                raise ValueError(f"File exceeds the limit of {max_bytes} bytes.")
+
+        data = buffer.getvalue()
+
+    cache.store(url, data, response.headers)
+    return data
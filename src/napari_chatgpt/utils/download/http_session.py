@@ -0,0 +1,52 @@
+"""Shared, pooled HTTP session for downloads.
+
+Creating a new connection for every request costs a DNS lookup, a TCP
+handshake and a TLS handshake. The session returned by
+``get_http_session`` keeps connections alive and reuses them across
+requests and threads.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Browser-like headers, some hosts refuse requests from scripts:
+BROWSER_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": (
+        "text/html,application/xhtml+xml," "application/xml;q=0.9,image/webp,*/*;q=0.8"
+    ),
+    "Accept-Language": "en-US,en;q=0.5",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+_session_lock = threading.Lock()
+_session: requests.Session | None = None
+
+
+def get_http_session() -> requests.Session:
+    """Return the lazily-created, process-wide HTTP session.
+
+    The session sends ``BROWSER_HEADERS`` and keeps up to 16 connections
+    alive per host, enough for concurrent downloads from the same host.
+
+    Returns:
+        The shared ``requests.Session``.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(BROWSER_HEADERS)
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=16)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from napari_chatgpt.utils.download import download_cache
+from napari_chatgpt.utils.download.download_cache import (
+    ChecksumMismatchError,
+    DownloadCache,
+)
+
+_CONTENTS = {
+    "/data/a.tif": bytes(range(256)) * 40,
+    "/data/b.tif": b"b" * 3000,
+    "/data/copy_of_a.tif": bytes(range(256)) * 40,
+}
+
+
+class _FileHandler(BaseHTTPRequestHandler):
+    """Serves _CONTENTS with ETags and byte ranges, and records requests."""
+
+    requests = []
+    etags = {}
+
+    def do_HEAD(self):
+        self._respond(body=False)
+
+    def do_GET(self):
+        self._respond(body=True)
+
+    def _respond(self, body):
+        cls = type(self)
+        cls.requests.append((self.command, self.path, self.headers.get("Range")))
+        data = _CONTENTS.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        etag = cls.etags.get(self.path, '"v1"')
+
+        start, end, status = 0, len(data) - 1, 200
+        byte_range = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if byte_range and (if_range is None or if_range == etag):
+            first, _, last = byte_range.removeprefix("bytes=").partition("-")
+            start, end, status = int(first), int(last) if last else end, 206
+
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        if body:
+            self.wfile.write(data[start : end + 1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    _FileHandler.requests = []
+    _FileHandler.etags = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FileHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _gets():
+    return [request for request in _FileHandler.requests if request[0] == "GET"]
+
+
+def test_files_are_downloaded_once(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path), revalidate_after=0)
+    url = f"{server_url}/data/a.tif"
+
+    path = cache.fetch(url)
+    assert os.path.basename(path) == "a.tif"
+    assert open(path, "rb").read() == _CONTENTS["/data/a.tif"]
+
+    # Revalidated with a HEAD request, but not downloaded again:
+    assert cache.fetch(url) == path
+    assert len(_gets()) == 1
+
+    # A new instance reads the index back from disk:
+    assert DownloadCache(str(tmp_path)).lookup(url) == path
+
+
+def test_changed_files_are_downloaded_again(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path), revalidate_after=0)
+    url = f"{server_url}/data/b.tif"
+    cache.fetch(url)
+
+    _FileHandler.etags["/data/b.tif"] = '"v2"'
+    cache.fetch(url)
+
+    assert len(_gets()) == 2
+
+
+def test_files_are_not_revalidated_too_often(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path), revalidate_after=3600)
+    url = f"{server_url}/data/b.tif"
+    cache.fetch(url)
+
+    _FileHandler.etags["/data/b.tif"] = '"v2"'
+    cache.fetch(url)
+
+    assert len(_FileHandler.requests) == 2
+
+
+def test_cached_files_are_used_offline(tmp_path, server_url, monkeypatch):
+    cache = DownloadCache(str(tmp_path), revalidate_after=0)
+    url = f"{server_url}/data/b.tif"
+    path = cache.fetch(url)
+
+    def _offline(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(cache, "_download", _offline)
+    monkeypatch.setattr(
+        download_cache.get_http_session(), "head", _offline, raising=False
+    )
+
+    assert cache.fetch(url) == path
+
+
+def test_identical_contents_are_stored_once(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path))
+
+    first = cache.fetch(f"{server_url}/data/a.tif")
+    second = cache.fetch(f"{server_url}/data/copy_of_a.tif")
+
+    assert os.path.dirname(first) == os.path.dirname(second)
+    assert cache.size() == len(_CONTENTS["/data/a.tif"])
+
+
+def test_interrupted_downloads_are_resumed(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path))
+    url = f"{server_url}/data/a.tif"
+
+    # Simulate a download interrupted after 1000 bytes:
+    part_path = cache._part_path(url)
+    os.makedirs(os.path.dirname(part_path))
+    with open(part_path, "wb") as f:
+        f.write(_CONTENTS["/data/a.tif"][:1000])
+    download_cache._write_json(part_path + ".json", {"url": url, "validator": '"v1"'})
+
+    path = cache.fetch(url)
+
+    assert open(path, "rb").read() == _CONTENTS["/data/a.tif"]
+    assert _gets() == [("GET", "/data/a.tif", "bytes=1000-")]
+    assert not os.listdir(os.path.dirname(part_path))
+
+
+def test_partial_downloads_of_another_version_are_discarded(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path))
+    url = f"{server_url}/data/a.tif"
+
+    part_path = cache._part_path(url)
+    os.makedirs(os.path.dirname(part_path))
+    with open(part_path, "wb") as f:
+        f.write(b"x" * 1000)
+    download_cache._write_json(part_path + ".json", {"url": url, "validator": '"v0"'})
+
+    path = cache.fetch(url)
+
+    assert open(path, "rb").read() == _CONTENTS["/data/a.tif"]
+    assert _gets() == [("GET", "/data/a.tif", None)]
+
+
+def test_parallel_ranges(tmp_path, server_url, monkeypatch):
+    monkeypatch.setattr(download_cache, "_MIN_PARALLEL_SIZE", 1000)
+    cache = DownloadCache(str(tmp_path), parallel_chunks=3)
+
+    path = cache.fetch(f"{server_url}/data/a.tif")
+
+    assert open(path, "rb").read() == _CONTENTS["/data/a.tif"]
+    assert sorted(byte_range for _, _, byte_range in _gets()) == [
+        "bytes=0-3413",
+        "bytes=3414-6827",
+        "bytes=6828-10239",
+    ]
+
+
+def test_checksum_verification(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path))
+    url = f"{server_url}/data/b.tif"
+
+    with pytest.raises(ChecksumMismatchError):
+        cache.fetch(url, sha256="0" * 64)
+    assert cache.lookup(url) is None
+
+    sha256 = hashlib.sha256(_CONTENTS["/data/b.tif"]).hexdigest()
+    assert cache.fetch(url, sha256=sha256) is not None
+
+
+def test_least_recently_used_files_are_evicted(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path), max_size=15000)
+    url_a = f"{server_url}/data/a.tif"
+    url_b = f"{server_url}/data/b.tif"
+
+    path_a = cache.fetch(url_a)
+    cache.store("https://example.com/c.tif", b"c" * 4000)
+    cache.lookup(url_a)
+
+    # Adding b exceeds the maximum size, c was used least recently:
+    cache.fetch(url_b)
+
+    assert cache.lookup("https://example.com/c.tif") is None
+    assert cache.lookup(url_a) == path_a
+    assert cache.size() == 10240 + 3000
+
+
+def test_replaced_contents_are_removed(tmp_path):
+    cache = DownloadCache(str(tmp_path), max_size=10)
+    url = "https://example.com/v.tif"
+
+    cache.store(url, b"version 1")
+    path = cache.store(url, b"version 2")
+
+    # Only the file of the latest version is left:
+    assert cache.lookup(url) == path
+    assert os.listdir(os.path.join(str(tmp_path), "files")) == [
+        os.path.basename(os.path.dirname(path))
+    ]
+    assert cache.size() == len(b"version 2")
+
+
+def test_missing_files_raise(tmp_path, server_url):
+    cache = DownloadCache(str(tmp_path))
+
+    with pytest.raises(requests.HTTPError):
+        cache.fetch(f"{server_url}/data/missing.tif")
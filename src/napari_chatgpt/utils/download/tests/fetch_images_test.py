@@ -0,0 +1,130 @@
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import imageio.v3 as iio
+import numpy
+import pytest
+
+from napari_chatgpt.utils.download import download_cache
+from napari_chatgpt.utils.download.download_cache import DownloadCache
+from napari_chatgpt.utils.download.fetch_images import fetch_images
+
+
+def _png_bytes(value: int) -> bytes:
+    buffer = io.BytesIO()
+    iio.imwrite(buffer, numpy.full((8, 8), value, dtype=numpy.uint8), extension=".png")
+    return buffer.getvalue()
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    """Serves /image/<value>, /slow/<value>, /busy/<value>, /huge and /broken."""
+
+    concurrent = 0
+    max_concurrent = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        kind, _, value = self.path.strip("/").partition("/")
+        # Only /busy requests are counted, slow requests of other tests
+        # may still be running:
+        with cls.lock:
+            cls.concurrent += kind == "busy"
+            cls.max_concurrent = max(cls.max_concurrent, cls.concurrent)
+        try:
+            if kind == "slow":
+                time.sleep(3)
+            elif kind == "busy":
+                time.sleep(0.2)
+            if kind in ("image", "slow", "busy"):
+                body = _png_bytes(int(value))
+            elif kind == "huge":
+                body = b"0" * 4096
+            else:
+                body = b"this is not an image"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with cls.lock:
+                cls.concurrent -= kind == "busy"
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    cache = DownloadCache(str(tmp_path / "download_cache"))
+    monkeypatch.setattr(download_cache, "_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _ImageHandler.max_concurrent = 0
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_stops_after_enough_images(server_url):
+    urls = [
+        f"{server_url}/slow/1",
+        f"{server_url}/broken",
+        f"{server_url}/image/2",
+        f"{server_url}/huge",
+        f"{server_url}/image/3",
+    ]
+
+    start = time.monotonic()
+    images = fetch_images(urls, max_images=2, max_bytes=1024)
+    elapsed = time.monotonic() - start
+
+    # The slow image is not waited for, failures are skipped:
+    assert elapsed < 2
+    assert [(index, image[0, 0]) for index, _, image in images] == [(2, 2), (4, 3)]
+
+
+def test_fetch_returns_what_it_can(server_url):
+    urls = [f"{server_url}/broken", f"{server_url}/image/7"]
+
+    images = fetch_images(urls, max_images=3)
+
+    assert [index for index, _, _ in images] == [1]
+    assert images[0][2].shape == (8, 8)
+
+
+def test_fetch_limits_concurrency_per_host(server_url):
+    urls = [f"{server_url}/busy/{value}" for value in range(6)]
+
+    images = fetch_images(urls, max_images=6, max_workers=6, per_host_limit=2)
+
+    assert len(images) == 6
+    assert _ImageHandler.max_concurrent <= 2
+
+
+def test_fetched_images_are_cached(server_url, cache):
+    url = f"{server_url}/busy/5"
+
+    fetch_images([url], max_images=1)
+    assert cache.lookup(url) is not None
+
+    # Served from the cache, the server is not contacted:
+    _ImageHandler.max_concurrent = 0
+    images = fetch_images([url], max_images=1)
+    assert images[0][2][0, 0] == 5
+    assert _ImageHandler.max_concurrent == 0
+
+
+def test_fetch_nothing():
+    assert fetch_images([], max_images=3) == []
+    assert fetch_images(["http://127.0.0.1:1/x"], max_images=0) == []
@@ -0,0 +1,147 @@
+"""Helpers for working with lazy (out-of-core) arrays such as dask and zarr.
+
+Layer data in napari is not always an in-memory numpy array: it can be a
+dask array, a zarr array, or a list of arrays for multiscale data. Calling
+``astype`` or ``ravel`` on such data loads all of it into memory. The
+functions here detect lazy arrays and walk them block by block instead.
+"""
+
+from math import prod
+
+import numpy
+from numpy import ndarray
+
+# Target number of elements per block when walking in-memory arrays:
+_BLOCK_SIZE = 2**20
+
+
+def is_lazy_array(array) -> bool:
+    """Return ``True`` if *array* is array-like but not an in-memory numpy array.
+
+    Dask arrays, zarr arrays, and other array types exposing ``shape``,
+    ``dtype`` and ``chunks`` are considered lazy.
+
+    Args:
+        array: The object to check.
+
+    Returns:
+        ``True`` for lazy arrays, ``False`` otherwise.
+    """
+    if isinstance(array, ndarray):
+        return False
+    return (
+        hasattr(array, "shape") and hasattr(array, "dtype") and hasattr(array, "chunks")
+    )
+
+
+def full_resolution(data):
+    """Return the full resolution level of multiscale data, or *data* itself.
+
+    Args:
+        data: An array, or a list of arrays / napari ``MultiScaleData``.
+
+    Returns:
+        The first (highest resolution) level for multiscale data.
+    """
+    if isinstance(data, (list, tuple)) or type(data).__name__ == "MultiScaleData":
+        return data[0]
+    return data
+
+
+def as_dask_array(array):
+    """Wrap an array into a dask array, keeping its native chunking.
+
+    Args:
+        array: A dask, zarr or numpy array, or multiscale data (in which
+            case the full resolution level is used).
+
+    Returns:
+        A ``dask.array.Array``.
+    """
+    import dask.array as da
+
+    array = full_resolution(array)
+    if isinstance(array, da.Array):
+        return array
+    if is_lazy_array(array):
+        return da.from_array(array, chunks=block_shape(array))
+    return da.from_array(numpy.asarray(array))
+
+
+def block_shape(array) -> tuple[int, ...]:
+    """Return the shape of the blocks in which to walk an array.
+
+    Lazy arrays are walked along their native chunks; in-memory arrays in
+    slabs of roughly a million elements along the first axis.
+
+    Args:
+        array: A lazy or in-memory array.
+
+    Returns:
+        The block shape, one entry per dimension.
+    """
+    chunks = getattr(array, "chunks", None)
+    if chunks is not None and not isinstance(array, ndarray):
+        # dask exposes chunks as a tuple of tuples, zarr as a tuple of ints:
+        if all(isinstance(c, tuple) for c in chunks):
+            return tuple(max(c) if len(c) > 0 else 1 for c in chunks)
+        return tuple(int(c) for c in chunks)
+
+    shape = array.shape
+    slab = max(1, _BLOCK_SIZE // max(1, prod(shape[1:])))
+    return (min(slab, shape[0]),) + tuple(shape[1:])
+
+
+def block_slices(shape, block_shape) -> list[tuple[slice, ...]]:
+    """Return the slices of the blocks tiling an array of the given shape.
+
+    Args:
+        shape: Shape of the array.
+        block_shape: Shape of the blocks, as returned by ``block_shape``.
+
+    Returns:
+        A list of tuples of slices, one tuple per block, in C order.
+    """
+    ranges = [range(0, size, max(1, step)) for size, step in zip(shape, block_shape)]
+    grid = numpy.stack(
+        numpy.meshgrid(*[numpy.arange(len(r)) for r in ranges], indexing="ij"), -1
+    ).reshape(-1, len(shape))
+    return [
+        tuple(
+            slice(r[i], min(r[i] + step, size))
+            for r, i, step, size in zip(ranges, index, block_shape, shape)
+        )
+        for index in grid
+    ]
+
+
+def sample_blocks(array, max_elements: int = 2**22, seed: int = 0) -> ndarray:
+    """Return the values of randomly chosen blocks of an array, flattened.
+
+    Only the sampled blocks are loaded into memory, which makes this
+    suitable for estimating statistics (percentiles, thresholds) of
+    arrays that do not fit in RAM.
+
+    Args:
+        array: A lazy or in-memory array.
+        max_elements: Stop sampling once this many elements were read. At
+            least one block is always read.
+        seed: Seed of the random block order.
+
+    Returns:
+        A 1D numpy array with the values of the sampled blocks.
+    """
+    array = full_resolution(array)
+    blocks = block_slices(array.shape, block_shape(array))
+    order = numpy.random.default_rng(seed).permutation(len(blocks))
+
+    samples = []
+    number_of_elements = 0
+    for index in order:
+        block = numpy.asarray(array[blocks[index]]).ravel()
+        samples.append(block)
+        number_of_elements += block.size
+        if number_of_elements >= max_elements:
+            break
+
+    return numpy.concatenate(samples)
@@ -1,32 +1,237 @@
-"""Image intensity normalization based on percentile ranges."""
+"""Image intensity normalization based on percentile ranges.
+
+Percentiles are estimated without sorting a copy of the whole image:
+8 and 16 bit integer images use an exact histogram accumulated block by
+block, other large images use a random sample of their values. The
+normalized image is written into a single ``float32`` array. Bounds
+computed for an array are cached, so normalizing the same layer data
+again (e.g. when re-running a segmentation with other parameters) skips
+the percentile estimation.
+"""
+
+import threading
+import weakref
 
 import numpy as np
 from napari.types import ArrayLike
-from numpy import percentile, ravel
+from numpy import ndarray
+
+from napari_chatgpt.utils.images.lazy_arrays import (
+    as_dask_array,
+    block_shape,
+    block_slices,
+    full_resolution,
+    is_lazy_array,
+    sample_blocks,
+)
+
+# Images with more values than this are sampled to estimate percentiles:
+_MAX_SAMPLES = 2**22
+
+# Cache of normalization bounds: id(image) -> (weak reference, {key: bounds})
+_bounds_cache: dict[int, tuple[weakref.ref, dict]] = {}
+_bounds_cache_lock = threading.RLock()
 
 
 def normalize_img(
-    image: ArrayLike, p_low: float, p_high: float, clip: bool = True
+    image: ArrayLike,
+    p_low: float,
+    p_high: float,
+    clip: bool = True,
+    bounds: tuple[float, float] | None = None,
+    in_place: bool = False,
 ) -> ArrayLike:
     """Normalize the image to a given percentile range.
 
+    Lazy arrays (dask, zarr, multiscale) are not loaded into memory: the
+    percentiles are estimated from a sample of their chunks and a lazy
+    ``float32`` dask array is returned.
+
     Args:
         image: The image to be normalized.
         p_low: The lower percentile to normalize the image.
         p_high: The higher percentile to normalize the image.
         clip: If True, clip the normalized image between 0 and 1.
+        bounds: Precomputed ``(v_low, v_high)`` intensity bounds; if given,
+            *p_low* and *p_high* are ignored.
+        in_place: If True and *image* is a ``float32`` numpy array, the
+            image is normalized in place instead of into a new array.
 
     Returns:
-        Normalized image.
+        Normalized ``float32`` image.
     """
+    if is_lazy_array(image) or isinstance(image, (list, tuple)):
+        return _normalize_lazy_img(image, p_low, p_high, clip, bounds)
+
+    image = np.asarray(image)
+
     # Calculate lower and higher percentiles:
-    v_low, v_high = percentile(ravel(image), [p_low, p_high])
+    if bounds is None:
+        bounds = get_normalization_bounds(image, p_low, p_high)
+    v_low, v_high = bounds
 
-    # rescale the image:
-    normalized_image = (image - v_low) / (v_high - v_low + 1e-6)
+    # Rescale the image into a single float32 array:
+    if in_place and image.dtype == np.float32:
+        normalized_image = image
+        np.subtract(image, np.float32(v_low), out=normalized_image)
+    else:
+        normalized_image = np.empty(image.shape, dtype=np.float32)
+        np.subtract(
+            image, v_low, out=normalized_image, dtype=np.float32, casting="unsafe"
+        )
+    normalized_image *= np.float32(1.0 / (v_high - v_low + 1e-6))
 
     # Clip between 0 and 1:
     if clip:
-        normalized_image = np.clip(normalized_image, 0, 1)
+        np.clip(normalized_image, 0, 1, out=normalized_image)
 
     return normalized_image
+
+
+def get_normalization_bounds(
+    image: ArrayLike, p_low: float, p_high: float, use_cache: bool = True
+) -> tuple[float, float]:
+    """Return the intensity values at two percentiles of an image.
+
+    Results are cached per array object (as long as it is alive), so
+    repeated calls for the same layer data are free. In-place
+    modifications of the array are not detected; pass ``use_cache=False``
+    after modifying an array in place.
+
+    Args:
+        image: The image, a numpy or lazy array.
+        p_low: The lower percentile.
+        p_high: The higher percentile.
+        use_cache: If True, reuse and store cached bounds.
+
+    Returns:
+        The ``(v_low, v_high)`` intensity bounds.
+    """
+    image = full_resolution(image)
+    key = (float(p_low), float(p_high), tuple(image.shape), str(image.dtype))
+
+    if use_cache:
+        bounds = _get_cached_bounds(image, key)
+        if bounds is not None:
+            return bounds
+
+    if is_lazy_array(image):
+        v_low, v_high = np.percentile(sample_blocks(image), [p_low, p_high])
+    else:
+        v_low, v_high = estimate_percentiles(image, [p_low, p_high])
+    bounds = (float(v_low), float(v_high))
+
+    if use_cache:
+        _set_cached_bounds(image, key, bounds)
+
+    return bounds
+
+
+def estimate_percentiles(
+    image: ndarray, percentiles, max_samples: int = _MAX_SAMPLES, seed: int = 0
+) -> ndarray:
+    """Estimate percentiles of an image without sorting a copy of it.
+
+    Integer images of at most 16 bits get exact percentiles from a
+    histogram accumulated block by block. Other images with more than
+    *max_samples* values get percentiles of a uniform random sample of
+    that many values. Smaller images use ``numpy.percentile`` directly.
+
+    Args:
+        image: The image.
+        percentiles: The percentiles to compute, between 0 and 100.
+        max_samples: Maximum number of values sampled from large images.
+        seed: Seed of the random sample.
+
+    Returns:
+        The values at the requested percentiles.
+    """
+    percentiles = np.asarray(percentiles, dtype=np.float64)
+
+    if image.dtype.kind in "ui" and image.dtype.itemsize <= 2:
+        return _histogram_percentiles(image, percentiles)
+
+    if image.size <= max_samples:
+        return np.percentile(image, percentiles)
+
+    # Sample with random coordinates, which avoids copying non-contiguous images:
+    rng = np.random.default_rng(seed)
+    coordinates = tuple(rng.integers(0, size, size=max_samples) for size in image.shape)
+    return np.percentile(image[coordinates], percentiles)
+
+
+def _histogram_percentiles(image: ndarray, percentiles: ndarray) -> ndarray:
+    """Exact percentiles of an 8 or 16 bit integer image, via its histogram.
+
+    Uses the same linear interpolation as ``numpy.percentile``.
+    """
+    offset = int(np.iinfo(image.dtype).min)
+    number_of_bins = int(np.iinfo(image.dtype).max) - offset + 1
+
+    histogram = np.zeros(number_of_bins, dtype=np.int64)
+    for slices in block_slices(image.shape, block_shape(image)):
+        block = image[slices].ravel()
+        if offset != 0:
+            block = block.astype(np.int32) - offset
+        histogram += np.bincount(block, minlength=number_of_bins)
+
+    # Position of each percentile in the sorted values, as in numpy.percentile:
+    cumulative = np.cumsum(histogram)
+    positions = percentiles / 100.0 * (cumulative[-1] - 1)
+    below = np.floor(positions).astype(np.int64)
+    above = np.minimum(below + 1, cumulative[-1] - 1)
+
+    # Value of the k-th sorted element is the first bin whose cumulative count exceeds k:
+    value_below = np.searchsorted(cumulative, below, side="right") + offset
+    value_above = np.searchsorted(cumulative, above, side="right") + offset
+    fraction = positions - below
+    return value_below + (value_above - value_below) * fraction
+
+
+def _normalize_lazy_img(image, p_low: float, p_high: float, clip: bool, bounds):
+    """Normalize a lazy array using percentiles estimated from sampled chunks."""
+
+    # Estimate lower and higher percentiles from a sample of the chunks:
+    if bounds is None:
+        bounds = get_normalization_bounds(image, p_low, p_high)
+    v_low, v_high = bounds
+
+    # rescale the image lazily:
+    image = as_dask_array(image).astype(np.float32)
+    normalized_image = (image - np.float32(v_low)) / np.float32(v_high - v_low + 1e-6)
+
+    # Clip between 0 and 1:
+    if clip:
+        normalized_image = normalized_image.clip(0, 1)
+
+    return normalized_image
+
+
+def _get_cached_bounds(image, key) -> tuple[float, float] | None:
+    with _bounds_cache_lock:
+        entry = _bounds_cache.get(id(image))
+        if entry is None or entry[0]() is not image:
+            return None
+        return entry[1].get(key)
+
+
+def _set_cached_bounds(image, key, bounds: tuple[float, float]):
+    image_id = id(image)
+    try:
+        reference = weakref.ref(image, lambda _: _evict_cached_bounds(image_id))
+    except TypeError:
+        # Objects that do not support weak references are not cached:
+        return
+    with _bounds_cache_lock:
+        entry = _bounds_cache.get(image_id)
+        if entry is None or entry[0]() is not image:
+            entry = (reference, {})
+            _bounds_cache[image_id] = entry
+        entry[1][key] = bounds
+
+
+def _evict_cached_bounds(image_id: int):
+    with _bounds_cache_lock:
+        entry = _bounds_cache.get(image_id)
+        if entry is not None and entry[0]() is None:
+            del _bounds_cache[image_id]
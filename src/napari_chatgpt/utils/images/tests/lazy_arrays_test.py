@@ -0,0 +1,54 @@
+import dask.array as da
+import numpy as np
+import zarr
+
+from napari_chatgpt.utils.images.lazy_arrays import (
+    as_dask_array,
+    block_shape,
+    block_slices,
+    full_resolution,
+    is_lazy_array,
+    sample_blocks,
+)
+
+
+def test_is_lazy_array():
+    image = np.zeros((8, 8))
+    assert not is_lazy_array(image)
+    assert is_lazy_array(da.from_array(image, chunks=4))
+    assert is_lazy_array(zarr.array(image, chunks=(4, 4)))
+    assert not is_lazy_array([1, 2, 3])
+
+
+def test_block_slices_tile_the_array():
+    image = np.arange(10 * 7).reshape(10, 7)
+    zarr_image = zarr.array(image, chunks=(4, 3))
+
+    assert block_shape(zarr_image) == (4, 3)
+    slices = block_slices(image.shape, block_shape(zarr_image))
+    assert len(slices) == 3 * 3
+
+    covered = np.zeros(image.shape, dtype=int)
+    for block in slices:
+        covered[block] += 1
+    assert (covered == 1).all()
+
+
+def test_sample_blocks_and_dask_wrapping():
+    image = np.arange(64 * 64, dtype=np.uint16).reshape(64, 64)
+    zarr_image = zarr.array(image, chunks=(16, 16))
+
+    # Sampling stops once enough elements were read:
+    sample = sample_blocks(zarr_image, max_elements=16 * 16 * 2)
+    assert sample.size == 16 * 16 * 2
+    assert set(sample.tolist()) <= set(image.ravel().tolist())
+
+    # All blocks when the limit is large enough:
+    assert sorted(sample_blocks(zarr_image).tolist()) == image.ravel().tolist()
+
+    dask_image = as_dask_array(zarr_image)
+    assert dask_image.chunksize == (16, 16)
+    assert (dask_image.compute() == image).all()
+
+    multiscale = [zarr_image, zarr_image[::2, ::2]]
+    assert full_resolution(multiscale) is zarr_image
@@ -14,3 +14,66 @@ def test_normalize_img():
     # Step 3: Assert that the returned normalized image has its min and max values within the expected range
     assert np.isclose(normalized_image.min(), 0, atol=1e-6)
     assert np.isclose(normalized_image.max(), 1, atol=1e-6)
+
+
+def test_normalize_lazy_img():
+    import dask.array as da
+
+    image = np.arange(10000, dtype=np.uint16).reshape(100, 100)
+    lazy_image = da.from_array(image, chunks=(25, 25))
+
+    normalized_image = normalize_img(lazy_image, 5, 95)
+
+    # The result stays lazy, and matches the in-memory normalization:
+    assert isinstance(normalized_image, da.Array)
+    assert normalized_image.dtype == np.float32
+    assert np.allclose(
+        normalized_image.compute(), normalize_img(image, 5, 95), atol=1e-3
+    )
+
+
+def test_estimate_percentiles_histogram_is_exact():
+    from napari_chatgpt.utils.images.normalize import estimate_percentiles
+
+    rng = np.random.default_rng(0)
+    for dtype in [np.uint8, np.int8, np.uint16, np.int16]:
+        info = np.iinfo(dtype)
+        image = rng.integers(info.min, info.max, size=(31, 17), endpoint=True)
+        image = image.astype(dtype)
+        for percentiles in ([0, 100], [1, 99.8], [33.3, 50]):
+            assert np.allclose(
+                estimate_percentiles(image, percentiles),
+                np.percentile(image, percentiles),
+            )
+
+
+def test_estimate_percentiles_sampling():
+    from napari_chatgpt.utils.images.normalize import estimate_percentiles
+
+    image = np.random.default_rng(0).random((200, 300)).astype(np.float32)
+    estimate = estimate_percentiles(image, [1, 99], max_samples=20000)
+    assert np.allclose(estimate, np.percentile(image, [1, 99]), atol=0.01)
+
+
+def test_normalize_img_float32_bounds_and_in_place():
+    from napari_chatgpt.utils.images.normalize import get_normalization_bounds
+
+    image = np.linspace(0, 10, 101, dtype=np.float32).reshape(101, 1)
+
+    normalized = normalize_img(image, 0, 100)
+    assert normalized.dtype == np.float32
+    assert normalized is not image
+
+    # Precomputed bounds take precedence over percentiles:
+    normalized = normalize_img(image, 0, 100, bounds=(0.0, 5.0))
+    assert np.isclose(normalized[50, 0], 1.0, atol=1e-5)
+    assert np.isclose(normalized[25, 0], 0.5, atol=1e-5)
+
+    # Bounds are cached per array:
+    bounds = get_normalization_bounds(image, 0, 100)
+    assert get_normalization_bounds(image, 0, 100) is bounds
+
+    # In-place normalization reuses the input buffer:
+    normalized = normalize_img(image, 0, 100, in_place=True)
+    assert normalized is image
+    assert np.isclose(image.max(), 1, atol=1e-6)
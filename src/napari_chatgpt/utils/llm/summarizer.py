@@ -2,6 +2,7 @@
 
 from napari_chatgpt.llm.litemind_api import get_llm
 from napari_chatgpt.llm.llm import LLM
+from napari_chatgpt.llm.llm_metrics import llm_caller
 
 
 def summarize(text: str, llm: LLM = None):
@@ -34,7 +35,8 @@ def summarize(text: str, llm: LLM = None):
     )
 
     # Call the LLM to get the summary:
-    summary = llm.generate(prompt)
+    with llm_caller("summarizer"):
+        summary = llm.generate(prompt)
 
     # get the last message and extract plain text:
     summary_text = summary[-1].to_plain_text()
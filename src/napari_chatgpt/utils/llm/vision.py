@@ -1,10 +1,11 @@
 """Vision utilities for checking model capabilities and describing images via LLM."""
 
 from arbol import aprint, asection
-from litemind import CombinedApi
 from litemind.apis.base_api import BaseApi
 from litemind.apis.model_features import ModelFeatures
 
+from napari_chatgpt.llm.llm_metrics import llm_caller
+
 
 def is_vision_available(
     api: BaseApi | None = None,
@@ -13,7 +14,8 @@ def is_vision_available(
     """Check if vision is available.
 
     Args:
-        api: API to use for checking availability. If None, uses CombinedApi.
+        api: API to use for checking availability. If None, uses the
+            global LiteMind API.
         model_name: Specific model name to check for vision capabilities.
             If None, checks all models.
 
@@ -24,7 +26,9 @@ def is_vision_available(
     with asection(f"Checking if vision is available:"):
         try:
             if api is None:
-                api = CombinedApi()
+                from napari_chatgpt.llm.litemind_api import get_litemind_api
+
+                api = get_litemind_api()
 
             if model_name is None:
                 model_name = api.get_best_model(
@@ -58,7 +62,8 @@ def describe_image(
     Args:
         image_path: Path to the image to describe.
         query: Query to send to GPT.
-        api: API to use for describing the image. If None, uses CombinedApi.
+        api: API to use for describing the image. If None, uses the
+            global LiteMind API.
         model_name: Model to use.
         number_of_tries: Number of times to try to send the request to GPT.
 
@@ -69,7 +74,9 @@ def describe_image(
     with asection(f"Describe a given image at path: '{image_path}':"):
         try:
             if api is None:
-                api = CombinedApi()
+                from napari_chatgpt.llm.litemind_api import get_litemind_api
+
+                api = get_litemind_api()
 
             if model_name is None or not api.has_model_support_for(
                 model_name=model_name,
@@ -86,12 +93,13 @@ def describe_image(
                 else image_path
             )
 
-            description = api.describe_image(
-                image_uri=image_uri,
-                query=query,
-                model_name=model_name,
-                number_of_tries=number_of_tries,
-            )
+            with llm_caller("vision"):
+                description = api.describe_image(
+                    image_uri=image_uri,
+                    query=query,
+                    model_name=model_name,
+                    number_of_tries=number_of_tries,
+                )
 
             if not description:
                 raise ValueError(
@@ -3,58 +3,35 @@
 from napari import Viewer
 from PIL import Image
 
+from napari_chatgpt.utils.napari.snapshot_service import get_snapshot_service
+
 
 def capture_canvas_snapshot(
-    viewer: Viewer, layer_name: str | None = None, reset_view: bool | None = True
+    viewer: Viewer,
+    layer_name: str | None = None,
+    reset_view: bool | None = True,
+    max_size: int | None = None,
 ) -> Image:
     """Capture a snapshot of the canvas of the napari viewer with only the given layer visible.
 
+    The viewer's ``SnapshotService`` reuses a recent frame if the scene
+    has not changed since, and downscales the snapshot.
+
     Args:
         viewer: The napari viewer.
         layer_name: The name of the layer to capture the snapshot of. Can be
             None, in which case all visible layers are captured.
         reset_view: Whether to reset the view before taking the snapshot.
+        max_size: Maximum width and height of the snapshot in pixels,
+            defaults to the service's configured size.
 
     Returns:
         The snapshot of the canvas of the napari viewer with only the given
         layer visible.
     """
-    # Save the state of the visibility flag of all layers:
-    visibility = {layer: layer.visible for layer in viewer.layers}
-
-    # Save the current camera view
-    if reset_view:
-        saved_view = {
-            "center": viewer.camera.center,
-            "zoom": viewer.camera.zoom,
-            "angles": viewer.camera.angles,
-        }
-
-        # Reset the view
-        viewer.reset_view()
-
-    # If no layer name is given, use all layers:
-    if layer_name:
-        # Hide all layers except for the given one:
-        for layer in viewer.layers:
-            layer.visible = layer.name == layer_name
-
-    # Take a snapshot of the viewer canvas:
-    snapshot = viewer.screenshot(canvas_only=True, flash=True)
-
-    # Restore the original view
-    if reset_view:
-        viewer.camera.center = saved_view["center"]
-        viewer.camera.zoom = saved_view["zoom"]
-        viewer.camera.angles = saved_view["angles"]
-
-    # Convert array to image:
-    image = Image.fromarray(snapshot)
-
-    # Reset the visibility of all layers to their original state:
-    if layer_name:
-        for layer, was_visible in visibility.items():
-            layer.visible = was_visible
-
-    # Return the image:
-    return image
+    return get_snapshot_service(viewer).snapshot(
+        canvas_only=True,
+        layer_name=layer_name,
+        reset_view=bool(reset_view),
+        max_size=max_size,
+    )
@@ -1,22 +1,30 @@
 """Introspection utilities that produce human-readable descriptions of napari viewer state."""
 
+from collections.abc import Callable
+
 import numpy
+from arbol import aprint
 from napari.layers import Image, Labels, Points, Surface, Tracks, Vectors
 from napari.utils.transforms import Affine
 
+from napari_chatgpt.utils.images.lazy_arrays import full_resolution, is_lazy_array
+from napari_chatgpt.utils.segmentation.label_statistics import count_labels
+
 
-def get_viewer_info(viewer):
+def get_viewer_info(viewer, cache: "ViewerInfoCache | None" = None):
     """Return a formatted string describing the full napari viewer state and layers.
 
     Args:
         viewer: The napari ``Viewer`` instance.
+        cache: Optional ``ViewerInfoCache`` used to reuse the descriptions
+            of layers that have not changed since the last call.
 
     Returns:
         A markdown-fenced block containing viewer state and layer information.
     """
     info = "```viewer_info\n"
     info += get_viewer_state(viewer)
-    info += get_viewer_layers_info(viewer)
+    info += get_viewer_layers_info(viewer, cache=cache)
     info += "```\n"
 
     return info
@@ -84,7 +92,10 @@ def get_viewer_state(viewer):
 
 
 def get_viewer_layers_info(
-    viewer, max_layers: int = 20, max_layers_with_details: int = 4
+    viewer,
+    max_layers: int = 20,
+    max_layers_with_details: int = 4,
+    cache: "ViewerInfoCache | None" = None,
 ):
     """List layers in a napari viewer with summary and detailed info.
 
@@ -93,6 +104,8 @@ def get_viewer_layers_info(
         max_layers: Maximum number of layers to include (most recent kept).
         max_layers_with_details: Number of most-recent layers to describe
             with full detail (shape, dtype, etc.).
+        cache: Optional ``ViewerInfoCache`` providing the layer
+            descriptions.
 
     Returns:
         A human-readable string describing all listed layers.
@@ -104,8 +117,10 @@ def get_viewer_layers_info(
 
     number_of_layers = len(layers)
 
+    describe = cache.layer_description if cache is not None else layer_description
+
     for index, layer in enumerate(layers):
-        layer_info = layer_description(
+        layer_info = describe(
             viewer, layer, details=index >= number_of_layers - max_layers_with_details
         )
 
@@ -124,6 +139,10 @@ def get_viewer_layers_info(
     return info_text
 
 
+# Hint given for layers whose data is a lazy (dask, zarr, ...) array:
+_LAZY_DATA_NOTE = "yes, out-of-core data: avoid loading it all into memory"
+
+
 def layer_description(viewer, layer, details: bool = True):
     """Build a dictionary of descriptive properties for a single layer.
 
@@ -171,6 +190,8 @@ def layer_description(viewer, layer, details: bool = True):
             "Image Shape": layer.data.shape,
             "Image Data Type": layer.data.dtype,
         }
+        if is_lazy_array(full_resolution(layer.data)):
+            layer_info["Lazy Data"] = _LAZY_DATA_NOTE
 
         if details:
             layer_info |= {
@@ -196,11 +217,19 @@ def layer_description(viewer, layer, details: bool = True):
             }
 
     elif isinstance(layer, Labels):
-        unique_labels = numpy.unique(layer.data)
+        # Count labels within a small time budget, on the smallest level
+        # of multiscale data:
+        if layer.multiscale:
+            layer_info["Number of Labels (lowest resolution level)"] = str(
+                count_labels(layer.data[-1])
+            )
+        else:
+            layer_info["Number of Labels"] = str(count_labels(layer.data))
         layer_info |= {
-            "Number of Labels": len(unique_labels) - (1 if 0 in unique_labels else 0),
             "Labels Data Type": layer.data.dtype,
         }
+        if is_lazy_array(full_resolution(layer.data)):
+            layer_info["Lazy Data"] = _LAZY_DATA_NOTE
 
         if details:
             layer_info |= {
@@ -232,6 +261,135 @@ def layer_description(viewer, layer, details: bool = True):
     return layer_info
 
 
+class ViewerInfoCache:
+    """Per-layer cache of layer descriptions, invalidated by napari events.
+
+    Describing a layer can be expensive (e.g. counting the labels of a
+    large ``Labels`` layer), so descriptions are computed once and reused
+    until one of the layer's relevant events fires (data, name, transform,
+    display properties, ...) or the layer is removed from the viewer.
+    Each call to ``get_viewer_info`` then only pays for the layers that
+    changed since the previous call.
+
+    Note that in-place modifications of a layer's data array that do not
+    emit any napari event are not detected.
+
+    The cache must be created and used on napari's Qt thread.
+    """
+
+    # Layer events that invalidate a layer's cached description:
+    invalidating_events = (
+        "data",
+        "name",
+        "visible",
+        "opacity",
+        "blending",
+        "scale",
+        "translate",
+        "rotate",
+        "shear",
+        "affine",
+        "interpolation2d",
+        "interpolation3d",
+        "rendering",
+        "symbol",
+        "size",
+        "paint",
+        "labels_update",
+    )
+
+    def __init__(self, viewer):
+        """Attach the cache to a viewer's layer list.
+
+        Args:
+            viewer: The napari ``Viewer`` whose layers are described.
+        """
+        self.viewer = viewer
+
+        # layer id -> {(details, ndisplay, data id): layer_info}
+        self._descriptions: dict[int, dict[tuple, dict]] = {}
+
+        # layer id -> (layer, invalidation callback)
+        self._connections: dict[int, tuple[object, Callable]] = {}
+
+        viewer.layers.events.inserted.connect(self._on_layer_inserted)
+        viewer.layers.events.removed.connect(self._on_layer_removed)
+        for layer in viewer.layers:
+            self._connect_layer(layer)
+
+    def get_viewer_info(self) -> str:
+        """Return the viewer description, reusing cached layer descriptions."""
+        return get_viewer_info(self.viewer, cache=self)
+
+    def layer_description(self, viewer, layer, details: bool = True) -> dict:
+        """Return the (possibly cached) description of a layer.
+
+        Same signature and result as the module-level ``layer_description``.
+        """
+        key = (details, viewer.dims.ndisplay, id(layer.data))
+        layer_descriptions = self._descriptions.setdefault(id(layer), {})
+        layer_info = layer_descriptions.get(key)
+        if layer_info is None:
+            layer_info = layer_description(viewer, layer, details=details)
+            # Drop descriptions made stale by a different ndisplay or data:
+            layer_descriptions.clear()
+            layer_descriptions[key] = layer_info
+        return layer_info
+
+    def invalidate(self, layer=None):
+        """Forget the cached description of a layer, or of all layers.
+
+        Args:
+            layer: The layer to invalidate, or ``None`` for all layers.
+        """
+        if layer is None:
+            self._descriptions.clear()
+        else:
+            self._descriptions.pop(id(layer), None)
+
+    def close(self):
+        """Disconnect from all viewer and layer events and clear the cache."""
+        self.viewer.layers.events.inserted.disconnect(self._on_layer_inserted)
+        self.viewer.layers.events.removed.disconnect(self._on_layer_removed)
+        for layer_id in list(self._connections):
+            self._disconnect_layer(layer_id)
+        self._descriptions.clear()
+
+    def _on_layer_inserted(self, event):
+        self._connect_layer(event.value)
+
+    def _on_layer_removed(self, event):
+        self._disconnect_layer(id(event.value))
+
+    def _connect_layer(self, layer):
+        layer_id = id(layer)
+        if layer_id in self._connections:
+            return
+
+        def _invalidate(event=None):
+            self._descriptions.pop(layer_id, None)
+
+        for event_name in self.invalidating_events:
+            emitter = getattr(layer.events, event_name, None)
+            if emitter is not None:
+                emitter.connect(_invalidate)
+
+        self._connections[layer_id] = (layer, _invalidate)
+
+    def _disconnect_layer(self, layer_id: int):
+        self._descriptions.pop(layer_id, None)
+        layer, callback = self._connections.pop(layer_id, (None, None))
+        if layer is None:
+            return
+        for event_name in self.invalidating_events:
+            emitter = getattr(layer.events, event_name, None)
+            if emitter is not None:
+                try:
+                    emitter.disconnect(callback)
+                except Exception as e:
+                    aprint(f"Could not disconnect from layer event {event_name}: {e}")
+
+
 def affine_to_single_line_string(affine):
     """Convert a napari Affine transform to a single-line string representation.
 
@@ -1,6 +1,6 @@
 """Open files and URLs in napari using multiple fallback strategies."""
 
-import tempfile
+import os
 import traceback
 from typing import TYPE_CHECKING
 
@@ -41,7 +41,7 @@ def open_video_in_napari(viewer: "Viewer", url: str):
 
     Args:
         viewer: The napari ``Viewer`` instance.
-        url: URL pointing to a video file.
+        url: URL or local path of a video file.
 
     Returns:
         ``True`` if the video was successfully opened, ``False`` otherwise.
@@ -57,14 +57,14 @@ def open_video_in_napari(viewer: "Viewer", url: str):
         ):
             return False
 
-        # temp folder:
-        temp_folder = tempfile.gettempdir()
-
-        # Download video file:
-        from napari_chatgpt.utils.download.download_files import download_files
+        if os.path.isfile(url):
+            # Already downloaded, or a local file:
+            file_path = url
+        else:
+            # Download video file, or reuse an earlier download:
+            from napari_chatgpt.utils.download.download_cache import get_download_cache
 
-        file_paths = download_files(urls=[url], path=temp_folder)
-        file_path = file_paths[0]
+            file_path = get_download_cache().fetch(url)
 
         # open video:
         import imageio.v3 as iio
@@ -0,0 +1,369 @@
+"""Viewer snapshots for notebooks and vision queries.
+
+Every screenshot forces napari to render on the Qt thread, and a full
+resolution PNG of a large window makes for a slow and heavy vision LLM
+request. ``SnapshotService`` reduces both costs:
+
+- The last frames grabbed are reused as long as the scene has not
+  changed, which is detected through layer, layer list, camera, dims and
+  grid events.
+- Frames are downscaled to a target resolution and encoded as JPEG or
+  WebP (or PNG) off the Qt thread, with ``downscale_image`` and
+  ``encode_image``.
+
+Note that changes that do not emit any napari event (e.g. in-place
+modifications of a layer's data array) are not detected, frames are
+therefore also dropped after ``max_frame_age`` seconds.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from io import BytesIO
+
+import numpy
+from arbol import aprint
+from napari import Viewer
+from PIL import Image
+
+from napari_chatgpt.utils.configuration.app_configuration import AppConfiguration
+
+# Supported encodings: name -> (PIL format, file suffix)
+_IMAGE_FORMATS = {
+    "png": ("PNG", ".png"),
+    "jpeg": ("JPEG", ".jpg"),
+    "webp": ("WEBP", ".webp"),
+}
+
+
+def downscale_image(image: Image.Image, max_size: int | None) -> Image.Image:
+    """Downscale an image so that its largest side is at most *max_size*.
+
+    Args:
+        image: The image to downscale, it is not modified.
+        max_size: Maximum width and height in pixels, or ``None`` to keep
+            the image as is.
+
+    Returns:
+        The downscaled image, or *image* itself if it is small enough.
+    """
+    if not max_size or max(image.size) <= max_size:
+        return image
+    image = image.copy()
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    return image
+
+
+def encode_image(
+    image: Image.Image, image_format: str = "jpeg", quality: int = 85
+) -> bytes:
+    """Encode an image as PNG, JPEG or WebP.
+
+    Args:
+        image: The image to encode.
+        image_format: ``"png"``, ``"jpeg"`` or ``"webp"``.
+        quality: Quality of lossy encodings, from 1 to 100.
+
+    Returns:
+        The encoded image.
+    """
+    pil_format, _ = _get_image_format(image_format)
+    if pil_format == "JPEG" and image.mode != "RGB":
+        # JPEG has no alpha channel:
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    if pil_format == "PNG":
+        image.save(buffer, format=pil_format, optimize=False)
+    else:
+        image.save(buffer, format=pil_format, quality=quality)
+    return buffer.getvalue()
+
+
+def image_file_suffix(image_format: str) -> str:
+    """Return the file suffix of an image format, e.g. ``".jpg"``."""
+    return _get_image_format(image_format)[1]
+
+
+def _get_image_format(image_format: str) -> tuple[str, str]:
+    try:
+        return _IMAGE_FORMATS[image_format.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown image format: '{image_format}', expected one of {tuple(_IMAGE_FORMATS)}."
+        )
+
+
+class SnapshotService:
+    """Grabs viewer frames, reusing recent ones while the scene is unchanged.
+
+    Frames are kept per kind of snapshot (whole window or canvas, layer
+    shown, view reset) until a scene event fires, or until they are older
+    than ``max_frame_age`` seconds.
+
+    The service must be created and used on napari's Qt thread.
+
+    Attributes:
+        viewer: The napari viewer.
+        max_size: Default maximum width and height of snapshots, in pixels.
+        image_format: Default encoding of snapshots sent to vision LLMs.
+        quality: Default quality of lossy encodings.
+        max_frame_age: Maximum age of a reused frame, in seconds.
+        rendered_frames: Number of frames rendered so far.
+        reused_frames: Number of frames reused so far.
+    """
+
+    # Events that do not change what is rendered:
+    ignored_events = frozenset(
+        {
+            "cursor",
+            "cursor_size",
+            "editable",
+            "extent",
+            "help",
+            "last_used",
+            "loaded",
+            "locked",
+            "metadata",
+            "mode",
+            "mouse_pan",
+            "mouse_zoom",
+            "status",
+            "synced",
+            "thumbnail",
+        }
+    )
+
+    # Maximum number of frames kept:
+    max_frames = 4
+
+    def __init__(
+        self,
+        viewer: Viewer,
+        max_size: int | None = 1024,
+        image_format: str = "jpeg",
+        quality: int = 85,
+        max_frame_age: float = 30.0,
+    ):
+        """Attach the service to a viewer.
+
+        Args:
+            viewer: The napari viewer.
+            max_size: Default maximum width and height of snapshots.
+            image_format: Default encoding of snapshots for vision LLMs.
+            quality: Default quality of lossy encodings.
+            max_frame_age: Maximum age of a reused frame, in seconds.
+        """
+        _get_image_format(image_format)
+        self.viewer = viewer
+        self.max_size = max_size
+        self.image_format = image_format
+        self.quality = quality
+        self.max_frame_age = max_frame_age
+        self.rendered_frames = 0
+        self.reused_frames = 0
+
+        # Incremented by every scene event:
+        self._generation = 0
+
+        # (canvas_only, layer_name, reset_view) -> (generation, time, frame)
+        self._frames: OrderedDict[tuple, tuple[int, float, numpy.ndarray]] = (
+            OrderedDict()
+        )
+
+        # Viewer-level emitter groups, and layer id -> layer:
+        self._groups = [
+            viewer.layers.events,
+            viewer.camera.events,
+            viewer.dims.events,
+            viewer.grid.events,
+        ]
+        self._layers: dict[int, object] = {}
+
+        for group in self._groups:
+            group.connect(self._on_scene_event)
+        viewer.layers.events.inserted.connect(self._on_layer_inserted)
+        viewer.layers.events.removed.connect(self._on_layer_removed)
+        for layer in viewer.layers:
+            self._connect_layer(layer)
+
+    def grab(
+        self,
+        canvas_only: bool = True,
+        layer_name: str | None = None,
+        reset_view: bool = False,
+    ) -> numpy.ndarray:
+        """Return a frame of the viewer, reusing a recent one if possible.
+
+        Args:
+            canvas_only: If ``True``, grab the canvas, otherwise the whole
+                viewer window.
+            layer_name: If given, only this layer is shown in the frame.
+            reset_view: If ``True``, the view is reset for the frame.
+
+        Returns:
+            The frame as an RGBA array, to be treated as read-only.
+        """
+        key = (canvas_only, layer_name, reset_view)
+        entry = self._frames.get(key)
+        if (
+            entry is not None
+            and entry[0] == self._generation
+            and time.monotonic() - entry[1] <= self.max_frame_age
+        ):
+            self._frames.move_to_end(key)
+            self.reused_frames += 1
+            return entry[2]
+
+        frame = self._render(canvas_only, layer_name, reset_view)
+        self.rendered_frames += 1
+
+        # The viewer is back to its original state, so the frame is valid
+        # for the generation reached after restoring it:
+        self._frames[key] = (self._generation, time.monotonic(), frame)
+        self._frames.move_to_end(key)
+        while len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+        return frame
+
+    def snapshot(
+        self,
+        canvas_only: bool = True,
+        layer_name: str | None = None,
+        reset_view: bool = False,
+        max_size: int | None = None,
+    ) -> Image.Image:
+        """Grab a frame as a downscaled PIL image.
+
+        Args:
+            canvas_only: If ``True``, grab the canvas, otherwise the whole
+                viewer window.
+            layer_name: If given, only this layer is shown in the image.
+            reset_view: If ``True``, the view is reset for the image.
+            max_size: Maximum width and height, defaults to ``max_size``.
+
+        Returns:
+            The snapshot image.
+        """
+        frame = self.grab(canvas_only, layer_name, reset_view)
+        return downscale_image(Image.fromarray(frame), max_size or self.max_size)
+
+    def invalidate(self):
+        """Forget all frames."""
+        self._generation += 1
+        self._frames.clear()
+
+    def close(self):
+        """Disconnect from all viewer and layer events and forget all frames."""
+        for group in self._groups:
+            group.disconnect(self._on_scene_event)
+        self.viewer.layers.events.inserted.disconnect(self._on_layer_inserted)
+        self.viewer.layers.events.removed.disconnect(self._on_layer_removed)
+        for layer_id in list(self._layers):
+            self._disconnect_layer(layer_id)
+        self._frames.clear()
+
+    def _render(
+        self, canvas_only: bool, layer_name: str | None, reset_view: bool
+    ) -> numpy.ndarray:
+        """Render a frame, then restore the viewer's view and layer visibility."""
+        viewer = self.viewer
+
+        # Save the state of the visibility flag of all layers:
+        visibility = {layer: layer.visible for layer in viewer.layers}
+
+        # Save the current camera view
+        saved_view = {
+            "center": viewer.camera.center,
+            "zoom": viewer.camera.zoom,
+            "angles": viewer.camera.angles,
+        }
+
+        try:
+            if reset_view:
+                viewer.reset_view()
+
+            # If no layer name is given, use all layers:
+            if layer_name:
+                # Hide all layers except for the given one:
+                for layer in viewer.layers:
+                    layer.visible = layer.name == layer_name
+
+            # No flash, it would animate the canvas for nothing:
+            return viewer.screenshot(canvas_only=canvas_only, flash=False)
+
+        finally:
+            # Restore the original view
+            if reset_view:
+                viewer.camera.center = saved_view["center"]
+                viewer.camera.zoom = saved_view["zoom"]
+                viewer.camera.angles = saved_view["angles"]
+
+            # Reset the visibility of all layers to their original state:
+            if layer_name:
+                for layer, was_visible in visibility.items():
+                    layer.visible = was_visible
+
+    def _on_scene_event(self, event=None):
+        if event is not None and event.type in self.ignored_events:
+            return
+        self._generation += 1
+
+    def _on_layer_inserted(self, event):
+        self._connect_layer(event.value)
+
+    def _on_layer_removed(self, event):
+        self._disconnect_layer(id(event.value))
+
+    def _connect_layer(self, layer):
+        if id(layer) not in self._layers:
+            layer.events.connect(self._on_scene_event)
+            self._layers[id(layer)] = layer
+
+    def _disconnect_layer(self, layer_id: int):
+        layer = self._layers.pop(layer_id, None)
+        if layer is None:
+            return
+        try:
+            layer.events.disconnect(self._on_scene_event)
+        except Exception as e:
+            aprint(f"Could not disconnect from layer events: {e}")
+
+
+# One service per viewer, created on first use:
+_services: dict[int, SnapshotService] = {}
+
+
+def get_snapshot_service(
+    viewer: Viewer, factory: Callable[[Viewer], SnapshotService] | None = None
+) -> SnapshotService:
+    """Return the snapshot service of a viewer, creating it if needed.
+
+    The defaults of new services are read from the ``omega`` application
+    configuration: ``snapshot_max_size``, ``snapshot_format``,
+    ``snapshot_quality`` and ``snapshot_max_frame_age``.
+
+    Must be called on napari's Qt thread.
+
+    Args:
+        viewer: The napari viewer.
+        factory: Creates the service, defaults to the configured one.
+
+    Returns:
+        The viewer's snapshot service.
+    """
+    service = _services.get(id(viewer))
+    if service is None or service.viewer is not viewer:
+        service = (factory or _configured_snapshot_service)(viewer)
+        _services[id(viewer)] = service
+    return service
+
+
+def _configured_snapshot_service(viewer: Viewer) -> SnapshotService:
+    config = AppConfiguration("omega")
+    return SnapshotService(
+        viewer,
+        max_size=config.get("snapshot_max_size", 1024),
+        image_format=config.get("snapshot_format", "jpeg"),
+        quality=config.get("snapshot_quality", 85),
+        max_frame_age=config.get("snapshot_max_frame_age", 30.0),
+    )
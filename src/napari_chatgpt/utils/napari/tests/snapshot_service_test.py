@@ -0,0 +1,115 @@
+import io
+
+import numpy
+import pytest
+from napari.components import ViewerModel
+from PIL import Image
+
+from napari_chatgpt.utils.napari.snapshot_service import (
+    SnapshotService,
+    downscale_image,
+    encode_image,
+    image_file_suffix,
+)
+
+
+class _ScreenshotViewer(ViewerModel):
+    """Viewer model with a fake screenshot recording the visible layers."""
+
+    def screenshot(self, canvas_only=True, flash=True):
+        self._screenshots.append([layer.name for layer in self.layers if layer.visible])
+        return numpy.zeros((600, 800, 4), dtype=numpy.uint8)
+
+
+def _make_viewer():
+    viewer = _ScreenshotViewer()
+    object.__setattr__(viewer, "_screenshots", [])
+    viewer.add_image(numpy.zeros((16, 16)), name="image")
+    viewer.add_labels(numpy.zeros((16, 16), dtype=numpy.int32), name="labels")
+    return viewer
+
+
+def test_frames_are_reused_until_the_scene_changes():
+    viewer = _make_viewer()
+    service = SnapshotService(viewer)
+
+    first = service.grab()
+    assert service.grab() is first
+    assert (service.rendered_frames, service.reused_frames) == (1, 1)
+
+    # Camera, layer and layer list events invalidate the frame:
+    viewer.camera.zoom = 2.0
+    service.grab()
+    viewer.layers["image"].opacity = 0.5
+    service.grab()
+    viewer.add_points(numpy.array([[1, 1]]), name="points")
+    service.grab()
+    assert service.rendered_frames == 4
+
+    # Events that do not change the rendering do not:
+    viewer.layers["image"].help = "some help"
+    service.grab()
+    assert service.rendered_frames == 4
+
+    service.close()
+    viewer.camera.zoom = 3.0
+    assert service._frames == {}
+
+
+def test_layer_frames_restore_visibility_and_are_reused():
+    viewer = _make_viewer()
+    service = SnapshotService(viewer)
+
+    layer_frame = service.grab(layer_name="labels", reset_view=True)
+    assert viewer._screenshots == [["labels"]]
+    assert all(layer.visible for layer in viewer.layers)
+
+    # Toggling and restoring visibility does not invalidate the frame:
+    assert service.grab(layer_name="labels", reset_view=True) is layer_frame
+
+    # Frames of different kinds are kept apart:
+    service.grab()
+    assert viewer._screenshots == [["labels"], ["image", "labels"]]
+
+
+def test_old_frames_are_not_reused():
+    viewer = _make_viewer()
+    service = SnapshotService(viewer, max_frame_age=0.0)
+
+    service.grab()
+    service.grab()
+    assert service.rendered_frames == 2
+
+
+def test_snapshot_is_downscaled():
+    viewer = _make_viewer()
+    service = SnapshotService(viewer, max_size=200)
+
+    assert service.snapshot().size == (200, 150)
+    assert service.snapshot(max_size=400).size == (400, 300)
+
+
+def test_downscale_image_keeps_small_images():
+    image = Image.new("RGB", (100, 50))
+    assert downscale_image(image, 200) is image
+    assert downscale_image(image, None) is image
+    assert downscale_image(image, 50).size == (50, 25)
+
+
+@pytest.mark.parametrize("image_format", ["png", "jpeg", "webp"])
+def test_encode_image(image_format):
+    image = Image.new("RGBA", (64, 48), (255, 0, 0, 255))
+
+    encoded = encode_image(image, image_format=image_format, quality=70)
+
+    decoded = Image.open(io.BytesIO(encoded))
+    assert (
+        decoded.format == {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}[image_format]
+    )
+    assert decoded.size == (64, 48)
+    assert image_file_suffix(image_format).lstrip(".") in ("png", "jpg", "webp")
+
+
+def test_unknown_image_format():
+    with pytest.raises(ValueError):
+        encode_image(Image.new("RGB", (4, 4)), image_format="gif")
@@ -0,0 +1,69 @@
+import numpy
+import pytest
+from napari.layers import Image, Labels
+
+from napari_chatgpt.utils.napari.viewer_data_snapshot import ViewerDataSnapshot
+
+
+class _FakeViewer:
+    """Minimal viewer exposing a real napari LayerList."""
+
+    def __init__(self):
+        from napari.components import LayerList
+
+        self.layers = LayerList()
+        self.title = "fake"
+
+
+def _make_viewer():
+    viewer = _FakeViewer()
+    viewer.layers.append(Image(numpy.zeros((8, 8)), name="image"))
+    viewer.layers.append(Labels(numpy.zeros((8, 8), dtype=numpy.int32), name="labels"))
+    return viewer
+
+
+def test_viewer_data_snapshot_layers():
+    viewer = _make_viewer()
+    snapshot = ViewerDataSnapshot(viewer)
+
+    assert len(snapshot.layers) == 2
+    assert "image" in snapshot.layers
+    assert isinstance(snapshot.layers["image"], Image)
+    assert isinstance(snapshot.layers[1], Labels)
+    assert snapshot.layers.index("labels") == 1
+    assert snapshot.layers["image"].data is viewer.layers["image"].data
+    assert snapshot.title == "fake"
+
+    with pytest.raises(KeyError):
+        _ = snapshot.layers["missing"]
+
+
+def test_viewer_data_snapshot_selection_and_read_only():
+    viewer = _make_viewer()
+    viewer.layers.selection.active = viewer.layers["labels"]
+    snapshot = ViewerDataSnapshot(viewer)
+
+    assert snapshot.layers.selection.active.name == "labels"
+    assert viewer.layers["labels"] in snapshot.layers.selection
+
+    # Changes to the live viewer after capture do not affect the snapshot:
+    viewer.layers["image"].data = numpy.ones((8, 8))
+    assert snapshot.layers["image"].data.sum() == 0
+
+    with pytest.raises(AttributeError):
+        snapshot.layers["image"].data = None
+
+
+def test_viewer_data_snapshot_refuses_changes():
+    viewer = _make_viewer()
+    viewer.add_labels = lambda *args, **kwargs: pytest.fail("viewer touched")
+    snapshot = ViewerDataSnapshot(viewer)
+
+    with pytest.raises(AttributeError, match="add_labels"):
+        snapshot.add_labels(numpy.zeros((8, 8), dtype=numpy.int32))
+    with pytest.raises(AttributeError, match="refresh"):
+        snapshot.layers["image"].refresh()
+
+    # Layer values and read-only methods are still available:
+    assert tuple(snapshot.layers["image"].scale) == (1.0, 1.0)
+    assert snapshot.layers["image"].world_to_data((1, 2)) is not None
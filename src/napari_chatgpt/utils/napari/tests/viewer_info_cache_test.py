@@ -0,0 +1,86 @@
+import numpy
+import pytest
+from napari.components import ViewerModel
+
+from napari_chatgpt.utils.napari import napari_viewer_info
+from napari_chatgpt.utils.napari.napari_viewer_info import (
+    ViewerInfoCache,
+    get_viewer_layers_info,
+)
+
+
+@pytest.fixture
+def counted_descriptions(monkeypatch):
+    """Count calls to the uncached layer_description function."""
+    calls = []
+    original = napari_viewer_info.layer_description
+
+    def _counting_layer_description(viewer, layer, details=True):
+        calls.append(layer.name)
+        return original(viewer, layer, details=details)
+
+    monkeypatch.setattr(
+        napari_viewer_info, "layer_description", _counting_layer_description
+    )
+    return calls
+
+
+def _make_viewer():
+    viewer = ViewerModel()
+    viewer.add_image(numpy.zeros((16, 16)), name="image")
+    viewer.add_labels(numpy.zeros((16, 16), dtype=numpy.int32), name="labels")
+    return viewer
+
+
+def test_viewer_info_cache_reuses_descriptions(counted_descriptions):
+    viewer = _make_viewer()
+    cache = ViewerInfoCache(viewer)
+
+    first = get_viewer_layers_info(viewer, cache=cache)
+    assert sorted(counted_descriptions) == ["image", "labels"]
+
+    counted_descriptions.clear()
+    second = get_viewer_layers_info(viewer, cache=cache)
+    assert counted_descriptions == []
+    assert first == second
+    assert first == get_viewer_layers_info(viewer)
+
+
+def test_viewer_info_cache_invalidation(counted_descriptions):
+    viewer = _make_viewer()
+    cache = ViewerInfoCache(viewer)
+    get_viewer_layers_info(viewer, cache=cache)
+
+    # Changing the data of one layer only invalidates that layer:
+    counted_descriptions.clear()
+    labels = numpy.zeros((16, 16), dtype=numpy.int32)
+    labels[2:5, 2:5] = 1
+    labels[8:10, 8:10] = 2
+    viewer.layers["labels"].data = labels
+    info = get_viewer_layers_info(viewer, cache=cache)
+    assert counted_descriptions == ["labels"]
+    assert "Number of Labels: 2" in info
+
+    # Renaming and transforms invalidate too:
+    counted_descriptions.clear()
+    viewer.layers["image"].name = "renamed"
+    viewer.layers["labels"].scale = (2, 2)
+    info = get_viewer_layers_info(viewer, cache=cache)
+    assert sorted(counted_descriptions) == ["labels", "renamed"]
+    assert "renamed" in info
+
+
+def test_viewer_info_cache_insert_remove(counted_descriptions):
+    viewer = _make_viewer()
+    cache = ViewerInfoCache(viewer)
+    get_viewer_layers_info(viewer, cache=cache)
+
+    counted_descriptions.clear()
+    viewer.add_points(numpy.array([[1, 1], [2, 2]]), name="points")
+    viewer.layers.remove("image")
+    info = get_viewer_layers_info(viewer, cache=cache)
+    assert counted_descriptions == ["points"]
+    assert "image" not in info
+
+    cache.close()
+    assert cache._connections == {}
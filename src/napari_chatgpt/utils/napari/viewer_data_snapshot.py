@@ -0,0 +1,143 @@
+"""Read-only stand-ins for a napari viewer that can be used off the Qt thread.
+
+A :class:`ViewerDataSnapshot` is captured on the Qt thread and then handed
+to code running in a worker thread. It records the layer list, the layer
+selection and every layer's ``data`` reference at capture time, so that
+code such as ``viewer.layers['cells'].data`` or
+``viewer.layers.selection.active.data`` can run in a worker without
+touching the live viewer's layer list. Methods that could change the
+viewer or its layers (``add_labels``, ``refresh``, ...) raise an
+``AttributeError`` instead of running on the live viewer from a worker.
+"""
+
+from collections.abc import Iterator
+from typing import Any
+
+# Read-only methods of layers that can be called from a worker thread:
+_LAYER_METHODS = frozenset({"data_to_world", "world_to_data", "get_value"})
+
+# Attributes of the viewer that can be read from a worker thread:
+_VIEWER_ATTRIBUTES = frozenset({"dims", "camera", "grid", "title"})
+
+
+class LayerSnapshot:
+    """Read-only proxy of a single napari layer.
+
+    ``name`` and ``data`` are captured at construction time; other
+    attributes are read from the underlying layer, but only a few
+    read-only methods can be called. ``isinstance`` checks
+    against napari layer classes keep working because ``__class__``
+    reports the class of the wrapped layer.
+    """
+
+    def __init__(self, layer):
+        object.__setattr__(self, "_layer", layer)
+        object.__setattr__(self, "name", layer.name)
+        object.__setattr__(self, "data", layer.data)
+
+    @property
+    def __class__(self):
+        return type(self._layer)
+
+    def __getattr__(self, item: str) -> Any:
+        value = getattr(self._layer, item)
+        if callable(value) and item not in _LAYER_METHODS:
+            raise AttributeError(
+                f"Cannot call '{item}' on layer '{self.name}': layer snapshots are read-only, return the result instead of changing the layer."
+            )
+        return value
+
+    def __setattr__(self, key: str, value: Any):
+        raise AttributeError(
+            f"Cannot set attribute '{key}': layer snapshots are read-only."
+        )
+
+    def __repr__(self) -> str:
+        return f"LayerSnapshot({self._layer!r})"
+
+
+class _SelectionSnapshot:
+    """Snapshot of the layer selection (active layer and selected layers)."""
+
+    def __init__(self, active: LayerSnapshot | None, selected: list[LayerSnapshot]):
+        self.active = active
+        self._selected = selected
+
+    def __iter__(self) -> Iterator[LayerSnapshot]:
+        return iter(self._selected)
+
+    def __len__(self) -> int:
+        return len(self._selected)
+
+    def __contains__(self, item) -> bool:
+        return any(item is s or item is s._layer for s in self._selected)
+
+
+class LayerListSnapshot:
+    """Read-only snapshot of a napari ``LayerList``.
+
+    Supports indexing by position, slice or layer name, iteration,
+    ``len``, ``in`` and the ``selection`` attribute.
+    """
+
+    def __init__(self, layers):
+        self._layers = [LayerSnapshot(layer) for layer in layers]
+        by_identity = {id(s._layer): s for s in self._layers}
+
+        active = layers.selection.active
+        selected = [
+            by_identity[id(layer)]
+            for layer in layers.selection
+            if id(layer) in by_identity
+        ]
+        self.selection = _SelectionSnapshot(
+            active=by_identity.get(id(active)) if active is not None else None,
+            selected=selected,
+        )
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for layer in self._layers:
+                if layer.name == key:
+                    return layer
+            raise KeyError(f"'{key}' is not in list")
+        return self._layers[key]
+
+    def __iter__(self) -> Iterator[LayerSnapshot]:
+        return iter(self._layers)
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def __contains__(self, item) -> bool:
+        if isinstance(item, str):
+            return any(layer.name == item for layer in self._layers)
+        return any(item is s or item is s._layer for s in self._layers)
+
+    def index(self, key) -> int:
+        """Return the position of a layer given its name or the layer itself."""
+        for index, layer in enumerate(self._layers):
+            if layer.name == key or layer is key or layer._layer is key:
+                return index
+        raise ValueError(f"{key!r} is not in list")
+
+
+class ViewerDataSnapshot:
+    """Read-only stand-in for a napari ``Viewer`` used by worker threads.
+
+    Must be constructed on the Qt thread. Besides ``layers``, only
+    ``dims``, ``camera``, ``grid`` and ``title`` are read from the live
+    viewer; anything else, such as ``add_labels``, raises an
+    ``AttributeError``.
+    """
+
+    def __init__(self, viewer):
+        self._viewer = viewer
+        self.layers = LayerListSnapshot(viewer.layers)
+
+    def __getattr__(self, item: str) -> Any:
+        if item in _VIEWER_ATTRIBUTES:
+            return getattr(self._viewer, item)
+        raise AttributeError(
+            f"Cannot use 'viewer.{item}': this function runs off the Qt thread on a read-only viewer, return the result instead of changing the viewer."
+        )
@@ -2,17 +2,29 @@
 
 Provides ``JupyterNotebookFile``, a helper for building ``.ipynb`` files
 with code cells, markdown cells, and embedded images.
+
+Viewer snapshots are stored as PNG sidecar files in a ``<notebook>_files``
+folder next to the notebook and referenced by relative path, so that the
+notebook itself stays small; they can be embedded when the notebook is
+closed. Snapshots and writes can be handed over to a background thread,
+which captures and encodes snapshots and coalesces pending writes.
 """
 
 import os
+import shutil
+import tempfile
+import threading
 from base64 import b64encode
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 from io import BytesIO
 from mimetypes import guess_type
 from os import makedirs, path
 
 import nbformat
+from arbol import aprint
 from nbformat.v4 import new_code_cell, new_markdown_cell, new_notebook
 from PIL import Image
 
@@ -32,16 +44,30 @@ class JupyterNotebookFile:
             explicit path is given.
         file_path: Path of the most recently saved notebook file, or ``None``.
         notebook: The in-memory ``nbformat`` notebook object.
+        embed_snapshots_on_close: If ``True``, snapshot sidecar files are
+            embedded in the notebook when it is closed or restarted.
     """
 
-    def __init__(self, notebook_folder_path: str | None = None):
+    def __init__(
+        self,
+        notebook_folder_path: str | None = None,
+        embed_snapshots_on_close: bool = False,
+    ):
         """Initialize a new notebook.
 
         Args:
             notebook_folder_path: Directory for saving notebook files.
                 Defaults to ``~/Desktop/omega_notebooks/``.
+            embed_snapshots_on_close: If ``True``, embed the snapshot
+                sidecar files in the notebook when it is closed.
         """
+        self.embed_snapshots_on_close = embed_snapshots_on_close
         self._modified = False
+        # Cells may be added from the agent, tool and writer threads:
+        self._lock = threading.RLock()
+        # Single background thread for snapshots and writes, in order:
+        self._executor: ThreadPoolExecutor | None = None
+        self._write_pending = False
         self.restart(
             notebook_folder_path=notebook_folder_path,
             write_before_restart=False,
@@ -69,7 +95,10 @@ class JupyterNotebookFile:
 
         if write_before_restart:
             # Write the notebook to disk before restarting
-            self.write()
+            self._finalize()
+        else:
+            # Let pending snapshots and writes of the previous notebook end:
+            self.flush()
 
         # path of system's desktop folder:
         desktop_path = path.join(path.join(path.expanduser("~")), "Desktop")
@@ -97,23 +126,117 @@ class JupyterNotebookFile:
         # Actual file path of the notebook (last saved file path):
         self.file_path = None
 
-        # Restart the notebook:
-        self.notebook = new_notebook()
+        # Folder of the snapshot sidecar files, created on first snapshot:
+        self.sidecar_folder_path = path.splitext(self.default_file_path)[0] + "_files"
 
-        # Mark as not modified:
-        self._modified = False
+        with self._lock:
+            # Restart the notebook:
+            self.notebook = new_notebook()
+
+            # Snapshot cells and their sidecar files, for embedding:
+            self._snapshot_cells = []
+
+            # Mark as not modified:
+            self._modified = False
 
     def write(self, file_path: str | None = None):
         """Write the notebook to disk.
 
+        The file is replaced atomically, so that it is never left half
+        written if writing fails or is interrupted.
+
         Args:
             file_path: Destination path. Defaults to ``self.default_file_path``.
         """
         file_path = file_path or self.default_file_path
+
+        # Serialize under the lock, cells may be added concurrently:
+        with self._lock:
+            content = nbformat.writes(self.notebook)
+
         # Write the notebook to disk
-        with open(file_path, "w", encoding="utf-8") as f:
-            nbformat.write(self.notebook, f)
-            self.file_path = file_path
+        folder = path.dirname(file_path) or "."
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", suffix=".ipynb", dir=folder, delete=False
+        ) as f:
+            f.write(content)
+        os.replace(f.name, file_path)
+        self.file_path = file_path
+
+    def write_in_background(self):
+        """Write the notebook to disk on the background thread.
+
+        Requests made while a write is still pending are coalesced into
+        that write, which saves the notebook as it is when it runs.
+        """
+        with self._lock:
+            if self._write_pending:
+                return
+            self._write_pending = True
+        self._get_executor().submit(self._background_write)
+
+    def _background_write(self):
+        with self._lock:
+            self._write_pending = False
+        try:
+            self.write()
+        except Exception as e:
+            aprint(
+                f"Error: {type(e).__name__} with message: '{str(e)}' while writing notebook: {self.default_file_path}"
+            )
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait for the pending background snapshots and writes.
+
+        Args:
+            timeout: Maximum seconds to wait, or ``None`` to wait as long
+                as needed.
+
+        Returns:
+            ``True`` if all pending work is done, ``False`` on timeout.
+        """
+        with self._lock:
+            executor = self._executor
+        if executor is None:
+            return True
+        try:
+            executor.submit(lambda: None).result(timeout=timeout)
+            return True
+        except FutureTimeoutError:
+            return False
+
+    def close(self, timeout: float | None = 30.0):
+        """Finish pending work, write the notebook and stop the background thread.
+
+        Snapshots are embedded first if ``embed_snapshots_on_close`` is set.
+        Snapshots that are still being taken after *timeout* seconds are
+        left out.
+
+        Args:
+            timeout: Maximum seconds to wait for pending background work.
+        """
+        if self._modified or self.file_path is not None:
+            self._finalize(timeout=timeout)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finalize(self, timeout: float | None = None):
+        """Flush pending work, embed snapshots if requested, and write."""
+        if not self.flush(timeout=timeout):
+            aprint("Warning: notebook snapshots still pending, writing without them.")
+        if self.embed_snapshots_on_close:
+            self.embed_snapshots()
+        self.write()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="omega_notebook"
+                )
+            return self._executor
 
     def add_code_cell(self, code: str, remove_quotes: bool = False):
         """Append a code cell to the notebook.
@@ -127,11 +250,12 @@ class JupyterNotebookFile:
             # Remove the quotes from the code block
             code = "\n".join(code.split("\n")[1:-1])
 
-        # Add a code cell
-        self.notebook.cells.append(new_code_cell(code))
+        with self._lock:
+            # Add a code cell
+            self.notebook.cells.append(new_code_cell(code))
 
-        # Mark as modified:
-        self._modified = True
+            # Mark as modified:
+            self._modified = True
 
     def add_markdown_cell(self, markdown: str, detect_code_blocks: bool = True):
         """Append a markdown cell, optionally extracting embedded code blocks.
@@ -155,21 +279,23 @@ class JupyterNotebookFile:
                         self.add_markdown_cell(block, detect_code_blocks=False)
 
         else:
-            # Add a plain markdown cell without detecting code blocks:
-            self.notebook.cells.append(new_markdown_cell(markdown))
+            with self._lock:
+                # Add a plain markdown cell without detecting code blocks:
+                self.notebook.cells.append(new_markdown_cell(markdown))
 
-            # Mark as modified:
-            self._modified = True
+                # Mark as modified:
+                self._modified = True
 
     def _add_image(self, base64_string: str, image_type: str, text: str = ""):
         # Add a markdown cell with the image and optional text
         image_html = f'<img src="data:image/{image_type};base64,{base64_string}"/>'
         markdown_content = f"{text}\n\n{image_html}" if text else image_html
         new_image_cell = new_markdown_cell(markdown_content)
-        self.notebook.cells.append(new_image_cell)
+        with self._lock:
+            self.notebook.cells.append(new_image_cell)
 
-        # Mark as modified:
-        self._modified = True
+            # Mark as modified:
+            self._modified = True
 
     def add_image_cell(self, image_path: str, text: str = ""):
         """Add a markdown cell with an embedded image loaded from a file path.
@@ -202,24 +328,86 @@ class JupyterNotebookFile:
         # Use the existing method to add the image with text
         self._add_image(base64_string, "PNG", text)
 
-        # Mark as modified:
-        self._modified = True
-
     def register_snapshot_function(self, snapshot_function: Callable):
         """Register a callable that returns a PIL ``Image`` snapshot."""
         self._snapshot_function = snapshot_function
 
     def take_snapshot(self, text: str = ""):
-        """Take a snapshot using the registered function and embed it as a cell.
+        """Take a snapshot using the registered function and add it as a cell.
+
+        The snapshot is saved as a PNG sidecar file referenced by the cell.
 
         Args:
             text: Optional descriptive text to include with the snapshot.
         """
-        # Call the snapshot function:
-        pil_image = self._snapshot_function()
+        cell, file_path = self._add_snapshot_cell(text)
+        self._fill_snapshot_cell(cell, file_path, text)
 
-        # Add this image to the notebook
-        self.add_image_cell_from_PIL_image(pil_image, text)
+    def take_snapshot_in_background(self, text: str = ""):
+        """Like ``take_snapshot``, but capture and encode on the background thread.
+
+        The cell is added right away, so that it keeps its place among the
+        cells added afterwards, and is filled in once the snapshot is saved.
+
+        Args:
+            text: Optional descriptive text to include with the snapshot.
+        """
+        cell, file_path = self._add_snapshot_cell(text)
+        self._get_executor().submit(self._fill_snapshot_cell, cell, file_path, text)
+
+    def _add_snapshot_cell(self, text: str):
+        """Add a placeholder cell for a snapshot and pick its sidecar file."""
+        with self._lock:
+            file_name = f"snapshot_{len(self._snapshot_cells) + 1:04d}.png"
+            file_path = path.join(self.sidecar_folder_path, file_name)
+            cell = new_markdown_cell(_with_text(text, "*Taking snapshot...*"))
+            self.notebook.cells.append(cell)
+            self._snapshot_cells.append((cell, file_path, text))
+            self._modified = True
+        return cell, file_path
+
+    def _fill_snapshot_cell(self, cell, file_path: str, text: str):
+        """Capture the snapshot, save it as a sidecar file and reference it."""
+        try:
+            # Call the snapshot function:
+            pil_image = self._snapshot_function()
+            if not isinstance(pil_image, Image.Image):
+                raise ValueError(f"snapshot function returned: {pil_image!r}")
+
+            # Save the image next to the notebook:
+            sidecar_folder_path = path.dirname(file_path)
+            makedirs(sidecar_folder_path, exist_ok=True)
+            pil_image.save(file_path, format="PNG")
+
+            relative_path = (
+                f"{path.basename(sidecar_folder_path)}/{path.basename(file_path)}"
+            )
+            source = _with_text(text, f'<img src="{relative_path}"/>')
+        except Exception as e:
+            aprint(
+                f"Error: {type(e).__name__} with message: '{str(e)}' while taking notebook snapshot."
+            )
+            source = _with_text(text, "*Snapshot not available.*")
+
+        with self._lock:
+            cell.source = source
+
+    def embed_snapshots(self):
+        """Embed the snapshot sidecar files in the notebook and delete them."""
+        with self._lock:
+            snapshot_cells = list(self._snapshot_cells)
+
+        for cell, file_path, text in snapshot_cells:
+            if not path.exists(file_path):
+                continue
+            with open(file_path, "rb") as image_file:
+                base64_string = b64encode(image_file.read()).decode()
+            image_html = f'<img src="data:image/png;base64,{base64_string}"/>'
+            with self._lock:
+                cell.source = _with_text(text, image_html)
+
+        if path.isdir(self.sidecar_folder_path):
+            shutil.rmtree(self.sidecar_folder_path, ignore_errors=True)
 
     def delete_notebook_file(self):
         """Delete the saved notebook file from disk, if it exists."""
@@ -228,6 +416,15 @@ class JupyterNotebookFile:
             os.unlink(self.file_path)
             print(f"Deleted the notebook at {self.file_path}")
 
+        # Delete the snapshot sidecar files:
+        if path.isdir(self.sidecar_folder_path):
+            shutil.rmtree(self.sidecar_folder_path, ignore_errors=True)
+
+
+def _with_text(text: str, content: str) -> str:
+    """Return *content* preceded by *text*, if any, as markdown."""
+    return f"{text}\n\n{content}" if text else content
+
 
 # def start_jupyter_server(folder_path):
 #     # Function to run the notebook server in a thread
@@ -0,0 +1,108 @@
+"""Tests for sidecar snapshots and background writes of notebooks."""
+
+import os
+import threading
+
+import nbformat
+import numpy as np
+from PIL import Image
+
+from napari_chatgpt.utils.notebook.jupyter_notebook import JupyterNotebookFile
+
+
+def _snapshot():
+    return Image.fromarray(np.zeros((8, 8, 3), dtype=np.uint8))
+
+
+def test_snapshot_is_saved_as_sidecar_file(tmp_path):
+    notebook = JupyterNotebookFile(notebook_folder_path=str(tmp_path))
+    notebook.register_snapshot_function(_snapshot)
+
+    notebook.take_snapshot("Viewer")
+    notebook.write()
+
+    source = notebook.notebook.cells[0].source
+    assert "base64" not in source
+    assert source.startswith("Viewer")
+
+    sidecar_name = os.path.basename(notebook.sidecar_folder_path)
+    assert f'<img src="{sidecar_name}/snapshot_0001.png"/>' in source
+    assert os.path.exists(
+        os.path.join(notebook.sidecar_folder_path, "snapshot_0001.png")
+    )
+
+
+def test_background_snapshot_keeps_cell_order(tmp_path):
+    notebook = JupyterNotebookFile(notebook_folder_path=str(tmp_path))
+    release = threading.Event()
+
+    def slow_snapshot():
+        release.wait(timeout=5)
+        return _snapshot()
+
+    notebook.register_snapshot_function(slow_snapshot)
+
+    notebook.add_markdown_cell("before")
+    notebook.take_snapshot_in_background()
+    notebook.add_markdown_cell("after")
+    assert "Taking snapshot" in notebook.notebook.cells[1].source
+
+    release.set()
+    notebook.write_in_background()
+    assert notebook.flush(timeout=5)
+
+    with open(notebook.file_path, encoding="utf-8") as f:
+        written = nbformat.read(f, as_version=4)
+    sources = [cell.source for cell in written.cells]
+    assert sources[0] == "before"
+    assert "snapshot_0001.png" in sources[1]
+    assert sources[2] == "after"
+
+    notebook.close()
+
+
+def test_background_writes_are_coalesced(tmp_path):
+    notebook = JupyterNotebookFile(notebook_folder_path=str(tmp_path))
+    release = threading.Event()
+    writes = []
+
+    # Block the background thread so that write requests pile up:
+    notebook._get_executor().submit(release.wait, 5)
+    original_write = notebook.write
+    notebook.write = lambda *args: writes.append(1) or original_write(*args)
+
+    for i in range(5):
+        notebook.add_markdown_cell(f"cell {i}")
+        notebook.write_in_background()
+    release.set()
+    assert notebook.flush(timeout=5)
+
+    assert len(writes) == 1
+    with open(notebook.file_path, encoding="utf-8") as f:
+        assert len(nbformat.read(f, as_version=4).cells) == 5
+
+    notebook.close()
+
+
+def test_failed_snapshot_does_not_break_notebook(tmp_path):
+    notebook = JupyterNotebookFile(notebook_folder_path=str(tmp_path))
+    notebook.register_snapshot_function(lambda: None)
+
+    notebook.take_snapshot()
+
+    assert "Snapshot not available" in notebook.notebook.cells[0].source
+
+
+def test_embed_snapshots_on_close(tmp_path):
+    notebook = JupyterNotebookFile(
+        notebook_folder_path=str(tmp_path), embed_snapshots_on_close=True
+    )
+    notebook.register_snapshot_function(_snapshot)
+
+    notebook.take_snapshot_in_background("Viewer")
+    notebook.close()
+
+    with open(notebook.file_path, encoding="utf-8") as f:
+        written = nbformat.read(f, as_version=4)
+    assert "data:image/png;base64," in written.cells[0].source
+    assert not os.path.exists(notebook.sidecar_folder_path)
@@ -10,6 +10,7 @@ from arbol import aprint, asection
 
 from napari_chatgpt.llm.litemind_api import get_llm
 from napari_chatgpt.llm.llm import LLM
+from napari_chatgpt.llm.llm_metrics import llm_caller
 from napari_chatgpt.utils.python.installed_packages import installed_package_list
 from napari_chatgpt.utils.strings.extract_code import extract_code_from_markdown
 
@@ -88,9 +89,10 @@ def add_comments(
             }
 
             # call LLM:
-            response = llm.generate(
-                prompt=_add_comments_prompt, variables=variables, temperature=0.0
-            )
+            with llm_caller("add_comments"):
+                response = llm.generate(
+                    prompt=_add_comments_prompt, variables=variables, temperature=0.0
+                )
 
             # Extract the response text:
             response_text = response[-1].to_plain_text()
@@ -11,6 +11,7 @@ from arbol import aprint, asection
 
 from napari_chatgpt.llm.litemind_api import get_llm
 from napari_chatgpt.llm.llm import LLM
+from napari_chatgpt.llm.llm_metrics import llm_caller
 from napari_chatgpt.utils.python.installed_packages import installed_package_list
 
 _check_code_safety_prompt = """
@@ -89,9 +90,12 @@ def check_code_safety(
             }
 
             # call LLM:
-            response = llm.generate(
-                prompt=_check_code_safety_prompt, variables=variables, temperature=0.0
-            )
+            with llm_caller("check_code_safety"):
+                response = llm.generate(
+                    prompt=_check_code_safety_prompt,
+                    variables=variables,
+                    temperature=0.0,
+                )
 
             # Extract the response text:
             response = response[-1].to_plain_text()
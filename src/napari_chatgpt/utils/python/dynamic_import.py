@@ -2,10 +2,26 @@
 
 Provides functions to dynamically load Python code as modules at runtime
 and execute arbitrary code strings with captured stdout.
+
+Code is compiled in memory and the compiled code objects are cached by
+the SHA-256 hash of their source, so running the same snippet again
+skips parsing and compilation. The source of each snippet is registered
+with ``linecache`` under a pseudo filename, so tracebacks and ``inspect``
+still show the code even though it never touches the disk. Snippets that
+need a real source file, such as numba functions compiled with
+``cache=True`` or code reading ``__file__``, are written to disk instead.
 """
 
-import importlib.util
+import atexit
+import hashlib
+import linecache
+import os
+import re
+import shutil
 import tempfile
+import threading
+import types
+from collections import OrderedDict
 from contextlib import redirect_stdout
 from io import StringIO
 from random import randint
@@ -13,16 +29,82 @@ from typing import Any
 
 from arbol import aprint, asection
 
+from napari_chatgpt.utils.system.tracing import span
+
+# Maximum number of compiled snippets kept in the cache:
+_MAX_CACHED_CODE = 128
+
+# Cache of compiled code objects: source hash -> code object
+_code_cache: OrderedDict[str, types.CodeType] = OrderedDict()
+_code_cache_lock = threading.Lock()
+
+# Folder holding the snippets that must exist as files, removed at exit:
+_snippet_folder: str | None = None
+
+# Code that needs a real source file: __file__, or numba's on-disk cache:
+_needs_file_pattern = re.compile(r"__file__|\bcache\s*=\s*True\b")
+
+
+def compile_cached(source: str) -> types.CodeType:
+    """Compile a source string, reusing the code object of an identical source.
+
+    The source is registered with ``linecache`` under the pseudo filename
+    of the code object, so that tracebacks and ``inspect.getsource`` work.
+
+    Args:
+        source: Python source code to compile.
+
+    Returns:
+        The compiled code object.
+    """
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    with _code_cache_lock:
+        code = _code_cache.get(key)
+        if code is not None:
+            _code_cache.move_to_end(key)
+            _register_source(code.co_filename, source)
+            return code
 
-def dynamic_import(module_code: str, name: str = None) -> Any | None:
+    # Compile outside the lock:
+    filename = f"<omega-snippet-{key[:16]}>"
+    code = compile(source, filename, "exec")
+    _register_source(filename, source)
+
+    with _code_cache_lock:
+        _code_cache[key] = code
+        while len(_code_cache) > _MAX_CACHED_CODE:
+            _, evicted = _code_cache.popitem(last=False)
+            linecache.cache.pop(evicted.co_filename, None)
+
+    return code
+
+
+def clear_code_cache():
+    """Drop all cached code objects and their ``linecache`` entries."""
+    with _code_cache_lock:
+        for code in _code_cache.values():
+            linecache.cache.pop(code.co_filename, None)
+        _code_cache.clear()
+
+
+def dynamic_import(
+    module_code: str, name: str = None, on_disk: bool | None = None
+) -> Any | None:
     """Dynamically load a Python code string as an importable module.
 
-    Writes the code to a temporary file and loads it as a Python module
-    using ``importlib``.
+    The code is compiled in memory (or taken from the code cache) and
+    executed in a new module object.
 
     Args:
         module_code: Python source code to load as a module.
         name: Optional module name. If None, a random name is generated.
+        on_disk: If True, the code is also written to a file that the
+            module's ``__file__`` points to, for libraries that need to
+            read or cache next to the source file (e.g. numba's
+            ``cache=True``). These files are removed when the process exits.
+            If None, the code is written to a file only when it refers to
+            ``__file__`` or uses ``cache=True``.
 
     Returns:
         The loaded module object, or None if loading fails.
@@ -31,23 +113,72 @@ def dynamic_import(module_code: str, name: str = None) -> Any | None:
     if not name:
         name = f"some_code_{randint(0, 999999999)}"
 
-    # Write code to temp file:
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-        f.write(module_code)
-        module_path = f.name
+    if on_disk is None:
+        on_disk = needs_source_file(module_code)
 
-    # Load the module from the temporary file
-    spec = importlib.util.spec_from_file_location(name=name, location=module_path)
+    if on_disk:
+        # Compile against the real file so that the code refers to it:
+        module_path = _write_snippet_file(module_code)
+        code = compile(module_code, module_path, "exec")
+    else:
+        code = compile_cached(module_code)
+        module_path = code.co_filename
 
-    # Not clear what this is about:
-    loaded_module = importlib.util.module_from_spec(spec)
+    # Create the module:
+    loaded_module = types.ModuleType(name)
+    loaded_module.__file__ = module_path
 
     # Execute module:
-    spec.loader.exec_module(loaded_module)
+    exec(code, loaded_module.__dict__)
 
     return loaded_module
 
 
+def needs_source_file(source: str) -> bool:
+    """Return True if *source* needs to run from a real file rather than from memory.
+
+    Args:
+        source: Python source code.
+
+    Returns:
+        True if the code refers to ``__file__`` or uses ``cache=True``
+        (e.g. numba's ``@jit(cache=True)``, which caches next to the file).
+    """
+    return _needs_file_pattern.search(source) is not None
+
+
+def _register_source(filename: str, source: str):
+    """Make *source* available to ``linecache`` under *filename*."""
+    # An mtime of None tells linecache.checkcache to keep the entry:
+    linecache.cache[filename] = (
+        len(source),
+        None,
+        source.splitlines(keepends=True),
+        filename,
+    )
+
+
+def _write_snippet_file(source: str) -> str:
+    """Write a snippet to the snippet folder, reusing the file of identical code."""
+    global _snippet_folder
+    with _code_cache_lock:
+        if _snippet_folder is None:
+            _snippet_folder = tempfile.mkdtemp(prefix="omega_snippets_")
+            atexit.register(shutil.rmtree, _snippet_folder, ignore_errors=True)
+        folder = _snippet_folder
+
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    path = os.path.join(folder, f"snippet_{key[:16]}.py")
+    if not os.path.exists(path):
+        # Write then rename, so that concurrent writers never expose a partial file:
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".py", dir=folder, delete=False
+        ) as f:
+            f.write(source)
+        os.replace(f.name, path)
+    return path
+
+
 # This should not have spurious whitespace, as it is used to format the code:
 __execution_harness = """
 def execute_code({}):
@@ -60,7 +191,8 @@ def execute_as_module(code_str, name: str = None, **kwargs) -> str:
 
     Wraps the code inside an ``execute_code`` function, loads it as a
     dynamic module, and calls the function with the provided keyword
-    arguments. All stdout output is captured and returned.
+    arguments. All stdout output is captured and returned. Running the
+    same code with the same argument names again reuses the compiled code.
 
     Args:
         code_str: Python source code to execute.
@@ -70,7 +202,10 @@ def execute_as_module(code_str, name: str = None, **kwargs) -> str:
     Returns:
         Captured stdout output from the code execution.
     """
-    with asection(f"Executing code as module (length={len(code_str)})"):
+    with (
+        asection(f"Executing code as module (length={len(code_str)})"),
+        span("python.execute_as_module", module=name),
+    ):
 
         # Create a function in the new module that will receive the variables
         # as arguments, and will contain the code_str
@@ -86,13 +221,14 @@ def execute_as_module(code_str, name: str = None, **kwargs) -> str:
             aprint(module_code)
 
         # Load the code as module:
-        _module_ = dynamic_import(module_code, name)
+        with span("python.dynamic_import", code_length=len(module_code)):
+            _module_ = dynamic_import(module_code, name)
 
         # get the function from module:
         execute_code = getattr(_module_, "execute_code")
 
         f = StringIO()
-        with redirect_stdout(f):
+        with redirect_stdout(f), span("python.execute_code"):
             # Call the execute_code function with the global variables as arguments
             if kwargs:
                 execute_code(**kwargs)
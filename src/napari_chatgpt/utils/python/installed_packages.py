@@ -2,21 +2,31 @@
 
 Provides functions to list installed packages (via pip and conda),
 check whether a specific package is installed, and filter the list
-to signal-processing-related packages.
+to signal-processing-related packages. Package lists come from the
+persistent package index (see ``package_index``), so they are not
+rescanned every time they are needed.
 """
 
 import importlib.util
+import threading
 import traceback
-from functools import lru_cache
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import version as pkg_version
 
+from napari_chatgpt.utils.python.package_index import (
+    get_package_index,
+    scan_conda_packages,
+    scan_pip_packages,
+)
 from napari_chatgpt.utils.python.relevant_libraries import (
     get_all_signal_processing_related_packages,
 )
 
+# Filtered package lists: (arguments, index generation) -> package list
+_filtered_lists: dict[tuple, list[str]] = {}
+_filtered_lists_lock = threading.Lock()
+
 
-@lru_cache
 def installed_package_list(
     clean_up: bool = True,
     version: bool = True,
@@ -24,6 +34,9 @@ def installed_package_list(
 ):
     """Return a deduplicated list of installed packages from pip and conda.
 
+    Results are cached per combination of arguments until the package
+    index changes.
+
     Args:
         clean_up: If True, exclude AWS and internal library packages.
         version: If True, include version numbers (e.g., "numpy==1.24.0").
@@ -34,7 +47,18 @@ def installed_package_list(
     Returns:
         A deduplicated list of installed package names (with optional versions).
     """
-    package_list = pip_list(version=version) + conda_list(version=version)
+    index = get_package_index()
+
+    key = (clean_up, version, tuple(filter) if filter else None, index.generation)
+    with _filtered_lists_lock:
+        cached = _filtered_lists.get(key)
+    if cached is not None:
+        return list(cached)
+
+    package_list = index.packages(version=version)
+
+    # Loading the index on first use changes its generation:
+    key = key[:-1] + (index.generation,)
 
     if clean_up:
         package_list = [pkg for pkg in package_list if not "aws-" in pkg]
@@ -46,7 +70,13 @@ def installed_package_list(
     # Remove duplicates in list:
     package_list = list(set(package_list))
 
-    return package_list
+    with _filtered_lists_lock:
+        # Drop the lists of older index generations:
+        for stale_key in [k for k in _filtered_lists if k[-1] != index.generation]:
+            del _filtered_lists[stale_key]
+        _filtered_lists[key] = package_list
+
+    return list(package_list)
 
 
 def pip_list(version: bool = False):
@@ -58,56 +88,30 @@ def pip_list(version: bool = False):
     Returns:
         List of package name strings, or an empty list on error.
     """
-    try:
-        import importlib.metadata as metadata
-
-        # Get a list of installed packages
-        if version:
-            package_list = [
-                f"{pkg.metadata['name']}=={pkg.metadata['version']}"
-                for pkg in metadata.distributions()
-            ]
-        else:
-            package_list = [pkg.metadata["name"] for pkg in metadata.distributions()]
-
-        return package_list
-
-    except Exception as e:
-        traceback.print_exc()
-        return []
+    packages = scan_pip_packages()
+    if version:
+        return [f"{name}=={v}" for name, v in packages.items()]
+    return list(packages)
 
 
 def conda_list(version: bool = False):
-    """List packages installed via conda by invoking ``conda list``.
+    """List packages installed via conda in the current environment.
+
+    Reads conda's package records in ``conda-meta`` rather than running
+    ``conda list`` in a subprocess.
 
     Args:
         version: If True, format entries as "name==version".
 
     Returns:
         List of package name strings, or an empty list on error
-        (e.g., if conda is not available).
+        (e.g., if this is not a conda environment).
     """
     try:
-        import subprocess
-
-        # Run the conda command to get a list of installed packages
-        output = subprocess.check_output(["conda", "list"]).decode("utf-8").strip()
-
-        # Split the output into lines and print the package names
+        packages = scan_conda_packages()
         if version:
-            package_list = [
-                f"{line.split()[0]}=={line.split()[1]}"
-                for line in output.split("\n")
-                if not line.startswith("#")
-            ]
-        else:
-            package_list = [
-                line.split()[0]
-                for line in output.split("\n")
-                if not line.startswith("#")
-            ]
-
-        return package_list
+            return [f"{name}=={v}" for name, v in packages.items()]
+        return list(packages)
 
     except Exception as e:
         traceback.print_exc()
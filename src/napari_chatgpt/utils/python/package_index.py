@@ -0,0 +1,296 @@
+"""Persistent index of the packages installed in the Python environment.
+
+Listing installed packages means iterating over every distribution's
+metadata and, in conda environments, reading conda's package records,
+which takes seconds in environments with hundreds of packages. The
+index stores the result in a JSON file together with a fingerprint of
+the environment (interpreter, modification times of the site-packages
+folders and of ``conda-meta``). As long as the fingerprint matches, the
+stored list is used as is. When it does not, the stale list is returned
+right away and the index is refreshed in a background thread.
+"""
+
+import hashlib
+import json
+import os
+import re
+import site
+import sys
+import threading
+import traceback
+from collections.abc import Iterable
+
+from arbol import aprint, asection
+
+# Version of the on-disk format, bump to invalidate existing indices:
+_INDEX_FORMAT = 1
+
+
+class PackageIndex:
+    """Index of installed pip and conda packages, cached on disk.
+
+    Attributes:
+        path: Path of the JSON file holding the index.
+    """
+
+    def __init__(self, path: str):
+        """Create an index stored at *path*; nothing is read until first use.
+
+        Args:
+            path: Path of the JSON file holding the index.
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._pip: dict[str, str] | None = None
+        self._conda: dict[str, str] | None = None
+        self._fingerprint: str | None = None
+        self._refresh_thread: threading.Thread | None = None
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Counter incremented each time the package list changes."""
+        return self._generation
+
+    def packages(self, version: bool = True) -> list[str]:
+        """Return the installed pip and conda packages.
+
+        Args:
+            version: If True, format entries as ``"name==version"``.
+
+        Returns:
+            List of package name strings, pip packages first.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return _format(self._pip, version) + _format(self._conda, version)
+
+    def refresh(self, wait: bool = True):
+        """Rescan the environment and save the index.
+
+        Args:
+            wait: If False, the scan runs in a background thread, unless
+                one is already running.
+        """
+        if wait:
+            self._refresh()
+            return
+
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh, name="omega_package_index", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def update_packages(self, package_names: Iterable[str]):
+        """Update the index after packages were installed.
+
+        The given packages are looked up right away, so that they are
+        listed immediately. Dependencies that pip installed along with
+        them are picked up by a rescan in a background thread; until it
+        completes, the index keeps its previous fingerprint and is thus
+        considered stale.
+
+        Args:
+            package_names: Names of the installed packages, optionally
+                with version specifiers (e.g. ``"numpy==1.26.0"``).
+        """
+        import importlib
+        import importlib.metadata as metadata
+
+        importlib.invalidate_caches()
+
+        with self._lock:
+            self._ensure_loaded()
+            pip = dict(self._pip)
+            for package_name in package_names:
+                name = re.split(r"[\s\[<>=!~;]", package_name.strip(), 1)[0]
+                if not name:
+                    continue
+                try:
+                    distribution = metadata.distribution(name)
+                except metadata.PackageNotFoundError:
+                    continue
+                pip[distribution.metadata["name"]] = distribution.version
+
+            self._pip = pip
+            self._generation += 1
+            self._save()
+
+        # Pick up the dependencies:
+        self.refresh(wait=False)
+
+    def _ensure_loaded(self):
+        """Load the index from disk, or scan the environment (lock held)."""
+        if self._pip is not None:
+            return
+
+        fingerprint = environment_fingerprint()
+        stored = self._load()
+
+        if stored is not None:
+            self._pip, self._conda, self._fingerprint = stored
+            self._generation += 1
+            if self._fingerprint != fingerprint:
+                aprint("Installed package index is stale, refreshing in background.")
+                self.refresh(wait=False)
+            return
+
+        self._refresh()
+
+    def _refresh(self):
+        """Scan the environment and save the index."""
+        with asection("Scanning installed packages:"):
+            fingerprint = environment_fingerprint()
+            pip = scan_pip_packages()
+            conda = scan_conda_packages()
+            aprint(f"Found {len(pip)} pip and {len(conda)} conda packages.")
+
+        with self._lock:
+            self._pip, self._conda, self._fingerprint = pip, conda, fingerprint
+            self._generation += 1
+            self._save()
+
+    def _load(self) -> tuple[dict, dict, str] | None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("format") != _INDEX_FORMAT:
+                return None
+            return data["pip"], data["conda"], data["fingerprint"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self):
+        data = {
+            "format": _INDEX_FORMAT,
+            "fingerprint": self._fingerprint,
+            "pip": self._pip,
+            "conda": self._conda,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Write then rename, so that readers never see a partial file:
+            temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            aprint(
+                f"Error: {type(e).__name__} with message: '{str(e)}' while saving the package index."
+            )
+
+
+def environment_fingerprint() -> str:
+    """Return a fingerprint that changes when packages are (un)installed.
+
+    Installing or removing a package adds or removes entries in the
+    site-packages folders (or in ``conda-meta``), which updates their
+    modification times.
+
+    Returns:
+        A hexadecimal digest.
+    """
+    parts = [sys.prefix, sys.version]
+    for folder in sorted(set(_site_packages_folders())) + [_conda_meta_folder()]:
+        try:
+            parts.append(f"{folder}:{os.stat(folder).st_mtime_ns}")
+        except (OSError, TypeError):
+            parts.append(f"{folder}:-")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _site_packages_folders() -> list[str]:
+    folders = []
+    try:
+        folders += site.getsitepackages()
+    except AttributeError:
+        pass
+    user_site = getattr(site, "USER_SITE", None)
+    if user_site:
+        folders.append(user_site)
+    folders += [
+        p
+        for p in sys.path
+        if p.endswith(("site-packages", "dist-packages")) and os.path.isdir(p)
+    ]
+    return folders
+
+
+def _conda_meta_folder() -> str | None:
+    for prefix in (sys.prefix, os.environ.get("CONDA_PREFIX")):
+        if prefix and os.path.isdir(os.path.join(prefix, "conda-meta")):
+            return os.path.join(prefix, "conda-meta")
+    return None
+
+
+def scan_pip_packages() -> dict[str, str]:
+    """Return ``{name: version}`` for all distributions visible to importlib."""
+    import importlib.metadata as metadata
+
+    try:
+        return {
+            distribution.metadata["name"]: distribution.version
+            for distribution in metadata.distributions()
+            if distribution.metadata["name"]
+        }
+    except Exception:
+        traceback.print_exc()
+        return {}
+
+
+def scan_conda_packages() -> dict[str, str]:
+    """Return ``{name: version}`` for the conda packages of this environment.
+
+    Reads the package records in ``conda-meta`` (named
+    ``<name>-<version>-<build>.json``) instead of running ``conda list``.
+    """
+    folder = _conda_meta_folder()
+    if folder is None:
+        return {}
+
+    packages = {}
+    for filename in os.listdir(folder):
+        if not filename.endswith(".json"):
+            continue
+        parts = filename[: -len(".json")].rsplit("-", 2)
+        if len(parts) == 3:
+            packages[parts[0]] = parts[1]
+    return packages
+
+
+def _format(packages: dict[str, str], version: bool) -> list[str]:
+    if version:
+        return [f"{name}=={v}" for name, v in packages.items()]
+    return list(packages)
+
+
+_index_lock = threading.Lock()
+_index: PackageIndex | None = None
+
+
+def get_package_index() -> PackageIndex:
+    """Return the process-wide package index.
+
+    The index is stored in ``~/.omega/package_index.json`` unless the
+    ``package_index_path`` key of the ``omega`` application configuration
+    says otherwise.
+
+    Returns:
+        The shared ``PackageIndex``.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            from napari_chatgpt.utils.configuration.app_configuration import (
+                AppConfiguration,
+            )
+
+            config = AppConfiguration("omega")
+            path = config.get("package_index_path") or os.path.expanduser(
+                "~/.omega/package_index.json"
+            )
+            _index = PackageIndex(os.path.expanduser(path))
+        return _index
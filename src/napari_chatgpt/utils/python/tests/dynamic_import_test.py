@@ -52,3 +52,64 @@ def test_execute_as_module():
     pprint(result)
 
     assert result == "[15 18 21]"
+
+
+___failing_code = """
+def fail():
+    raise ValueError("failing on purpose")
+"""
+
+
+def test_dynamic_import_reuses_compiled_code():
+    import linecache
+    import traceback
+
+    module_a = dynamic_import(___failing_code)
+    module_b = dynamic_import(___failing_code)
+
+    # Separate modules, same compiled code, no file on disk:
+    assert module_a is not module_b
+    assert module_a.fail.__code__ is module_b.fail.__code__
+    assert module_a.__file__.startswith("<omega-snippet-")
+
+    # Tracebacks still show the source:
+    assert "def fail" in "".join(linecache.getlines(module_a.__file__))
+    try:
+        module_a.fail()
+    except ValueError:
+        assert 'raise ValueError("failing on purpose")' in traceback.format_exc()
+
+
+def test_dynamic_import_on_disk():
+    import os
+
+    module = dynamic_import(___module_code, on_disk=True)
+
+    assert os.path.exists(module.__file__)
+    assert module.my_function(3) == 9
+
+
+___cached_jit_code = """
+from numba import njit
+
+@njit(cache=True)
+def add_one(x):
+    return x + 1
+"""
+
+
+def test_dynamic_import_falls_back_to_disk():
+    import os
+
+    # numba caches next to the source file, which must then exist:
+    module = dynamic_import(___cached_jit_code)
+    assert os.path.exists(module.__file__)
+    assert module.add_one(1) == 2
+
+    # Code reading __file__ gets a real file too:
+    module = dynamic_import("import os\nfolder = os.path.dirname(__file__)\n")
+    assert os.path.isdir(module.folder)
+
+    # Other code stays in memory:
+    module = dynamic_import(___module_code)
+    assert module.__file__.startswith("<omega-snippet-")
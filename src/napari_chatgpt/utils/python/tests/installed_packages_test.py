@@ -18,3 +18,17 @@ def test_installed_packages():
 def test_is_package_installed():
     assert is_package_installed("numpy")
     assert not is_package_installed("grumpy")
+
+
+def test_installed_package_list_is_cached(monkeypatch):
+    from napari_chatgpt.utils.python import installed_packages
+
+    index = installed_packages.get_package_index()
+    first = installed_package_list()
+
+    # A cached list is returned without asking the index for its packages:
+    def fail(version: bool = True):
+        raise AssertionError("package index queried")
+
+    monkeypatch.setattr(index, "packages", fail)
+    assert installed_package_list() == first
@@ -0,0 +1,91 @@
+import json
+import threading
+
+import napari_chatgpt.utils.python.package_index as package_index
+from napari_chatgpt.utils.python.package_index import PackageIndex
+
+
+def _count_scans(monkeypatch):
+    scans = {"pip": 0}
+    scan_pip_packages = package_index.scan_pip_packages
+
+    def counting_scan_pip_packages():
+        scans["pip"] += 1
+        return scan_pip_packages()
+
+    monkeypatch.setattr(package_index, "scan_pip_packages", counting_scan_pip_packages)
+    return scans
+
+
+def test_package_index_persists(tmp_path, monkeypatch):
+    scans = _count_scans(monkeypatch)
+    path = str(tmp_path / "package_index.json")
+
+    packages = PackageIndex(path).packages()
+    assert any(p.startswith("numpy==") for p in packages)
+    assert scans["pip"] == 1
+
+    # A new index (e.g. in a new process) loads the file instead of scanning:
+    assert PackageIndex(path).packages() == packages
+    assert scans["pip"] == 1
+
+
+def test_package_index_stale_refreshes_in_background(tmp_path, monkeypatch):
+    scans = _count_scans(monkeypatch)
+    path = str(tmp_path / "package_index.json")
+
+    PackageIndex(path).packages()
+
+    # Pretend packages were installed since the index was saved:
+    with open(path) as f:
+        data = json.load(f)
+    data["fingerprint"] = "stale"
+    data["pip"] = {"some-removed-package": "1.0"}
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+    index = PackageIndex(path)
+    assert index.packages(version=False) == ["some-removed-package"]
+
+    index._refresh_thread.join()
+    assert scans["pip"] == 2
+    assert "numpy" in index.packages(version=False)
+
+
+def test_package_index_update_packages(tmp_path, monkeypatch):
+    scans = _count_scans(monkeypatch)
+    path = str(tmp_path / "package_index.json")
+
+    index = PackageIndex(path)
+    index.packages()
+    fingerprint = index._fingerprint
+    # numpy was installed, and pulled in pip as a dependency:
+    index._pip.pop("numpy")
+    index._pip.pop("pip")
+    generation = index.generation
+
+    # Block the background rescan to see the index before it:
+    scan_started = threading.Event()
+    release_scan = threading.Event()
+    scan_pip_packages = package_index.scan_pip_packages
+
+    def blocked_scan_pip_packages():
+        scan_started.set()
+        release_scan.wait(10)
+        return scan_pip_packages()
+
+    monkeypatch.setattr(package_index, "scan_pip_packages", blocked_scan_pip_packages)
+    index.update_packages(["numpy==1.0", "grumpy"])
+
+    # The named package is listed right away, the index is still stale:
+    assert "numpy" in index.packages(version=False)
+    assert "pip" not in index.packages(version=False)
+    assert index.generation > generation
+    assert index._fingerprint == fingerprint
+    assert scan_started.wait(10)
+
+    # The dependencies are listed once the rescan is done:
+    release_scan.set()
+    index._refresh_thread.join()
+    assert "pip" in index.packages(version=False)
+    assert scans["pip"] == 2
@@ -0,0 +1,148 @@
+"""Out-of-core instance labelling of large binary masks, one block at a time.
+
+``label_blockwise`` labels each block of a (lazy) binary mask
+independently, writes the block labels to a chunked zarr store, merges
+labels that touch across block faces, and returns a lazy dask array of
+the final labels. Only one block (plus one face plane) is held in memory
+at any time, so masks far larger than RAM can be labelled.
+
+Temporary zarr stores are deleted once no array uses them anymore, e.g.
+when the labels layer is removed from the viewer, and at exit.
+"""
+
+import shutil
+import tempfile
+import weakref
+from collections.abc import Callable
+
+import numpy
+from arbol import aprint, asection
+from numpy import ndarray
+
+from napari_chatgpt.utils.images.lazy_arrays import as_dask_array, block_shape
+
+
+def label_blockwise(
+    binary,
+    segment_block: Callable[[ndarray], ndarray] | None = None,
+    min_segment_size: int = 0,
+    output_path: str | None = None,
+):
+    """Label a large binary mask block by block.
+
+    Labels touching across a block face are merged, so that the result
+    is the same as labelling the whole mask at once (with face
+    connectivity across blocks), except for *segment_block* functions
+    that split objects, e.g. watershed, which may split differently at
+    block borders.
+
+    Args:
+        binary: Binary mask as a dask, zarr or numpy array.
+        segment_block: Function labelling one in-memory block; defaults to
+            ``skimage.measure.label``.
+        min_segment_size: Segments with fewer voxels are removed.
+        output_path: Folder of the zarr store holding the block labels; a
+            new temporary folder, deleted with the last array using it, is
+            used if ``None``.
+
+    Returns:
+        A lazy ``uint32`` dask array of labels, backed by the zarr store.
+    """
+    import dask.array as da
+    import zarr
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    from skimage.segmentation import relabel_sequential
+
+    if segment_block is None:
+        from skimage.measure import label as segment_block
+
+    # Make the chunking regular so that blocks align with the zarr chunks:
+    binary = as_dask_array(binary)
+    binary = binary.rechunk(block_shape(binary))
+    chunk_shape = tuple(c[0] for c in binary.chunks)
+
+    temporary = output_path is None
+    if temporary:
+        output_path = tempfile.mkdtemp(prefix="omega_labels_")
+
+    block_labels = zarr.open_array(
+        store=output_path,
+        mode="w",
+        shape=binary.shape,
+        chunks=chunk_shape,
+        dtype=numpy.uint32,
+    )
+
+    if temporary:
+        # Every array derived from the labels refers to the zarr array:
+        weakref.finalize(block_labels, shutil.rmtree, output_path, True)
+
+    with asection(
+        f"Labelling mask of shape {binary.shape} in {binary.npartitions} blocks:"
+    ):
+        # Label each block independently, with globally unique labels:
+        offset = 0
+        sizes = [numpy.zeros(1, dtype=numpy.int64)]
+        for block_index in numpy.ndindex(*binary.numblocks):
+            block = numpy.asarray(binary.blocks[block_index])
+            labels, _, _ = relabel_sequential(segment_block(block))
+            labels = labels.astype(numpy.uint32, copy=False)
+            number_of_labels = int(labels.max()) if labels.size > 0 else 0
+
+            sizes.append(
+                numpy.bincount(labels.ravel(), minlength=number_of_labels + 1)[1:]
+            )
+            labels[labels > 0] += offset
+            offset += number_of_labels
+
+            block_labels[_block_slice(block_index, chunk_shape, binary.shape)] = labels
+
+        aprint(f"Found {offset} labels before merging across block faces.")
+
+        # Collect pairs of labels touching across block faces:
+        pairs = [numpy.zeros((0, 2), dtype=numpy.uint32)]
+        for axis, number_of_blocks in enumerate(binary.numblocks):
+            for boundary in range(1, number_of_blocks):
+                position = boundary * chunk_shape[axis]
+                before = block_labels[_plane(axis, position - 1, binary.ndim)]
+                after = block_labels[_plane(axis, position, binary.ndim)]
+                touching = (before > 0) & (after > 0)
+                if touching.any():
+                    face_pairs = numpy.stack([before[touching], after[touching]], 1)
+                    pairs.append(numpy.unique(face_pairs, axis=0))
+        pairs = numpy.concatenate(pairs)
+
+        # Merge touching labels with a connected-components pass:
+        graph = coo_matrix(
+            (numpy.ones(len(pairs), dtype=bool), (pairs[:, 0], pairs[:, 1])),
+            shape=(offset + 1, offset + 1),
+        )
+        _, components = connected_components(graph, directed=False)
+
+        # Build the lookup table from block labels to final labels:
+        component_sizes = numpy.bincount(components, weights=numpy.concatenate(sizes))
+        keep = component_sizes >= min_segment_size
+        keep[components[0]] = False
+        new_ids = numpy.zeros(len(component_sizes), dtype=numpy.uint32)
+        new_ids[keep] = numpy.arange(1, keep.sum() + 1, dtype=numpy.uint32)
+        lut = new_ids[components]
+
+        aprint(f"Found {int(keep.sum())} labels after merging.")
+
+    return da.from_zarr(block_labels).map_blocks(_apply_lut, lut, dtype=numpy.uint32)
+
+
+def _apply_lut(block: ndarray, lut: ndarray) -> ndarray:
+    return lut[block]
+
+
+def _block_slice(block_index, chunk_shape, shape) -> tuple[slice, ...]:
+    return tuple(
+        slice(i * c, min((i + 1) * c, s))
+        for i, c, s in zip(block_index, chunk_shape, shape)
+    )
+
+
+def _plane(axis: int, position: int, ndim: int) -> tuple:
+    return tuple(position if a == axis else slice(None) for a in range(ndim))
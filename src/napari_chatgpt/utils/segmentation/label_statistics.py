@@ -0,0 +1,125 @@
+"""Fast, time-bounded counting of the labels present in a label image.
+
+Counting labels with ``numpy.unique`` sorts a copy of the whole array,
+and on lazy arrays (dask, zarr, ...) it loads everything into memory.
+``count_labels`` instead walks the array block by block, counting the
+labels of each block with ``numpy.bincount`` whenever label values are
+small enough, and stops when its time budget is exhausted. In that case
+the count is a lower bound and is flagged as approximate.
+"""
+
+import time
+from dataclasses import dataclass
+from math import prod
+
+import numpy
+from numpy import ndarray
+
+from napari_chatgpt.utils.images.lazy_arrays import block_shape, block_slices
+
+
+@dataclass
+class LabelStatistics:
+    """Result of counting the labels of a label image.
+
+    Attributes:
+        number_of_labels: Number of distinct non-zero labels found. A lower
+            bound on the true number when ``approximate`` is ``True``.
+        approximate: ``True`` if only part of the data was examined.
+        fraction_examined: Fraction of the array's blocks examined.
+    """
+
+    number_of_labels: int
+    approximate: bool = False
+    fraction_examined: float = 1.0
+
+    def __str__(self) -> str:
+        if not self.approximate:
+            return str(self.number_of_labels)
+        return (
+            f"at least {self.number_of_labels} "
+            f"(approximate, {self.fraction_examined:.0%} of the data examined)"
+        )
+
+
+def count_labels(labels, time_budget: float | None = 0.01) -> LabelStatistics:
+    """Count the distinct non-zero labels of a label image.
+
+    Works with numpy arrays and with lazy array types exposing ``shape``,
+    ``dtype``, ``chunks`` and slicing (dask, zarr, ...), which are read
+    one chunk at a time. Blocks are visited in a fixed pseudo-random
+    order so that a partial count is spread over the whole image.
+
+    Args:
+        labels: The label image.
+        time_budget: Maximum number of seconds to spend, or ``None`` for
+            no limit. At least one block is always examined.
+
+    Returns:
+        A ``LabelStatistics`` instance.
+    """
+    shape = tuple(labels.shape)
+    if prod(shape) == 0:
+        return LabelStatistics(number_of_labels=0)
+    if len(shape) == 0:
+        return LabelStatistics(len(unique_nonzero_labels(numpy.asarray(labels))))
+
+    blocks = block_slices(shape, block_shape(labels))
+    if len(blocks) > 1:
+        order = numpy.random.default_rng(0).permutation(len(blocks))
+        blocks = [blocks[i] for i in order]
+
+    start = time.perf_counter()
+    found = []
+    examined = 0
+    for slices in blocks:
+        if (
+            examined > 0
+            and time_budget is not None
+            and time.perf_counter() - start > time_budget
+        ):
+            break
+        block = numpy.asarray(labels[slices])
+        found.append(unique_nonzero_labels(block))
+        examined += 1
+
+    present = numpy.unique(numpy.concatenate(found)) if len(found) > 1 else found[0]
+
+    return LabelStatistics(
+        number_of_labels=len(present),
+        approximate=examined < len(blocks),
+        fraction_examined=examined / len(blocks),
+    )
+
+
+def unique_nonzero_labels(labels: ndarray) -> ndarray:
+    """Return the sorted distinct non-zero values of an in-memory array.
+
+    Uses ``numpy.bincount`` (linear time, no sorting) when the array has
+    an integer dtype and its values are non-negative and small enough,
+    and falls back to ``numpy.unique`` otherwise.
+
+    Args:
+        labels: The label array.
+
+    Returns:
+        A 1D array of the distinct non-zero labels.
+    """
+    if labels.dtype == bool:
+        return numpy.array([1]) if labels.any() else numpy.array([], dtype=int)
+
+    if labels.dtype.kind in "ui":
+        flat = labels.ravel()
+        if labels.dtype.itemsize <= 2 and labels.dtype.kind == "u":
+            # Values are bounded by 65535, no need to look at them first:
+            use_bincount = True
+        else:
+            low, high = flat.min(), flat.max()
+            use_bincount = low >= 0 and high <= 4 * flat.size + 2**16
+        if use_bincount:
+            counts = numpy.bincount(flat)
+            present = numpy.flatnonzero(counts)
+            return present[present != 0]
+
+    present = numpy.unique(labels)
+    return present[present != 0]
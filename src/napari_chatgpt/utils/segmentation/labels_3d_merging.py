@@ -18,13 +18,16 @@ def segment_3d_from_segment_2d(
     overlap_threshold: float = 0.5,
     iterations: int = 2,
     debug_view: bool = False,
+    z_only: bool = False,
 ):
     """Produce a 3D label volume by segmenting 2D slices along all three axes.
 
     Slices along Z, Y, and X are segmented independently with
     *segment_2d_func*, then the three binary masks are intersected.
     Morphological closing/opening cleans the mask before labels from the
-    Z-axis segmentation are merged across slices based on overlap.
+    Z-axis segmentation are merged across slices based on overlap. With
+    *z_only*, the Y and X passes are skipped and the Z-axis labels are
+    merged directly.
 
     Args:
         image: 3D image array of shape ``(Z, Y, X)``.
@@ -37,6 +40,8 @@ def segment_3d_from_segment_2d(
             mask cleaning.
         debug_view: If ``True``, open a napari viewer to inspect intermediate
             merge results.
+        z_only: If ``True``, only segment slices along the Z axis, which is
+            about three times faster.
 
     Returns:
         3D label array with merged segment labels.
@@ -47,44 +52,45 @@ def segment_3d_from_segment_2d(
         image, segment_2d_func, min_segment_size=min_segment_size
     )
 
-    # Segment the 2D slices along y axis:
-    aprint("Segmenting 2D slices along y axis")
-    image = np.transpose(image, (1, 2, 0))
-    labels_y = segment_2d_z_slices(
-        image, segment_2d_func, min_segment_size=min_segment_size
-    )
+    if not z_only:
+        # Segment the 2D slices along y axis:
+        aprint("Segmenting 2D slices along y axis")
+        image = np.transpose(image, (1, 2, 0))
+        labels_y = segment_2d_z_slices(
+            image, segment_2d_func, min_segment_size=min_segment_size
+        )
 
-    # Transpose the labels back to the original orientation:
-    labels_y = np.transpose(labels_y, (2, 0, 1))
+        # Transpose the labels back to the original orientation:
+        labels_y = np.transpose(labels_y, (2, 0, 1))
 
-    # Segment the 2D slices along x axis:
-    aprint("Segmenting 2D slices along x axis")
-    image = np.transpose(image, (1, 2, 0))
-    labels_x = segment_2d_z_slices(
-        image, segment_2d_func, min_segment_size=min_segment_size
-    )
+        # Segment the 2D slices along x axis:
+        aprint("Segmenting 2D slices along x axis")
+        image = np.transpose(image, (1, 2, 0))
+        labels_x = segment_2d_z_slices(
+            image, segment_2d_func, min_segment_size=min_segment_size
+        )
 
-    # transpose the labels back to the original orientation:
-    labels_x = np.transpose(labels_x, (1, 2, 0))
+        # transpose the labels back to the original orientation:
+        labels_x = np.transpose(labels_x, (1, 2, 0))
 
-    # Convert the labels to binary arrays:
-    binary_labels_z = labels_z > 0
-    binary_labels_y = labels_y > 0
-    binary_labels_x = labels_x > 0
+        # Convert the labels to binary arrays:
+        binary_labels_z = labels_z > 0
+        binary_labels_y = labels_y > 0
+        binary_labels_x = labels_x > 0
 
-    # Take the product of the binary arrays to get a mask:
-    mask = binary_labels_z * binary_labels_y * binary_labels_x
+        # Take the product of the binary arrays to get a mask:
+        mask = binary_labels_z * binary_labels_y * binary_labels_x
 
-    # Apply morphological closing operator n times to fill in the holes, and then the erosion operator n times to remove the noise:
-    from skimage.morphology import dilation, erosion
+        # Apply morphological closing operator n times to fill in the holes, and then the erosion operator n times to remove the noise:
+        from skimage.morphology import dilation, erosion
 
-    for _ in range(iterations):
-        mask = dilation(mask)
-    for _ in range(iterations):
-        mask = erosion(mask)
+        for _ in range(iterations):
+            mask = dilation(mask)
+        for _ in range(iterations):
+            mask = erosion(mask)
 
-    # Apply the mask to the labels:
-    labels_z = labels_z * mask
+        # Apply the mask to the labels:
+        labels_z = labels_z * mask
 
     # Merge the labels from the three axes:
     labels_z = make_slice_labels_different(labels_z)
@@ -163,95 +169,185 @@ def make_slice_labels_different(stack):
     return stack
 
 
-def merge_2d_segments(stack, overlap_threshold: int = 1, debug_view: bool = True):
+def merge_2d_segments(
+    stack,
+    overlap_threshold: float = 1,
+    debug_view: bool = True,
+    parallel: bool = False,
+    max_workers: int | None = None,
+):
     """Merge labels across consecutive Z-slices based on spatial overlap.
 
-    Adjacent slices are compared and overlapping labels exceeding
-    *overlap_threshold* are unified to the smallest label ID.
+    For each pair of adjacent slices a contingency table of overlap
+    counts is computed with a single ``bincount``. Two labels are merged
+    when their overlap, relative to the smaller of the two, reaches
+    *overlap_threshold*. Merges are collected in a union-find structure
+    and every merged group is relabelled to its smallest label ID, with a
+    single lookup-table pass over the stack at the end.
 
     Args:
         stack: 3D label array with globally unique per-slice labels.
+            Relabelled in place.
         overlap_threshold: Minimum overlap fraction to trigger merging.
-        debug_view: If ``True``, open a napari viewer after each non-empty
-            slice for inspection.
+        debug_view: If ``True``, open a napari viewer on the merged labels
+            for inspection.
+        parallel: If ``True``, process slice pairs in a thread pool.
+        max_workers: Number of threads used when *parallel* is ``True``.
 
     Returns:
         The label array with merged labels.
     """
     with asection("Merging 2D segments"):
 
-        # Iterate through each z-plane
-        for z in range(stack.shape[0] - 1):
+        number_of_pairs = max(0, stack.shape[0] - 1)
+        max_label = int(stack.max()) if stack.size > 0 else 0
+
+        if number_of_pairs == 0 or max_label == 0:
+            return stack
+
+        def _pairs_for_z(z: int):
+            return overlapping_label_pairs(stack[z], stack[z + 1], overlap_threshold)
+
+        # Find the pairs of labels to merge, slice pair by slice pair:
+        if parallel:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pairs = list(executor.map(_pairs_for_z, range(number_of_pairs)))
+        else:
+            pairs = [_pairs_for_z(z) for z in range(number_of_pairs)]
+        pairs = np.concatenate(pairs)
+
+        aprint(f"Merging {len(pairs)} pairs of overlapping labels.")
 
-            aprint(f"Processing z-plane {z} of {stack.shape[0] - 1}")
+        # Union-find over merges, each group is represented by its smallest label:
+        lut = _union_find_smallest_root(max_label + 1, pairs)
 
-            # Get the current and next planes
-            current_plane = stack[z, :, :]
-            next_plane = stack[z + 1, :, :]
+        # Relabel the stack once:
+        stack[...] = lut[stack]
 
-            # List all unique labels in the current plane:
-            current_labels = np.unique(current_plane)
-            current_labels = current_labels[current_labels != 0]
+        if debug_view:
+            # Open a napari instance:
+            from napari import Viewer
 
-            # List all unique labels in the next plane:
-            next_labels = np.unique(next_plane)
-            next_labels = next_labels[next_labels != 0]
+            viewer = Viewer()
 
-            # Check overlap for each label in the next plane
-            for next_label in next_labels:
+            # Load the segmented cells into the viewer:
+            viewer.add_labels(stack, name="labels")
 
-                # Create a mask for the current label:
-                next_mask = next_plane == next_label
+            # Make the viewer visible
+            from napari import run
 
-                # List of overlapping labels:
-                list_of_labels = []
+            run()
 
-                # Calculate overlap with next plane's segments
-                for current_label in current_labels:
+    return stack
 
-                    # Create a mask for the other label:
-                    current_mask = current_plane == current_label
 
-                    # Calculate the overlap between the two masks:
-                    next_mask_sum = np.sum(next_mask)
-                    current_mask_sum = np.sum(current_mask)
-                    min_mask_sum = min(next_mask_sum, current_mask_sum)
+def overlapping_label_pairs(
+    current_plane, next_plane, overlap_threshold: float
+) -> numpy.ndarray:
+    """Return the pairs of labels of two planes that overlap enough to merge.
 
-                    # Avoid division by zero if either mask is empty:
-                    if min_mask_sum == 0:
-                        overlap = 0.0
-                    else:
-                        overlap = np.sum(next_mask & current_mask) / min_mask_sum
+    Args:
+        current_plane: 2D label array.
+        next_plane: 2D label array of the same shape.
+        overlap_threshold: Minimum overlap, relative to the area of the
+            smaller of the two labels, for a pair to be returned.
 
-                    # If overlap exceeds threshold, add the label to the list:
-                    if overlap >= overlap_threshold:
-                        list_of_labels.append(current_label)
+    Returns:
+        An array of shape ``(N, 2)`` of ``(current_label, next_label)`` pairs.
+    """
+    current_ids, current_labels = _compact_labels(current_plane.ravel())
+    next_ids, next_labels = _compact_labels(next_plane.ravel())
+
+    # Areas of each label within its plane:
+    current_areas = numpy.bincount(current_ids, minlength=len(current_labels))
+    next_areas = numpy.bincount(next_ids, minlength=len(next_labels))
+
+    # Overlap counts of label pairs, from combined label IDs:
+    foreground = (current_ids > 0) & (next_ids > 0)
+    combined = current_ids[foreground].astype(numpy.int64) * len(next_labels)
+    combined += next_ids[foreground]
+    if len(current_labels) * len(next_labels) <= 2**24:
+        counts = numpy.bincount(
+            combined, minlength=len(current_labels) * len(next_labels)
+        )
+        combined = numpy.flatnonzero(counts)
+        counts = counts[combined]
+    else:
+        combined, counts = numpy.unique(combined, return_counts=True)
+    current_index, next_index = numpy.divmod(combined, len(next_labels))
 
-                # Find the smallest label in the list of overlapping labels:
-                if len(list_of_labels) > 0:
-                    new_label = min(next_label, min(list_of_labels))
+    # Keep pairs whose overlap is large enough relative to the smaller label:
+    smaller_area = numpy.minimum(current_areas[current_index], next_areas[next_index])
+    merge = counts >= overlap_threshold * smaller_area
 
-                    # Update all the overlapping labels to the smallest label:
-                    for old_label in list_of_labels:
-                        if old_label != new_label:
-                            stack[stack == old_label] = new_label
+    return numpy.stack(
+        [current_labels[current_index[merge]], next_labels[next_index[merge]]], axis=1
+    ).astype(numpy.int64)
 
-                    # update the label in the next plane
-                    if next_label != new_label:
-                        stack[stack == next_label] = new_label
 
-            if debug_view and len(next_labels) > 0:
-                # Open a napari instance:
-                from napari import Viewer
+def _compact_labels(labels: numpy.ndarray):
+    """Map labels to compact IDs, 0 staying 0.
 
-                viewer = Viewer()
+    Returns:
+        The compact ID of each element, and the label of each compact ID.
+    """
+    nonzero = labels[labels > 0]
+    if nonzero.size == 0:
+        return numpy.zeros(labels.shape, dtype=numpy.intp), numpy.zeros(1, labels.dtype)
+
+    low, high = int(nonzero.min()), int(nonzero.max())
+    if high - low < 4 * labels.size:
+        # Labels of a slice are mostly contiguous, so a shifted bincount is enough:
+        present = numpy.flatnonzero(numpy.bincount(nonzero - low)) + low
+        lut = numpy.zeros(high - low + 2, dtype=numpy.intp)
+        lut[present - low + 1] = numpy.arange(1, len(present) + 1)
+        shifted = numpy.where(labels > 0, labels.astype(numpy.int64) - low + 1, 0)
+        ids = lut[shifted]
+    else:
+        present, inverse = numpy.unique(nonzero, return_inverse=True)
+        ids = numpy.zeros(labels.shape, dtype=numpy.intp)
+        ids[labels > 0] = inverse + 1
+
+    return ids, numpy.concatenate(
+        [numpy.zeros(1, labels.dtype), present.astype(labels.dtype)]
+    )
 
-                # Load the segmented cells into the viewer:
-                viewer.add_labels(stack, name="labels")
 
-                # Make the viewer visible
-                from napari import run
+def _union_find_smallest_root(size: int, pairs: numpy.ndarray) -> numpy.ndarray:
+    """Union-find over label pairs, returning a lookup table to the smallest label.
 
-                run()
+    Args:
+        size: Number of labels (including background 0).
+        pairs: Array of shape ``(N, 2)`` of labels to merge.
 
-    return stack
+    Returns:
+        Lookup table mapping each label to the smallest label of its group.
+    """
+    parent = numpy.arange(size, dtype=numpy.int64)
+
+    def find(label: int) -> int:
+        root = label
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression:
+        while parent[label] != root:
+            parent[label], label = root, parent[label]
+        return root
+
+    for a, b in pairs:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            # Union by smallest label, so roots are always the smallest label:
+            if root_a < root_b:
+                parent[root_b] = root_a
+            else:
+                parent[root_a] = root_b
+
+    # Flatten all paths:
+    while True:
+        grandparent = parent[parent]
+        if numpy.array_equal(grandparent, parent):
+            return parent
+        parent = grandparent
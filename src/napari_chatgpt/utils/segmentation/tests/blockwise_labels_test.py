@@ -0,0 +1,79 @@
+"""Tests for blockwise_labels functions."""
+
+import dask.array as da
+import numpy as np
+from skimage.measure import label
+
+from napari_chatgpt.utils.segmentation.blockwise_labels import label_blockwise
+
+
+def _face_connected_label(binary):
+    return label(binary, connectivity=1)
+
+
+def test_label_blockwise_matches_global_labelling(tmp_path):
+    rng = np.random.default_rng(0)
+    binary = rng.random((40, 50)) > 0.6
+
+    reference = _face_connected_label(binary)
+    labels = label_blockwise(
+        da.from_array(binary, chunks=(16, 16)),
+        segment_block=_face_connected_label,
+        output_path=str(tmp_path / "labels.zarr"),
+    )
+
+    # Result is lazy:
+    assert isinstance(labels, da.Array)
+    labels = labels.compute()
+
+    # Same partition into objects as labelling the whole mask at once:
+    assert labels.max() == reference.max()
+    assert len(set(zip(reference.ravel(), labels.ravel()))) == reference.max() + 1
+    assert ((labels > 0) == binary).all()
+
+
+def test_label_blockwise_removes_small_segments_across_blocks(tmp_path):
+    binary = np.zeros((3, 32, 32), dtype=bool)
+    # Object spanning four blocks, 64 voxels:
+    binary[1, 4:12, 4:12] = True
+    # Small object within one block, 4 voxels:
+    binary[1, 20:22, 20:22] = True
+
+    labels = label_blockwise(
+        da.from_array(binary, chunks=(3, 8, 8)),
+        min_segment_size=10,
+        output_path=str(tmp_path / "labels.zarr"),
+    ).compute()
+
+    assert labels.max() == 1
+    assert (labels > 0).sum() == 64
+
+
+def test_label_blockwise_deletes_temporary_store(monkeypatch):
+    import gc
+    import os
+    import tempfile
+
+    folders = []
+    mkdtemp = tempfile.mkdtemp
+
+    def _recording_mkdtemp(*args, **kwargs):
+        folders.append(mkdtemp(*args, **kwargs))
+        return folders[-1]
+
+    monkeypatch.setattr(tempfile, "mkdtemp", _recording_mkdtemp)
+
+    binary = np.zeros((32, 32), dtype=bool)
+    binary[4:12, 4:12] = True
+    labels = label_blockwise(da.from_array(binary, chunks=(16, 16)))
+    view = labels[:16]
+
+    del labels
+    gc.collect()
+    # Still used by the view:
+    assert os.path.isdir(folders[0])
+    assert view.compute().max() == 1
+
+    del view
+    gc.collect()
+    assert not os.path.exists(folders[0])
@@ -0,0 +1,75 @@
+"""Tests for label_statistics functions."""
+
+import dask.array as da
+import numpy as np
+import pytest
+import zarr
+
+from napari_chatgpt.utils.segmentation.label_statistics import (
+    LabelStatistics,
+    count_labels,
+    unique_nonzero_labels,
+)
+
+
+def _reference_count(labels):
+    unique = np.unique(labels)
+    return len(unique[unique != 0])
+
+
+@pytest.mark.parametrize(
+    "dtype", [np.uint8, np.uint16, np.int32, np.uint32, np.int64, np.uint64]
+)
+def test_count_labels_exact_matches_unique(dtype):
+    rng = np.random.default_rng(42)
+    labels = rng.integers(0, 200, size=(64, 64, 8)).astype(dtype)
+    labels[labels % 7 == 0] = 0
+
+    stats = count_labels(labels, time_budget=None)
+
+    assert stats == LabelStatistics(number_of_labels=_reference_count(labels))
+    assert str(stats) == str(_reference_count(labels))
+
+
+def test_unique_nonzero_labels_large_and_negative_values():
+    labels = np.array([0, 5, 2**40, 5, 0, 7], dtype=np.int64)
+    assert unique_nonzero_labels(labels).tolist() == [5, 7, 2**40]
+
+    labels = np.array([-3, 0, 4, 4], dtype=np.int32)
+    assert unique_nonzero_labels(labels).tolist() == [-3, 4]
+
+    labels = np.zeros((4, 4), dtype=bool)
+    assert len(unique_nonzero_labels(labels)) == 0
+    labels[0, 0] = True
+    assert len(unique_nonzero_labels(labels)) == 1
+
+
+def test_count_labels_lazy_arrays():
+    labels = np.zeros((40, 40), dtype=np.uint32)
+    for i in range(1, 11):
+        labels[4 * (i - 1) : 4 * i - 2, 5:9] = i
+
+    dask_labels = da.from_array(labels, chunks=(10, 10))
+    assert count_labels(dask_labels, time_budget=None).number_of_labels == 10
+
+    zarr_labels = zarr.array(labels, chunks=(8, 8))
+    assert count_labels(zarr_labels, time_budget=None).number_of_labels == 10
+
+
+def test_count_labels_time_budget_is_approximate():
+    labels = da.from_array(
+        np.arange(64 * 64, dtype=np.uint32).reshape(64, 64), chunks=(8, 8)
+    )
+
+    stats = count_labels(labels, time_budget=0.0)
+
+    # Only the first block is examined:
+    assert stats.approximate
+    assert stats.fraction_examined == pytest.approx(1 / 64)
+    assert 0 < stats.number_of_labels <= 64
+    assert str(stats).startswith("at least")
+
+
+def test_count_labels_empty():
+    assert count_labels(np.zeros((0, 5), dtype=np.uint8)).number_of_labels == 0
+    assert count_labels(np.zeros((5, 5), dtype=np.uint8)).number_of_labels == 0
@@ -70,3 +70,84 @@ def test_merge_2d_segments_no_overlap():
     labels_slice1 = set(np.unique(result[1])) - {0}
     if labels_slice0 and labels_slice1:
         assert labels_slice0 != labels_slice1
+
+
+def test_merge_2d_segments_chain_uses_smallest_label():
+    # A label chain across three slices, plus an unrelated label:
+    stack = np.zeros((3, 6, 6), dtype=np.uint32)
+    stack[0, 0:3, 0:3] = 5
+    stack[1, 0:3, 0:3] = 7
+    stack[2, 1:3, 1:3] = 9
+    stack[2, 4:6, 4:6] = 3
+
+    result = merge_2d_segments(stack, overlap_threshold=0.5, debug_view=False)
+
+    assert set(np.unique(result)) == {0, 3, 5}
+    assert (result[stack > 0] != 0).all()
+    assert result[2, 4, 4] == 3
+
+
+def test_merge_2d_segments_threshold_relative_to_smaller_label():
+    stack = np.zeros((2, 10, 10), dtype=np.uint32)
+    stack[0, 0:10, 0:10] = 1
+    # 4 of the 8 pixels of label 2 overlap label 1: 50% of the smaller label.
+    stack[1, 0:2, 0:4] = 2
+    stack[0, 0:2, 2:4] = 0
+
+    merged = merge_2d_segments(stack.copy(), overlap_threshold=0.5, debug_view=False)
+    assert set(np.unique(merged)) == {0, 1}
+
+    kept = merge_2d_segments(stack.copy(), overlap_threshold=0.6, debug_view=False)
+    assert set(np.unique(kept)) == {0, 1, 2}
+
+
+def test_merge_2d_segments_parallel_matches_serial():
+    from skimage.measure import label
+
+    rng = np.random.default_rng(0)
+    stack = np.stack([label(rng.random((32, 32)) > 0.55) for _ in range(6)])
+    stack = make_slice_labels_different(stack.astype(np.uint32))
+
+    serial = merge_2d_segments(stack.copy(), overlap_threshold=0.3, debug_view=False)
+    parallel = merge_2d_segments(
+        stack.copy(), overlap_threshold=0.3, debug_view=False, parallel=True
+    )
+
+    np.testing.assert_array_equal(serial, parallel)
+    assert len(np.unique(serial)) < len(np.unique(stack))
+
+
+def _threshold_segment_2d(image):
+    from skimage.measure import label
+
+    return label(image > 0.5)
+
+
+def _blob_volume():
+    image = np.zeros((6, 24, 24), dtype=np.float32)
+    image[1:5, 2:10, 2:10] = 1.0
+    image[1:5, 14:22, 14:22] = 1.0
+    return image
+
+
+def test_segment_3d_from_segment_2d_z_only():
+    from napari_chatgpt.utils.segmentation.labels_3d_merging import (
+        segment_3d_from_segment_2d,
+    )
+
+    calls = []
+
+    def segment_2d(image):
+        calls.append(image.shape)
+        return _threshold_segment_2d(image)
+
+    image = _blob_volume()
+    labels = segment_3d_from_segment_2d(
+        image, segment_2d_func=segment_2d, min_segment_size=4, z_only=True
+    )
+
+    # Only the Z slices were segmented:
+    assert calls == [(24, 24)] * 6
+    # Two objects, each merged across slices:
+    assert len(np.unique(labels)) == 3
+    assert (labels[1:5, 2:10, 2:10] > 0).all()
@@ -0,0 +1,215 @@
+"""Process-wide cache of loaded deep learning models.
+
+Delegated segmentation code is re-imported for every request, so models
+created inside it (Cellpose, StarDist, ...) would otherwise have their
+weights loaded again each time. The registry keeps recently used models
+alive across requests, keyed by backend, model type and device, and
+evicts the least recently used ones beyond a count or memory limit.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from arbol import aprint, asection
+
+from napari_chatgpt.utils.configuration.app_configuration import AppConfiguration
+
+
+class _ModelEntry:
+    """A cached model with its estimated size and a lock serialising its use."""
+
+    def __init__(self, model: Any, size: int):
+        self.model = model
+        self.size = size
+        self.lock = threading.RLock()
+
+
+class ModelRegistry:
+    """LRU cache of loaded models with a count and memory limit.
+
+    Models are loaded at most once per key, even when requested from
+    several threads at the same time.
+    """
+
+    def __init__(self, max_models: int = 4, max_memory_bytes: int | None = None):
+        """Create an empty registry.
+
+        Args:
+            max_models: Maximum number of models kept loaded.
+            max_memory_bytes: Maximum estimated total size of the models
+                kept loaded, or ``None`` for no limit. The most recently
+                used model is always kept, even if it exceeds the limit.
+        """
+        self.max_models = max_models
+        self.max_memory_bytes = max_memory_bytes
+        self._entries: OrderedDict[tuple, _ModelEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading_locks: dict[tuple, threading.Lock] = {}
+
+    def get(
+        self, backend: str, model_type: str, device: str, loader: Callable[[], Any]
+    ) -> Any:
+        """Return a cached model, loading it with *loader* if needed.
+
+        Args:
+            backend: Name of the library, e.g. ``"cellpose"``.
+            model_type: Name of the model within the library.
+            device: Device the model runs on, e.g. ``"cpu"`` or ``"cuda"``.
+            loader: Callable creating the model when it is not cached.
+
+        Returns:
+            The model instance.
+        """
+        return self._get_entry((backend, model_type, device), loader).model
+
+    @contextmanager
+    def use(
+        self, backend: str, model_type: str, device: str, loader: Callable[[], Any]
+    ) -> Iterator[Any]:
+        """Context manager giving exclusive use of a cached model.
+
+        Concurrent users of the same model are serialised, since model
+        instances are generally not thread-safe.
+
+        Args:
+            backend: Name of the library, e.g. ``"cellpose"``.
+            model_type: Name of the model within the library.
+            device: Device the model runs on, e.g. ``"cpu"`` or ``"cuda"``.
+            loader: Callable creating the model when it is not cached.
+
+        Yields:
+            The model instance.
+        """
+        entry = self._get_entry((backend, model_type, device), loader)
+        with entry.lock:
+            yield entry.model
+
+    def clear(self):
+        """Drop all cached models."""
+        with self._lock:
+            self._entries.clear()
+        _release_accelerator_memory()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def _get_entry(self, key: tuple, loader: Callable[[], Any]) -> _ModelEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            loading_lock = self._loading_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock, once per key:
+        with loading_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry
+
+            with asection(f"Loading model {key} into the model registry:"):
+                model = loader()
+                entry = _ModelEntry(model, estimate_model_size(model))
+                aprint(f"Estimated model size: {entry.size / 1e6:.1f} MB")
+
+            with self._lock:
+                self._entries[key] = entry
+                self._loading_locks.pop(key, None)
+                evicted = self._evict()
+
+        if evicted:
+            _release_accelerator_memory()
+
+        return entry
+
+    def _evict(self) -> bool:
+        """Evict least recently used models beyond the limits (lock held)."""
+        evicted = False
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models
+            or (
+                self.max_memory_bytes is not None
+                and sum(e.size for e in self._entries.values()) > self.max_memory_bytes
+            )
+        ):
+            key, _ = self._entries.popitem(last=False)
+            aprint(f"Evicting model {key} from the model registry.")
+            evicted = True
+        return evicted
+
+
+def estimate_model_size(model: Any) -> int:
+    """Estimate the memory used by a model's weights, in bytes.
+
+    Supports PyTorch modules (and objects wrapping one as ``net``, like
+    Cellpose models) and Keras models (and objects wrapping one as
+    ``keras_model``, like StarDist models). Returns 0 for anything else.
+    """
+    for candidate in (model, getattr(model, "net", None)):
+        parameters = getattr(candidate, "parameters", None)
+        if callable(parameters):
+            try:
+                return sum(p.numel() * p.element_size() for p in parameters())
+            except Exception:
+                pass
+
+    for candidate in (model, getattr(model, "keras_model", None)):
+        count_params = getattr(candidate, "count_params", None)
+        if callable(count_params):
+            try:
+                return int(count_params()) * 4
+            except Exception:
+                pass
+
+    return 0
+
+
+def _release_accelerator_memory():
+    """Return cached GPU memory to the system after models were dropped."""
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        try:
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+
+_registry_lock = threading.Lock()
+_registry: ModelRegistry | None = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry.
+
+    The limits can be set with the ``model_cache_max_models`` and
+    ``model_cache_max_memory_gb`` keys of the ``omega`` application
+    configuration.
+
+    Returns:
+        The shared ``ModelRegistry``.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            config = AppConfiguration("omega")
+            max_models = config.get("model_cache_max_models", 4)
+            max_memory_gb = config.get("model_cache_max_memory_gb", 8)
+            _registry = ModelRegistry(
+                max_models=max_models,
+                max_memory_bytes=(
+                    int(max_memory_gb * 1e9) if max_memory_gb is not None else None
+                ),
+            )
+        return _registry
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from napari_chatgpt.utils.system.model_registry import (
+    ModelRegistry,
+    estimate_model_size,
+)
+
+
+class _FakeModel:
+    def __init__(self, name: str, number_of_params: int = 0):
+        self.name = name
+        self.number_of_params = number_of_params
+
+    def count_params(self):
+        return self.number_of_params
+
+
+def test_model_registry_loads_once_and_reuses():
+    registry = ModelRegistry(max_models=2)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return _FakeModel("cyto")
+
+    first = registry.get("cellpose", "cyto", "cpu", loader)
+    second = registry.get("cellpose", "cyto", "cpu", loader)
+
+    assert first is second
+    assert len(loads) == 1
+
+    # A different device is a different model:
+    third = registry.get("cellpose", "cyto", "cuda", loader)
+    assert third is not first
+    assert len(loads) == 2
+
+
+def test_model_registry_lru_eviction_by_count_and_memory():
+    registry = ModelRegistry(max_models=2)
+    registry.get("b", "m1", "cpu", lambda: _FakeModel("m1"))
+    registry.get("b", "m2", "cpu", lambda: _FakeModel("m2"))
+    # Use m1 again, so that m2 is the least recently used:
+    registry.get("b", "m1", "cpu", lambda: _FakeModel("m1"))
+    registry.get("b", "m3", "cpu", lambda: _FakeModel("m3"))
+
+    assert len(registry) == 2
+    assert ("b", "m1", "cpu") in registry
+    assert ("b", "m2", "cpu") not in registry
+
+    # 100 parameters are estimated at 400 bytes:
+    registry = ModelRegistry(max_models=10, max_memory_bytes=1000)
+    registry.get("b", "m1", "cpu", lambda: _FakeModel("m1", 100))
+    registry.get("b", "m2", "cpu", lambda: _FakeModel("m2", 100))
+    registry.get("b", "m3", "cpu", lambda: _FakeModel("m3", 100))
+    assert len(registry) == 2
+    assert ("b", "m1", "cpu") not in registry
+
+    # The most recent model is kept even when it exceeds the limit alone:
+    registry.get("b", "big", "cpu", lambda: _FakeModel("big", 10000))
+    assert len(registry) == 1
+
+
+def test_model_registry_concurrent_loads_and_use():
+    registry = ModelRegistry()
+    loads = []
+
+    def slow_loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return _FakeModel("slow")
+
+    models = []
+    threads = [
+        threading.Thread(
+            target=lambda: models.append(registry.get("b", "m", "cpu", slow_loader))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(model is models[0] for model in models)
+
+    with registry.use("b", "m", "cpu", slow_loader) as model:
+        assert model is models[0]
+
+
+def test_estimate_model_size():
+    assert estimate_model_size(_FakeModel("m", 10)) == 40
+    assert estimate_model_size(object()) == 0
@@ -0,0 +1,106 @@
+import json
+import threading
+
+import pytest
+
+from napari_chatgpt.utils.system.tracing import (
+    _NULL_SPAN,
+    current_span_id,
+    disable_tracing,
+    enable_tracing,
+    is_tracing_enabled,
+    span,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_tracing():
+    disable_tracing()
+    yield
+    disable_tracing()
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_tracing_is_a_no_op():
+    assert not is_tracing_enabled()
+    assert span("anything", key="value") is _NULL_SPAN
+    with span("anything") as s:
+        s.set(result=1)
+        assert current_span_id() is None
+
+
+def test_nested_spans_jsonl(tmp_path):
+    path = enable_tracing(str(tmp_path / "trace.jsonl"))
+
+    with span("outer", kind="test") as outer:
+        with span("inner") as inner:
+            inner.set(result=42)
+        assert current_span_id() == outer.span_id
+    assert current_span_id() is None
+    disable_tracing()
+
+    records = {r["name"]: r for r in _read_jsonl(path)}
+    assert records["outer"]["parent"] is None
+    assert records["outer"]["attributes"] == {"kind": "test"}
+    assert records["inner"]["parent"] == records["outer"]["id"]
+    assert records["inner"]["attributes"] == {"result": 42}
+    assert records["inner"]["start_us"] >= records["outer"]["start_us"]
+    assert records["inner"]["duration_us"] <= records["outer"]["duration_us"]
+
+
+def test_span_records_errors(tmp_path):
+    path = enable_tracing(str(tmp_path / "trace.jsonl"))
+
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("boom")
+    disable_tracing()
+
+    (record,) = _read_jsonl(path)
+    assert record["attributes"]["error"] == "ValueError"
+
+
+def test_explicit_parent_across_threads(tmp_path):
+    path = enable_tracing(str(tmp_path / "trace.jsonl"))
+
+    with span("submit"):
+        parent_id = current_span_id()
+
+        def worker():
+            with span("work", parent_id=parent_id):
+                pass
+
+        thread = threading.Thread(target=worker, name="tracing_test_worker")
+        thread.start()
+        thread.join()
+    disable_tracing()
+
+    records = {r["name"]: r for r in _read_jsonl(path)}
+    assert records["work"]["parent"] == records["submit"]["id"]
+    assert records["work"]["thread"] == "tracing_test_worker"
+
+
+def test_chrome_trace_format(tmp_path):
+    path = enable_tracing(str(tmp_path / "trace.json"), trace_format="chrome")
+
+    with span("outer"):
+        with span("inner"):
+            pass
+    disable_tracing()
+
+    # Chrome accepts an unterminated array, close it to parse it here:
+    with open(path) as f:
+        events = json.loads(f.read().rstrip().rstrip(",") + "]")
+    assert [e["name"] for e in events] == ["inner", "outer"]
+    assert all(e["ph"] == "X" for e in events)
+    assert events[0]["args"]["parent"] == events[1]["args"]["id"]
+
+
+def test_unknown_trace_format(tmp_path):
+    with pytest.raises(ValueError):
+        enable_tracing(str(tmp_path / "trace.txt"), trace_format="xml")
+    assert not is_tracing_enabled()
@@ -0,0 +1,292 @@
+"""Lightweight tracing of Omega's hot paths.
+
+Code paths that may be slow (agent turns, tool runs, LLM calls, napari
+calls, code execution, ...) are wrapped in nested *spans*::
+
+    with span("llm.generate", model=model_name):
+        ...
+
+Spans measure monotonic wall time and record their parent span, also
+across threads: spans opened in the agent executor, the compute pool or
+on napari's Qt thread are attached to the span that submitted the work.
+Finished spans are appended to a local file, either as JSON lines or in
+Chrome's trace event format (open it in ``chrome://tracing`` or
+https://ui.perfetto.dev).
+
+Tracing is off by default. It is enabled with the ``tracing_enabled``
+key of the ``omega`` application configuration (``tracing_path`` and
+``tracing_format`` choose the output), or at runtime with
+:func:`enable_tracing`. When disabled, :func:`span` returns a shared
+no-op context manager, so instrumented code pays a single flag check.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from arbol import aprint
+
+# Span currently open in this context, parent of the spans opened next:
+_current_span: ContextVar["_Span | None"] = ContextVar(
+    "omega_current_span", default=None
+)
+
+_TRACE_FORMATS = ("jsonl", "chrome")
+
+
+class Tracer:
+    """Writes finished spans to a JSONL or Chrome trace file."""
+
+    def __init__(self, path: str, trace_format: str = "jsonl"):
+        """Create a tracer; the file is created when the first span ends.
+
+        Args:
+            path: Path of the trace file, overwritten if it exists.
+            trace_format: ``"jsonl"`` for one JSON object per span, or
+                ``"chrome"`` for Chrome's trace event format.
+        """
+        if trace_format not in _TRACE_FORMATS:
+            raise ValueError(
+                f"Unknown trace format: '{trace_format}', expected one of {_TRACE_FORMATS}."
+            )
+        self.path = path
+        self.trace_format = trace_format
+        self.origin_ns = time.perf_counter_ns()
+        self._span_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def new_span_id(self) -> int:
+        """Return a new unique span id."""
+        return next(self._span_ids)
+
+    def write(self, span: "_Span"):
+        """Append a finished span to the trace file."""
+        start_us = (span.start_ns - self.origin_ns) / 1000
+        duration_us = (span.end_ns - span.start_ns) / 1000
+
+        if self.trace_format == "chrome":
+            event = {
+                "name": span.name,
+                "ph": "X",
+                "ts": start_us,
+                "dur": duration_us,
+                "pid": os.getpid(),
+                "tid": span.thread_id,
+                "args": {
+                    "id": span.span_id,
+                    "parent": span.parent_id,
+                    **span.attributes,
+                },
+            }
+            line = json.dumps(event, default=str) + ",\n"
+        else:
+            record = {
+                "id": span.span_id,
+                "parent": span.parent_id,
+                "name": span.name,
+                "start_us": start_us,
+                "duration_us": duration_us,
+                "thread": span.thread_name,
+                "attributes": span.attributes,
+            }
+            line = json.dumps(record, default=str) + "\n"
+
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "w", buffering=1)
+                    # The closing bracket is optional in Chrome's format:
+                    if self.trace_format == "chrome":
+                        self._file.write("[\n")
+                self._file.write(line)
+            except OSError as e:
+                aprint(
+                    f"Error: {type(e).__name__} with message: '{str(e)}' while writing trace file: {self.path}"
+                )
+
+    def close(self):
+        """Close the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class _Span:
+    """A span being measured, used as a context manager."""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "attributes",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "thread_id",
+        "thread_name",
+        "_token",
+    )
+
+    def __init__(self, tracer: Tracer, name: str, parent_id: int | None, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = tracer.new_span_id()
+        self.parent_id = parent_id
+        self.start_ns = self.end_ns = 0
+        self._token = None
+
+    def set(self, **attributes):
+        """Add attributes to the span, e.g. results known at the end."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "_Span":
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self._token = _current_span.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end_ns = time.perf_counter_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer.write(self)
+        return False
+
+
+class _NullSpan:
+    """Shared no-op span returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+_tracer_lock = threading.Lock()
+_tracer: Tracer | None = None
+_configured = False
+
+
+def span(name: str, parent_id: int | None = None, **attributes: Any):
+    """Return a context manager measuring the enclosed code as a span.
+
+    Args:
+        name: Name of the span, e.g. ``"llm.generate"``.
+        parent_id: Id of the parent span, for work handed over to
+            another thread (see ``current_span_id``). Defaults to the
+            span currently open in this context.
+        **attributes: Attributes recorded with the span.
+
+    Returns:
+        The span, or a no-op context manager if tracing is disabled.
+    """
+    if not _configured:
+        _configure_from_app_configuration()
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+
+    if parent_id is None:
+        parent = _current_span.get()
+        parent_id = parent.span_id if parent is not None else None
+    return _Span(tracer, name, parent_id, attributes)
+
+
+def current_span_id() -> int | None:
+    """Return the id of the span open in this context, if any."""
+    if _tracer is None:
+        return None
+    current = _current_span.get()
+    return current.span_id if current is not None else None
+
+
+def is_tracing_enabled() -> bool:
+    """Return True if spans are being recorded."""
+    if not _configured:
+        _configure_from_app_configuration()
+    return _tracer is not None
+
+
+def enable_tracing(path: str | None = None, trace_format: str = "jsonl") -> str:
+    """Start recording spans to a file.
+
+    Args:
+        path: Path of the trace file. Defaults to a new file in
+            ``~/.omega/traces``.
+        trace_format: ``"jsonl"`` or ``"chrome"``.
+
+    Returns:
+        The path of the trace file.
+    """
+    global _tracer, _configured
+    if path is None:
+        path = _default_trace_path(trace_format)
+    tracer = Tracer(os.path.expanduser(path), trace_format)
+    with _tracer_lock:
+        previous, _tracer, _configured = _tracer, tracer, True
+    if previous is not None:
+        previous.close()
+    aprint(f"Tracing enabled, writing spans to: {tracer.path}")
+    return tracer.path
+
+
+def disable_tracing():
+    """Stop recording spans and close the trace file."""
+    global _tracer, _configured
+    with _tracer_lock:
+        previous, _tracer, _configured = _tracer, None, True
+    if previous is not None:
+        previous.close()
+
+
+def _default_trace_path(trace_format: str) -> str:
+    extension = "json" if trace_format == "chrome" else "jsonl"
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(
+        os.path.expanduser("~/.omega/traces"),
+        f"omega-trace-{timestamp}-{os.getpid()}.{extension}",
+    )
+
+
+def _configure_from_app_configuration():
+    """Enable tracing on first use if the configuration asks for it."""
+    global _configured
+    with _tracer_lock:
+        if _configured:
+            return
+        _configured = True
+
+    try:
+        from napari_chatgpt.utils.configuration.app_configuration import (
+            AppConfiguration,
+        )
+
+        config = AppConfiguration("omega")
+        if config.get("tracing_enabled", False):
+            enable_tracing(
+                path=config.get("tracing_path", None),
+                trace_format=config.get("tracing_format", "jsonl"),
+            )
+    except Exception as e:
+        aprint(
+            f"Error: {type(e).__name__} with message: '{str(e)}' while configuring tracing."
+        )
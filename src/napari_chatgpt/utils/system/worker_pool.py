@@ -0,0 +1,93 @@
+"""Process-wide worker pools for running heavy work off napari's Qt thread.
+
+Tools that run long computations (segmentation, denoising, ...) submit
+them to a shared pool instead of executing them inside the Qt event loop,
+which keeps the viewer responsive and lets several jobs run concurrently.
+Network-bound work (downloads, web searches, remote LLM requests) goes to
+a separate, larger I/O pool so that it never waits behind computations.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from arbol import aprint
+
+from napari_chatgpt.utils.configuration.app_configuration import AppConfiguration
+
+_pool_lock = threading.Lock()
+_compute_pool: ThreadPoolExecutor | None = None
+_io_pool: ThreadPoolExecutor | None = None
+
+
+def _default_compute_workers() -> int:
+    """Return the default number of compute workers for this machine.
+
+    Heavy numerical libraries (numpy, scikit-image, PyTorch, TensorFlow)
+    parallelise internally, so we keep the number of concurrent jobs
+    modest: half the available cores, at least 2 and at most 8.
+    """
+    cpu_count = os.cpu_count() or 2
+    return max(2, min(8, cpu_count // 2))
+
+
+def get_compute_pool() -> ThreadPoolExecutor:
+    """Return the lazily-created, process-wide compute pool.
+
+    The number of workers can be set with the ``compute_workers`` key
+    of the ``omega`` application configuration.
+
+    Returns:
+        A ``ThreadPoolExecutor`` shared by all tools.
+    """
+    global _compute_pool
+    with _pool_lock:
+        if _compute_pool is None:
+            config = AppConfiguration("omega")
+            max_workers = config.get("compute_workers", _default_compute_workers())
+            aprint(f"Creating compute pool with {max_workers} workers.")
+            _compute_pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="omega_compute"
+            )
+        return _compute_pool
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    """Return the lazily-created, process-wide I/O pool.
+
+    I/O-bound jobs spend their time waiting on the network, so this pool
+    has more workers than the compute pool (8 by default). The number of
+    workers can be set with the ``io_workers`` key of the ``omega``
+    application configuration.
+
+    Returns:
+        A ``ThreadPoolExecutor`` shared by all tools.
+    """
+    global _io_pool
+    with _pool_lock:
+        if _io_pool is None:
+            config = AppConfiguration("omega")
+            max_workers = config.get("io_workers", 8)
+            aprint(f"Creating I/O pool with {max_workers} workers.")
+            _io_pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="omega_io"
+            )
+        return _io_pool
+
+
+def shutdown_worker_pools(wait: bool = False):
+    """Shut down all worker pools created so far.
+
+    Pools are re-created on demand if requested again afterwards.
+
+    Args:
+        wait: If ``True``, block until running jobs have finished.
+    """
+    global _compute_pool, _io_pool
+    with _pool_lock:
+        if _compute_pool is not None:
+            _compute_pool.shutdown(wait=wait, cancel_futures=True)
+            _compute_pool = None
+        if _io_pool is not None:
+            _io_pool.shutdown(wait=wait, cancel_futures=True)
+            _io_pool = None